@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Batch ingestion of saved grant roundup documents
+Parses a directory or glob of RTF/HTML documents in a process pool and
+merges the grants into one deduplicated file with per-document provenance
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bs4 import BeautifulSoup
+from rtf_parser import RTFParser
+from grant_section_parser import FusedGrantParser
+
+SUPPORTED_EXTENSIONS = ('.rtf', '.html', '.htm')
+HEADING_TAGS = ['h3', 'h4']
+BLOCK_TAGS = ['p', 'div', 'li', 'br', 'tr', 'section', 'article', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+
+
+def expand_inputs(inputs):
+    """Resolve directories, globs and file paths into a sorted list of documents"""
+    documents = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in os.listdir(item)]
+        else:
+            candidates = glob.glob(item, recursive=True)
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS):
+                documents.add(os.path.abspath(path))
+    return sorted(documents)
+
+
+def html_to_lines(content):
+    """Flatten an HTML page to one line per block, writing each grant heading as Text("url")"""
+    soup = BeautifulSoup(content, 'html.parser')
+    for element in soup(['script', 'style', 'noscript']):
+        element.decompose()
+
+    # Grant headings (as in GrantsScholarshipsScraper) take the first link
+    # between them and the next heading, so they read like RTF title lines
+    for heading in soup.find_all(HEADING_TAGS):
+        for element in heading.find_all_next(['a'] + HEADING_TAGS):
+            if element.name in HEADING_TAGS:
+                break
+            if element.get('href', '').startswith(('http://', 'https://')):
+                heading.append(f'("{element["href"]}")')
+                break
+
+    for block in soup.find_all(BLOCK_TAGS):
+        block.insert_before('\n')
+        block.insert_after('\n')
+    return [re.sub(r'\s+', ' ', line).strip() for line in soup.get_text().split('\n')]
+
+
+def parse_document(path):
+    """Parse one document into grants (runs in a pool worker)"""
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    if path.lower().endswith('.rtf'):
+        lines = RTFParser(path).iter_clean_lines()
+    else:
+        lines = html_to_lines(raw.decode('utf-8', errors='ignore'))
+    grants = FusedGrantParser(layout='simple').parse(lines)
+
+    return {
+        'document': path,
+        'sha256': hashlib.sha256(raw).hexdigest(),
+        'bytes': len(raw),
+        'grants': grants,
+        'parse_time': round(time.perf_counter() - start, 6),
+    }
+
+
+def dedupe_key(grant):
+    """Grants are the same opportunity if they share a website, else a title"""
+    website = grant.get('website', '').strip('"').strip().lower().rstrip('/')
+    if website:
+        website = re.sub(r'^https?://(www\.)?', '', website)
+        return f"url:{website}"
+    title = re.sub(r'\W+', ' ', grant.get('title', '').lower()).strip()
+    return f"title:{title}"
+
+
+def merge_documents(results):
+    """Merge per-document grants in document order, folding duplicates together"""
+    merged = {}
+    duplicates = 0
+    for result in results:
+        for position, grant in enumerate(result['grants']):
+            provenance = {
+                'document': result['document'],
+                'sha256': result['sha256'],
+                'position': position,
+            }
+            key = dedupe_key(grant)
+            existing = merged.get(key)
+            if existing is None:
+                grant['provenance'] = [provenance]
+                merged[key] = grant
+                continue
+
+            # Keep the first copy, filling any fields it is missing from the duplicate
+            duplicates += 1
+            for field in ('description', 'amount', 'deadline', 'eligibility', 'website'):
+                if not existing.get(field) and grant.get(field):
+                    existing[field] = grant[field]
+            existing['tags'] = sorted(set(existing.get('tags', [])) | set(grant.get('tags', [])))
+            existing['provenance'].append(provenance)
+
+    return list(merged.values()), duplicates
+
+
+def ingest(inputs, workers=None):
+    """Parse every document in parallel and return merged grants plus a summary"""
+    documents = expand_inputs(inputs)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    results = {}
+    errors = []
+    if documents:
+        # Largest documents first, so the slowest file never starts last
+        by_size = sorted(documents, key=os.path.getsize, reverse=True)
+        with ProcessPoolExecutor(max_workers=min(workers, len(documents))) as pool:
+            futures = {pool.submit(parse_document, path): path for path in by_size}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    print(f"⚠️ Error parsing {path}: {e}")
+                    errors.append({'document': path, 'error': str(e)})
+
+    # Merge in input order so the output does not depend on completion order
+    ordered = [results[path] for path in documents if path in results]
+    grants, duplicates = merge_documents(ordered)
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        'documents': len(documents),
+        'documents_parsed': len(ordered),
+        'errors': errors,
+        'grants_extracted': sum(len(result['grants']) for result in ordered),
+        'grants_merged': len(grants),
+        'duplicates_merged': duplicates,
+        'workers': workers,
+        'wall_time': round(elapsed, 6),
+        'slowest_document_time': max((result['parse_time'] for result in ordered), default=0),
+        'per_document': [
+            {'document': result['document'], 'grants': len(result['grants']),
+             'bytes': result['bytes'], 'parse_time': result['parse_time']}
+            for result in ordered
+        ],
+    }
+    return grants, summary
+
+
+def parse_args():
+    """Parse command line options for batch ingestion"""
+    parser = argparse.ArgumentParser(description="Parse many saved grant roundup documents at once")
+    parser.add_argument('inputs', nargs='+', help="Directories, glob patterns or RTF/HTML files")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: all cores)")
+    parser.add_argument('--output', help="Merged grants file (default: weareteachers_grants_<timestamp>.json)")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run batch ingestion"""
+    args = parse_args()
+    print("🚀 Starting batch grant ingestion...")
+
+    grants, summary = ingest(args.inputs, workers=args.workers)
+    if not summary['documents']:
+        print("❌ No RTF or HTML documents found")
+        sys.exit(1)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = args.output or f"weareteachers_grants_{timestamp}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(grants, f, indent=2, ensure_ascii=False)
+
+    # Kept out of the weareteachers_grants_* pattern the converter picks up
+    summary_file = os.path.join(os.path.dirname(output_file), f"batch_ingest_summary_{timestamp}.json")
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"✅ Parsed {summary['documents_parsed']}/{summary['documents']} documents "
+          f"with {summary['workers']} workers in {summary['wall_time']:.2f}s "
+          f"(slowest document {summary['slowest_document_time']:.2f}s)")
+    print(f"📊 {summary['grants_extracted']} grants extracted, "
+          f"{summary['duplicates_merged']} duplicates merged, {summary['grants_merged']} kept")
+    print(f"📁 Saved to: {output_file}")
+    print(f"📁 Summary saved to: {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the parsing, processing and conversion hot paths
+Runs over the checked-in fixtures (optionally replicated to larger sizes),
+stores results as JSON and compares runs against a regression threshold
+"""
+
+import io
+import os
+import sys
+import copy
+import glob
+import json
+import time
+import random
+import hashlib
+import re
+import shutil
+import argparse
+import tempfile
+import platform
+import statistics
+import contextlib
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, 'scrapers'))
+
+from striprtf.striprtf import rtf_to_text
+
+import rtf_parser
+import rtf_tokenizer
+import simple_rtf_parser
+import grant_section_parser
+import opportunity_query
+import search_index
+import typeahead_index
+import semantic_matching
+import similar_opportunities
+import popularity_scores
+import deadline_index
+import facet_counts
+import convert_grants_to_scholarships as converter
+from llm_processor import LLMOpportunityProcessor
+from grants_scholarships_scraper import GrantsScholarshipsScraper
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Slowdowns smaller than this many seconds are timer and scheduler noise, whatever their percentage
+MIN_REGRESSION_SECONDS = 0.001
+# Run parameters that must match for two result files to be comparable
+RUN_PARAMETERS = ('scale', 'repeats', 'rtf_sha1')
+
+# The chained-substitution cleaner RTFParser used before the tokenizer, kept as a baseline
+LEGACY_RTF_SUBSTITUTIONS = [
+    (r'\\rtf1.*?\\fonttbl.*?}', re.DOTALL), (r'\\colortbl.*?}', re.DOTALL), (r'\\listtable.*?}', re.DOTALL),
+    (r'\\f[0-9]+', 0), (r'\\fs[0-9]+', 0), (r'\\cf[0-9]+', 0), (r'\\cb[0-9]+', 0), (r'\\b[0-9]*', 0),
+    (r'\\i[0-9]*', 0), (r'\\ul[0-9]*', 0), (r'\\ulc[0-9]+', 0), (r'\\strokec[0-9]+', 0),
+    (r'\\strokewidth[0-9]+', 0), (r'\\kerning[0-9]+', 0), (r'\\expnd[0-9]+', 0), (r'\\expndtw[0-9]+', 0),
+    (r'\\outl[0-9]+', 0), (r'\\ls[0-9]+', 0), (r'\\ilvl[0-9]+', 0), (r'\\listtext.*?}', re.DOTALL),
+]
+
+
+def latest_fixture(pattern):
+    """Return the newest checked-in fixture matching a glob relative to backend/"""
+    matches = sorted(glob.glob(os.path.join(BACKEND_DIR, pattern)))
+    if not matches:
+        raise FileNotFoundError(f"No fixture matches {pattern}")
+    return matches[-1]
+
+
+def legacy_regex_rtf_clean(content):
+    """Strip RTF with the original sequence of ~25 full-document re.sub passes"""
+    cleaned = content
+    for pattern, flags in LEGACY_RTF_SUBSTITUTIONS:
+        cleaned = re.sub(pattern, '', cleaned, flags=flags)
+    cleaned = re.sub(r'\\uc0\\u8226', '•', cleaned)
+    cleaned = re.sub(r'\\uc0\\u[0-9]+', '', cleaned)
+    cleaned = re.sub(r"\\\'[0-9a-f]{2}", '', cleaned)
+    cleaned = re.sub(r'\\[a-zA-Z]+[0-9]*', '', cleaned)
+    cleaned = re.sub(r'\s+', ' ', cleaned)
+    cleaned = re.sub(r'\n\s*\n', '\n\n', cleaned)
+    return '\n'.join(line.strip() for line in cleaned.split('\n') if line.strip())
+
+
+def legacy_simple_extract_grants(lines):
+    """simple_rtf_parser's extraction before the fused parser, kept as a baseline"""
+    grants = []
+    current_grant = {}
+
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+
+        # Check if this is a grant title (contains organization name and URL)
+        if '(' in line and ')' in line and ('http' in line or 'www.' in line):
+            # Save previous grant if exists
+            if current_grant and current_grant.get('title'):
+                grants.append(current_grant)
+
+            # Start new grant
+            current_grant = {
+                'title': line,
+                'organization': line.split('(')[0].strip(),
+                'website': '',
+                'description': '',
+                'amount': '',
+                'deadline': '',
+                'eligibility': '',
+                'tags': []
+            }
+
+            # Extract website from title
+            url_match = re.search(r'\(([^)]+)\)', line)
+            if url_match:
+                current_grant['website'] = url_match.group(1)
+
+        # Parse grant details
+        elif current_grant:
+            if line.startswith('What It Is:'):
+                current_grant['description'] = line.replace('What It Is:', '').strip()
+            elif line.startswith('Award:'):
+                current_grant['amount'] = line.replace('Award:', '').strip()
+            elif line.startswith('Deadline:'):
+                current_grant['deadline'] = line.replace('Deadline:', '').strip()
+            elif line.startswith('Application Requirements:'):
+                current_grant['eligibility'] = line.replace('Application Requirements:', '').strip()
+            elif line.startswith('What It Is:') or line.startswith('Award:') or line.startswith('Deadline:') or line.startswith('Application Requirements:'):
+                # Skip section headers
+                pass
+            else:
+                # Continue adding to current field
+                if current_grant.get('description') and not line.startswith(('Award:', 'Deadline:', 'Application Requirements:')):
+                    current_grant['description'] += ' ' + line
+                elif current_grant.get('eligibility') and not line.startswith(('Award:', 'Deadline:', 'What It Is:')):
+                    current_grant['eligibility'] += ' ' + line
+
+    # Add the last grant
+    if current_grant and current_grant.get('title'):
+        grants.append(current_grant)
+
+    return grants
+
+def legacy_simple_tag_grants(grants):
+    """simple_rtf_parser's tagging before the fused parser, kept as a baseline"""
+    for grant in grants:
+        tags = []
+        content = f"{grant.get('title', '')} {grant.get('description', '')} {grant.get('eligibility', '')}".lower()
+
+        # Subject area tags
+        if any(word in content for word in ['steam', 'science', 'technology', 'engineering', 'math', 'stem']):
+            tags.append('STEAM')
+        if any(word in content for word in ['professional', 'development', 'training', 'conference']):
+            tags.append('Professional Development')
+        if any(word in content for word in ['classroom', 'supplies', 'materials', 'equipment']):
+            tags.append('Classroom Supplies')
+        if any(word in content for word in ['arts', 'music', 'creative', 'artistic']):
+            tags.append('Arts Education')
+        if any(word in content for word in ['literacy', 'reading', 'books', 'language']):
+            tags.append('Literacy')
+        if any(word in content for word in ['special', 'needs', 'inclusive', 'disabilities']):
+            tags.append('Special Education')
+
+        # Grade level tags
+        if any(word in content for word in ['elementary', 'primary', 'k-5', 'k-6']):
+            tags.append('Elementary')
+        if any(word in content for word in ['middle school', '6-8', '7-8']):
+            tags.append('Middle School')
+        if any(word in content for word in ['high school', 'secondary', '9-12']):
+            tags.append('High School')
+        if any(word in content for word in ['pre-k', 'preschool', 'early childhood']):
+            tags.append('Early Childhood')
+
+        # Grant type tags
+        if any(word in content for word in ['mini-grant', 'mini grant', 'small grant']):
+            tags.append('Mini Grant')
+        if any(word in content for word in ['classroom grant', 'teacher grant']):
+            tags.append('Classroom Grant')
+        if any(word in content for word in ['technology', 'computer', 'digital']):
+            tags.append('Technology')
+
+        # Organization type tags
+        title_lower = grant.get('title', '').lower()
+        if any(word in title_lower for word in ['foundation', 'fund']):
+            tags.append('Foundation')
+        if any(word in title_lower for word in ['corporation', 'corp', 'company']):
+            tags.append('Corporate')
+        if any(word in title_lower for word in ['government', 'federal', 'state']):
+            tags.append('Government')
+
+        grant['tags'] = list(set(tags))
+
+
+def replicate_records(records, scale):
+    """Repeat a list of records until it is `scale` times its original size"""
+    return [copy.deepcopy(record) for _ in range(scale) for record in records]
+
+
+def replicate_rtf(content, scale):
+    """Repeat the body of an RTF document `scale` times, keeping a single header"""
+    if scale <= 1:
+        return content
+    body_start = content.index('\\pard')
+    body = content[body_start:content.rindex('}')]
+    return content[:content.rindex('}')] + body * (scale - 1) + '}'
+
+
+class BenchmarkSuite:
+    def __init__(self, scale=1, repeats=5, rtf_path=None):
+        self.scale = scale
+        self.repeats = repeats
+        self.benchmarks = {}
+        self.workdir = tempfile.mkdtemp(prefix='teacheasy_bench_')
+
+        source_rtf = rtf_path or os.path.join(BACKEND_DIR, 'WeAreTeachers.rtf')
+        with open(source_rtf, 'r', encoding='utf-8', errors='ignore') as f:
+            source_content = f.read()
+        self.rtf_sha1 = hashlib.sha1(source_content.encode('utf-8')).hexdigest()
+        self.rtf_content = replicate_rtf(source_content, scale)
+        self.rtf_path = os.path.join(self.workdir, 'WeAreTeachers.rtf')
+        with open(self.rtf_path, 'w', encoding='utf-8') as f:
+            f.write(self.rtf_content)
+
+        with open(latest_fixture('data/raw_scraped_opportunities_*.json'), 'r', encoding='utf-8') as f:
+            self.raw_opportunities = replicate_records(json.load(f), scale)
+        with open(latest_fixture('data/processed_opportunities_*.json'), 'r', encoding='utf-8') as f:
+            self.processed_opportunities = replicate_records(json.load(f), scale)
+        with open(latest_fixture('weareteachers_grants_*.json'), 'r', encoding='utf-8') as f:
+            self.grants = replicate_records(json.load(f), scale)
+
+        self.processor = LLMOpportunityProcessor()
+        self.scraper = GrantsScholarshipsScraper()
+        self.fixtures = {}
+        self.fixture_builders = {}
+        self.register_default_benchmarks()
+
+    def register(self, name, func, records, setup=None, unit='records', fixtures=(), check=None):
+        """Register a benchmark
+
+        `setup` builds fresh input for each repeat, `fixtures` names the shared fixtures to build
+        before timing starts, `records` may be a callable evaluated after they are built, and
+        `check` validates the first result so a broken path is not timed.
+        """
+        self.benchmarks[name] = {'func': func, 'records': records, 'setup': setup, 'unit': unit,
+                                 'fixtures': fixtures, 'check': check}
+
+    def register_fixture(self, name, build):
+        """Register a shared fixture, built the first time a selected benchmark needs it"""
+        self.fixture_builders[name] = build
+
+    def fixture(self, name):
+        """A shared fixture, built on first use"""
+        if name not in self.fixtures:
+            self.fixtures[name] = self.fixture_builders[name]()
+        return self.fixtures[name]
+
+    def register_default_benchmarks(self):
+        """Register the benchmarks covering the pipeline's hot paths"""
+        fixture = self.fixture
+        amount_texts = [grant.get('amount', '') for grant in self.grants]
+        deadline_texts = [grant.get('deadline', '') for grant in self.grants]
+
+        self.register('rtf_parser.process_rtf', self.bench_process_rtf, len(self.rtf_content),
+                      unit='chars', check=bool)
+        self.register('rtf_parser.iter_grants', lambda: list(rtf_parser.RTFParser(self.rtf_path).iter_grants()),
+                      len(self.rtf_content), unit='chars', check=bool)
+        self.register('simple_rtf_parser.parse_weareteachers_grants', self.bench_parse_weareteachers_grants,
+                      len(self.rtf_content), unit='chars')
+
+        self.register_fixture('rtf_lines', lambda: rtf_parser.rtf_to_lines(self.rtf_content))
+        self.register_fixture('legacy_parser', lambda: rtf_parser.RTFParser(self.rtf_path))
+        self.register('grant_parse.legacy_rtf_parser',
+                      lambda: [fixture('legacy_parser').parse_grant_info(section)
+                               for section in fixture('legacy_parser').extract_grant_sections(
+                                   '\n'.join(fixture('rtf_lines')))],
+                      lambda: len(fixture('rtf_lines')), unit='lines', fixtures=('rtf_lines', 'legacy_parser'),
+                      check=bool)
+        self.register('grant_parse.fused_rtf_parser',
+                      lambda: grant_section_parser.FusedGrantParser().parse(fixture('rtf_lines')),
+                      lambda: len(fixture('rtf_lines')), unit='lines', fixtures=('rtf_lines',), check=bool)
+        self.register('grant_parse.legacy_simple',
+                      lambda: legacy_simple_tag_grants(legacy_simple_extract_grants(fixture('rtf_lines'))),
+                      lambda: len(fixture('rtf_lines')), unit='lines', fixtures=('rtf_lines',))
+        self.register('grant_parse.fused_simple',
+                      lambda: grant_section_parser.FusedGrantParser(layout='simple').parse(fixture('rtf_lines')),
+                      lambda: len(fixture('rtf_lines')), unit='lines', fixtures=('rtf_lines',))
+        self.register('rtf_clean.striprtf', lambda: rtf_to_text(self.rtf_content),
+                      len(self.rtf_content), unit='chars')
+        self.register('rtf_clean.regex_fallback', lambda: legacy_regex_rtf_clean(self.rtf_content),
+                      len(self.rtf_content), unit='chars')
+        self.register('rtf_clean.tokenizer', lambda: rtf_tokenizer.rtf_to_plain_text(self.rtf_content),
+                      len(self.rtf_content), unit='chars')
+        self.register('llm_processor.process_opportunities',
+                      lambda opportunities: self.processor.process_opportunities(opportunities),
+                      len(self.raw_opportunities),
+                      setup=lambda: copy.deepcopy(self.raw_opportunities), check=bool)
+        self.register('convert.convert_grant_to_scholarship',
+                      lambda: [converter.convert_grant_to_scholarship(grant) for grant in self.grants],
+                      len(self.grants))
+        self.register('convert.parse_amount',
+                      lambda: [converter.parse_amount(text) for text in amount_texts],
+                      len(amount_texts))
+        self.register('convert.parse_deadline',
+                      lambda: [converter.parse_deadline(text) for text in deadline_texts],
+                      len(deadline_texts))
+        self.register('scraper.extract_amount',
+                      lambda: [self.scraper.extract_amount(text) for text in amount_texts],
+                      len(amount_texts))
+        self.register('scraper.parse_deadline',
+                      lambda: [self.scraper.parse_deadline(text) for text in deadline_texts],
+                      len(deadline_texts))
+        self.register('json.write_processed', self.bench_write_json, len(self.processed_opportunities))
+
+        def build_query_fixture():
+            query_index = opportunity_query.OpportunityQueryIndex(self.processed_opportunities)
+            documents = [document for document in query_index.documents if document is not None]
+            return query_index, documents, list(opportunity_query.random_queries(documents, 200))
+
+        self.register_fixture('queries', build_query_fixture)
+        self.register('opportunity_query.route_scan',
+                      lambda: [opportunity_query.route_query(fixture('queries')[1], params)
+                               for params in fixture('queries')[2]],
+                      lambda: len(fixture('queries')[2]), unit='queries', fixtures=('queries',))
+        self.register('opportunity_query.indexed',
+                      lambda: [fixture('queries')[0].query(params) for params in fixture('queries')[2]],
+                      lambda: len(fixture('queries')[2]), unit='queries', fixtures=('queries',))
+
+        def build_text_index():
+            text_index = search_index.SearchIndex(self.workdir)
+            text_index.update(self.processed_opportunities)
+            return text_index
+
+        self.register_fixture('text_index', build_text_index)
+        search_terms = ['classroom technology', 'grant', 'stem teachers', 'art supplies', 'reading books',
+                        'professional development', 'science', 'music education']
+        self.register('search_index.build',
+                      lambda: search_index.SearchIndex(self.workdir).update(self.processed_opportunities),
+                      len(self.processed_opportunities))
+        self.register('search_index.search',
+                      lambda: [fixture('text_index').search(terms) for terms in search_terms],
+                      len(search_terms), unit='queries', fixtures=('text_index',))
+
+        def build_suggestions():
+            typeahead_path = os.path.join(self.workdir, 'typeahead.idx')
+            typeahead_index.build_index(self.processed_opportunities, typeahead_path)
+            return typeahead_index.TypeaheadIndex(typeahead_path)
+
+        self.register_fixture('suggestions', build_suggestions)
+        prefixes = ['gr', 'te', 'tech', 'st', 'art', 'dell', 'class', 'science e', 'fund', 'zz']
+        self.register('typeahead.build',
+                      lambda: typeahead_index.build_arrays(self.processed_opportunities),
+                      len(self.processed_opportunities))
+        self.register('typeahead.suggest',
+                      lambda: [fixture('suggestions').suggest(prefix) for prefix in prefixes],
+                      len(prefixes), unit='queries', fixtures=('suggestions',))
+
+        self.register_fixture('matcher', lambda: semantic_matching.SemanticMatcher().fit(self.processed_opportunities))
+        profiles = [{'auth0Id': f"{subject}/{need}", 'subjects': [subject], 'fundingNeeds': [need]}
+                    for subject in ['Mathematics', 'Science', 'English', 'Art', 'Music', 'Computer Science']
+                    for need in ['Technology Equipment', 'Classroom Supplies', 'Field Trips',
+                                 'Professional Development']]
+        self.register('semantic_matching.fit',
+                      lambda: semantic_matching.SemanticMatcher().fit(self.processed_opportunities),
+                      len(self.processed_opportunities))
+        self.register('semantic_matching.match',
+                      lambda: list(fixture('matcher').match(profiles)),
+                      len(profiles), unit='users', fixtures=('matcher',))
+
+        def build_edited():
+            edited = copy.deepcopy(self.processed_opportunities)
+            for document in edited[::20]:
+                document['description'] = f"{document.get('description', '')} Updated for the new school year."
+            return edited
+
+        self.register_fixture('edited', build_edited)
+        self.register_fixture('similar', lambda: similar_opportunities.build(self.processed_opportunities)[0])
+        self.register('similar_opportunities.build',
+                      lambda: similar_opportunities.build(self.processed_opportunities),
+                      len(self.processed_opportunities))
+        self.register('similar_opportunities.refresh',
+                      lambda: similar_opportunities.build(fixture('edited'), fixture('similar')),
+                      len(self.processed_opportunities), fixtures=('edited', 'similar'))
+
+        self.register_fixture('activity_users',
+                              lambda: self.activity_users(1000 * self.scale, len(self.processed_opportunities)))
+        now = popularity_scores.to_seconds('2025-10-01T00:00:00Z')
+        self.register('popularity_scores.update',
+                      lambda: popularity_scores.update_state(popularity_scores.PopularityState(now),
+                                                             fixture('activity_users'), [], now),
+                      lambda: sum(len(user['viewHistory']) + len(user['bookmarkedScholarships'])
+                                  for user in fixture('activity_users')),
+                      unit='events', fixtures=('activity_users',))
+
+        def build_deadlines():
+            deadlines = deadline_index.DeadlineIndex(os.path.join(self.workdir, 'deadline_index.json'))
+            deadlines.upsert(self.processed_opportunities)
+            return deadlines
+
+        self.register_fixture('deadlines', build_deadlines)
+        swept_at = time.time() + 30 * deadline_index.DAY_SECONDS
+        windows = [7, 30, 90]
+        self.register('deadline_index.build',
+                      lambda: deadline_index.DeadlineIndex().upsert(self.processed_opportunities),
+                      len(self.processed_opportunities))
+        self.register('deadline_index.closing_within',
+                      lambda: [fixture('deadlines').closing_within(time.time(), days) for days in windows],
+                      len(windows), unit='queries', fixtures=('deadlines',))
+        self.register('deadline_index.sweep',
+                      lambda index: index.sweep(swept_at),
+                      lambda: fixture('deadlines').size,
+                      setup=lambda: deadline_index.DeadlineIndex.load(fixture('deadlines').save()),
+                      fixtures=('deadlines',))
+
+        def build_facets():
+            facets = facet_counts.FacetCounts(state_path=None)
+            facets.upsert(self.processed_opportunities)
+            return facets
+
+        self.register_fixture('facets', build_facets)
+        self.register('facet_counts.build',
+                      lambda: facet_counts.FacetCounts(state_path=None).upsert(self.processed_opportunities),
+                      len(self.processed_opportunities))
+        self.register('facet_counts.delta',
+                      lambda: fixture('facets').upsert(fixture('edited')[::20]),
+                      lambda: len(fixture('edited')[::20]), fixtures=('facets', 'edited'))
+        self.register('facet_counts.document', lambda: fixture('facets').document(),
+                      lambda: fixture('facets').size, fixtures=('facets',))
+
+    def activity_users(self, count, opportunities):
+        """Users with view history and bookmarks over `opportunities` ids, skewed towards popular ones"""
+        rng = random.Random(0)
+        start = datetime(2025, 7, 1)
+        users = []
+        for index in range(count):
+            viewed = {int(opportunities * rng.random() ** 3) for _ in range(rng.randint(0, 40))}
+            times = [start + timedelta(minutes=rng.randint(0, 60 * 24 * 90)) for _ in viewed]
+            users.append({
+                '_id': f"{index:024x}",
+                'viewHistory': [{'scholarshipId': f"{item:024x}", 'viewedAt': viewed_at.isoformat() + 'Z'}
+                                for item, viewed_at in zip(viewed, times)],
+                'bookmarkedScholarships': [f"{item:024x}" for item in viewed if rng.random() < 0.15],
+                'updatedAt': '2025-09-30T00:00:00Z',
+            })
+        return users
+
+    def bench_process_rtf(self):
+        """Run RTFParser end to end with its progress output suppressed"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            return rtf_parser.RTFParser(self.rtf_path).process_rtf()
+
+    def bench_parse_weareteachers_grants(self):
+        """Run the simple parser, which reads WeAreTeachers.rtf from the working directory"""
+        cwd = os.getcwd()
+        os.chdir(self.workdir)
+        try:
+            return simple_rtf_parser.parse_weareteachers_grants()
+        finally:
+            os.chdir(cwd)
+
+    def bench_write_json(self):
+        """Write the processed artifact the same way the manager does"""
+        with open(os.path.join(self.workdir, 'processed.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.processed_opportunities, f, indent=2, ensure_ascii=False)
+
+    def run(self, names=None):
+        """Run the selected benchmarks and return a JSON-serializable result"""
+        results = {}
+        for name, bench in self.benchmarks.items():
+            if names and name not in names:
+                continue
+
+            for fixture_name in bench['fixtures']:
+                self.fixture(fixture_name)
+            records = bench['records']() if callable(bench['records']) else bench['records']
+
+            timings = []
+            for repeat in range(self.repeats):
+                args = (bench['setup'](),) if bench['setup'] else ()
+                start = time.perf_counter()
+                result = bench['func'](*args)
+                timings.append(time.perf_counter() - start)
+                if repeat == 0 and bench['check'] and not bench['check'](result):
+                    raise AssertionError(f"{name} produced no records; refusing to time a broken path")
+
+            median = statistics.median(timings)
+            quartiles = statistics.quantiles(timings, n=4) if len(timings) > 1 else [median, median, median]
+            results[name] = {
+                'records': records,
+                'unit': bench['unit'],
+                'repeats': self.repeats,
+                'min': round(min(timings), 6),
+                'median': round(median, 6),
+                'mean': round(statistics.mean(timings), 6),
+                'iqr': round(quartiles[2] - quartiles[0], 6),
+                'records_per_second': round(records / median, 2) if median else None,
+            }
+            print(f"  {name}: median {median * 1000:.2f} ms over {records} {bench['unit']}")
+
+        return {
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': self.scale,
+            'repeats': self.repeats,
+            'rtf_sha1': self.rtf_sha1,
+            'rtf_chars': len(self.rtf_content),
+            'results': results,
+        }
+
+    def cleanup(self):
+        """Remove the temporary working directory"""
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def parameter_mismatches(baseline, current):
+    """Run parameters that differ between two result files, as (name, baseline, current)"""
+    return [(name, baseline.get(name), current.get(name)) for name in RUN_PARAMETERS
+            if baseline.get(name) != current.get(name)]
+
+
+def compare_results(baseline, current, threshold, min_delta=MIN_REGRESSION_SECONDS):
+    """Return the benchmarks whose fastest run slowed down by more than `threshold`
+
+    The fastest of the repeats is the least disturbed by other work on the
+    machine. A slowdown also has to exceed `min_delta` seconds and the spread
+    (interquartile range) of either run, so sub-millisecond paths do not fail
+    the gate on noise.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base or not base['min']:
+            continue
+        delta = result['min'] - base['min']
+        change = delta / base['min']
+        noise = max(min_delta, base.get('iqr', 0), result.get('iqr', 0))
+        if change > threshold and delta > noise:
+            regressions.append({
+                'benchmark': name,
+                'baseline_min': base['min'],
+                'current_min': result['min'],
+                'change': round(change, 4),
+            })
+    return regressions
+
+
+def parse_args():
+    """Parse command line options for the benchmark suite"""
+    parser = argparse.ArgumentParser(description="Benchmark the scraping pipeline hot paths")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Run the benchmarks and save results")
+    run_parser.add_argument('--scale', type=int, default=1, help="Replicate fixtures this many times")
+    run_parser.add_argument('--repeats', type=int, default=5, help="Timed repeats per benchmark")
+    run_parser.add_argument('--only', nargs='*', help="Only run the named benchmarks")
+    run_parser.add_argument('--rtf', help="RTF document to benchmark instead of WeAreTeachers.rtf")
+    run_parser.add_argument('--output', help="Results file (defaults to benchmarks/results/)")
+
+    compare_parser = subparsers.add_parser('compare', help="Fail if a benchmark regressed")
+    compare_parser.add_argument('baseline', help="Baseline results JSON")
+    compare_parser.add_argument('current', help="Current results JSON")
+    compare_parser.add_argument('--threshold', type=float, default=0.15,
+                                help="Allowed slowdown as a fraction of the baseline's fastest run")
+    compare_parser.add_argument('--min-delta-ms', type=float, default=MIN_REGRESSION_SECONDS * 1000,
+                                help="Ignore slowdowns smaller than this many milliseconds")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run or compare benchmarks"""
+    args = parse_args()
+
+    if args.command == 'compare':
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+
+        mismatches = parameter_mismatches(baseline, current)
+        if mismatches:
+            print("❌ Cannot compare runs made with different parameters:")
+            for name, base_value, current_value in mismatches:
+                print(f"   • {name}: {base_value} vs {current_value}")
+            sys.exit(2)
+
+        regressions = compare_results(baseline, current, args.threshold, args.min_delta_ms / 1000)
+        if regressions:
+            print(f"❌ {len(regressions)} benchmark(s) regressed past {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"   • {regression['benchmark']}: {regression['baseline_min'] * 1000:.2f} ms → "
+                      f"{regression['current_min'] * 1000:.2f} ms ({regression['change']:+.0%})")
+            sys.exit(1)
+        print(f"✅ No benchmark regressed past {args.threshold:.0%}")
+        return
+
+    print(f"🚀 Running benchmarks at scale {args.scale}...")
+    suite = BenchmarkSuite(scale=args.scale, repeats=args.repeats, rtf_path=args.rtf)
+    try:
+        results = suite.run(args.only)
+    finally:
+        suite.cleanup()
+
+    output_file = args.output
+    if not output_file:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = os.path.join(RESULTS_DIR, f"benchmark_{timestamp}_x{args.scale}.json")
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"📁 Results saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Synthetic corpus generator for scaling tests
+Produces WeAreTeachers-style HTML pages, GrantWatch-style listing pages,
+RTF roundups in the layout RTFParser expects, grant JSON and raw opportunity
+JSON at arbitrary scale, seeded from the checked-in fixtures
+"""
+
+import os
+import re
+import sys
+import copy
+import glob
+import html
+import json
+import random
+import argparse
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BACKEND_DIR, 'scrapers'))
+
+from vocabulary import get_vocabulary
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+REGIONS = ['Texas', 'California', 'New York', 'Midwest', 'Southeast', 'Rural', 'Urban', 'Pacific Northwest']
+
+# Synthetic view history and applications fall in the 90 days before this
+ACTIVITY_END = datetime(2025, 10, 1)
+
+TITLE_SUFFIXES = ['Grant', 'Award', 'Fund', 'Program', 'Classroom Grant', 'Teacher Grant', 'Scholarship']
+
+SECTION_HEADERS = [
+    'General Education Grants for Teachers and Schools',
+    'STEAM Education Grants for Teachers',
+    'Literacy Education Grants for Teachers',
+    'Arts Education Grants for Educators',
+]
+
+RTF_HEADER = (
+    '{\\rtf1\\ansi\\ansicpg1252\\cocoartf2822\n'
+    '\\cocoatextscaling0\\cocoaplatform0{\\fonttbl\\f0\\froman\\fcharset0 Times-Bold;'
+    '\\f1\\fswiss\\fcharset0 Helvetica-Bold;\\f2\\fswiss\\fcharset0 Helvetica;\n}\n'
+    '{\\colortbl;\\red255\\green255\\blue255;\\red29\\green31\\blue32;\\red255\\green255\\blue255;'
+    '\\red26\\green112\\blue124;\n}\n'
+    '{\\*\\listtable{\\list\\listtemplateid1\\listhybrid{\\listlevel\\levelnfc23\\levelnfcn23'
+    '{\\leveltext\\leveltemplateid1\\\'01\\uc0\\u8226 ;}{\\levelnumbers;}\\fi-360\\li720\\lin720 }'
+    '{\\listname ;}\\listid1}}\n'
+    '\\margl1440\\margr1440\\vieww11520\\viewh8400\\viewkind0\n'
+    '\\deftab720\n'
+)
+
+RTF_LABELS = ['What It Is:', 'Award:', 'Deadline:', 'Application Requirements:']
+
+# Profile values a user can pick (models/User.js)
+USER_GRADES = ['Pre-K', 'K', '1', '2', '3', '4', '5', '6', '7', '8', '9', '10', '11', '12', 'College', 'Adult Education']
+USER_SUBJECTS = [
+    'Mathematics', 'Science', 'English/Language Arts', 'Social Studies', 'History',
+    'Art', 'Music', 'Physical Education', 'Foreign Language', 'Computer Science',
+    'Special Education', 'ESL/ELL', 'Reading', 'Writing', 'Other'
+]
+USER_REGIONS = ['North', 'South', 'East', 'West', 'Central', 'Northeast', 'Northwest', 'Southeast', 'Southwest']
+USER_FUNDING_NEEDS = [
+    'Classroom Supplies', 'Technology Equipment', 'Books and Materials',
+    'Professional Development', 'Field Trips', 'Special Programs',
+    'Student Support', 'Classroom Furniture', 'STEM Materials', 'Other'
+]
+
+
+RESUME_ROLES = ['Classroom Teacher', 'Lead Teacher', 'Department Chair', 'Instructional Coach', 'Special Education Teacher',
+                'Bilingual Teacher', 'Curriculum Coordinator', 'Student Teacher']
+RESUME_DUTIES = [
+    'Designed and taught {subject} lessons for {grade} students aligned to state standards',
+    'Raised average {subject} assessment scores by {percent}% over {years} school years',
+    'Led an after-school {club} club serving {count} students, including {percent}% from low-income families',
+    'Wrote and won a ${amount:,} grant to fund {item} for the {subject} classroom',
+    'Mentored {count} new teachers through the district induction program',
+    'Integrated {item} into daily instruction to support differentiated learning',
+    'Partnered with families and community organizations to host a {subject} night for {count} attendees',
+    'Developed IEP-aligned accommodations for students with diverse learning needs',
+    'Coordinated a field trip program to local museums and science centers for {count} students',
+    'Served on the campus leadership team and the {subject} curriculum committee',
+    'Used formative assessment data to regroup students weekly and close reading gaps',
+    'Organized a schoolwide {club} fair with projects from {count} students',
+]
+RESUME_ITEMS = ['classroom tablets', 'a robotics kit', 'leveled library books', 'flexible seating', 'a 3D printer',
+                'science lab equipment', 'musical instruments', 'art supplies', 'document cameras', 'a maker space']
+RESUME_CLUBS = ['robotics', 'coding', 'science', 'chess', 'book', 'art', 'garden', 'debate', 'math', 'music']
+RESUME_DEGREES = ['B.S. in Elementary Education', 'B.A. in English', 'M.Ed. in Curriculum and Instruction',
+                  'B.S. in Biology', 'M.A. in Educational Leadership', 'B.M. in Music Education']
+RESUME_CERTIFICATIONS = ['Texas Educator Certification, EC-6 Core Subjects', 'ESL Supplemental Certification',
+                         'Gifted and Talented Certification', 'Special Education EC-12', 'Google Certified Educator',
+                         'STEM Teaching Certificate', 'Reading Specialist Certification']
+RESUME_AWARDS = ['Teacher of the Year', 'District Innovation Award', 'Excellence in STEM Teaching Award',
+                 'Community Partnership Award', 'Outstanding Mentor Award']
+
+
+def latest_fixture(pattern):
+    """Return the newest checked-in fixture matching a glob relative to backend/"""
+    matches = sorted(glob.glob(os.path.join(BACKEND_DIR, pattern)))
+    if not matches:
+        raise FileNotFoundError(f"No fixture matches {pattern}")
+    return matches[-1]
+
+
+def rtf_escape(text):
+    """Escape text for an RTF body, encoding non-ASCII as \\u escapes"""
+    out = []
+    for char in text:
+        if char in '\\{}':
+            out.append('\\' + char)
+        elif ord(char) > 127:
+            code = ord(char)
+            out.append(f"\\uc0\\u{code if code < 32768 else code - 65536} ")
+        else:
+            out.append(char)
+    return ''.join(out)
+
+
+class SyntheticCorpusGenerator:
+    def __init__(self, seed=42):
+        self.seed = seed
+
+        with open(latest_fixture('weareteachers_grants_*.json'), 'r', encoding='utf-8') as f:
+            self.fixture_grants = json.load(f)
+        with open(latest_fixture('data/raw_scraped_opportunities_*.json'), 'r', encoding='utf-8') as f:
+            self.fixture_opportunities = json.load(f)
+
+        self.organizations = sorted({g['organization'] for g in self.fixture_grants if g.get('organization')})
+        self.sentences = []
+        self.requirements = []
+        self.amounts = []
+        self.deadlines = []
+        for grant in self.fixture_grants:
+            self.sentences.extend(s.strip() for s in re.split(r'(?<=[.!?])\s+', grant.get('description', '')) if s.strip())
+            if grant.get('eligibility'):
+                self.requirements.append(grant['eligibility'])
+            if grant.get('amount'):
+                self.amounts.append(grant['amount'])
+            if grant.get('deadline'):
+                self.deadlines.append(grant['deadline'])
+
+    def rng_for(self, index):
+        """Per-record RNG so any slice of the corpus is reproducible on its own"""
+        return random.Random(self.seed * 1000003 + index)
+
+    def amount_text(self, rng):
+        """Pick a fixture amount or synthesize one in a common format"""
+        if rng.random() < 0.5 and self.amounts:
+            return rng.choice(self.amounts)
+        low = rng.choice([100, 250, 500, 1000, 2000, 5000])
+        high = low * rng.choice([2, 4, 10])
+        return rng.choice([f"${low:,}", f"Up to ${high:,}", f"${low:,} - ${high:,}", 'Varies'])
+
+    def deadline_text(self, rng):
+        """Pick a fixture deadline or synthesize one"""
+        if rng.random() < 0.5 and self.deadlines:
+            return rng.choice(self.deadlines)
+        year = datetime.now().year + rng.choice([0, 1])
+        return rng.choice([f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {year}", 'Ongoing', 'Rolling'])
+
+    def grant(self, index):
+        """Build one grant record in the simple_rtf_parser output layout"""
+        rng = self.rng_for(index)
+        base_org = self.organizations[index % len(self.organizations)]
+        if index < len(self.organizations):
+            organization = base_org
+        else:
+            organization = f"{base_org} {rng.choice(REGIONS)} Chapter {index // len(self.organizations)}"
+        slug = re.sub(r'[^a-z0-9]+', '', base_org.lower()) or 'foundation'
+        website = f"https://www.{slug}.org/grants/{index}"
+
+        return {
+            'title': f"{organization} {rng.choice(TITLE_SUFFIXES)}",
+            'organization': organization,
+            'website': website,
+            'description': ' '.join(rng.sample(self.sentences, k=min(len(self.sentences), rng.randint(1, 3)))),
+            'amount': self.amount_text(rng),
+            'deadline': self.deadline_text(rng),
+            'eligibility': rng.choice(self.requirements) if self.requirements else '',
+            'tags': [],
+        }
+
+    def iter_grants(self, count, start=0):
+        """Yield `count` grants lazily"""
+        for index in range(start, start + count):
+            yield self.grant(index)
+
+    def raw_opportunity(self, index):
+        """Build one raw scraped opportunity from a fixture template"""
+        rng = self.rng_for(index)
+        grant = self.grant(index)
+        opportunity = copy.deepcopy(self.fixture_opportunities[index % len(self.fixture_opportunities)])
+        low = rng.choice([0, 100, 500, 1000, 2500])
+        opportunity.update({
+            'title': grant['title'],
+            'organization': grant['organization'],
+            'description': grant['description'],
+            'website': grant['website'],
+            'amount': {'min': low, 'max': low * rng.choice([1, 2, 5, 10]), 'currency': 'USD'},
+        })
+        opportunity.setdefault('application', {})['applicationUrl'] = grant['website']
+        return opportunity
+
+    def object_id(self, kind, index):
+        """A stable 24-hex-digit ObjectId for a synthetic document"""
+        return {'$oid': f"{kind:02x}{self.seed % 256:02x}{index:020x}"}
+
+    def scholarship(self, index):
+        """Build one scholarships-collection document as mongoexport writes it"""
+        rng = self.rng_for(index)
+        grant = self.grant(index)
+        vocabulary = get_vocabulary()
+        values = vocabulary.values
+        low = rng.choice([0, 100, 250, 500, 1000, 2500, 5000])
+        created = datetime(2025, 1, 1) + timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        deadline = created + timedelta(days=rng.randint(7, 400))
+
+        first_grade = rng.randint(0, 12)
+        grades = values['gradeLevels'][first_grade:first_grade + rng.randint(1, 6)]
+        return {
+            '_id': self.object_id(1, index),
+            'title': grant['title'],
+            'organization': grant['organization'],
+            'description': grant['description'],
+            'website': grant['website'],
+            'amount': {'min': low, 'max': low * rng.choice([1, 2, 5, 10]), 'currency': 'USD'},
+            'eligibility': {
+                'gradeLevels': grades,
+                'subjects': rng.sample(values['subjects'], rng.randint(1, 3)),
+                'regions': rng.sample(values['regions'], rng.randint(1, 2)),
+                'districts': rng.sample(values['districts'], rng.randint(0, 2)),
+                'fundingTypes': rng.sample(values['fundingTypes'], rng.randint(1, 3)),
+                'requirements': grant['eligibility'],
+            },
+            'application': {'deadline': {'$date': deadline.isoformat() + 'Z'}, 'applicationUrl': grant['website']},
+            'tags': rng.sample(['STEAM', 'Literacy', 'Technology', 'Arts Education', 'Mini Grant',
+                                'Classroom Supplies', 'Professional Development'], rng.randint(0, 3)),
+            'type': rng.choice(['grant', 'grant', 'scholarship']),
+            'source': rng.choice(['WeAreTeachers', 'We Are Teachers', 'Texas GrantWatch', 'Teachers of Tomorrow']),
+            'popularity': rng.randint(0, 100),
+            'viewCount': rng.randint(0, 5000),
+            'isActive': rng.random() < 0.95,
+            'isVerified': rng.random() < 0.9,
+            'createdAt': {'$date': created.isoformat() + 'Z'},
+        }
+
+    def popular_scholarship(self, rng, scholarships):
+        """A scholarship index skewed towards the low (popular) end"""
+        return int(scholarships * rng.random() ** 3)
+
+    def user(self, index, scholarships=None):
+        """Build one users-collection document as mongoexport writes it
+
+        With a scholarship count, the user also gets bookmarks and view
+        history over that many synthetic scholarships.
+        """
+        rng = self.rng_for(index + 10_000_019)
+        first_grade = rng.randint(0, 13)
+        user = {
+            '_id': self.object_id(2, index),
+            'auth0Id': f"auth0|synthetic{index}",
+            'email': f"teacher{index}@example.org",
+            'schoolRegion': rng.choice(USER_REGIONS),
+            'schoolDistrict': rng.choice(get_vocabulary().values['districts'][:49]),
+            'gradeLevel': USER_GRADES[first_grade:first_grade + rng.randint(1, 3)],
+            'subjects': rng.sample(USER_SUBJECTS, rng.randint(1, 3)),
+            'fundingNeeds': rng.sample(USER_FUNDING_NEEDS, rng.randint(1, 3)),
+            'preferences': {'minAmount': rng.choice([0, 0, 100, 500]), 'maxAmount': rng.choice([1000, 5000, 10000, 50000])},
+        }
+        if scholarships:
+            activity = random.Random(self.seed * 1000003 + index + 20_000_003)
+            viewed = {self.popular_scholarship(activity, scholarships) for _ in range(activity.randint(0, 40))}
+            history = sorted((ACTIVITY_END - timedelta(minutes=activity.randint(0, 60 * 24 * 90)), s) for s in viewed)
+            user['viewHistory'] = [{'scholarshipId': self.object_id(1, s), 'viewedAt': {'$date': t.isoformat() + 'Z'}}
+                                   for t, s in history[-50:]]
+            user['bookmarkedScholarships'] = [self.object_id(1, s) for _, s in history
+                                              if activity.random() < 0.15]
+            updated = history[-1][0] if history else ACTIVITY_END - timedelta(days=90)
+            user['updatedAt'] = {'$date': updated.isoformat() + 'Z'}
+        return user
+
+    def application(self, index, users, scholarships):
+        """Build one applications-collection document as mongoexport writes it"""
+        rng = self.rng_for(index + 30_000_001)
+        scholarship = self.popular_scholarship(rng, scholarships)
+        applied = ACTIVITY_END - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        return {
+            '_id': self.object_id(3, index),
+            'userId': f"auth0|synthetic{rng.randrange(users)}",
+            'scholarshipId': self.object_id(1, scholarship),
+            'status': rng.choice(['Under Review', 'Approved', 'Rejected', 'Pending Documents', 'Submitted']),
+            'appliedAt': {'$date': applied.isoformat() + 'Z'},
+            'isActive': rng.random() < 0.95,
+        }
+
+    def resume(self, index):
+        """Plain-text resume for synthetic user `index`, as essay assist receives after parsing"""
+        rng = self.rng_for(index + 20_000_003)
+        user = self.user(index)
+        subjects = user['subjects']
+        grades = ', '.join(user['gradeLevel'])
+        year = datetime.now().year
+        lines = [f"Teacher {index}", user['email'], f"{user['schoolDistrict']} | {user['schoolRegion']}", '',
+                 'PROFESSIONAL SUMMARY',
+                 f"{rng.choice(['Dedicated', 'Creative', 'Data-driven', 'Passionate'])} educator with "
+                 f"{rng.randint(3, 25)} years of experience teaching {' and '.join(subjects)} to grade {grades} "
+                 f"students. {rng.choice(self.sentences) if self.sentences else ''}", '', 'EXPERIENCE']
+        for position in range(rng.randint(2, 6)):
+            end = year - position * rng.randint(2, 4)
+            lines.append(f"{rng.choice(RESUME_ROLES)}, {rng.choice(get_vocabulary().values['districts'][:49])} "
+                         f"({end - rng.randint(2, 5)}-{'Present' if position == 0 else end})")
+            for duty in rng.sample(RESUME_DUTIES, rng.randint(3, 7)):
+                lines.append('• ' + duty.format(subject=rng.choice(subjects), grade=f"grade {grades}",
+                                                percent=rng.randint(5, 40), years=rng.randint(1, 4),
+                                                club=rng.choice(RESUME_CLUBS), count=rng.randint(10, 300),
+                                                amount=rng.choice([500, 1000, 2500, 5000, 10000]),
+                                                item=rng.choice(RESUME_ITEMS)))
+            lines.append('')
+        lines += ['EDUCATION'] + rng.sample(RESUME_DEGREES, rng.randint(1, 2)) + ['']
+        lines += ['CERTIFICATIONS'] + rng.sample(RESUME_CERTIFICATIONS, rng.randint(1, 4)) + ['']
+        lines += ['AWARDS'] + [f"{award}, {year - rng.randint(0, 10)}"
+                               for award in rng.sample(RESUME_AWARDS, rng.randint(0, 3))] + ['']
+        lines += ['PROFESSIONAL DEVELOPMENT'] + [rng.choice(self.sentences) for _ in range(rng.randint(1, 4))
+                                                 if self.sentences]
+        return '\n'.join(lines)
+
+    def write_rtf(self, path, count):
+        """Write an RTF roundup with `count` grant sections"""
+        with open(path, 'w', encoding='ascii') as f:
+            f.write(RTF_HEADER)
+            for index, grant in enumerate(self.iter_grants(count)):
+                if index % 50 == 0:
+                    header = SECTION_HEADERS[(index // 50) % len(SECTION_HEADERS)]
+                    f.write('\\pard\\pardeftab720\\li560\\fi-560\\ri560\\sa480\\partightenfactor0\n')
+                    f.write(f"\\f0\\b\\fs62 \\cf2 \\cb3 \\strokec2 {rtf_escape(header)}\\\n")
+                f.write('\\pard\\pardeftab720\\li560\\fi-560\\ri560\\sa480\\partightenfactor0\n')
+                f.write(f'{{\\field{{\\*\\fldinst{{HYPERLINK "{grant["website"]}"}}}}{{\\fldrslt \n')
+                f.write(f"\\fs50 \\cf4 \\ul \\ulc4 \\strokec4 {rtf_escape(grant['organization'])}}}}}\n")
+                f.write('\\fs50 \\\n')
+                f.write('\\pard\\tx220\\tx720\\pardeftab720\\li720\\fi-720\\partightenfactor0\n')
+                values = [grant['description'], grant['amount'], grant['deadline'], grant['eligibility']]
+                for label, value in zip(RTF_LABELS, values):
+                    f.write('\\ls1\\ilvl0\n')
+                    f.write('\\f1\\b \\cb3 {\\listtext\t\\uc0\\u8226 \t}\\strokec2 ' + label + '\n')
+                    f.write(f"\\f2\\b0 \\'a0{rtf_escape(value)}\\cb1 \\\n")
+            f.write('}')
+        return path
+
+    def write_weareteachers_pages(self, out_dir, count, per_page=50):
+        """Write WeAreTeachers-style HTML pages with `per_page` grants each"""
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        for page_start in range(0, count, per_page):
+            parts = ['<html><head><title>Grants for Teachers</title></head><body><article>']
+            parts.append(f"<h2>{html.escape(SECTION_HEADERS[(page_start // per_page) % len(SECTION_HEADERS)])}</h2>")
+            for grant in self.iter_grants(min(per_page, count - page_start), start=page_start):
+                parts.append('<div class="grant">')
+                parts.append(f'<h3>{html.escape(grant["title"])}</h3>')
+                parts.append(f'<p><strong>What It Is:</strong> {html.escape(grant["description"])}</p>')
+                parts.append(f'<p><strong>Award:</strong> {html.escape(grant["amount"])}</p>')
+                parts.append(f'<p><strong>Deadline:</strong> {html.escape(grant["deadline"])}</p>')
+                parts.append(f'<p><strong>Application Requirements:</strong> {html.escape(grant["eligibility"])}</p>')
+                parts.append(f'<a href="{html.escape(grant["website"])}">Apply</a></div>')
+            parts.append('</article></body></html>')
+
+            path = os.path.join(out_dir, f"weareteachers_page_{page_start // per_page:05d}.html")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(parts))
+            paths.append(path)
+        return paths
+
+    def write_grantwatch_pages(self, out_dir, count, per_page=50):
+        """Write GrantWatch-style listing pages with `per_page` listings each"""
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        for page_start in range(0, count, per_page):
+            parts = ['<html><head><title>Teachers Grants</title></head><body><div id="results">']
+            for grant in self.iter_grants(min(per_page, count - page_start), start=page_start):
+                parts.append('<div class="grant-listing">')
+                parts.append(f'<h4><a href="{html.escape(grant["website"])}">{html.escape(grant["title"])}</a></h4>')
+                parts.append(f'<p>{html.escape(grant["description"])} Award: {html.escape(grant["amount"])}</p>')
+                parts.append(f'<span class="deadline">Deadline: {html.escape(grant["deadline"])}</span></div>')
+            parts.append('</div></body></html>')
+
+            path = os.path.join(out_dir, f"grantwatch_page_{page_start // per_page:05d}.html")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(parts))
+            paths.append(path)
+        return paths
+
+    def write_records(self, path, records, ndjson=False):
+        """Stream records to a JSON array or NDJSON file without holding them in memory"""
+        with open(path, 'w', encoding='utf-8') as f:
+            if ndjson:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                return path
+
+            f.write('[')
+            for index, record in enumerate(records):
+                f.write(',\n' if index else '\n')
+                f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n]')
+        return path
+
+    def write_grants(self, path, count, ndjson=False):
+        """Write grants in the weareteachers_grants_*.json layout"""
+        return self.write_records(path, self.iter_grants(count), ndjson)
+
+    def write_raw_opportunities(self, path, count, ndjson=False):
+        """Write raw opportunities in the raw_scraped_opportunities_*.json layout"""
+        return self.write_records(path, (self.raw_opportunity(i) for i in range(count)), ndjson)
+
+    def write_scholarships(self, path, count, ndjson=False):
+        """Write a scholarships collection export"""
+        return self.write_records(path, (self.scholarship(i) for i in range(count)), ndjson)
+
+    def write_users(self, path, count, ndjson=False):
+        """Write a users collection export, with activity over `count` scholarships"""
+        return self.write_records(path, (self.user(i, count) for i in range(count)), ndjson)
+
+    def write_applications(self, path, count, ndjson=False):
+        """Write an applications collection export over `count` users and scholarships"""
+        return self.write_records(path, (self.application(i, count, count) for i in range(count)), ndjson)
+
+    def write_resumes(self, out_dir, count):
+        """Write <auth0Id>.txt resumes matching the synthetic users"""
+        os.makedirs(out_dir, exist_ok=True)
+        for i in range(count):
+            with open(os.path.join(out_dir, f"{self.user(i)['auth0Id']}.txt"), 'w', encoding='utf-8') as f:
+                f.write(self.resume(i))
+        return out_dir
+
+
+def parse_args():
+    """Parse command line options for the generator"""
+    parser = argparse.ArgumentParser(description="Generate a synthetic grants corpus for scaling tests")
+    parser.add_argument('--records', type=int, default=10000, help="Number of records per artifact")
+    parser.add_argument('--out', default='synthetic_corpus', help="Output directory")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--per-page', type=int, default=50, help="Records per HTML page")
+    parser.add_argument('--ndjson', action='store_true', help="Write JSON artifacts as NDJSON")
+    parser.add_argument('--kinds', nargs='*', default=['rtf', 'weareteachers', 'grantwatch', 'grants', 'raw'],
+                        choices=['rtf', 'weareteachers', 'grantwatch', 'grants', 'raw', 'scholarships', 'users',
+                                 'resumes', 'applications'],
+                        help="Artifacts to generate")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to generate the corpus"""
+    args = parse_args()
+    generator = SyntheticCorpusGenerator(seed=args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    extension = 'ndjson' if args.ndjson else 'json'
+
+    print(f"🚀 Generating {args.records:,} records per artifact into {args.out}/")
+    if 'rtf' in args.kinds:
+        path = generator.write_rtf(os.path.join(args.out, 'WeAreTeachers.rtf'), args.records)
+        print(f"   • RTF: {path} ({os.path.getsize(path):,} bytes)")
+    if 'weareteachers' in args.kinds:
+        paths = generator.write_weareteachers_pages(os.path.join(args.out, 'weareteachers'), args.records, args.per_page)
+        print(f"   • WeAreTeachers pages: {len(paths)}")
+    if 'grantwatch' in args.kinds:
+        paths = generator.write_grantwatch_pages(os.path.join(args.out, 'grantwatch'), args.records, args.per_page)
+        print(f"   • GrantWatch pages: {len(paths)}")
+    if 'grants' in args.kinds:
+        path = generator.write_grants(os.path.join(args.out, f"weareteachers_grants_synthetic.{extension}"),
+                                      args.records, args.ndjson)
+        print(f"   • Grants: {path}")
+    if 'raw' in args.kinds:
+        path = generator.write_raw_opportunities(
+            os.path.join(args.out, f"raw_scraped_opportunities_synthetic.{extension}"), args.records, args.ndjson)
+        print(f"   • Raw opportunities: {path}")
+    if 'scholarships' in args.kinds:
+        path = generator.write_scholarships(os.path.join(args.out, f"scholarships_synthetic.{extension}"),
+                                            args.records, args.ndjson)
+        print(f"   • Scholarships export: {path}")
+    if 'users' in args.kinds:
+        path = generator.write_users(os.path.join(args.out, f"users_synthetic.{extension}"), args.records, args.ndjson)
+        print(f"   • Users export: {path}")
+    if 'applications' in args.kinds:
+        path = generator.write_applications(os.path.join(args.out, f"applications_synthetic.{extension}"),
+                                            args.records, args.ndjson)
+        print(f"   • Applications export: {path}")
+    if 'resumes' in args.kinds:
+        path = generator.write_resumes(os.path.join(args.out, 'resumes'), args.records)
+        print(f"   • Resumes: {path}/")
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,28 @@
 Convert WeAreTeachers grants to Scholarship model format
 """
 
+import os
+import sys
 import json
 import re
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import random
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrapers'))
+from vocabulary import get_vocabulary
+
+# Content keywords for each grade band, checked in order; the first band found wins
+GRADE_BAND_KEYWORDS = [
+    (['pre-k', 'preschool', 'early childhood', 'k-2', 'k-3'], 'Early Childhood'),
+    (['elementary', 'primary', 'k-5', 'k-6'], 'Elementary'),
+    (['middle school', '6-8', '7-8'], 'Middle School'),
+    (['high school', 'secondary', '9-12'], 'High School'),
+]
+
 def parse_amount(amount_str):
     """Parse amount string and return min/max values with special formatting"""
     if not amount_str or amount_str.lower() in ['varies', 'not specified', 'contact for details']:
@@ -86,22 +103,13 @@ def determine_grade_levels(tags, content):
     """Determine grade levels based on tags and content"""
     content_lower = content.lower()
     
-    grade_levels = []
+    # Bands expand through the canonical vocabulary, in the grade spellings user profiles use
+    for keywords, band in GRADE_BAND_KEYWORDS:
+        if any(word in content_lower for word in keywords):
+            return get_vocabulary().canonicalize('gradeLevels', [band])
     
-    if any(word in content_lower for word in ['pre-k', 'preschool', 'early childhood', 'k-2', 'k-3']):
-        grade_levels.extend(['Pre-K', 'Kindergarten', '1st Grade', '2nd Grade'])
-    elif any(word in content_lower for word in ['elementary', 'primary', 'k-5', 'k-6']):
-        grade_levels.extend(['Pre-K', 'Kindergarten', '1st Grade', '2nd Grade', '3rd Grade', '4th Grade', '5th Grade'])
-    elif any(word in content_lower for word in ['middle school', '6-8', '7-8']):
-        grade_levels.extend(['6th Grade', '7th Grade', '8th Grade'])
-    elif any(word in content_lower for word in ['high school', 'secondary', '9-12']):
-        grade_levels.extend(['9th Grade', '10th Grade', '11th Grade', '12th Grade'])
-    else:
-        # Default to all grade levels
-        grade_levels = ['Pre-K', 'Kindergarten', '1st Grade', '2nd Grade', '3rd Grade', '4th Grade', '5th Grade', 
-                       '6th Grade', '7th Grade', '8th Grade', '9th Grade', '10th Grade', '11th Grade', '12th Grade']
-    
-    return grade_levels
+    # Default to all grade levels
+    return get_vocabulary().canonicalize('gradeLevels', ['all grades'])
 
 def determine_subjects(tags, content):
     """Determine subjects based on tags and content"""
@@ -151,8 +159,9 @@ def determine_funding_types(tags, content):
     
     return funding_types
 
-def convert_grant_to_scholarship(grant):
-    """Convert a grant to Scholarship model format"""
+def convert_grant_to_scholarship(grant, timestamp=None):
+    """Convert a grant to Scholarship model format; `timestamp` is shared by a whole batch"""
+    timestamp = timestamp or datetime.now().isoformat()
     
     # Parse amount
     amount_info = parse_amount(grant.get('amount', ''))
@@ -217,29 +226,172 @@ def convert_grant_to_scholarship(grant):
         'isActive': True,
         'source': 'WeAreTeachers',
         'tags': grant.get('tags', []),
-        'createdAt': datetime.now().isoformat(),
-        'updatedAt': datetime.now().isoformat()
+        'createdAt': timestamp,
+        'updatedAt': timestamp
     }
     
     return scholarship
 
+def convert_batch(grants):
+    """Convert a chunk of grants with one timestamp; returns (scholarships, error count)"""
+    timestamp = datetime.now().isoformat()
+    scholarships = []
+    errors = 0
+    for grant in grants:
+        try:
+            scholarships.append(convert_grant_to_scholarship(grant, timestamp))
+        except Exception:
+            errors += 1
+    return scholarships, errors
+
+def iter_grant_records(path, chunk_size=1 << 16):
+    """Yield records from a JSON array or NDJSON file without loading it whole"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            # NDJSON: one record per line
+            pending = buffer
+            while True:
+                lines = pending.split('\n')
+                pending = lines.pop()
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                pending += chunk
+            if pending.strip():
+                yield json.loads(pending)
+            return
+        
+        # JSON array: decode one element at a time, refilling the buffer as needed
+        position = 1
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield record
+            position = end
+
+def iter_chunks(records, size):
+    """Group an iterable into lists of `size` records"""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def stream_convert(input_path, output_path, workers=None, chunk_size=500, report_every=2.0):
+    """Convert a JSON/NDJSON grants file to NDJSON in chunks on a process pool"""
+    workers = workers or os.cpu_count() or 1
+    converted = 0
+    errors = 0
+    start = time.perf_counter()
+    last_report = start
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(output_path, 'w', encoding='utf-8') as out:
+        # A bounded window of chunks in flight keeps memory flat and output in order
+        in_flight = deque()
+        chunks = iter_chunks(iter_grant_records(input_path), chunk_size)
+        while True:
+            while len(in_flight) < workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                in_flight.append(pool.submit(convert_batch, chunk))
+            if not in_flight:
+                break
+            
+            scholarships, chunk_errors = in_flight.popleft().result()
+            out.writelines(json.dumps(scholarship, ensure_ascii=False) + '\n' for scholarship in scholarships)
+            converted += len(scholarships)
+            errors += chunk_errors
+            
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                print(f"  ⏱️ {converted:,} converted ({converted / (now - start):,.0f} records/s)")
+                last_report = now
+    
+    elapsed = time.perf_counter() - start
+    return {
+        'converted': converted,
+        'errors': errors,
+        'wall_time': round(elapsed, 6),
+        'records_per_second': round(converted / elapsed, 2) if elapsed else None,
+    }
+
+def parse_args():
+    """Parse command line options for the converter"""
+    parser = argparse.ArgumentParser(description="Convert WeAreTeachers grants to Scholarship format")
+    parser.add_argument('--rtf', metavar='PATH',
+                        help="Parse grants from this RTF file (cached by content hash) instead of "
+                             "reading the latest weareteachers_grants_*.json")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="With --rtf, re-parse the file even if a cached result exists")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream a JSON/NDJSON grants file to NDJSON, converting chunks on a worker pool")
+    parser.add_argument('--input', help="Grants file for --stream (default: latest weareteachers_grants_*.json)")
+    parser.add_argument('--output', help="NDJSON output for --stream (default: converted_scholarships_<timestamp>.ndjson)")
+    parser.add_argument('--workers', type=int, help="Worker processes for --stream (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Grants per worker task in --stream mode")
+    return parser.parse_args()
+
 def main():
     """Main function to convert grants to scholarships"""
+    args = parse_args()
     print("🚀 Converting WeAreTeachers grants to Scholarship format...")
     
-    # Find the latest grants file
-    import glob
-    grant_files = glob.glob("weareteachers_grants_*.json")
-    if not grant_files:
-        print("❌ No grants file found. Run simple_rtf_parser.py first.")
+    if args.stream:
+        import glob
+        input_file = args.input or max(glob.glob("weareteachers_grants_*.json"), default=None)
+        if not input_file:
+            print("❌ No grants file found. Run simple_rtf_parser.py first.")
+            sys.exit(1)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = args.output or f"converted_scholarships_{timestamp}.ndjson"
+        print(f"📁 Streaming grants from: {input_file}")
+        
+        stats = stream_convert(input_file, output_file, workers=args.workers, chunk_size=args.chunk_size)
+        print(f"✅ Converted {stats['converted']:,} grants in {stats['wall_time']:.2f}s "
+              f"({stats['records_per_second']:,.0f} records/s, {stats['errors']} errors)")
+        print(f"📁 Saved to: {output_file}")
         return
     
-    latest_file = max(grant_files)
-    print(f"📁 Reading grants from: {latest_file}")
-    
-    # Load grants
-    with open(latest_file, 'r', encoding='utf-8') as f:
-        grants = json.load(f)
+    if args.rtf:
+        from simple_rtf_parser import parse_weareteachers_grants
+        from rtf_cache import RTFCache
+        print(f"📁 Reading grants from: {args.rtf}")
+        grants = parse_weareteachers_grants(rtf_path=args.rtf, cache=None if args.no_cache else RTFCache())
+    else:
+        # Find the latest grants file
+        import glob
+        grant_files = glob.glob("weareteachers_grants_*.json")
+        if not grant_files:
+            print("❌ No grants file found. Run simple_rtf_parser.py first.")
+            return
+        
+        latest_file = max(grant_files)
+        print(f"📁 Reading grants from: {latest_file}")
+        
+        # Load grants
+        with open(latest_file, 'r', encoding='utf-8') as f:
+            grants = json.load(f)
     
     print(f"📊 Found {len(grants)} grants to convert")
     
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Deadline calendar index
+Buckets active opportunities by the UTC day of their next deadline, so
+"closing in the next N days" walks only the buckets in that window, and a
+sweep visits only the buckets that have come due since the last one:
+recurring opportunities get their nextDeadline advanced by a year and
+one-off opportunities are deactivated. Swept documents are written as a
+processed file, which every processed-file reader applies as an upsert.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import bisect
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+from mongo_export import iter_export, load_export, document_id, parse_date, write_ndjson, bulk_update_script
+from opportunity_query import DELTA_PATTERNS, record_key
+
+DEFAULT_STATE_PATH = os.path.join('data', 'deadline_index', 'state.json')
+STATE_VERSION = 1
+
+DAY_SECONDS = 86400
+EPOCH = datetime(1970, 1, 1)
+DEADLINE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def to_seconds(value):
+    parsed = parse_date(value)
+    return None if parsed is None else (parsed - EPOCH).total_seconds()
+
+
+def from_seconds(seconds):
+    return EPOCH + timedelta(seconds=seconds)
+
+
+def next_deadline(document):
+    """(deadline in epoch seconds, recurring) for an active opportunity, or None
+
+    Recurring opportunities close on their nextDeadline when they have one;
+    everything else on application.deadline.
+    """
+    if document.get('isActive', True) is False:
+        return None
+    application = document.get('application') or {}
+    recurring = bool(application.get('isRecurring'))
+    deadline = to_seconds(application.get('nextDeadline')) if recurring else None
+    if deadline is None:
+        deadline = to_seconds(application.get('deadline'))
+    return None if deadline is None else (deadline, recurring)
+
+
+def advance_year(deadline, now):
+    """The same date in the first later year that falls after `now` (Feb 29 becomes Feb 28)"""
+    moment = from_seconds(deadline)
+    years = max(1, from_seconds(now).year - moment.year)
+    while True:
+        year = moment.year + years
+        day = min(moment.day, 28) if moment.month == 2 and moment.day == 29 else moment.day
+        advanced = moment.replace(year=year, day=day)
+        seconds = (advanced - EPOCH).total_seconds()
+        if seconds > now:
+            return seconds
+        years += 1
+
+
+class DeadlineIndex:
+    """Calendar queue of active opportunities keyed by record_key
+
+    `days` is the sorted list of non-empty day buckets; each bucket is the
+    set of keys whose deadline falls on that UTC day.
+    """
+
+    def __init__(self, state_path=DEFAULT_STATE_PATH):
+        self.state_path = state_path
+        self.entries = {}
+        self.sources = {}
+        self.buckets = {}
+        self.days = []
+        self.last_sweep = None
+        self.applied_files = {}
+
+    @property
+    def size(self):
+        return len(self.entries)
+
+    def _bucket_add(self, key, deadline):
+        day = int(deadline // DAY_SECONDS)
+        bucket = self.buckets.get(day)
+        if bucket is None:
+            bucket = self.buckets[day] = set()
+            bisect.insort(self.days, day)
+        bucket.add(key)
+
+    def _bucket_remove(self, key, deadline):
+        day = int(deadline // DAY_SECONDS)
+        bucket = self.buckets.get(day)
+        if bucket is None:
+            return
+        bucket.discard(key)
+        if not bucket:
+            del self.buckets[day]
+            del self.days[bisect.bisect_left(self.days, day)]
+
+    def set(self, key, deadline, recurring, source=None):
+        """Index or move one opportunity"""
+        current = self.entries.get(key)
+        if current is not None:
+            if current[0] == deadline:
+                self.entries[key] = (deadline, recurring)
+                if source:
+                    self.sources[key] = source
+                return
+            self._bucket_remove(key, current[0])
+        self.entries[key] = (deadline, recurring)
+        if source:
+            self.sources[key] = source
+        self._bucket_add(key, deadline)
+
+    def remove(self, key):
+        current = self.entries.pop(key, None)
+        self.sources.pop(key, None)
+        if current is not None:
+            self._bucket_remove(key, current[0])
+
+    def upsert(self, documents, source=None):
+        """Index documents, dropping those that are inactive or have no deadline; returns the number seen"""
+        count = 0
+        for document in documents:
+            key = record_key(document)
+            deadline = next_deadline(document)
+            if deadline is None:
+                self.remove(key)
+            else:
+                self.set(key, deadline[0], deadline[1], source)
+            count += 1
+        return count
+
+    def refresh(self, data_dir):
+        """Apply processed files written since the last refresh, oldest first"""
+        paths = [path for pattern in DELTA_PATTERNS for path in glob.glob(os.path.join(data_dir, pattern))]
+        applied = 0
+        for path in sorted(paths, key=os.path.getmtime):
+            mtime = os.path.getmtime(path)
+            if self.applied_files.get(path) == mtime:
+                continue
+            applied += self.upsert(iter_export(path), source=path)
+            self.applied_files[path] = mtime
+        return applied
+
+    def closing_within(self, now, days):
+        """(key, deadline) pairs closing in (now, now + days], soonest first"""
+        end = now + days * DAY_SECONDS
+        results = []
+        for position in range(bisect.bisect_left(self.days, int(now // DAY_SECONDS)), len(self.days)):
+            day = self.days[position]
+            if day * DAY_SECONDS > end:
+                break
+            results.extend(sorted((self.entries[key][0], key) for key in self.buckets[day]
+                                  if now < self.entries[key][0] <= end))
+        return [(key, deadline) for deadline, key in results]
+
+    def due(self, now):
+        """Keys whose deadline has passed, from the buckets up to today"""
+        keys = []
+        for day in self.days[:bisect.bisect_right(self.days, int(now // DAY_SECONDS))]:
+            keys.extend(key for key in self.buckets[day] if self.entries[key][0] <= now)
+        return keys
+
+    def sweep(self, now):
+        """Advance recurring deadlines and retire one-off opportunities that have passed
+
+        Only the due buckets are visited. Returns {key: change}, where a
+        change is {'isActive': False} or {'nextDeadline': epoch seconds}.
+        """
+        changes = {}
+        for key in self.due(now):
+            deadline, recurring = self.entries[key]
+            if recurring:
+                advanced = advance_year(deadline, now)
+                self.set(key, advanced, True)
+                changes[key] = {'nextDeadline': advanced}
+            else:
+                self.remove(key)
+                changes[key] = {'isActive': False}
+        self.last_sweep = now
+        return changes
+
+    def save(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            'version': STATE_VERSION,
+            'lastSweep': self.last_sweep,
+            'appliedFiles': self.applied_files,
+            'entries': {key: [deadline, recurring, self.sources.get(key)]
+                        for key, (deadline, recurring) in self.entries.items()},
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=directory or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self.state_path
+
+    @classmethod
+    def load(cls, state_path=DEFAULT_STATE_PATH):
+        """Load a saved index, or start an empty one"""
+        index = cls(state_path)
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return index
+        if state.get('version') != STATE_VERSION:
+            return index
+        index.last_sweep = state.get('lastSweep')
+        index.applied_files = state.get('appliedFiles', {})
+        for key, (deadline, recurring, source) in state.get('entries', {}).items():
+            index.set(key, deadline, recurring, source)
+        return index
+
+
+def apply_change(document, change):
+    """A copy of the document with a sweep change applied"""
+    document = dict(document)
+    if 'nextDeadline' in change:
+        document['application'] = dict(document.get('application') or {})
+        document['application']['nextDeadline'] = from_seconds(change['nextDeadline']).strftime(DEADLINE_FORMAT)
+    if 'isActive' in change:
+        document['isActive'] = change['isActive']
+    return document
+
+
+def swept_documents(sources, changes):
+    """Swept documents, read back only from the processed files that hold them"""
+    by_source = {}
+    for key in changes:
+        by_source.setdefault(sources.get(key), set()).add(key)
+    documents = {}
+    for source, keys in by_source.items():
+        if not source or not os.path.exists(source):
+            continue
+        for document in iter_export(source):
+            key = record_key(document)
+            if key in keys:
+                documents[key] = apply_change(document, changes[key])
+    return documents
+
+
+def sweep_data_dir(data_dir, state_path=None, now=None):
+    """Refresh the index from data_dir, sweep it and write the swept documents as a processed file
+
+    Returns (processed file or None, changes).
+    """
+    index = DeadlineIndex.load(state_path or os.path.join(data_dir, 'deadline_index', 'state.json'))
+    index.refresh(data_dir)
+    now = time.time() if now is None else now
+    # Retired opportunities leave the index, so note where every due one lives first
+    sources = {key: index.sources.get(key) for key in index.due(now)}
+    changes = index.sweep(now)
+
+    output_file = None
+    documents = swept_documents(sources, changes)
+    if documents:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = os.path.join(data_dir, f"processed_deadline_sweep_{timestamp}.ndjson")
+        write_ndjson(output_file, documents.values())
+        # Our own output is already reflected in the index
+        index.applied_files[output_file] = os.path.getmtime(output_file)
+        for key in documents:
+            if key in index.entries:
+                index.sources[key] = output_file
+    index.save()
+    return output_file, changes
+
+
+def export_updates(documents, changes):
+    """$set updates by _id for swept documents from a scholarships export"""
+    for document in documents:
+        key = record_key(document)
+        change = changes.get(key)
+        if change is None or not document_id(document):
+            continue
+        update = {'_id': document_id(document)}
+        if 'nextDeadline' in change:
+            update['application.nextDeadline'] = {'$date': from_seconds(change['nextDeadline']).isoformat() + 'Z'}
+        if 'isActive' in change:
+            update['isActive'] = change['isActive']
+        yield update
+
+
+def write_updates(documents, changes, output_file, timestamp):
+    """Write the $set updates for swept documents and the script that applies them
+
+    Returns (updates written, script file).
+    """
+    written = write_ndjson(output_file, export_updates(documents, changes))
+    script_file = os.path.join(os.path.dirname(output_file) or '.', f"import_deadline_updates_{timestamp}.js")
+    with open(script_file, 'w', encoding='utf-8') as f:
+        f.write(bulk_update_script('scholarships', os.path.abspath(output_file),
+                                   f"Deadline sweep updates (timestamp: {timestamp})", generation='scholarships'))
+    return written, script_file
+
+
+def check_sweep(index, now, days=30):
+    """Compare the index's answers with a scan over every entry"""
+    end = now + days * DAY_SECONDS
+    expected = sorted((deadline, key) for key, (deadline, _) in index.entries.items() if now < deadline <= end)
+    closing = index.closing_within(now, days)
+    ok = closing == [(key, deadline) for deadline, key in expected]
+    print(f"{'✅' if ok else '❌'} closing_within({days}): {len(closing):,} opportunities")
+
+    due = {key for key, (deadline, _) in index.entries.items() if deadline <= now}
+    changes = index.sweep(now)
+    swept_ok = set(changes) == due and not index.due(now)
+    print(f"{'✅' if swept_ok else '❌'} sweep: {len(changes):,} due opportunities swept, none left behind")
+    return ok and swept_ok
+
+
+def parse_args():
+    """Parse command line options for the deadline index"""
+    parser = argparse.ArgumentParser(description="Sweep passed deadlines and list opportunities closing soon")
+    parser.add_argument('--data-dir', default='data', help="Directory with the pipeline's processed files")
+    parser.add_argument('--scholarships',
+                        help="Sweep a scholarships export instead, writing $set updates by _id")
+    parser.add_argument('--state', help="Saved index (default: <data-dir>/deadline_index/state.json)")
+    parser.add_argument('--as-of', help="Sweep as of this ISO time instead of now")
+    parser.add_argument('--closing-within', type=int, metavar='DAYS',
+                        help="Print the opportunities closing in the next DAYS days instead of sweeping")
+    parser.add_argument('--check', action='store_true', help="Compare the index's answers with a full scan")
+    parser.add_argument('--output',
+                        help="NDJSON output for --scholarships (default: data/deadline_updates_<timestamp>.ndjson)")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run the deadline index"""
+    args = parse_args()
+    now = to_seconds(args.as_of) if args.as_of else time.time()
+    if now is None:
+        print(f"❌ Could not parse --as-of {args.as_of}")
+        sys.exit(1)
+    state_path = args.state or os.path.join(args.data_dir, 'deadline_index', 'state.json')
+    start = time.perf_counter()
+
+    if args.scholarships:
+        print("🚀 Sweeping scholarships export...")
+        documents = load_export(args.scholarships)
+        index = DeadlineIndex(state_path)
+        index.upsert(documents)
+        print(f"📊 {index.size:,} active opportunities with deadlines in {len(index.days):,} day buckets")
+        if args.check:
+            sys.exit(0 if check_sweep(index, now) else 1)
+        changes = index.sweep(now)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = args.output or os.path.join('data', f"deadline_updates_{timestamp}.ndjson")
+        written, script_file = write_updates(documents, changes, output_file, timestamp)
+        print(f"✅ {written:,} updates in {time.perf_counter() - start:.2f}s")
+        print(f"📁 Saved to: {output_file}")
+        print(f"📁 Import script: {script_file}")
+        return
+
+    if args.check or args.closing_within is not None:
+        index = DeadlineIndex.load(state_path)
+        applied = index.refresh(args.data_dir)
+        print(f"📊 {index.size:,} active opportunities indexed ({applied:,} documents from new files)")
+        if args.check:
+            sys.exit(0 if check_sweep(index, now) else 1)
+        index.save()
+        closing = index.closing_within(now, args.closing_within)
+        print(f"🎯 {len(closing):,} opportunities close in the next {args.closing_within} days")
+        for key, deadline in closing:
+            print(f"   {from_seconds(deadline).strftime(DEADLINE_FORMAT)}  {key}")
+        return
+
+    print("🚀 Sweeping passed deadlines...")
+    output_file, changes = sweep_data_dir(args.data_dir, state_path, now)
+    advanced = sum(1 for change in changes.values() if 'nextDeadline' in change)
+    print(f"✅ {advanced:,} deadlines advanced, {len(changes) - advanced:,} opportunities deactivated "
+          f"in {time.perf_counter() - start:.2f}s")
+    if output_file:
+        print(f"📁 Saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+"""
+Essay assist LLM gateway
+A local HTTP service between routes/essayAssist.js and any Ollama-compatible
+endpoint. It caches the model-status probe, keeps each user's conversation
+context so the long system prefix is only sent on a user's first turn, puts
+only the resume passages relevant to each question (see resume_index) into
+the prompt, streams tokens as they are generated, caps in-flight generations
+with a round-robin queue across users, and lets identical questions share
+one generation.
+"""
+
+import json
+import time
+import hashlib
+import tempfile
+import argparse
+import threading
+from collections import OrderedDict, deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+
+import requests
+
+from resume_index import DEFAULT_INDEX_DIR, ResumeStore, build_prompt
+
+DEFAULT_UPSTREAM = 'http://localhost:11434'
+DEFAULT_MODEL = 'mistral:7b'
+DEFAULT_PORT = 5055
+
+# How long a status probe is trusted; failures are retried sooner
+STATUS_TTL = 30.0
+STATUS_FAILURE_TTL = 3.0
+# Generations running upstream at once, and requests allowed to wait for one
+MAX_IN_FLIGHT = 2
+MAX_WAITING = 64
+QUEUE_TIMEOUT = 120.0
+# Seconds to connect, and the longest silence allowed between streamed tokens
+CONNECT_TIMEOUT = 5.0
+TOKEN_TIMEOUT = 60.0
+# Ollama keeps the model (and its prompt cache) loaded this long between requests
+KEEP_ALIVE = '30m'
+# Conversations are dropped after this idle time, and restarted from the prefix past this many tokens
+SESSION_TTL = 30 * 60
+MAX_SESSIONS = 1000
+MAX_CONTEXT_TOKENS = 3072
+# Finished answers to a user's first question are reused for this long
+ANSWER_TTL = 120.0
+
+UNAVAILABLE_MESSAGE = 'Ollama is not running. Please start Ollama server and ensure Mistral 7B model is available.'
+
+# Same wording as callOllama in routes/essayAssist.js
+SYSTEM_PROMPT = """You are an expert grant application assistant. You help educators write compelling grant applications by analyzing their background and providing personalized advice.
+
+{resume}Please provide helpful, specific, and actionable advice for grant applications. Focus on:
+1. Highlighting relevant experience and qualifications
+2. Suggesting specific examples and achievements to mention
+3. Providing tips for writing compelling narratives
+4. Addressing common grant application requirements
+
+Keep responses concise but comprehensive, and always relate advice back to the user's specific background when possible."""
+
+
+class GatewayError(Exception):
+    """A request the gateway could not serve; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=503):
+        super().__init__(message)
+        self.status = status
+
+
+def build_system_prompt(resume=''):
+    resume = resume.strip() if resume else ''
+    return SYSTEM_PROMPT.format(resume=f"Here is the user's resume/background information:\n{resume}\n\n"
+                                if resume else '')
+
+
+def digest(*parts):
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def normalize_question(message):
+    return ' '.join(message.lower().split())
+
+
+class ModelStatus:
+    """The upstream /api/tags probe, cached; concurrent callers share one probe"""
+
+    def __init__(self, upstream, http, ttl=STATUS_TTL, failure_ttl=STATUS_FAILURE_TTL):
+        self.upstream = upstream
+        self.http = http
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.lock = threading.Lock()
+        self.result = None
+        self.expires = 0.0
+
+    def get(self):
+        with self.lock:
+            if self.result is None or time.monotonic() >= self.expires:
+                try:
+                    response = self.http.get(f"{self.upstream}/api/tags", timeout=2)
+                    response.raise_for_status()
+                    self.result = {'available': True, 'models': response.json().get('models', [])}
+                    self.expires = time.monotonic() + self.ttl
+                except (requests.RequestException, ValueError) as e:
+                    self.result = {'available': False, 'error': str(e)}
+                    self.expires = time.monotonic() + self.failure_ttl
+            return dict(self.result)
+
+    def invalidate(self):
+        with self.lock:
+            self.expires = 0.0
+
+
+class FairQueue:
+    """At most `slots` holders at once; waiters are granted round-robin across users
+
+    A user with many questions queued gets one slot per turn of the
+    rotation, so a single busy client cannot starve the rest of the class.
+    """
+
+    def __init__(self, slots=MAX_IN_FLIGHT, max_waiting=MAX_WAITING):
+        self.slots = slots
+        self.max_waiting = max_waiting
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = {}
+        self.rotation = deque()
+        self.queued = 0
+
+    def acquire(self, user, timeout=QUEUE_TIMEOUT):
+        with self.lock:
+            if self.in_flight < self.slots and not self.rotation:
+                self.in_flight += 1
+                return
+            if self.queued >= self.max_waiting:
+                raise GatewayError('Essay assistant is busy, please try again shortly', status=429)
+            ticket = threading.Event()
+            self.waiting.setdefault(user, deque()).append(ticket)
+            if user not in self.rotation:
+                self.rotation.append(user)
+            self.queued += 1
+
+        if ticket.wait(timeout):
+            return
+        with self.lock:
+            # The slot may have been handed over just as the wait timed out
+            if ticket.is_set():
+                return
+            tickets = self.waiting[user]
+            tickets.remove(ticket)
+            if not tickets:
+                del self.waiting[user]
+                self.rotation.remove(user)
+            self.queued -= 1
+        raise GatewayError('Timed out waiting for the essay assistant', status=504)
+
+    def release(self):
+        with self.lock:
+            if self.rotation:
+                # Hand the slot straight to the next user in the rotation
+                user = self.rotation.popleft()
+                tickets = self.waiting[user]
+                ticket = tickets.popleft()
+                if tickets:
+                    self.rotation.append(user)
+                else:
+                    del self.waiting[user]
+                self.queued -= 1
+                ticket.set()
+            else:
+                self.in_flight -= 1
+
+
+class Flight:
+    """One upstream generation; any number of readers replay its tokens and then follow it live"""
+
+    def __init__(self):
+        self.tokens = []
+        self.done = False
+        self.error = None
+        self.context = None
+        self.finished_at = None
+        self.condition = threading.Condition()
+
+    def push(self, token):
+        with self.condition:
+            self.tokens.append(token)
+            self.condition.notify_all()
+
+    def finish(self, context=None, error=None):
+        with self.condition:
+            self.context = context
+            self.error = error
+            self.done = True
+            self.finished_at = time.monotonic()
+            self.condition.notify_all()
+
+    def __iter__(self):
+        position = 0
+        while True:
+            with self.condition:
+                while position == len(self.tokens) and not self.done:
+                    self.condition.wait()
+                tokens = self.tokens[position:]
+                done = self.done
+            position += len(tokens)
+            yield from tokens
+            if done and position == len(self.tokens):
+                if self.error is not None:
+                    raise self.error
+                return
+
+    def text(self):
+        return ''.join(self)
+
+
+class Session:
+    """A user's conversation: the prefix it started from and Ollama's context after the last turn"""
+
+    def __init__(self, prefix_key):
+        self.prefix_key = prefix_key
+        self.context = None
+        self.state = 'start'
+        self.updated = time.monotonic()
+
+
+class EssayGateway:
+    """Status cache, sessions, fair scheduling and coalescing in front of an Ollama-compatible server"""
+
+    def __init__(self, upstream=DEFAULT_UPSTREAM, model=DEFAULT_MODEL, slots=MAX_IN_FLIGHT,
+                 max_waiting=MAX_WAITING, queue_timeout=QUEUE_TIMEOUT, answer_ttl=ANSWER_TTL, resumes=None):
+        self.upstream = upstream.rstrip('/')
+        self.model = model
+        # With a ResumeStore, prompts carry retrieved passages; without one, the whole resume as before
+        self.resumes = resumes
+        self.http = requests.Session()
+        self.status = ModelStatus(self.upstream, self.http)
+        self.queue = FairQueue(slots, max_waiting)
+        self.queue_timeout = queue_timeout
+        self.answer_ttl = answer_ttl
+        self.lock = threading.Lock()
+        self.sessions = OrderedDict()
+        # (prefix, conversation state, question) -> Flight, while running and briefly after
+        self.flights = {}
+
+    def _session(self, user_id, prefix_key):
+        now = time.monotonic()
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if len(self.sessions) < MAX_SESSIONS and now - oldest.updated < SESSION_TTL:
+                break
+            self.sessions.popitem(last=False)
+        session = self.sessions.get(user_id)
+        if session is None or session.prefix_key != prefix_key:
+            # A new or replaced resume starts the conversation over
+            session = Session(prefix_key)
+        self.sessions[user_id] = session
+        self.sessions.move_to_end(user_id)
+        session.updated = now
+        return session
+
+    def has_resume(self, user_id, resume=''):
+        return bool(resume) or (self.resumes is not None and self.resumes.get(user_id) is not None)
+
+    def end_session(self, user_id, forget_resume=False):
+        with self.lock:
+            ended = self.sessions.pop(user_id, None) is not None
+        if forget_resume and self.resumes is not None:
+            ended = self.resumes.delete(user_id) or ended
+        return ended
+
+    def ask(self, user_id, message, resume='', grant=None):
+        """Start (or join) the generation answering a question; returns (flight, joined)"""
+        if not self.status.get()['available']:
+            raise GatewayError(UNAVAILABLE_MESSAGE)
+        if self.resumes is not None:
+            index = self.resumes.put(user_id, resume) if resume else self.resumes.get(user_id)
+            system = build_system_prompt('')
+            prompt = build_prompt(message, index.search(message) if index else (), grant)
+            # A new resume still starts the conversation over
+            prefix_key = digest(self.model, system, index.digest if index else '')
+        else:
+            system = build_system_prompt(resume)
+            prompt = build_prompt(message, grant=grant)
+            prefix_key = digest(self.model, system)
+        with self.lock:
+            session = self._session(user_id, prefix_key)
+            context, state = session.context, session.state
+            key = digest(prefix_key, state, normalize_question(prompt))
+            flight = self.flights.get(key)
+            if flight is not None and flight.done and (
+                    flight.error is not None or time.monotonic() - flight.finished_at > self.answer_ttl):
+                flight = None
+            joined = flight is not None
+            if not joined:
+                flight = self.flights[key] = Flight()
+                self._expire_flights()
+        if not joined:
+            payload = {'model': self.model, 'prompt': prompt, 'stream': True, 'keep_alive': KEEP_ALIVE}
+            if context:
+                # The prefix and earlier turns are already in the context tokens
+                payload['context'] = context
+            else:
+                payload['system'] = system
+            threading.Thread(target=self._generate, args=(user_id, payload, flight), daemon=True).start()
+        threading.Thread(target=self._remember, args=(user_id, prefix_key, flight), daemon=True).start()
+        return flight, joined
+
+    def _expire_flights(self):
+        now = time.monotonic()
+        for key in [key for key, flight in self.flights.items()
+                    if flight.done and now - flight.finished_at > self.answer_ttl]:
+            del self.flights[key]
+
+    def _remember(self, user_id, prefix_key, flight):
+        """Advance the user's session to the context the answer ended with"""
+        try:
+            flight.text()
+        except Exception:
+            return
+        with self.lock:
+            session = self.sessions.get(user_id)
+            if session is None or session.prefix_key != prefix_key:
+                return
+            if flight.context and len(flight.context) <= MAX_CONTEXT_TOKENS:
+                session.context = flight.context
+                session.state = digest(flight.context)
+            else:
+                session.context, session.state = None, 'start'
+
+    def _generate(self, user_id, payload, flight):
+        try:
+            self.queue.acquire(user_id, self.queue_timeout)
+        except GatewayError as e:
+            flight.finish(error=e)
+            return
+        try:
+            with self.http.post(f"{self.upstream}/api/generate", json=payload, stream=True,
+                                timeout=(CONNECT_TIMEOUT, TOKEN_TIMEOUT)) as response:
+                response.raise_for_status()
+                context = None
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('error'):
+                        raise GatewayError(f"AI service unavailable: {chunk['error']}")
+                    if chunk.get('response'):
+                        flight.push(chunk['response'])
+                    if chunk.get('done'):
+                        context = chunk.get('context')
+                        break
+            flight.finish(context=context)
+        except requests.ConnectionError:
+            self.status.invalidate()
+            flight.finish(error=GatewayError('Ollama server is not running. Please start Ollama with: ollama serve'))
+        except requests.Timeout:
+            flight.finish(error=GatewayError('Ollama request timed out. The model might be loading or busy.', 504))
+        except GatewayError as e:
+            flight.finish(error=e)
+        except (requests.RequestException, ValueError) as e:
+            flight.finish(error=GatewayError(f"AI service unavailable: {e}"))
+        finally:
+            self.queue.release()
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    """GET /status, POST /chat (streamed NDJSON or one JSON answer), DELETE /session/<userId> or /resume/<userId>"""
+    gateway = None
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if urlparse(self.path).path != '/status':
+            self.send_error(404)
+            return
+        self.send_json(200, self.gateway.status.get())
+
+    def do_DELETE(self):
+        path = urlparse(self.path).path
+        for prefix, forget_resume in (('/session/', False), ('/resume/', True)):
+            if path.startswith(prefix):
+                user_id = unquote(path[len(prefix):])
+                self.send_json(200, {'success': self.gateway.end_session(user_id, forget_resume)})
+                return
+        self.send_error(404)
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/chat':
+            self.send_error(404)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except ValueError:
+            self.send_json(400, {'error': 'Invalid JSON body'})
+            return
+        message = (body.get('message') or '').strip()
+        if not message:
+            self.send_json(400, {'error': 'Message is required'})
+            return
+        user_id = body.get('userId') or 'anonymous'
+        resume = body.get('resume') or ''
+        try:
+            flight, joined = self.gateway.ask(user_id, message, resume, body.get('grant'))
+            has_resume = self.gateway.has_resume(user_id, resume)
+            if not body.get('stream'):
+                self.send_json(200, {'response': flight.text(), 'hasResume': has_resume})
+                return
+        except GatewayError as e:
+            self.send_json(e.status, {'error': str(e)})
+            return
+
+        # Streamed answers end when the connection closes; each line is one JSON object
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        try:
+            for token in flight:
+                self.wfile.write(json.dumps({'token': token}, ensure_ascii=False).encode('utf-8') + b'\n')
+                self.wfile.flush()
+            done = {'done': True, 'response': ''.join(flight.tokens), 'hasResume': has_resume, 'shared': joined}
+            self.wfile.write(json.dumps(done, ensure_ascii=False).encode('utf-8') + b'\n')
+        except GatewayError as e:
+            self.wfile.write(json.dumps({'error': str(e)}).encode('utf-8') + b'\n')
+        except OSError:
+            # The client went away; the generation carries on for anyone sharing it
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(gateway, port=DEFAULT_PORT, host='127.0.0.1'):
+    GatewayHandler.gateway = gateway
+    server = ThreadingHTTPServer((host, port), GatewayHandler)
+    server.daemon_threads = True
+    return server
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """A stand-in for Ollama's /api/tags and /api/generate that records what it was asked"""
+    model = DEFAULT_MODEL
+    token_delay = 0.01
+    lock = threading.Lock()
+    tags_calls = 0
+    generate_calls = []
+    running = 0
+    max_running = 0
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.tags_calls = 0
+            cls.generate_calls = []
+            cls.running = 0
+            cls.max_running = 0
+
+    def do_GET(self):
+        if self.path != '/api/tags':
+            self.send_error(404)
+            return
+        with self.lock:
+            type(self).tags_calls += 1
+        data = json.dumps({'models': [{'name': self.model}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path != '/api/generate':
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        cls = type(self)
+        with cls.lock:
+            cls.generate_calls.append({'prompt': request['prompt'], 'system': request.get('system'),
+                                       'chars': len(request['prompt']) + len(request.get('system') or ''),
+                                       'context': len(request.get('context') or []), 'started': time.monotonic()})
+            cls.running += 1
+            cls.max_running = max(cls.max_running, cls.running)
+        try:
+            words = f"Advice for {request['prompt']} with examples".split()
+            limit = (request.get('options') or {}).get('num_predict')
+            if limit is not None and limit >= 0:
+                words = words[:limit]
+            # Fake token ids: the context is the old context (or the system prompt) plus prompt and answer
+            context = list(request.get('context') or [len(word) for word in (request.get('system') or '').split()])
+            context += [len(word) for word in request['prompt'].split() + words]
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+            for word in words:
+                time.sleep(self.token_delay)
+                self.wfile.write(json.dumps({'response': word + ' ', 'done': False}).encode('utf-8') + b'\n')
+                self.wfile.flush()
+            self.wfile.write(json.dumps({'response': '', 'done': True, 'context': context}).encode('utf-8') + b'\n')
+        except OSError:
+            # The client stopped reading, as a real server would see on a cancelled request
+            pass
+        finally:
+            with cls.lock:
+                cls.running -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_checks():
+    """Exercise the gateway against a stub Ollama server; returns True when every check passes"""
+    stub = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+    stub.daemon_threads = True
+    upstream = start_server(stub)
+    results = []
+
+    def check(name, passed, detail=''):
+        results.append(passed)
+        print(f"  {'✅' if passed else '❌'} {name}{f' ({detail})' if detail else ''}")
+
+    def chat(base, body):
+        response = requests.post(f"{base}/chat", json=body, stream=True, timeout=30)
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+        return response.status_code, lines
+
+    # Status probes are cached
+    StubOllamaHandler.reset()
+    gateway = EssayGateway(upstream)
+    threads = [threading.Thread(target=gateway.status.get) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    gateway.status.get()
+    check("status probe cached", StubOllamaHandler.tags_calls == 1, f"{StubOllamaHandler.tags_calls} upstream probes")
+
+    # Tokens stream through the HTTP endpoint, and later turns reuse the context instead of the prefix
+    StubOllamaHandler.reset()
+    gateway.resumes = ResumeStore(tempfile.mkdtemp(prefix='resume_index_'))
+    base = start_server(serve(gateway, port=0))
+    resume = '\n'.join(['SUMMARY', 'Fifth grade science teacher for 8 years.', 'EXPERIENCE'] +
+                       [f"Taught unit {i} on weather, plants and ecosystems to 28 students." for i in range(40)] +
+                       ['ACTIVITIES', 'Sponsor of the robotics club, which won the 2023 regional championship.'])
+    status, lines = chat(base, {'userId': 'teacher-a', 'message': 'How do I describe my impact?', 'resume': resume,
+                                'stream': True})
+    check("tokens streamed", status == 200 and len(lines) > 2 and lines[-1].get('done'),
+          f"{len(lines) - 1} token lines")
+    chat(base, {'userId': 'teacher-a', 'message': 'What budget should I ask for?', 'resume': resume, 'stream': True})
+    first, second = StubOllamaHandler.generate_calls[:2]
+    check("only relevant resume passages sent", first['chars'] < len(build_system_prompt(resume)),
+          f"{first['chars']:,} prompt characters instead of {len(build_system_prompt(resume)):,}+")
+    grant = {'title': 'Robotics Grant', 'eligibility': {'requirements': 'Describe a STEM club you lead.'}}
+    response = requests.post(f"{base}/chat", json={'userId': 'teacher-b', 'resume': resume, 'grant': grant,
+                                                   'message': 'How do I show my robotics club results?'},
+                             timeout=30).json()
+    prompt = StubOllamaHandler.generate_calls[-1]['prompt']
+    check("passages match the question and grant requirements are included",
+          'robotics club' in prompt and 'Describe a STEM club you lead.' in prompt and response['hasResume'])
+    check("prefix sent once per conversation",
+          first['system'] and first['context'] == 0 and second['system'] is None and second['context'] > 0,
+          f"second turn sent {second['context']} context tokens and no system prompt")
+    response = requests.post(f"{base}/chat", json={'userId': 'teacher-a', 'message': 'Thanks',
+                                                   'resume': 'New resume ' * 10}, timeout=30).json()
+    check("new resume restarts the conversation",
+          StubOllamaHandler.generate_calls[-1]['system'] is not None and 'response' in response)
+
+    # Identical questions share one generation
+    StubOllamaHandler.reset()
+    answers = []
+    threads = [threading.Thread(target=lambda i=i: answers.append(
+        gateway.ask(f"student-{i}", 'What is a grant narrative?')[0].text())) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    check("identical questions coalesced", len(StubOllamaHandler.generate_calls) == 1 and len(set(answers)) == 1,
+          f"{len(StubOllamaHandler.generate_calls)} generations for 8 askers")
+
+    # In-flight generations are capped and users take turns
+    StubOllamaHandler.reset()
+    StubOllamaHandler.token_delay = 0.02
+    fair = EssayGateway(upstream, slots=2)
+    flights = [fair.ask('busy', f"Question {i}?")[0] for i in range(6)]
+    time.sleep(0.05)
+    flights += [fair.ask(f"other-{i}", f"Other question {i}?")[0] for i in range(2)]
+    for flight in flights:
+        flight.text()
+    order = [call['prompt'] for call in sorted(StubOllamaHandler.generate_calls, key=lambda call: call['started'])]
+    others = [position for position, prompt in enumerate(order) if prompt.startswith('User Question: Other')]
+    check("in-flight generations capped", StubOllamaHandler.max_running <= 2, f"max {StubOllamaHandler.max_running}")
+    check("queue is fair across users", others and max(others) < 5, f"other users started at positions {others}")
+
+    small = EssayGateway(upstream, slots=1, max_waiting=1)
+    busy = [small.ask('busy', f"Long question {i}?")[0] for i in range(3)]
+    time.sleep(0.05)
+    rejected = sum(1 for flight in busy if flight.done and isinstance(flight.error, GatewayError)
+                   and flight.error.status == 429)
+    for flight in busy:
+        try:
+            flight.text()
+        except GatewayError:
+            pass
+    check("full queue rejects instead of piling up", rejected == 1, f"{rejected} rejected")
+    StubOllamaHandler.token_delay = 0.01
+
+    # A missing upstream fails fast with the route's message
+    stub.shutdown()
+    stub.server_close()
+    offline = EssayGateway(upstream)
+    try:
+        offline.ask('teacher-a', 'Hello?')
+        check("unavailable upstream reported", False)
+    except GatewayError as e:
+        check("unavailable upstream reported", str(e) == UNAVAILABLE_MESSAGE and e.status == 503)
+    return all(results)
+
+
+def parse_args():
+    """Parse command line options for the essay assist gateway"""
+    parser = argparse.ArgumentParser(description="Serve essay assist requests in front of an Ollama-compatible API")
+    parser.add_argument('--upstream', default=DEFAULT_UPSTREAM, help="Ollama-compatible base URL")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="Model to generate with")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument('--slots', type=int, default=MAX_IN_FLIGHT, help="Generations allowed upstream at once")
+    parser.add_argument('--max-waiting', type=int, default=MAX_WAITING, help="Requests allowed to wait for a slot")
+    parser.add_argument('--resume-dir', default=DEFAULT_INDEX_DIR, help="Where per-user resume indexes are kept")
+    parser.add_argument('--full-resume', action='store_true',
+                        help="Send whole resumes instead of the passages relevant to each question")
+    parser.add_argument('--check', action='store_true', help="Run the gateway checks against a stub server")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run the essay assist gateway"""
+    args = parse_args()
+    if args.check:
+        print("🧪 Checking the gateway against a stub Ollama server...")
+        passed = run_checks()
+        print("✅ All checks passed" if passed else "❌ Some checks failed")
+        raise SystemExit(0 if passed else 1)
+
+    gateway = EssayGateway(args.upstream, args.model, slots=args.slots, max_waiting=args.max_waiting,
+                           resumes=None if args.full_resume else ResumeStore(args.resume_dir))
+    server = serve(gateway, args.port)
+    print(f"🚀 Essay assist gateway on http://127.0.0.1:{args.port} -> {args.upstream} ({args.model}, "
+          f"{args.slots} slots)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
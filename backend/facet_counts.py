@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Materialized facet counts
+Counts active opportunities per grade level, subject, funding type,
+region, source and amount bucket in one pass over the processed files, and
+keeps the counts current from later files by taking each changed record's
+old values back out before adding its new ones. The result is one small
+document per collection in `facetcounts`, which the filter sidebar and the
+discounts category/company/source endpoints read instead of running
+distinct queries on every load. The import stamps each document with its
+collection's write generation; the routes fall back to live counts once a
+later write bumps it.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+from collections import Counter
+from datetime import datetime
+
+from mongo_export import iter_export, load_export, write_ndjson, bulk_upsert_script
+from opportunity_query import DELTA_PATTERNS, get_path, record_key
+
+DEFAULT_STATE_PATH = os.path.join('data', 'facet_counts', 'state.json')
+STATE_VERSION = 1
+
+# Facet name and the document path it counts
+SCHOLARSHIP_FACETS = {
+    'gradeLevels': 'eligibility.gradeLevels',
+    'subjects': 'eligibility.subjects',
+    'fundingTypes': 'eligibility.fundingTypes',
+    'regions': 'eligibility.regions',
+    'source': 'source',
+}
+DISCOUNT_FACETS = {
+    'categories': 'category',
+    'companies': 'company',
+    'sources': 'source',
+}
+
+# Buckets on amount.max, the bound the route's minAmount filter compares against
+AMOUNT_BUCKETS = [(0, '0-499'), (500, '500-999'), (1000, '1000-4999'), (5000, '5000-9999'), (10000, '10000+')]
+AMOUNT_UNSPECIFIED = 'unspecified'
+
+SEPARATOR = '\x1f'
+
+
+def amount_bucket(document):
+    values = [value for value in get_path(document, 'amount.max') if isinstance(value, (int, float))]
+    if not values or max(values) <= 0:
+        return AMOUNT_UNSPECIFIED
+    amount = max(values)
+    label = AMOUNT_BUCKETS[0][1]
+    for lower, name in AMOUNT_BUCKETS:
+        if amount >= lower:
+            label = name
+    return label
+
+
+def facet_values(document, facets=SCHOLARSHIP_FACETS, amounts=True):
+    """Distinct (facet, value) labels a document counts towards"""
+    labels = set()
+    for facet, path in facets.items():
+        for value in get_path(document, path):
+            if isinstance(value, str) and value.strip():
+                labels.add(f"{facet}{SEPARATOR}{value.strip()}")
+    if amounts:
+        labels.add(f"amount{SEPARATOR}{amount_bucket(document)}")
+    return labels
+
+
+class FacetCounts:
+    """Facet counts plus each record's contribution, so any record can be replaced or removed"""
+
+    def __init__(self, state_path=DEFAULT_STATE_PATH):
+        self.state_path = state_path
+        self.labels = []
+        self.label_ids = {}
+        self.records = {}
+        self.counts = Counter()
+        self.applied_files = {}
+
+    @property
+    def size(self):
+        return len(self.records)
+
+    def _label_id(self, label):
+        label_id = self.label_ids.get(label)
+        if label_id is None:
+            label_id = self.label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        return label_id
+
+    def set(self, key, labels):
+        """Replace a record's contribution; returns True when the counts changed"""
+        new = sorted(self._label_id(label) for label in labels)
+        old = self.records.get(key)
+        if old == new:
+            return False
+        if old:
+            self.counts.subtract(old)
+        self.counts.update(new)
+        self.records[key] = new
+        return True
+
+    def remove(self, key):
+        old = self.records.pop(key, None)
+        if old:
+            self.counts.subtract(old)
+        return old is not None
+
+    def upsert(self, documents):
+        """Apply documents as upserts; inactive ones stop counting. Returns the number that changed the counts"""
+        changed = 0
+        for document in documents:
+            key = record_key(document)
+            if document.get('isActive', True) is False:
+                changed += self.remove(key)
+            else:
+                changed += self.set(key, facet_values(document))
+        return changed
+
+    def refresh(self, data_dir):
+        """Apply processed files written since the last refresh, oldest first"""
+        paths = [path for pattern in DELTA_PATTERNS for path in glob.glob(os.path.join(data_dir, pattern))]
+        changed = 0
+        for path in sorted(paths, key=os.path.getmtime):
+            mtime = os.path.getmtime(path)
+            if self.applied_files.get(path) == mtime:
+                continue
+            changed += self.upsert(iter_export(path))
+            self.applied_files[path] = mtime
+        return changed
+
+    def document(self, name='scholarships'):
+        """The materialized view: per facet, values with their counts, most common first"""
+        facets = {}
+        for label_id, count in self.counts.items():
+            if count > 0:
+                facet, value = self.labels[label_id].split(SEPARATOR, 1)
+                facets.setdefault(facet, []).append({'value': value, 'count': count})
+        for values in facets.values():
+            values.sort(key=lambda item: (-item['count'], item['value']))
+        return {'name': name, 'total': self.size, 'facets': facets, 'generatedAt': datetime.now().astimezone().isoformat()}
+
+    def save(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {'version': STATE_VERSION, 'appliedFiles': self.applied_files, 'labels': self.labels,
+                 'records': self.records}
+        fd, tmp_path = tempfile.mkstemp(dir=directory or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self.state_path
+
+    @classmethod
+    def load(cls, state_path=DEFAULT_STATE_PATH):
+        """Load saved counts, or start empty"""
+        counts = cls(state_path)
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return counts
+        if state.get('version') != STATE_VERSION:
+            return counts
+        counts.applied_files = state.get('appliedFiles', {})
+        counts.labels = state.get('labels', [])
+        counts.label_ids = {label: label_id for label_id, label in enumerate(counts.labels)}
+        counts.records = state.get('records', {})
+        for label_ids in counts.records.values():
+            counts.counts.update(label_ids)
+        return counts
+
+
+def discount_document(discounts):
+    """Materialized category/company/source counts over every discount, as the distinct endpoints see them"""
+    counts = FacetCounts(state_path=None)
+    for index, discount in enumerate(discounts):
+        counts.set(str(index), facet_values(discount, DISCOUNT_FACETS, amounts=False))
+    return counts.document('discounts')
+
+
+def update_facets(data_dir, state_path=None, output_file=None, discounts=None):
+    """Bring the saved counts up to date with data_dir and write the view plus its import script
+
+    Returns (output file, import script, records whose contribution changed).
+    """
+    counts = FacetCounts.load(state_path or os.path.join(data_dir, 'facet_counts', 'state.json'))
+    changed = counts.refresh(data_dir)
+    counts.save()
+
+    documents = [counts.document()]
+    if discounts is not None:
+        documents.append(discount_document(discounts))
+    output_file = output_file or os.path.join(data_dir, 'facet_counts.ndjson')
+    write_ndjson(output_file, documents)
+    script_file = os.path.join(os.path.dirname(output_file) or '.', 'import_facet_counts.js')
+    with open(script_file, 'w', encoding='utf-8') as f:
+        f.write(bulk_upsert_script('facetcounts', os.path.abspath(output_file), 'name',
+                                   f"Materialized facet counts (generated: {documents[0]['generatedAt']})",
+                                   stamp_generation=True))
+    return output_file, script_file, changed
+
+
+def check_counts(data_dir, counts):
+    """Compare the maintained counts with a from-scratch pass over the merged processed files"""
+    merged = {}
+    paths = [path for pattern in DELTA_PATTERNS for path in glob.glob(os.path.join(data_dir, pattern))]
+    for path in sorted(paths, key=os.path.getmtime):
+        for document in iter_export(path):
+            merged[record_key(document)] = document
+    fresh = FacetCounts(state_path=None)
+    fresh.upsert(merged.values())
+    ok = counts.document()['facets'] == fresh.document()['facets'] and counts.size == fresh.size
+    print(f"{'✅' if ok else '❌'} Maintained counts {'match' if ok else 'differ from'} a full recount "
+          f"({fresh.size:,} active opportunities)")
+    return ok
+
+
+def parse_args():
+    """Parse command line options for the facet counts job"""
+    parser = argparse.ArgumentParser(description="Materialize facet counts for the filter sidebar and discounts")
+    parser.add_argument('--data-dir', default='data', help="Directory with the pipeline's processed files")
+    parser.add_argument('--state', help="Saved counts (default: <data-dir>/facet_counts/state.json)")
+    parser.add_argument('--discounts', help="Discounts export to count categories, companies and sources from")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore the saved counts and recount everything")
+    parser.add_argument('--check', action='store_true', help="Compare the maintained counts with a full recount")
+    parser.add_argument('--output', help="NDJSON output (default: <data-dir>/facet_counts.ndjson)")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run the facet counts job"""
+    args = parse_args()
+    print("🚀 Materializing facet counts...")
+    start = time.perf_counter()
+    state_path = args.state or os.path.join(args.data_dir, 'facet_counts', 'state.json')
+    if args.rebuild and os.path.exists(state_path):
+        os.remove(state_path)
+
+    if args.check:
+        counts = FacetCounts.load(state_path)
+        counts.refresh(args.data_dir)
+        sys.exit(0 if check_counts(args.data_dir, counts) else 1)
+
+    discounts = load_export(args.discounts) if args.discounts else None
+    output_file, script_file, changed = update_facets(args.data_dir, state_path, args.output, discounts)
+
+    print(f"✅ {changed:,} records changed the counts in {time.perf_counter() - start:.2f}s")
+    print(f"📁 Saved to: {output_file}")
+    print(f"📁 Import script: {script_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Fused grant section parser for cleaned RTF text
+Recognizes grant titles and field labels in a single pass over the lines,
+builds each structured grant as its section is read and tags it once
+"""
+
+import re
+
+# Bump when a change alters the grants the parser produces
+PARSER_VERSION = 1
+
+# Field labels, dispatched by group number
+LABEL_PATTERN = re.compile(r'(What It Is:)|(Award:)|(Deadline:)|(Application Requirements:)')
+LABEL_FIELDS = {1: 'description', 2: 'amount', 3: 'deadline', 4: 'eligibility'}
+
+# Keywords that make a line a grant title for RTFParser
+TITLE_KEYWORDS = (
+    'grant', 'program', 'award', 'fund', 'scholarship', 'foundation',
+    'donorschoose', 'voya', 'unsung heroes', 'mitsubishi', 'conocophillips',
+    'ezra jack keats', 'association of american educators', 'casey',
+    'walmart', 'computers for learning', 'pets in classroom'
+)
+SECTION_HEADER_SUFFIXES = ('Schools', 'Teachers', 'Educators')
+
+URL_PATTERN = re.compile(r'\(([^)]+)\)')
+
+# (tag, keywords) in the order the tags are assigned; content tags match the
+# section text, title tags match the grant title
+CONTENT_TAG_RULES = [
+    ('STEAM', ['steam', 'science', 'technology', 'engineering', 'math', 'stem']),
+    ('Professional Development', ['professional', 'development', 'training', 'conference']),
+    ('Classroom Supplies', ['classroom', 'supplies', 'materials', 'equipment']),
+    ('Arts Education', ['arts', 'music', 'creative', 'artistic']),
+    ('Literacy', ['literacy', 'reading', 'books', 'language']),
+    ('Special Education', ['special', 'needs', 'inclusive', 'disabilities']),
+    ('Elementary', ['elementary', 'primary', 'k-5', 'k-6']),
+    ('Middle School', ['middle school', '6-8', '7-8']),
+    ('High School', ['high school', 'secondary', '9-12']),
+    ('Early Childhood', ['pre-k', 'preschool', 'early childhood']),
+    ('Mini Grant', ['mini-grant', 'mini grant', 'small grant']),
+    ('Classroom Grant', ['classroom grant', 'teacher grant']),
+    ('Technology', ['technology', 'computer', 'digital']),
+]
+TITLE_TAG_RULES = [
+    ('Foundation', ['foundation', 'fund']),
+    ('Corporate', ['corporation', 'corp', 'company']),
+    ('Government', ['government', 'federal', 'state']),
+]
+
+
+class KeywordTagger:
+    """Assigns tags from keyword rules in one pass over the rules per text"""
+
+    def __init__(self, rules):
+        self.rules = [(tag, tuple(words)) for tag, words in rules]
+
+    def tags(self, text):
+        """Return the tags whose keywords occur in `text`, in rule order"""
+        # Plain loops over substring checks: C-level `in` beats a regex
+        # alternation here, and breaking on the first hit skips the rest
+        tags = []
+        for tag, words in self.rules:
+            for word in words:
+                if word in text:
+                    tags.append(tag)
+                    break
+        return tags
+
+
+CONTENT_TAGGER = KeywordTagger(CONTENT_TAG_RULES)
+TITLE_TAGGER = KeywordTagger(TITLE_TAG_RULES)
+
+
+def is_url_title(line):
+    """A line naming an organization with its URL in parentheses"""
+    return '(' in line and ')' in line and ('http' in line or 'www.' in line)
+
+
+def is_keyword_title(line):
+    """RTFParser's title rule: a URL title, or a grant keyword outside a section header"""
+    if is_url_title(line):
+        return True
+    if line.endswith(SECTION_HEADER_SUFFIXES):
+        return False
+    lowered = line.lower()
+    for keyword in TITLE_KEYWORDS:
+        if keyword in lowered:
+            return True
+    return False
+
+
+class FusedGrantParser:
+    """Single-pass grant parser producing RTFParser or simple_rtf_parser records
+
+    layout='rtf_parser' matches RTFParser.extract_grant_sections followed by
+    parse_grant_info; layout='simple' matches simple_rtf_parser's extraction
+    and tagging.
+    """
+
+    LAYOUTS = ('rtf_parser', 'simple')
+
+    def __init__(self, layout='rtf_parser'):
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown layout: {layout}")
+        self.layout = layout
+
+    def parse(self, lines):
+        """Parse all grants from an iterable of cleaned lines"""
+        return list(self.iter_grants(lines))
+
+    def iter_grants(self, lines):
+        """Yield each grant as soon as the next title closes its section"""
+        if self.layout == 'simple':
+            return self._iter_simple(lines)
+        return self._iter_rtf_parser(lines)
+
+    def _iter_rtf_parser(self, lines):
+        label_match = LABEL_PATTERN.match
+        grant = None
+        section = []
+        parts = {}
+        field = None
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            if is_keyword_title(line):
+                if grant is not None and section:
+                    yield self._finish_rtf_parser(grant, section, parts)
+                url_match = URL_PATTERN.search(line)
+                grant = {
+                    'title': line,
+                    'description': '',
+                    'amount': '',
+                    'deadline': '',
+                    'eligibility': '',
+                    'organization': line.split('(')[0].strip(),
+                    'website': url_match.group(1) if url_match else '',
+                    'tags': [],
+                    'raw_content': '',
+                }
+                section = []
+                parts = {}
+                field = None
+                continue
+
+            if grant is None:
+                # Text before the first title belongs to no grant
+                continue
+            section.append(line)
+
+            # Field text is collected as parts and joined once when the section closes
+            match = label_match(line)
+            if match:
+                field = LABEL_FIELDS[match.lastindex]
+                value = line.replace(match.group(match.lastindex), '').strip()
+                parts[field] = [value] if value else []
+            elif (field == 'description' or field == 'eligibility') and parts[field]:
+                parts[field].append(line)
+
+        if grant is not None and section:
+            yield self._finish_rtf_parser(grant, section, parts)
+
+    def _finish_rtf_parser(self, grant, section, parts):
+        content = '\n'.join(section)
+        for field, values in parts.items():
+            grant[field] = ' '.join(values)
+        tags = CONTENT_TAGGER.tags(content.lower()) + TITLE_TAGGER.tags(grant['title'].lower())
+        grant['tags'] = list(set(tags))
+        grant['raw_content'] = content
+        return grant
+
+    def _iter_simple(self, lines):
+        label_match = LABEL_PATTERN.match
+        grant = None
+        parts = {}
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            if is_url_title(line):
+                if grant is not None:
+                    yield self._finish_simple(grant, parts)
+                url_match = URL_PATTERN.search(line)
+                grant = {
+                    'title': line,
+                    'organization': line.split('(')[0].strip(),
+                    'website': url_match.group(1) if url_match else '',
+                    'description': '',
+                    'amount': '',
+                    'deadline': '',
+                    'eligibility': '',
+                    'tags': []
+                }
+                parts = {'description': [], 'eligibility': []}
+                continue
+
+            if grant is None:
+                continue
+
+            # Continuation lines extend the description, else the eligibility
+            match = label_match(line)
+            if match:
+                value = line.replace(match.group(match.lastindex), '').strip()
+                parts[LABEL_FIELDS[match.lastindex]] = [value] if value else []
+            elif parts['description']:
+                parts['description'].append(line)
+            elif parts['eligibility']:
+                parts['eligibility'].append(line)
+
+        if grant is not None:
+            yield self._finish_simple(grant, parts)
+
+    def _finish_simple(self, grant, parts):
+        for field, values in parts.items():
+            grant[field] = ' '.join(values)
+        content = f"{grant['title']} {grant['description']} {grant['eligibility']}".lower()
+        tags = CONTENT_TAGGER.tags(content) + TITLE_TAGGER.tags(grant['title'].lower())
+        grant['tags'] = list(set(tags))
+        return grant
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Link health checks for processed opportunities
+Checks every website and application.applicationUrl with concurrent HEAD
+requests (falling back to GET where HEAD is refused), at most a few at a
+time per host, following redirects hop by hop. Results are cached with a
+TTL so unchanged URLs are not rechecked every run, and each opportunity
+gets a linkHealth flag. URLs shared by many records, like a roundup page
+used as every grant's application link, are flagged as generic.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from mongo_export import load_export
+
+DEFAULT_CACHE_PATH = os.path.join('data', 'link_checker', 'cache.json')
+CACHE_VERSION = 1
+
+WORKERS = 16
+PER_HOST_LIMIT = 2
+TIMEOUT = 10
+MAX_REDIRECTS = 5
+USER_AGENT = 'Mozilla/5.0 (compatible; TeachEasyLinkChecker/1.0)'
+
+# How long a result stays fresh, by status
+TTL_SECONDS = {'ok': 7 * 86400, 'redirected': 7 * 86400, 'broken': 86400, 'unreachable': 6 * 3600}
+# Unreachable (timeouts, 5xx, 429) is transient; this many in a row counts as broken
+UNREACHABLE_LIMIT = 3
+# A URL used by more records than this is a listing page, not the opportunity's own link
+GENERIC_URL_RECORDS = 5
+# Servers that refuse HEAD outright get a GET instead
+HEAD_REFUSED = {403, 405, 501}
+# When nothing answers, up to this many previously answering sites are probed to tell
+# dead links from a dead network; without any, failures across this many hosts mean offline
+PROBE_SITES = 3
+OFFLINE_MIN_HOSTS = 3
+
+LINK_FIELDS = {'website': ('website',), 'applicationUrl': ('application', 'applicationUrl')}
+
+
+def link_urls(document):
+    """{field: url} for the opportunity's checkable links"""
+    urls = {}
+    for field, path in LINK_FIELDS.items():
+        value = document
+        for part in path:
+            value = value.get(part) if isinstance(value, dict) else None
+        if isinstance(value, str) and urlparse(value).scheme in ('http', 'https'):
+            urls[field] = value
+    return urls
+
+
+class HostLimiter:
+    """A semaphore per host, created on first use"""
+
+    def __init__(self, limit=PER_HOST_LIMIT):
+        self.limit = limit
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, url):
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            semaphore = self.semaphores.get(host)
+            if semaphore is None:
+                semaphore = self.semaphores[host] = threading.BoundedSemaphore(self.limit)
+        return semaphore
+
+
+class LinkChecker:
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, workers=WORKERS, per_host=PER_HOST_LIMIT,
+                 timeout=TIMEOUT, ttl=None):
+        self.cache_path = cache_path
+        self.workers = workers
+        self.timeout = timeout
+        self.ttl = dict(TTL_SECONDS, **(ttl or {}))
+        self.limiter = HostLimiter(per_host)
+        self.local = threading.local()
+        self.cache = self.load_cache(cache_path)
+        self.requests_made = 0
+        self.counter_lock = threading.Lock()
+        self.offline = False
+
+    @staticmethod
+    def load_cache(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError, TypeError):
+            return {}
+        return cache.get('results', {}) if cache.get('version') == CACHE_VERSION else {}
+
+    def save_cache(self):
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'results': self.cache}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self.cache_path
+
+    @property
+    def session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            session.headers['User-Agent'] = USER_AGENT
+        return session
+
+    def fresh(self, url, now):
+        result = self.cache.get(url)
+        return result is not None and now - result['checkedAt'] < self.ttl.get(result['status'], 0)
+
+    def request(self, method, url):
+        with self.limiter(url):
+            with self.counter_lock:
+                self.requests_made += 1
+            response = self.session.request(method, url, allow_redirects=False, timeout=self.timeout,
+                                            stream=method == 'GET')
+            response.close()
+            return response.status_code, response.headers.get('Location')
+
+    def check(self, url):
+        """Check one URL, following redirects hop by hop so every hop respects its host's limit"""
+        current = url
+        seen = {url}
+        redirects = 0
+        try:
+            while True:
+                status, location = self.request('HEAD', current)
+                if status in HEAD_REFUSED:
+                    status, location = self.request('GET', current)
+                if 300 <= status < 400 and location:
+                    redirects += 1
+                    current = urljoin(current, location)
+                    if current in seen or redirects > MAX_REDIRECTS:
+                        return self.result(url, 'broken', status, current, redirects, 'too many redirects')
+                    seen.add(current)
+                    continue
+                break
+        except requests.exceptions.ConnectionError as e:
+            # Name resolution failures will not fix themselves; refused or reset connections might
+            permanent = 'Name or service not known' in str(e) or 'nodename nor servname' in str(e)
+            return self.result(url, 'broken' if permanent else 'unreachable', None, current, redirects,
+                               type(e).__name__)
+        except requests.exceptions.RequestException as e:
+            return self.result(url, 'unreachable', None, current, redirects, type(e).__name__)
+
+        if status < 400:
+            return self.result(url, 'redirected' if current != url else 'ok', status, current, redirects)
+        if status == 429 or status >= 500:
+            return self.result(url, 'unreachable', status, current, redirects, f"HTTP {status}")
+        return self.result(url, 'broken', status, current, redirects, f"HTTP {status}")
+
+    def result(self, url, status, code, final_url, redirects, error=None):
+        previous = self.cache.get(url) or {}
+        failures = previous.get('failures', 0) + 1 if status == 'unreachable' else 0
+        if status == 'unreachable' and failures >= UNREACHABLE_LIMIT:
+            status = 'broken'
+        return {'status': status, 'httpStatus': code, 'finalUrl': final_url, 'redirects': redirects,
+                'error': error, 'failures': failures, 'checkedAt': time.time()}
+
+    def check_all(self, urls, now=None):
+        """Check every URL without a fresh cached result; returns the number checked"""
+        now = time.time() if now is None else now
+        stale = sorted({url for url in urls if not self.fresh(url, now)})
+        # Interleave hosts so one slow host does not hold every worker
+        by_host = {}
+        for url in stale:
+            by_host.setdefault(urlparse(url).netloc.lower(), []).append(url)
+        order = [url for group in zip_longest_lists(by_host.values()) for url in group]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(self.check, order))
+        # No host answering at all may mean we are offline rather than that every link broke
+        if results and all(result['httpStatus'] is None for result in results) and not self.online(by_host):
+            self.offline = True
+            return 0
+        self.cache.update(zip(order, results))
+        return len(order)
+
+    def online(self, failed_hosts):
+        """Whether the network is up, judged by sites that answered on earlier runs"""
+        probes = {}
+        for url, result in self.cache.items():
+            host = urlparse(url).netloc.lower()
+            if result.get('httpStatus') is not None and host not in failed_hosts:
+                probes.setdefault(host, url)
+            if len(probes) == PROBE_SITES:
+                break
+        if not probes:
+            # Nothing to compare with: a few dead hosts are dead links, many at once is the network
+            return len(failed_hosts) < OFFLINE_MIN_HOSTS
+        for url in probes.values():
+            try:
+                self.request('HEAD', url)
+                return True
+            except requests.exceptions.RequestException:
+                continue
+        return False
+
+    def annotate(self, opportunities, now=None):
+        """Check the opportunities' links and set each one's linkHealth; returns (checked, flagged)"""
+        links = [link_urls(opportunity) for opportunity in opportunities]
+        usage = Counter(url for urls in links for url in set(urls.values()))
+        checked = self.check_all(usage, now)
+
+        flagged = 0
+        for opportunity, urls in zip(opportunities, links):
+            health = {'checkedAt': datetime.now().isoformat(), 'broken': False}
+            for field, url in urls.items():
+                result = self.cache.get(url, {})
+                health[field] = {
+                    'status': result.get('status', 'unchecked'),
+                    'httpStatus': result.get('httpStatus'),
+                    'generic': usage[url] > GENERIC_URL_RECORDS,
+                }
+                if result.get('finalUrl') and result['finalUrl'] != url:
+                    health[field]['finalUrl'] = result['finalUrl']
+                if result.get('status') == 'broken':
+                    health['broken'] = True
+            opportunity['linkHealth'] = health
+            flagged += health['broken']
+        return checked, flagged
+
+
+def zip_longest_lists(groups):
+    """Round-robin rows across lists: the first of each, then the second of each, ..."""
+    groups = [list(group) for group in groups]
+    for position in range(max((len(group) for group in groups), default=0)):
+        yield [group[position] for group in groups if position < len(group)]
+
+
+class StubSiteHandler(BaseHTTPRequestHandler):
+    """A local stand-in for opportunity sites, with a path for every case the checker handles"""
+    delay = 0.05
+    lock = threading.Lock()
+    calls = []
+    running = {}
+    max_running = {}
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.calls = []
+            cls.running = {}
+            cls.max_running = {}
+
+    def respond(self):
+        host = self.headers.get('Host', '')
+        with self.lock:
+            type(self).calls.append((self.command, self.path))
+            self.running[host] = self.running.get(host, 0) + 1
+            self.max_running[host] = max(self.max_running.get(host, 0), self.running[host])
+        try:
+            time.sleep(self.delay)
+            path = self.path.split('?')[0]
+            if path.startswith('/ok'):
+                self.send_response(200)
+            elif path == '/moved':
+                self.send_response(301)
+                self.send_header('Location', '/ok/after-move')
+            elif path == '/loop-a':
+                self.send_response(302)
+                self.send_header('Location', '/loop-b')
+            elif path == '/loop-b':
+                self.send_response(302)
+                self.send_header('Location', '/loop-a')
+            elif path == '/no-head':
+                self.send_response(405 if self.command == 'HEAD' else 200)
+            elif path == '/flaky':
+                self.send_response(503)
+            elif path == '/slow':
+                time.sleep(1)
+                self.send_response(200)
+            else:
+                self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        except OSError:
+            pass
+        finally:
+            with self.lock:
+                # A slow request can outlive a reset()
+                self.running[host] = max(self.running.get(host, 0) - 1, 0)
+
+    do_HEAD = respond
+    do_GET = respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_checks():
+    """Exercise the checker against a local stub site; returns True when every check passes"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubSiteHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    hosts = [f"http://127.0.0.1:{port}", f"http://localhost:{port}"]
+    # A port nothing listens on stands in for a host that does not answer
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        dead_port = probe.getsockname()[1]
+    results = []
+
+    def check(name, passed, detail=''):
+        results.append(passed)
+        print(f"  {'✅' if passed else '❌'} {name}{f' ({detail})' if detail else ''}")
+
+    cache_path = os.path.join(tempfile.mkdtemp(prefix='link_checker_'), 'cache.json')
+    roundup = f"{hosts[0]}/ok/roundup"
+    opportunities = [
+        {'title': f"Grant {i}", 'website': f"{hosts[i % 2]}/ok/{i}", 'application': {'applicationUrl': roundup}}
+        for i in range(12)
+    ]
+    opportunities += [
+        {'title': 'Moved', 'website': f"{hosts[0]}/moved"},
+        {'title': 'Gone', 'website': f"{hosts[0]}/gone", 'application': {'applicationUrl': f"{hosts[1]}/ok/apply"}},
+        {'title': 'Loop', 'website': f"{hosts[1]}/loop-a"},
+        {'title': 'No HEAD', 'website': f"{hosts[1]}/no-head"},
+        {'title': 'Flaky', 'website': f"{hosts[0]}/flaky"},
+        {'title': 'Slow', 'website': f"{hosts[1]}/slow"},
+    ]
+    by_title = {opportunity['title']: opportunity for opportunity in opportunities}
+
+    StubSiteHandler.reset()
+    checker = LinkChecker(cache_path, workers=8, per_host=2, timeout=0.5)
+    checked, flagged = checker.annotate(opportunities)
+
+    def status(title, field='website'):
+        return by_title[title]['linkHealth'][field]['status']
+
+    peaks = sorted(StubSiteHandler.max_running.values())
+    check("every distinct URL checked once", checked == 20, f"{checked} URLs")
+    check("per-host limit respected and used on both hosts", peaks == [2, 2], f"peaks {peaks}")
+    check("working link ok", status('Grant 0') == 'ok')
+    moved = by_title['Moved']['linkHealth']['website']
+    check("redirect followed", moved['status'] == 'redirected' and moved.get('finalUrl', '').endswith('/ok/after-move'))
+    check("404 flagged broken", status('Gone') == 'broken' and by_title['Gone']['linkHealth']['broken'])
+    check("redirect loop flagged broken", status('Loop') == 'broken')
+    check("HEAD refusal falls back to GET", status('No HEAD') == 'ok')
+    check("5xx and timeouts are transient", status('Flaky') == 'unreachable' and status('Slow') == 'unreachable'
+          and not by_title['Flaky']['linkHealth']['broken'])
+    check("shared roundup link flagged generic",
+          by_title['Grant 0']['linkHealth']['applicationUrl']['generic']
+          and not by_title['Gone']['linkHealth']['applicationUrl']['generic'])
+    check("broken opportunities counted", flagged == 2, f"{flagged} flagged")
+
+    checker.save_cache()
+    StubSiteHandler.reset()
+    cached = LinkChecker(cache_path, workers=8, per_host=2, timeout=0.5)
+    rechecked, _ = cached.annotate(opportunities)
+    check("fresh results come from the cache", rechecked == 0 and cached.requests_made == 0,
+          f"{rechecked} rechecked, {cached.requests_made} requests")
+
+    dead = f"http://127.0.0.1:{dead_port}/new-domain"
+    single = LinkChecker(cache_path, workers=8, per_host=2, timeout=0.5)
+    check("one dead new host is flagged while known sites answer",
+          single.check_all([dead]) == 1 and not single.offline and single.cache[dead]['httpStatus'] is None)
+    first_run = LinkChecker(os.path.join(os.path.dirname(cache_path), 'first.json'), timeout=0.5)
+    check("one dead host on a first run is not taken for offline",
+          first_run.check_all([dead]) == 1 and not first_run.offline)
+
+    later = time.time() + TTL_SECONDS['ok'] + 1
+    expired = LinkChecker(cache_path, workers=8, per_host=2, timeout=0.5)
+    check("expired results are rechecked", expired.check_all(link_urls(by_title['Grant 0']).values(), later) == 2)
+
+    for _ in range(UNREACHABLE_LIMIT):
+        cached.check_all([f"{hosts[0]}/flaky"], now=time.time() + TTL_SECONDS['broken'])
+    check("repeatedly unreachable becomes broken", cached.cache[f"{hosts[0]}/flaky"]['status'] == 'broken')
+
+    server.shutdown()
+    server.server_close()
+    offline = LinkChecker(cache_path, timeout=0.5)
+    new_urls = [f"http://127.0.0.1:{dead_port}/new/{i}" for i in range(3)]
+    offline.annotate([{'website': url} for url in new_urls])
+    check("no answers, known sites included, is treated as offline",
+          offline.offline and not any(url in offline.cache for url in new_urls))
+    many = LinkChecker(os.path.join(os.path.dirname(cache_path), 'offline.json'), timeout=0.5)
+    many.annotate([{'website': f"{host}/ok/{i}"} for i, host in enumerate(hosts + [f"http://[::1]:{port}"])])
+    check("no answers from many hosts on a first run is treated as offline", many.offline and not many.cache)
+    return all(results)
+
+
+def parse_args():
+    """Parse command line options for the link checker"""
+    parser = argparse.ArgumentParser(description="Check opportunity links and flag broken ones")
+    parser.add_argument('--input', help="Processed opportunities JSON/NDJSON to check")
+    parser.add_argument('--output', help="Where to write the flagged opportunities (default: overwrite --input)")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help="Cached results")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="Concurrent requests overall")
+    parser.add_argument('--per-host', type=int, default=PER_HOST_LIMIT, help="Concurrent requests per host")
+    parser.add_argument('--timeout', type=float, default=TIMEOUT, help="Request timeout in seconds")
+    parser.add_argument('--check', action='store_true', help="Run the checks against a local stub site")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run the link checker"""
+    args = parse_args()
+    if args.check:
+        print("🚀 Checking the link checker against a local stub site...")
+        sys.exit(0 if run_checks() else 1)
+    if not args.input:
+        print("❌ --input is required")
+        sys.exit(1)
+
+    print("🚀 Checking opportunity links...")
+    start = time.perf_counter()
+    opportunities = load_export(args.input)
+    checker = LinkChecker(args.cache, workers=args.workers, per_host=args.per_host, timeout=args.timeout)
+    checked, flagged = checker.annotate(opportunities)
+    if checker.offline:
+        print("❌ No site answered; is the network down? Links were left unflagged")
+        sys.exit(1)
+    checker.save_cache()
+
+    output_file = args.output or args.input
+    directory = os.path.dirname(output_file)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or '.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        if output_file.endswith('.ndjson'):
+            for opportunity in opportunities:
+                f.write(json.dumps(opportunity, ensure_ascii=False) + '\n')
+        else:
+            json.dump(opportunities, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_file)
+
+    print(f"📊 {checked:,} URLs checked, {checker.requests_made:,} requests, the rest from cache")
+    print(f"✅ {flagged:,} of {len(opportunities):,} opportunities have a broken link "
+          f"({time.perf_counter() - start:.2f}s)")
+    print(f"📁 Saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
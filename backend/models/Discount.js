@@ -1,4 +1,5 @@
 const mongoose = require('mongoose');
+const { trackWrites } = require('./writeGeneration');
 
 const discountSchema = new mongoose.Schema({
   title: {
@@ -191,4 +192,7 @@ discountSchema.statics.getFeaturedDiscounts = function(limit = 6) {
   }).limit(limit);
 };
 
+// Facet views are current until a write changes what they count
+trackWrites(discountSchema, 'discounts');
+
 module.exports = mongoose.model('Discount', discountSchema);
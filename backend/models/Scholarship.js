@@ -1,4 +1,5 @@
 const mongoose = require('mongoose');
+const { trackWrites } = require('./writeGeneration');
 
 const scholarshipSchema = new mongoose.Schema({
   // Basic information
@@ -206,6 +207,27 @@ const scholarshipSchema = new mongoose.Schema({
     default: false
   },
   
+  // Link health from link_checker.py
+  linkHealth: {
+    broken: {
+      type: Boolean,
+      default: false
+    },
+    checkedAt: Date,
+    website: {
+      status: String,
+      httpStatus: Number,
+      finalUrl: String,
+      generic: Boolean
+    },
+    applicationUrl: {
+      status: String,
+      httpStatus: Number,
+      finalUrl: String,
+      generic: Boolean
+    }
+  },
+  
   // Statistics
   viewCount: {
     type: Number,
@@ -270,4 +292,7 @@ scholarshipSchema.index({ isActive: 1, isVerified: 1 });
 scholarshipSchema.index({ popularity: -1 });
 scholarshipSchema.index({ createdAt: -1 });
 
+// Facet views are current until a write changes what they count; engagement counters do not
+trackWrites(scholarshipSchema, 'scholarships', { ignore: ['viewCount', 'bookmarkCount', 'popularity'] });
+
 module.exports = mongoose.model('Scholarship', scholarshipSchema);
@@ -0,0 +1,37 @@
+const mongoose = require('mongoose');
+
+// A counter per collection that every write able to change its facet counts bumps.
+// Materialized views (facetcounts) store the generation they were imported at, so a
+// route can tell whether a view is still current with one read by _id instead of
+// scanning the collection. Scripts that write with the driver directly (the pipeline's
+// generated import scripts) bump the counter themselves.
+const COLLECTION = 'writegenerations';
+
+const counters = () => mongoose.connection.db.collection(COLLECTION);
+
+const bumpGeneration = name =>
+  counters().updateOne({ _id: name }, { $inc: { generation: 1 } }, { upsert: true });
+
+const currentGeneration = async name => (await counters().findOne({ _id: name }))?.generation || 0;
+
+// True when an update only uses operators on the given fields, e.g. { $inc: { viewCount: 1 } }
+const touchesOnly = (update, fields) => Object.entries(update || {}).every(([operator, value]) =>
+  operator.startsWith('$') && value && typeof value === 'object' &&
+  Object.keys(value).every(field => fields.includes(field)));
+
+const UPDATES = ['updateOne', 'updateMany', 'findOneAndUpdate', 'replaceOne', 'findOneAndReplace'];
+const DELETES = ['deleteOne', 'deleteMany', 'findOneAndDelete'];
+
+// Bump `name`'s generation after every write through the model, except updates that
+// only touch `ignore` (counters such as viewCount that no facet is built from)
+const trackWrites = (schema, name, { ignore = [] } = {}) => {
+  const bump = () => bumpGeneration(name);
+  schema.post('save', bump);
+  schema.post('insertMany', bump);
+  schema.post(DELETES, bump);
+  schema.post(UPDATES, async function() {
+    if (!touchesOnly(this.getUpdate(), ignore)) await bump();
+  });
+};
+
+module.exports = { COLLECTION, bumpGeneration, currentGeneration, trackWrites };
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Helpers for reading collection exports and writing job output
+Batch jobs run over `mongoexport` dumps (NDJSON, or JSON arrays with
+--jsonArray) rather than a live connection, and write NDJSON that a
+generated Node script loads back into MongoDB
+"""
+
+import json
+from datetime import datetime, timezone
+
+from convert_grants_to_scholarships import iter_grant_records
+
+# Write generation counters per collection (see models/writeGeneration.js)
+GENERATIONS_COLLECTION = 'writegenerations'
+
+
+def iter_export(path):
+    """Yield documents from a JSON array or NDJSON export"""
+    return iter_grant_records(path)
+
+
+def load_export(path):
+    """Load every document from an export"""
+    return list(iter_export(path))
+
+
+def document_id(document, default=None):
+    """The document's _id as a string, unwrapping extended JSON {"$oid": ...}"""
+    value = document.get('_id', default)
+    if isinstance(value, dict):
+        value = value.get('$oid', default)
+    return None if value is None else str(value)
+
+
+def parse_date(value):
+    """Parse an exported date ({"$date": ...}, ISO string or epoch millis) to a naive UTC datetime"""
+    if isinstance(value, dict):
+        value = value.get('$date', value.get('$numberLong'))
+        if isinstance(value, dict):
+            value = value.get('$numberLong')
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, (int, float)) or (isinstance(value, str) and value.lstrip('-').isdigit()):
+        return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc).replace(tzinfo=None)
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def write_ndjson(path, records):
+    """Write records as NDJSON; returns the number written"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            count += 1
+    return count
+
+
+def bulk_upsert_script(collection, ndjson_path, key, description, stamp_generation=False):
+    """Node.js script that upserts every NDJSON line into `collection` by `key`
+
+    With stamp_generation, each record is stamped with the current write generation of
+    the collection its `key` names, marking a materialized view current as of the import.
+    """
+    stamp = f'''
+        const counters = await mongoose.connection.db.collection({json.dumps(GENERATIONS_COLLECTION)}).find().toArray();
+        const generations = Object.fromEntries(counters.map(counter => [counter._id, counter.generation]));''' if stamp_generation else ''
+    stamp_record = f'''
+            record.generation = generations[record.{key}] || 0;''' if stamp_generation else ''
+    return f'''const fs = require('fs');
+const readline = require('readline');
+const mongoose = require('mongoose');
+require('dotenv').config();
+
+// {description}
+const inputFile = {json.dumps(ndjson_path)};
+
+async function importRecords() {{
+    try {{
+        await mongoose.connect(process.env.MONGODB_URI || 'mongodb://localhost:27017/teacheasy');
+        console.log('✅ Connected to MongoDB');
+
+        const collection = mongoose.connection.db.collection({json.dumps(collection)});
+        await collection.createIndex({{ {key}: 1 }}, {{ unique: true }});{stamp}
+        const lines = readline.createInterface({{ input: fs.createReadStream(inputFile) }});
+        let batch = [];
+        let written = 0;
+
+        for await (const line of lines) {{
+            if (!line.trim()) continue;
+            const record = JSON.parse(line);{stamp_record}
+            batch.push({{
+                replaceOne: {{ filter: {{ {key}: record.{key} }}, replacement: record, upsert: true }}
+            }});
+            if (batch.length === 1000) {{
+                await collection.bulkWrite(batch, {{ ordered: false }});
+                written += batch.length;
+                batch = [];
+            }}
+        }}
+        if (batch.length) {{
+            await collection.bulkWrite(batch, {{ ordered: false }});
+            written += batch.length;
+        }}
+        console.log(`✅ Upserted ${{written}} records into {collection}`);
+    }} catch (error) {{
+        console.error('❌ Error importing records:', error);
+    }} finally {{
+        await mongoose.connection.close();
+        console.log('🔌 Database connection closed');
+    }}
+}}
+
+importRecords();
+'''
+
+
+def bulk_update_script(collection, ndjson_path, description, generation=None):
+    """Node.js script that $sets each NDJSON line's fields on the `collection` document with its _id
+
+    Pass generation (a collection name) when the updates can change facet counts, so the
+    script bumps its write generation and the materialized view stops being served.
+    """
+    bump = f'''
+        await mongoose.connection.db.collection({json.dumps(GENERATIONS_COLLECTION)})
+            .updateOne({{ _id: {json.dumps(generation)} }}, {{ $inc: {{ generation: 1 }} }}, {{ upsert: true }});''' if generation else ''
+    return f'''const fs = require('fs');
+const readline = require('readline');
+const mongoose = require('mongoose');
+require('dotenv').config();
+
+// {description}
+const inputFile = {json.dumps(ndjson_path)};
+
+async function updateRecords() {{
+    try {{
+        await mongoose.connect(process.env.MONGODB_URI || 'mongodb://localhost:27017/teacheasy');
+        console.log('✅ Connected to MongoDB');
+
+        const collection = mongoose.connection.db.collection({json.dumps(collection)});
+        const lines = readline.createInterface({{ input: fs.createReadStream(inputFile) }});
+        let batch = [];
+        let matched = 0;
+
+        for await (const line of lines) {{
+            if (!line.trim()) continue;
+            // Extended JSON, so dates ({{"$date": ...}}) are stored as dates
+            const {{ _id, ...fields }} = mongoose.mongo.BSON.EJSON.parse(line);
+            const filter = mongoose.Types.ObjectId.isValid(_id) ? {{ _id: new mongoose.Types.ObjectId(_id) }} : {{ _id }};
+            batch.push({{ updateOne: {{ filter, update: {{ $set: fields }} }} }});
+            if (batch.length === 1000) {{
+                matched += (await collection.bulkWrite(batch, {{ ordered: false }})).matchedCount;
+                batch = [];
+            }}
+        }}
+        if (batch.length) {{
+            matched += (await collection.bulkWrite(batch, {{ ordered: false }})).matchedCount;
+        }}{bump}
+        console.log(`✅ Updated ${{matched}} documents in {collection}`);
+    }} catch (error) {{
+        console.error('❌ Error updating records:', error);
+    }} finally {{
+        await mongoose.connection.close();
+        console.log('🔌 Database connection closed');
+    }}
+}}
+
+updateRecords();
+'''
@@ -0,0 +1,707 @@
+#!/usr/bin/env python3
+"""
+In-memory read side for GET /api/scholarships
+Loads processed opportunities into posting lists per facet value, sorted
+amount arrays and a lower-cased search corpus, and answers the route's
+filter, sort and pagination parameters without scanning every document.
+New processed files from the pipeline are applied as upserts.
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+from collections import OrderedDict
+
+import numpy as np
+
+from mongo_export import iter_export, document_id, parse_date
+
+# Facet query parameters and the document path each one filters ($in)
+FACET_PARAMS = {
+    'gradeLevels': 'eligibility.gradeLevels',
+    'subjects': 'eligibility.subjects',
+    'fundingTypes': 'eligibility.fundingTypes',
+}
+
+# Paths the route's search text is matched against
+SEARCH_PATHS = ['title', 'organization', 'description', 'eligibility.subjects', 'tags']
+
+# Paths Mongoose casts to Date, and the defaults it fills in on insert (models/Scholarship.js)
+DATE_PATHS = ['createdAt', 'updatedAt', 'publishedAt', 'application.deadline', 'application.nextDeadline']
+MODEL_DEFAULTS = {
+    'popularity': 0,
+    'isActive': True,
+    'isVerified': False,
+    'viewCount': 0,
+    'bookmarkCount': 0,
+    'status': 'Open',
+    'source': 'Unknown',
+}
+
+# Validation rules from validateScholarshipQuery
+MAX_LIMIT = 100
+
+# Processed files the pipeline writes into data/
+DELTA_PATTERNS = ['processed_*.json', 'processed_*.ndjson']
+
+SEARCH_CACHE_SIZE = 256
+# Slots taken from the sort order per step when walking it for a page
+ORDER_CHUNK = 4096
+CORPUS_SEPARATOR = '\x00'
+
+
+class QueryValidationError(ValueError):
+    """Raised for parameters the route would reject with a 400"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def get_path(document, path):
+    """Values at a dotted path, flattening arrays along the way (as Mongo does)"""
+    values = [document]
+    for part in path.split('.'):
+        next_values = []
+        for value in values:
+            if isinstance(value, list):
+                value = [item.get(part) for item in value if isinstance(item, dict)]
+                next_values.extend(v for v in value if v is not None)
+            elif isinstance(value, dict) and value.get(part) is not None:
+                next_values.append(value[part])
+        values = next_values
+    flat = []
+    for value in values:
+        if isinstance(value, list):
+            flat.extend(value)
+        else:
+            flat.append(value)
+    return flat
+
+
+def set_path(document, path, value):
+    """Set a dotted path on nested dicts"""
+    parts = path.split('.')
+    for part in parts[:-1]:
+        document = document.get(part)
+        if not isinstance(document, dict):
+            return
+    document[parts[-1]] = value
+
+
+def sort_value(value):
+    """A comparable key following BSON sort order (null < numbers < strings < objects < booleans < dates)"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (5, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (6, value)
+    return (3, json.dumps(value, sort_keys=True, default=str))
+
+
+def sort_key(document, path, descending):
+    """Sort key for a document: arrays sort by their smallest element ascending, largest descending"""
+    values = get_path(document, path)
+    if not values:
+        return (0, 0)
+    keys = [sort_value(value) for value in values]
+    return max(keys) if descending else min(keys)
+
+
+def record_key(document):
+    """Stable identity for upserts: the _id, else a hash of the fields the pipeline never rewrites"""
+    key = document_id(document)
+    if key:
+        return key
+    identity = json.dumps([document.get('title', ''), document.get('organization', ''),
+                           document.get('website', '')], ensure_ascii=False)
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()[:24]
+
+
+def normalize_document(document, inserted_at=None):
+    """Apply what Mongoose does on insert: defaults, Date casting and an _id"""
+    document = json.loads(json.dumps(document, default=str))
+    for field, default in MODEL_DEFAULTS.items():
+        document.setdefault(field, default)
+    for path in ('createdAt', 'updatedAt', 'publishedAt'):
+        if get_path(document, path) == []:
+            set_path(document, path, inserted_at or datetime.now())
+    for path in DATE_PATHS:
+        values = get_path(document, path)
+        if len(values) == 1 and not isinstance(values[0], datetime):
+            set_path(document, path, parse_date(values[0]))
+    document['_id'] = record_key(document)
+    return document
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def parse_query(params):
+    """Validate and default req.query-style parameters like the route"""
+    errors = []
+
+    def integer(name, default, low, high=None):
+        value = params.get(name)
+        if value is None:
+            return default
+        try:
+            number = int(str(value).strip())
+        except ValueError:
+            errors.append(f"Invalid value for {name}")
+            return default
+        if number < low or (high is not None and number > high):
+            errors.append(f"Invalid value for {name}")
+        return number
+
+    def amount(name):
+        value = params.get(name)
+        if value is None:
+            return None
+        try:
+            number = float(str(value).strip())
+        except ValueError:
+            errors.append(f"Invalid value for {name}")
+            return None
+        if number < 0 or math.isnan(number):
+            errors.append(f"Invalid value for {name}")
+        return number
+
+    def values(name):
+        value = params.get(name)
+        if not value:
+            return None
+        if isinstance(value, str):
+            value = value.split(',')
+        return [str(item).strip() for item in value]
+
+    query = {
+        'page': integer('page', 1, 1),
+        'limit': integer('limit', 20, 1, MAX_LIMIT),
+        'minAmount': amount('minAmount'),
+        'maxAmount': amount('maxAmount'),
+        'facets': {param: values(param) for param in FACET_PARAMS},
+        'search': params.get('search') or None,
+        'sortBy': params.get('sortBy') or 'createdAt',
+        'sortOrder': params.get('sortOrder') or 'desc',
+    }
+    if errors:
+        raise QueryValidationError(errors)
+    return query
+
+
+def compile_search(search):
+    """The route's `new RegExp(escapeRegex(search), 'i')`: a literal, case-insensitive match"""
+    return re.compile(re.escape(search), re.IGNORECASE)
+
+
+def paginate(documents, total, query):
+    """Response body in the route's shape"""
+    page, limit = query['page'], query['limit']
+    total_pages = math.ceil(total / limit)
+    return {
+        'scholarships': documents,
+        'pagination': {
+            'currentPage': page,
+            'totalPages': total_pages,
+            'totalItems': total,
+            'itemsPerPage': limit,
+            'hasNextPage': page < total_pages,
+            'hasPrevPage': page > 1,
+        },
+    }
+
+
+def route_query(documents, params):
+    """Reference implementation: evaluate the route's Mongo filter on every document"""
+    query = parse_query(params)
+    pattern = compile_search(query['search']) if query['search'] else None
+
+    def matches(document):
+        if document.get('isActive') is not True:
+            return False
+        low, high = query['minAmount'], query['maxAmount']
+        if low is not None or high is not None:
+            amount_ok = False
+            if low is not None:
+                amount_ok |= any(is_number(v) and v >= low for v in get_path(document, 'amount.max'))
+            if high is not None:
+                amount_ok |= any(is_number(v) and v <= high for v in get_path(document, 'amount.min'))
+            if not amount_ok:
+                return False
+        for param, path in FACET_PARAMS.items():
+            wanted = query['facets'][param]
+            if wanted is not None and not set(wanted) & set(v for v in get_path(document, path) if isinstance(v, str)):
+                return False
+        if pattern is not None:
+            return any(isinstance(v, str) and pattern.search(v)
+                       for path in SEARCH_PATHS for v in get_path(document, path))
+        return True
+
+    descending = query['sortOrder'] != 'asc'
+    selected = sorted((d for d in documents if matches(d)),
+                      key=lambda d: sort_key(d, query['sortBy'], descending), reverse=descending)
+    skip = (query['page'] - 1) * query['limit']
+    return paginate(selected[skip:skip + query['limit']], len(selected), query)
+
+
+class OpportunityQueryIndex:
+    """Posting-list index over opportunities, updated in place by upserts and removals"""
+
+    def __init__(self, documents=(), capacity=1024):
+        self.capacity = capacity
+        self.size = 0
+        self.documents = []
+        self.slot_of = {}
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.active = np.zeros(capacity, dtype=bool)
+        # facet path -> value -> bitmap of slots holding it
+        self.postings = {path: {} for path in FACET_PARAMS.values()}
+        self.amount_min = np.full(capacity, np.nan)
+        self.amount_max = np.full(capacity, np.nan)
+        self.search_text = []
+        self.applied_files = {}
+        self._invalidate()
+        self.upsert(documents)
+
+    def _invalidate(self):
+        """Drop structures derived from the whole collection; rebuilt on next use"""
+        self._orders = {}
+        self._amount_index = None
+        self._corpus = None
+        self._search_cache = OrderedDict()
+
+    def _grow(self, needed):
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        extra = capacity - self.capacity
+
+        def extend(array, fill):
+            return np.concatenate([array, np.full(extra, fill, dtype=array.dtype)])
+
+        self.alive = extend(self.alive, False)
+        self.active = extend(self.active, False)
+        self.amount_min = extend(self.amount_min, np.nan)
+        self.amount_max = extend(self.amount_max, np.nan)
+        for postings in self.postings.values():
+            for value in postings:
+                postings[value] = extend(postings[value], False)
+        self.capacity = capacity
+
+    def _clear_slot(self, slot):
+        document = self.documents[slot]
+        for path, postings in self.postings.items():
+            for value in get_path(document, path):
+                if isinstance(value, str) and value in postings:
+                    postings[value][slot] = False
+        self.alive[slot] = False
+        self.active[slot] = False
+        self.amount_min[slot] = np.nan
+        self.amount_max[slot] = np.nan
+        self.search_text[slot] = ''
+
+    def _fill_slot(self, slot, document):
+        self.documents[slot] = document
+        self.alive[slot] = True
+        self.active[slot] = document.get('isActive') is True
+        for path, postings in self.postings.items():
+            for value in get_path(document, path):
+                if not isinstance(value, str):
+                    continue
+                bitmap = postings.get(value)
+                if bitmap is None:
+                    bitmap = postings[value] = np.zeros(self.capacity, dtype=bool)
+                bitmap[slot] = True
+        # Mongo only compares numbers with numbers; keep the extreme value an array could match with
+        amount_max = [v for v in get_path(document, 'amount.max') if is_number(v)]
+        amount_min = [v for v in get_path(document, 'amount.min') if is_number(v)]
+        self.amount_max[slot] = max(amount_max) if amount_max else np.nan
+        self.amount_min[slot] = min(amount_min) if amount_min else np.nan
+        self.search_text[slot] = CORPUS_SEPARATOR.join(
+            v.lower() for path in SEARCH_PATHS for v in get_path(document, path) if isinstance(v, str))
+
+    def upsert(self, documents, inserted_at=None):
+        """Insert or replace documents (by _id, else title/organization/website); returns the count"""
+        count = 0
+        for document in documents:
+            document = normalize_document(document, inserted_at)
+            key = document['_id']
+            slot = self.slot_of.get(key)
+            if slot is None:
+                slot = self.size
+                self._grow(slot + 1)
+                self.documents.append(None)
+                self.search_text.append('')
+                self.slot_of[key] = slot
+                self.size += 1
+            else:
+                self._clear_slot(slot)
+            self._fill_slot(slot, document)
+            count += 1
+        if count:
+            self._invalidate()
+        return count
+
+    def remove(self, keys):
+        """Remove documents by key; returns the number removed"""
+        count = 0
+        for key in keys:
+            slot = self.slot_of.pop(key, None)
+            if slot is not None:
+                self._clear_slot(slot)
+                self.documents[slot] = None
+                count += 1
+        if count:
+            self._invalidate()
+        return count
+
+    def refresh(self, data_dir):
+        """Apply processed files the pipeline wrote since the last refresh, oldest first"""
+        paths = [path for pattern in DELTA_PATTERNS for path in glob.glob(os.path.join(data_dir, pattern))]
+        applied = 0
+        for path in sorted(paths, key=os.path.getmtime):
+            mtime = os.path.getmtime(path)
+            if self.applied_files.get(path) == mtime:
+                continue
+            # Files from one run are imported together, so they share an insert time
+            applied += self.upsert(iter_export(path), inserted_at=datetime.fromtimestamp(mtime))
+            self.applied_files[path] = mtime
+        return applied
+
+    def _sort_order(self, path, descending):
+        """Slots in sort order (ties keep insertion order) and each slot's position in it,
+        cached until the next change"""
+        cache_key = (path, descending)
+        cached = self._orders.get(cache_key)
+        if cached is None:
+            keys = [sort_key(document, path, descending) if document is not None else (0, 0)
+                    for document in self.documents]
+            distinct = {key: rank for rank, key in enumerate(sorted(set(keys)))}
+            ranks = np.fromiter((distinct[key] for key in keys), dtype=np.int64, count=len(keys))
+            order = np.argsort(-ranks if descending else ranks, kind='stable')
+            position = np.empty_like(order)
+            position[order] = np.arange(len(order))
+            cached = self._orders[cache_key] = (order, position)
+        return cached
+
+    def _page(self, mask, total, path, descending, skip, limit):
+        """Slots on the requested page, without ordering every match"""
+        order, position = self._sort_order(path, descending)
+        needed = skip + limit
+        if needed <= 0 or skip >= total:
+            return np.zeros(0, dtype=np.int64)
+        if total * 32 < self.size:
+            # Few matches: order just them
+            matched = np.flatnonzero(mask)
+            return matched[np.argsort(position[matched], kind='stable')][skip:needed]
+        # Many matches: walk the sort order until the page is filled
+        pages = []
+        found = 0
+        for start in range(0, self.size, ORDER_CHUNK):
+            chunk = order[start:start + ORDER_CHUNK]
+            hits = chunk[mask[chunk]]
+            pages.append(hits)
+            found += len(hits)
+            if found >= needed:
+                break
+        return np.concatenate(pages)[skip:needed]
+
+    def _amount_mask(self, low, high):
+        """Slots with amount.max >= low OR amount.min <= high, via sorted amount arrays"""
+        if self._amount_index is None:
+            n = self.size
+            by_max = np.argsort(self.amount_max[:n], kind='stable')
+            by_min = np.argsort(self.amount_min[:n], kind='stable')
+            # NaNs sort last; cut them off so they never match
+            max_count = int(np.count_nonzero(~np.isnan(self.amount_max[:n])))
+            min_count = int(np.count_nonzero(~np.isnan(self.amount_min[:n])))
+            self._amount_index = (by_max[:max_count], self.amount_max[by_max[:max_count]],
+                                  by_min[:min_count], self.amount_min[by_min[:min_count]])
+        by_max, sorted_max, by_min, sorted_min = self._amount_index
+
+        mask = np.zeros(self.size, dtype=bool)
+        if low is not None:
+            mask[by_max[np.searchsorted(sorted_max, low, side='left'):]] = True
+        if high is not None:
+            mask[by_min[:np.searchsorted(sorted_min, high, side='right')]] = True
+        return mask
+
+    def _search_mask(self, search):
+        """Slots whose searched fields contain the search text, ignoring case, as the route matches"""
+        mask = self._search_cache.get(search)
+        if mask is not None:
+            self._search_cache.move_to_end(search)
+            return mask
+
+        pattern = compile_search(search)
+        mask = np.zeros(self.size, dtype=bool)
+        if search.isascii():
+            # ASCII text: find it in one lower-cased corpus instead of per document
+            if self._corpus is None:
+                texts = self.search_text
+                starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
+                self._corpus = (CORPUS_SEPARATOR.join(texts), starts)
+            corpus, starts = self._corpus
+            needle = search.lower()
+            position = corpus.find(needle)
+            while position != -1:
+                slot = int(np.searchsorted(starts, position, side='right')) - 1
+                mask[slot] = True
+                if slot + 1 >= len(starts):
+                    break
+                position = corpus.find(needle, int(starts[slot + 1]))
+        else:
+            for slot, document in enumerate(self.documents):
+                if document is not None and any(
+                        isinstance(v, str) and pattern.search(v)
+                        for path in SEARCH_PATHS for v in get_path(document, path)):
+                    mask[slot] = True
+
+        self._search_cache[search] = mask
+        if len(self._search_cache) > SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+        return mask
+
+    def query(self, params):
+        """Answer GET /api/scholarships parameters with the route's response body"""
+        query = parse_query(params)
+        n = self.size
+        mask = self.active[:n].copy()
+
+        if query['minAmount'] is not None or query['maxAmount'] is not None:
+            mask &= self._amount_mask(query['minAmount'], query['maxAmount'])
+
+        for param, path in FACET_PARAMS.items():
+            wanted = query['facets'][param]
+            if wanted is None:
+                continue
+            union = np.zeros(n, dtype=bool)
+            for value in set(wanted):
+                bitmap = self.postings[path].get(value)
+                if bitmap is not None:
+                    union |= bitmap[:n]
+            mask &= union
+
+        if query['search']:
+            mask &= self._search_mask(query['search'])
+
+        total = int(np.count_nonzero(mask))
+        skip = (query['page'] - 1) * query['limit']
+        slots = self._page(mask, total, query['sortBy'], query['sortOrder'] != 'asc', skip, query['limit'])
+        return paginate([self.documents[slot] for slot in slots.tolist()], total, query)
+
+
+def random_queries(documents, count, seed=0):
+    """Query parameter sets drawn from the values present in the documents"""
+    rng = random.Random(seed)
+    facet_values = {param: sorted({v for d in documents for v in get_path(d, path) if isinstance(v, str)})
+                    for param, path in FACET_PARAMS.items()}
+    words = sorted({word for d in documents for word in re.findall(r'[A-Za-z]{4,}', d.get('title', ''))})
+    searches = (words[:50] + ['grant', 'STEM', 'teacher', 'Art', '^The', 'math|science', '(', '$1,000', 'K-12',
+                                'no-such-text'])
+    sort_fields = ['createdAt', 'popularity', 'viewCount', 'amount.max', 'amount.min', 'title',
+                   'application.deadline', 'eligibility.gradeLevels', 'missingField']
+
+    for _ in range(count):
+        params = {}
+        if rng.random() < 0.5:
+            params['page'] = str(rng.randint(1, 4))
+        if rng.random() < 0.5:
+            params['limit'] = str(rng.choice([1, 5, 10, 20, 50, 100]))
+        for param, values in facet_values.items():
+            if values and rng.random() < 0.3:
+                params[param] = ','.join(rng.sample(values, min(len(values), rng.randint(1, 3))))
+        if rng.random() < 0.3:
+            params['minAmount'] = str(rng.choice([0, 100, 500, 1000, 5000, 25000]))
+        if rng.random() < 0.3:
+            params['maxAmount'] = str(rng.choice([0, 250, 1000, 10000, 100000]))
+        if words and rng.random() < 0.3:
+            params['search'] = rng.choice(searches)
+        if rng.random() < 0.6:
+            params['sortBy'] = rng.choice(sort_fields)
+        if rng.random() < 0.5:
+            params['sortOrder'] = rng.choice(['asc', 'desc'])
+        yield params
+
+
+def compare_responses(expected, actual):
+    """Differences between two response bodies (ids and pagination)"""
+    expected_ids = [d['_id'] for d in expected['scholarships']]
+    actual_ids = [d['_id'] for d in actual['scholarships']]
+    problems = []
+    if expected_ids != actual_ids:
+        problems.append(f"ids {expected_ids} != {actual_ids}")
+    if expected['pagination'] != actual['pagination']:
+        problems.append(f"pagination {expected['pagination']} != {actual['pagination']}")
+    return problems
+
+
+def check_parity(documents, queries=500, seed=0):
+    """Compare the index against the route's semantics, before and after a delta; returns failures"""
+    rng = random.Random(seed)
+    half = len(documents) // 2
+    # Small initial capacity so the delta exercises growth
+    index = OpportunityQueryIndex(documents[:half], capacity=8)
+
+    def run_round(label, round_seed):
+        failures = []
+        # The reference scans the same normalized documents the index holds
+        live = [document for document in index.documents if document is not None]
+        for params in random_queries(live, queries, round_seed):
+            expected = route_query(live, params)
+            actual = index.query(params)
+            problems = compare_responses(expected, actual)
+            if problems:
+                failures.append({'round': label, 'params': params, 'problems': problems})
+        return failures
+
+    failures = run_round('initial', seed)
+
+    # Delta: the rest of the documents arrive, some existing ones change and some are removed
+    keys = list(index.slot_of)
+    changed = []
+    for key in rng.sample(keys, min(len(keys), 10)):
+        document = dict(index.documents[index.slot_of[key]])
+        document['isActive'] = rng.random() < 0.5
+        document['popularity'] = rng.randint(0, 100)
+        changed.append(document)
+    index.upsert(documents[half:] + changed, inserted_at=datetime(2025, 1, 1))
+    index.remove(rng.sample(keys, min(len(keys), 5)))
+    failures += run_round('after delta', seed + 1)
+    return failures
+
+
+def fixture_documents(documents, inserted_at=datetime(2025, 9, 1)):
+    """Normalized copies of documents, one per _id, with a distinct createdAt each, as JSON-ready dicts"""
+    latest = {record_key(document): document for document in documents}
+    fixtures = []
+    for position, document in enumerate(latest.values()):
+        document = normalize_document(document, inserted_at + timedelta(minutes=position))
+        fixtures.append(json.loads(json.dumps(document, default=lambda value: value.isoformat() + 'Z')))
+    return fixtures
+
+
+def parity_cases(documents, count=200, seed=0):
+    """Route queries for the parity fixture, without expected results
+
+    The expectations are recorded from the real GET /api/scholarships route by
+    `tests/route_parity.js --record`, so the tests do not check this module
+    against itself. Only queries whose matches have no ties on the sort field
+    are kept: MongoDB orders ties arbitrarily, so their pages are not stable.
+    """
+    normalized = [normalize_document(document) for document in documents]
+    cases = []
+    for params in random_queries(normalized, count * 4, seed):
+        query = parse_query(params)
+        matched, page = [], 1
+        while True:
+            response = route_query(normalized, dict(params, page=str(page), limit=str(MAX_LIMIT)))
+            matched += response['scholarships']
+            if not response['pagination']['hasNextPage']:
+                break
+            page += 1
+        keys = [sort_key(document, query['sortBy'], query['sortOrder'] != 'asc') for document in matched]
+        if len(set(keys)) != len(keys):
+            continue
+        cases.append({'params': params})
+        if len(cases) == count:
+            break
+    # Parameters the route's validators should reject
+    for params in ({'page': '0'}, {'limit': '101'}, {'limit': 'ten'}, {'minAmount': '-5'}, {'maxAmount': 'lots'}):
+        cases.append({'params': params})
+    return cases
+
+
+def time_queries(index, queries):
+    """Per-query latencies (seconds), warm"""
+    for params in queries:
+        index.query(params)
+    latencies = []
+    for params in queries:
+        start = time.perf_counter()
+        index.query(params)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def parse_args():
+    """Parse command line options for the query service"""
+    parser = argparse.ArgumentParser(description="Indexed in-memory queries over processed opportunities")
+    parser.add_argument('--data-dir', default='data', help="Directory holding processed_*.json files")
+    parser.add_argument('--input', action='append', help="Load this export or processed file instead")
+    parser.add_argument('--query', help="Query string as sent to GET /api/scholarships, e.g. "
+                                        "'subjects=Science&minAmount=500'")
+    parser.add_argument('--check', action='store_true', help="Run the parity check against the route semantics")
+    parser.add_argument('--queries', type=int, default=500, help="Random queries per parity round")
+    parser.add_argument('--write-cases', metavar='PATH',
+                        help="Write fixture documents and route queries for tests/route_parity.js to "
+                             "record results for")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run the query service tools"""
+    from urllib.parse import parse_qsl
+
+    args = parse_args()
+    start = time.perf_counter()
+    if args.input:
+        documents = [document for path in args.input for document in iter_export(path)]
+        index = OpportunityQueryIndex(documents)
+    else:
+        documents = None
+        index = OpportunityQueryIndex()
+        index.refresh(args.data_dir)
+    print(f"📊 Indexed {len(index.slot_of):,} opportunities in {time.perf_counter() - start:.2f}s")
+
+    if args.check:
+        if documents is None:
+            documents = [document for document in index.documents if document is not None]
+        failures = check_parity(documents, queries=args.queries)
+        for failure in failures[:10]:
+            print(f"❌ {failure['round']}: {failure['params']}")
+            for problem in failure['problems']:
+                print(f"   {problem}")
+        if failures:
+            print(f"❌ {len(failures)} queries differ from the route semantics")
+            sys.exit(1)
+        print(f"✅ {2 * args.queries} queries match the route semantics")
+
+        latencies = sorted(time_queries(index, list(random_queries(documents, args.queries, seed=42))))
+        print(f"⏱️ Query latency p50 {latencies[len(latencies) // 2] * 1e6:.0f}µs, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f}µs")
+
+    if args.write_cases:
+        if documents is None:
+            documents = [document for document in index.documents if document is not None]
+        fixtures = fixture_documents(documents)
+        cases = parity_cases(fixtures, count=args.queries)
+        with open(args.write_cases, 'w', encoding='utf-8') as f:
+            json.dump({'documents': fixtures, 'cases': cases, 'recorded': None}, f, indent=1, ensure_ascii=False)
+        print(f"📁 Wrote {len(fixtures)} documents and {len(cases)} cases to {args.write_cases}")
+        print("   Record the route's results with `npm run test:route-parity:record`")
+
+    if args.query:
+        result = index.query(dict(parse_qsl(args.query)))
+        print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
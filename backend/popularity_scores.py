@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Popularity scoring job
+Aggregates bookmarks, view history and applications into time-decayed
+popularity scores per opportunity and writes them back in bulk, replacing
+the fixed popularity the scrapers assign
+
+Each opportunity keeps a forward-decayed counter: an event of weight w at
+time t adds w * 2^((t - landmark) / half_life), and the score at time T is
+the sum times 2^(-(T - landmark) / half_life). Adding an event never
+touches the rest of the counter, so a run only has to read the events
+since the previous one. Bookmarks carry no timestamp, so each
+(user, opportunity) pair is dated when it is first seen and its
+contribution is taken back out if the bookmark disappears.
+"""
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from mongo_export import load_export, document_id, parse_date, write_ndjson, bulk_update_script
+
+DEFAULT_STATE_PATH = os.path.join('data', 'popularity', 'state.npz')
+STATE_VERSION = 1
+
+HALF_LIFE_DAYS = 14
+EVENT_WEIGHTS = {'view': 1.0, 'bookmark': 3.0, 'application': 5.0}
+# Move the landmark forward before 2^(age / half_life) gets anywhere near overflow
+RELANDMARK_HALF_LIVES = 256
+# Scores are mapped onto 0-100 on a log scale, with this percentile of opportunities with activity at 100
+SCALE_PERCENTILE = 99
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_seconds(value):
+    """Exported date to epoch seconds, or None"""
+    parsed = parse_date(value)
+    return None if parsed is None else (parsed - EPOCH).total_seconds()
+
+
+def pair_key(user_id, scholarship_id):
+    """64-bit key for a (user, opportunity) bookmark"""
+    digest = hashlib.blake2b(f"{user_id}:{scholarship_id}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class PopularityState:
+    """Forward-decayed counters per opportunity plus the bookmarks already counted"""
+
+    def __init__(self, landmark, half_life_days=HALF_LIFE_DAYS):
+        self.landmark = float(landmark)
+        self.half_life = half_life_days * 86400.0
+        self.watermark = None
+        self.ids = []
+        self.slots = {}
+        self.sums = np.zeros(0)
+        self.pair_keys = np.zeros(0, dtype=np.uint64)
+        self.pair_items = np.zeros(0, dtype=np.int64)
+        self.pair_times = np.zeros(0)
+        # What the last run wrote, so unchanged opportunities are not written again
+        self.published = np.zeros(0)
+        self.published_bookmarks = np.zeros(0, dtype=np.int64)
+
+    def slot_array(self, scholarship_ids):
+        """Counter slots for a list of ids, adding slots for new opportunities"""
+        slots = self.slots
+        out = np.empty(len(scholarship_ids), dtype=np.int64)
+        for i, scholarship_id in enumerate(scholarship_ids):
+            slot = slots.get(scholarship_id)
+            if slot is None:
+                slot = slots[scholarship_id] = len(self.ids)
+                self.ids.append(scholarship_id)
+            out[i] = slot
+        grow = len(self.ids) - len(self.sums)
+        if grow:
+            self.sums = np.concatenate([self.sums, np.zeros(grow)])
+            self.published = np.concatenate([self.published, np.full(grow, np.nan)])
+            self.published_bookmarks = np.concatenate([self.published_bookmarks, np.full(grow, -1, dtype=np.int64)])
+        return out
+
+    def weight_at(self, times):
+        return np.exp2((np.asarray(times, dtype=np.float64) - self.landmark) / self.half_life)
+
+    def add(self, slots, times, weight):
+        """Add events of one kind to their counters"""
+        if len(slots):
+            self.sums += np.bincount(slots, weights=weight * self.weight_at(times), minlength=len(self.sums))
+
+    def move_landmark(self, now):
+        """Rescale the counters to a later landmark; scores are unchanged"""
+        if now - self.landmark > RELANDMARK_HALF_LIVES * self.half_life:
+            self.sums *= np.exp2((self.landmark - now) / self.half_life)
+            self.landmark = float(now)
+
+    def apply_bookmarks(self, keys, slots, times):
+        """Count new bookmarks and take back the ones that were removed
+
+        Returns (added, removed).
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        known = np.isin(keys, self.pair_keys)
+        kept = np.isin(self.pair_keys, keys)
+        weight = EVENT_WEIGHTS['bookmark']
+
+        removed = ~kept
+        if removed.any():
+            self.add(self.pair_items[removed], self.pair_times[removed], -weight)
+            np.maximum(self.sums, 0, out=self.sums)
+        added = ~known
+        self.add(slots[added], times[added], weight)
+
+        self.pair_keys = np.concatenate([self.pair_keys[kept], keys[added]])
+        self.pair_items = np.concatenate([self.pair_items[kept], slots[added]])
+        self.pair_times = np.concatenate([self.pair_times[kept], times[added]])
+        return int(added.sum()), int(removed.sum())
+
+    def scores(self, now):
+        """Decayed score of every opportunity at `now`"""
+        return self.sums * np.exp2((self.landmark - now) / self.half_life)
+
+    def bookmark_counts(self):
+        return np.bincount(self.pair_items, minlength=len(self.ids))
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, version=np.array(STATE_VERSION), landmark=np.array(self.landmark),
+                         half_life=np.array(self.half_life),
+                         watermark=np.array(np.nan if self.watermark is None else self.watermark),
+                         ids=np.array(self.ids, dtype=str), sums=self.sums, pair_keys=self.pair_keys,
+                         pair_items=self.pair_items, pair_times=self.pair_times, published=self.published,
+                         published_bookmarks=self.published_bookmarks)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path, half_life_days=HALF_LIFE_DAYS):
+        """Load a saved state, or return None when there is none to build on"""
+        try:
+            saved = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        with saved:
+            if int(saved['version']) != STATE_VERSION or float(saved['half_life']) != half_life_days * 86400.0:
+                return None
+            state = cls(float(saved['landmark']), half_life_days)
+            watermark = float(saved['watermark'])
+            state.watermark = None if np.isnan(watermark) else watermark
+            state.ids = saved['ids'].tolist()
+            state.slots = {scholarship_id: slot for slot, scholarship_id in enumerate(state.ids)}
+            for name in ('sums', 'pair_keys', 'pair_items', 'pair_times', 'published', 'published_bookmarks'):
+                setattr(state, name, saved[name])
+        return state
+
+
+def epoch_seconds(values):
+    """Exported dates to epoch seconds in bulk, NaN where missing or unparseable
+
+    UTC ISO strings, which is what mongoexport writes, are parsed by NumPy in
+    one pass; anything else goes through parse_date one at a time.
+    """
+    raw = [value.get('$date') if isinstance(value, dict) else value for value in values]
+    if raw and all(isinstance(value, str) and value.endswith('Z') for value in raw):
+        try:
+            parsed = np.array([value[:-1] for value in raw], dtype='datetime64[ms]')
+            return parsed.astype(np.int64) / 1000.0
+        except ValueError:
+            pass
+    seconds = [to_seconds(value) for value in values]
+    return np.array([np.nan if t is None else t for t in seconds], dtype=np.float64)
+
+
+def object_id(value):
+    """Referenced ObjectId as a string, unwrapping {"$oid": ...}"""
+    if isinstance(value, dict):
+        value = value.get('$oid')
+    return None if value is None else str(value)
+
+
+def in_window(ids, times, since, until):
+    """ids and times of the events with since < time <= until"""
+    times = epoch_seconds(times)
+    keep = (times <= until) & ~np.isnan(times)
+    if since is not None:
+        keep &= times > since
+    keep &= np.array([scholarship_id is not None for scholarship_id in ids], dtype=bool)
+    return [ids[i] for i in np.flatnonzero(keep).tolist()], times[keep]
+
+
+def collect_events(users, applications, since, until):
+    """Events in (since, until] from the users and applications exports
+
+    Views and applications are timestamped and read by window. Bookmarks
+    are returned in full, dated by the user's updatedAt (the closest thing
+    to a bookmark time) clamped into the window, and diffed against the
+    saved pairs by the caller.
+    """
+    view_ids, view_times = [], []
+    bookmark_keys, bookmark_ids, bookmark_users = [], [], []
+    updated_times = []
+
+    for user in users:
+        for entry in user.get('viewHistory') or []:
+            view_ids.append(object_id(entry.get('scholarshipId')))
+            view_times.append(entry.get('viewedAt'))
+
+        bookmarks = user.get('bookmarkedScholarships') or []
+        if bookmarks:
+            user_id = document_id(user) or user.get('auth0Id')
+            for bookmark in bookmarks:
+                scholarship_id = object_id(bookmark)
+                if scholarship_id:
+                    bookmark_keys.append(pair_key(user_id, scholarship_id))
+                    bookmark_ids.append(scholarship_id)
+                    bookmark_users.append(len(updated_times))
+            updated_times.append(user.get('updatedAt'))
+
+    events = {
+        'view': in_window(view_ids, view_times, since, until),
+        'application': in_window([object_id(application.get('scholarshipId')) for application in applications],
+                                 [application.get('appliedAt') or application.get('createdAt')
+                                  for application in applications], since, until),
+    }
+
+    updated = epoch_seconds(updated_times)
+    dated = np.where(np.isnan(updated), until, np.clip(updated, -np.inf if since is None else since, until))
+    # A user can carry the same bookmark twice; count it once
+    keys, first = np.unique(np.array(bookmark_keys, dtype=np.uint64), return_index=True)
+    bookmark_times = dated[np.array(bookmark_users, dtype=np.int64)[first]] if len(first) else np.zeros(0)
+    bookmarks = (keys, [bookmark_ids[i] for i in first.tolist()], bookmark_times)
+    return events, bookmarks
+
+
+def update_state(state, users, applications, now):
+    """Fold the events since the state's watermark into its counters
+
+    Returns per-kind counts of what was added.
+    """
+    state.move_landmark(now)
+    events, (keys, bookmark_ids, bookmark_times) = collect_events(users, applications, state.watermark, now)
+    counts = {}
+    for kind, (scholarship_ids, times) in events.items():
+        state.add(state.slot_array(scholarship_ids), times, EVENT_WEIGHTS[kind])
+        counts[kind] = len(scholarship_ids)
+    counts['bookmark'], counts['unbookmarked'] = state.apply_bookmarks(
+        keys, state.slot_array(bookmark_ids), bookmark_times)
+    state.watermark = now
+    return counts
+
+
+def popularity_values(scores):
+    """Map decayed scores onto the 0-100 popularity field"""
+    positive = scores[scores > 0]
+    if not len(positive):
+        return np.zeros_like(scores)
+    reference = max(np.percentile(positive, SCALE_PERCENTILE), 1e-9)
+    return np.round(np.minimum(100 * np.log1p(scores) / np.log1p(reference), 100), 1)
+
+
+def iter_updates(state, now, scholarships=None):
+    """$set documents for every opportunity whose popularity or bookmark count changed
+
+    Changes are judged against what the previous run wrote, or against the
+    stored values when a scholarships export is given; with an export,
+    opportunities without any activity are also reset from their scraped
+    default to 0. Marks what is yielded as published.
+    """
+    values = popularity_values(state.scores(now))
+    bookmarks = state.bookmark_counts()
+
+    if scholarships is None:
+        changed = (values != state.published) | (bookmarks != state.published_bookmarks)
+        for slot in np.flatnonzero(changed).tolist():
+            yield {'_id': state.ids[slot], 'popularity': float(values[slot]), 'bookmarkCount': int(bookmarks[slot])}
+    else:
+        for scholarship in scholarships:
+            scholarship_id = document_id(scholarship)
+            slot = state.slots.get(scholarship_id)
+            popularity = 0.0 if slot is None else float(values[slot])
+            bookmark_count = 0 if slot is None else int(bookmarks[slot])
+            if scholarship.get('popularity') != popularity or scholarship.get('bookmarkCount', 0) != bookmark_count:
+                yield {'_id': scholarship_id, 'popularity': popularity, 'bookmarkCount': bookmark_count}
+    state.published = values
+    state.published_bookmarks = bookmarks
+
+
+def check_incremental(users, applications, now, half_life_days=HALF_LIFE_DAYS):
+    """Score the events in two runs split at their midpoint and compare with one run over everything"""
+    times = [to_seconds(entry.get('viewedAt')) for user in users for entry in user.get('viewHistory') or []]
+    times += [to_seconds(application.get('appliedAt')) for application in applications]
+    times = [t for t in times if t is not None]
+    if not times:
+        print("⚠️  No timestamped events to split")
+        return True
+    midpoint = float(np.median(times))
+
+    # What the exports looked like at the midpoint: later views, applications and bookmark edits not made yet
+    earlier_users = []
+    for user in users:
+        updated = to_seconds(user.get('updatedAt'))
+        earlier = dict(user)
+        earlier['viewHistory'] = [entry for entry in user.get('viewHistory') or []
+                                  if (to_seconds(entry.get('viewedAt')) or 0) <= midpoint]
+        if updated is None or updated > midpoint:
+            earlier['bookmarkedScholarships'] = []
+        earlier_users.append(earlier)
+    earlier_applications = [application for application in applications
+                            if (to_seconds(application.get('appliedAt')) or 0) <= midpoint]
+
+    batch = PopularityState(now, half_life_days)
+    update_state(batch, users, applications, now)
+
+    incremental = PopularityState(midpoint, half_life_days)
+    update_state(incremental, earlier_users, earlier_applications, midpoint)
+    update_state(incremental, users, applications, now)
+
+    batch_scores = dict(zip(batch.ids, batch.scores(now)))
+    incremental_scores = dict(zip(incremental.ids, incremental.scores(now)))
+    ids = sorted(set(batch_scores) | set(incremental_scores))
+    a = np.array([batch_scores.get(i, 0.0) for i in ids])
+    b = np.array([incremental_scores.get(i, 0.0) for i in ids])
+    worst = float(np.max(np.abs(a - b) / np.maximum(np.abs(a), 1e-9))) if ids else 0.0
+    matches = np.allclose(a, b, rtol=1e-9, atol=1e-12)
+    print(f"{'✅' if matches else '❌'} Incremental vs batch: {len(ids):,} opportunities, "
+          f"worst relative difference {worst:.2e}")
+    return matches
+
+
+def parse_args():
+    """Parse command line options for the popularity job"""
+    parser = argparse.ArgumentParser(description="Compute time-decayed popularity scores from user activity")
+    parser.add_argument('--users', required=True, help="Users export (bookmarkedScholarships and viewHistory)")
+    parser.add_argument('--applications', help="Applications export")
+    parser.add_argument('--scholarships',
+                        help="Scholarships export; resets opportunities without activity and skips unchanged ones")
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help="Saved counters used for incremental runs")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore the saved counters and replay everything")
+    parser.add_argument('--half-life-days', type=float, default=HALF_LIFE_DAYS, help="Score half-life in days")
+    parser.add_argument('--as-of', help="Score as of this ISO time instead of now")
+    parser.add_argument('--check', action='store_true', help="Check an incremental run against a batch run")
+    parser.add_argument('--output', help="NDJSON output (default: data/popularity_<timestamp>.ndjson)")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run the popularity job"""
+    args = parse_args()
+    print("🚀 Computing popularity scores...")
+    start = time.perf_counter()
+
+    now = to_seconds(args.as_of) if args.as_of else (datetime.utcnow() - EPOCH).total_seconds()
+    if now is None:
+        print(f"❌ Could not parse --as-of {args.as_of}")
+        sys.exit(1)
+    users = load_export(args.users)
+    applications = load_export(args.applications) if args.applications else []
+    print(f"📊 {len(users):,} users, {len(applications):,} applications")
+
+    if args.check:
+        sys.exit(0 if check_incremental(users, applications, now, args.half_life_days) else 1)
+
+    state = None if args.rebuild else PopularityState.load(args.state, args.half_life_days)
+    if state is not None and state.watermark is not None and state.watermark > now:
+        print("⚠️  Saved counters are newer than --as-of; replaying everything")
+        state = None
+    if state is None:
+        state = PopularityState(now, args.half_life_days)
+    counts = update_state(state, users, applications, now)
+    print(f"📊 +{counts['view']:,} views, +{counts['bookmark']:,} bookmarks "
+          f"(-{counts['unbookmarked']:,}), +{counts['application']:,} applications")
+
+    scholarships = load_export(args.scholarships) if args.scholarships else None
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = args.output or os.path.join('data', f"popularity_{timestamp}.ndjson")
+    written = write_ndjson(output_file, iter_updates(state, now, scholarships))
+    state.save(args.state)
+
+    script_file = os.path.join(os.path.dirname(output_file) or '.', f"import_popularity_{timestamp}.js")
+    with open(script_file, 'w', encoding='utf-8') as f:
+        f.write(bulk_update_script('scholarships', os.path.abspath(output_file),
+                                   f"Popularity scores (timestamp: {timestamp})"))
+
+    print(f"✅ Scored {len(state.ids):,} opportunities, {written:,} updates in {time.perf_counter() - start:.2f}s")
+    print(f"📁 Saved to: {output_file}")
+    print(f"📁 Import script: {script_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Batch recommendation precompute
+Encodes opportunity eligibility and user profiles as bitmasks and amount
+intervals in NumPy arrays and computes every user's top-K opportunities in
+vectorized blocks, so GET /api/users/:auth0Id/recommendations only has to
+read a stored list
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrapers'))
+from vocabulary import get_vocabulary
+from mongo_export import load_export, document_id, write_ndjson, bulk_upsert_script
+
+# Opportunity values that match every user, as in the recommendations route
+WILDCARDS = {
+    'gradeLevels': [],
+    'subjects': ['Any'],
+    'regions': ['National', 'International'],
+    'districts': ['All Districts', 'Statewide', 'National', 'International', 'Texas Districts'],
+    'fundingTypes': ['General'],
+}
+
+# User profile field for each eligibility field
+USER_FIELDS = {
+    'gradeLevels': 'gradeLevel',
+    'subjects': 'subjects',
+    'regions': 'schoolRegion',
+    'districts': 'schoolDistrict',
+    'fundingTypes': 'fundingNeeds',
+}
+
+# Users without amount preferences get the User model defaults
+DEFAULT_MIN_AMOUNT = 0
+DEFAULT_MAX_AMOUNT = 10000
+
+
+def as_list(value):
+    """Profile fields may be a single string or a list"""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class EligibilityIndex:
+    """Opportunities encoded column-wise, ordered by the route's ranking"""
+
+    def __init__(self, opportunities):
+        vocabulary = get_vocabulary()
+        # Only what the route would consider, ranked by popularity then views
+        candidates = [op for op in opportunities if op.get('isActive', True) and op.get('isVerified', True)]
+        candidates.sort(key=lambda op: (-(op.get('popularity') or 0), -(op.get('viewCount') or 0)))
+
+        self.ids = [document_id(op, default=str(index)) for index, op in enumerate(candidates)]
+        self.size = len(candidates)
+        self.masks = {}
+        self.matches_all = {}
+
+        for field in WILDCARDS:
+            masks = np.zeros(self.size, dtype=np.uint64)
+            for index, op in enumerate(candidates):
+                labels = op.get('eligibility', {}).get(field) or []
+                if field == 'gradeLevels' and 'Any' in labels:
+                    labels = ['all grades']
+                masks[index] = vocabulary.encode(field, labels)
+            self.masks[field] = masks
+
+            wildcard = np.uint64(vocabulary.encode_values(field, WILDCARDS[field]))
+            matches_all = (masks & wildcard) != 0
+            if field == 'districts':
+                # The route does not filter on districts, so opportunities without any match everyone
+                matches_all |= masks == 0
+            self.matches_all[field] = matches_all
+
+        amounts = [op.get('amount') or {} for op in candidates]
+        self.amount_min = np.array([amount.get('min') or 0 for amount in amounts], dtype=np.float64)
+        self.amount_max = np.array([amount.get('max') or 0 for amount in amounts], dtype=np.float64)
+
+
+class UserProfiles:
+    """User profiles as bitmask columns, collapsed to distinct profiles"""
+
+    def __init__(self, users):
+        vocabulary = get_vocabulary()
+        self.auth0_ids = [user.get('auth0Id') or document_id(user) for user in users]
+        columns = []
+        for field, user_field in USER_FIELDS.items():
+            columns.append(np.array([vocabulary.encode(field, as_list(user.get(user_field))) for user in users],
+                                    dtype=np.uint64))
+
+        preferences = [user.get('preferences') or {} for user in users]
+        columns.append(np.array([p.get('minAmount') or DEFAULT_MIN_AMOUNT for p in preferences], dtype=np.uint64))
+        columns.append(np.array([p.get('maxAmount') or DEFAULT_MAX_AMOUNT for p in preferences], dtype=np.uint64))
+
+        # Users with identical profiles get identical recommendations, so only
+        # distinct rows are scored
+        rows = np.stack(columns, axis=1) if users else np.zeros((0, len(columns)), dtype=np.uint64)
+        self.unique_rows, self.profile_of_user = np.unique(rows, axis=0, return_inverse=True)
+        self.profile_of_user = self.profile_of_user.reshape(-1)
+        self.masks = {field: self.unique_rows[:, i] for i, field in enumerate(USER_FIELDS)}
+        self.min_amount = self.unique_rows[:, len(USER_FIELDS)].astype(np.float64)
+        self.max_amount = self.unique_rows[:, len(USER_FIELDS) + 1].astype(np.float64)
+
+    @property
+    def size(self):
+        return len(self.unique_rows)
+
+
+def top_k(index, profiles, k=10, chunk_size=8192, block_size=512):
+    """Ranked top-K opportunity positions for every distinct profile (-1 pads short lists)
+
+    Opportunities are scanned in ranking order a chunk at a time; a profile
+    drops out as soon as it has K matches, so most of the users x
+    opportunities matrix is never evaluated.
+    """
+    results = np.full((profiles.size, k), -1, dtype=np.int64)
+    found = np.zeros(profiles.size, dtype=np.int64)
+    active = np.arange(profiles.size)
+
+    for start in range(0, index.size, chunk_size):
+        if not active.size:
+            break
+        stop = min(start + chunk_size, index.size)
+        opp_masks = {field: masks[start:stop] for field, masks in index.masks.items()}
+        opp_all = {field: matches[start:stop] for field, matches in index.matches_all.items()}
+        opp_min = index.amount_min[start:stop]
+        opp_max = index.amount_max[start:stop]
+
+        for block_start in range(0, active.size, block_size):
+            block = active[block_start:block_start + block_size]
+
+            eligible = (opp_min[None, :] <= profiles.max_amount[block, None]) & \
+                       (opp_max[None, :] >= profiles.min_amount[block, None])
+            for field, masks in opp_masks.items():
+                overlap = (masks[None, :] & profiles.masks[field][block, None]) != 0
+                eligible &= overlap | opp_all[field][None, :]
+
+            # Rank of each match within the profile's list so far; keep the first K
+            rank = np.cumsum(eligible, axis=1) + found[block, None]
+            keep = eligible & (rank <= k)
+            rows, cols = np.nonzero(keep)
+            results[block[rows], rank[rows, cols] - 1] = start + cols
+            found[block] = np.minimum(rank[:, -1], k)
+
+        active = active[found[active] < k]
+
+    return results
+
+
+def build_recommendations(users, opportunities, k=10):
+    """Compute recommendation documents for every user"""
+    index = EligibilityIndex(opportunities)
+    profiles = UserProfiles(users)
+    positions = top_k(index, profiles, k=k) if index.size else np.full((profiles.size, k), -1, dtype=np.int64)
+
+    generated_at = datetime.now().isoformat()
+    ids = index.ids
+    # Recommendation lists are shared by every user with the same profile
+    profile_lists = [[ids[p] for p in row if p >= 0] for row in positions.tolist()]
+    for user_index, auth0_id in enumerate(profiles.auth0_ids):
+        yield {
+            'auth0Id': auth0_id,
+            'scholarshipIds': profile_lists[profiles.profile_of_user[user_index]],
+            'k': k,
+            'generatedAt': generated_at,
+        }
+
+
+def parse_args():
+    """Parse command line options for the recommendation job"""
+    parser = argparse.ArgumentParser(description="Precompute top-K recommendations for every user")
+    parser.add_argument('--users', required=True, help="Users export (mongoexport NDJSON or JSON array)")
+    parser.add_argument('--scholarships', required=True, help="Scholarships export (NDJSON or JSON array)")
+    parser.add_argument('--k', type=int, default=10, help="Recommendations per user")
+    parser.add_argument('--output', help="NDJSON output (default: data/recommendations_<timestamp>.ndjson)")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run the recommendation job"""
+    args = parse_args()
+    print("🚀 Precomputing recommendations...")
+    start = time.perf_counter()
+
+    users = load_export(args.users)
+    opportunities = load_export(args.scholarships)
+    print(f"📊 {len(users):,} users × {len(opportunities):,} opportunities")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = args.output or os.path.join('data', f"recommendations_{timestamp}.ndjson")
+    written = write_ndjson(output_file, build_recommendations(users, opportunities, k=args.k))
+
+    script_file = os.path.join(os.path.dirname(output_file) or '.', f"import_recommendations_{timestamp}.js")
+    with open(script_file, 'w', encoding='utf-8') as f:
+        f.write(bulk_upsert_script('recommendations', os.path.abspath(output_file), 'auth0Id',
+                                   f"Precomputed recommendations (timestamp: {timestamp})"))
+
+    print(f"✅ Wrote recommendations for {written:,} users in {time.perf_counter() - start:.2f}s")
+    print(f"📁 Saved to: {output_file}")
+    print(f"📁 Import script: {script_file}")
+
+
+if __name__ == "__main__":
+    main()
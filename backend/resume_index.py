@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Resume passage index for essay assist
+Splits a parsed resume into short passages under their section headings and
+indexes them with BM25, one small JSON file per user. For each question only
+the best-matching passages, plus the requirements of the grant being applied
+for, go into the prompt instead of the whole resume.
+"""
+
+import os
+import re
+import glob
+import json
+import math
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from collections import OrderedDict
+
+from search_index import analyze, K1, B
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = os.path.join('data', 'resume_index')
+
+# Words per passage; a passage never spans two sections
+CHUNK_WORDS = 60
+# Passages put in a prompt, and the most resume words they may add up to
+TOP_PASSAGES = 3
+MAX_PASSAGE_WORDS = 220
+CACHE_SIZE = 256
+
+# "EXPERIENCE", "Professional Development:", "Skills & Certifications"
+HEADING_PATTERN = re.compile(r"^(?:[A-Z][A-Z0-9 &/,'()-]{2,48}|[A-Z][\w &/,'()-]{2,48}:)$")
+BULLET_PATTERN = re.compile(r'^[\s•·▪◦●*\-–]+')
+
+# Questions from ESSAY_ASSIST_SETUP.md, used by --benchmark
+EXAMPLE_QUESTIONS = [
+    "How can I highlight my teaching experience in grant applications?",
+    "What are the key elements of a compelling grant proposal?",
+    "How should I structure my grant application essay?",
+    "What specific examples from my background should I mention?",
+    "Help me write a personal statement for this education grant",
+    "Which of my grants or awards should I mention for a robotics funding request?",
+]
+
+
+def chunk_resume(text, chunk_words=CHUNK_WORDS):
+    """Passages of up to chunk_words words, each tagged with the section heading above it"""
+    chunks = []
+    heading = ''
+    lines = []
+    count = 0
+
+    def flush():
+        nonlocal lines, count
+        if lines:
+            chunks.append({'heading': heading, 'text': '\n'.join(lines)})
+        lines, count = [], 0
+
+    for raw in text.splitlines():
+        line = BULLET_PATTERN.sub('', raw).strip()
+        if not line:
+            continue
+        if HEADING_PATTERN.match(line) and len(line.split()) <= 6:
+            flush()
+            heading = line.rstrip(':').strip()
+            continue
+        words = line.split()
+        # PDF text often arrives as a few very long lines
+        for start in range(0, len(words), chunk_words):
+            piece = words[start:start + chunk_words]
+            if count + len(piece) > chunk_words:
+                flush()
+            lines.append(' '.join(piece))
+            count += len(piece)
+    flush()
+    return chunks
+
+
+def resume_hash(text):
+    return hashlib.sha1(text.strip().encode('utf-8')).hexdigest()
+
+
+class ResumeIndex:
+    """BM25 over one resume's passages"""
+
+    def __init__(self, user_id, digest, chunks):
+        self.user_id = user_id
+        self.digest = digest
+        self.chunks = chunks
+        self.terms = []
+        self.df = {}
+        for chunk in chunks:
+            terms = {}
+            for term in analyze(f"{chunk['heading']} {chunk['text']}"):
+                terms[term] = terms.get(term, 0) + 1
+            self.terms.append(terms)
+            for term in terms:
+                self.df[term] = self.df.get(term, 0) + 1
+        self.lengths = [sum(terms.values()) for terms in self.terms]
+        self.avgdl = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    @classmethod
+    def from_text(cls, user_id, text):
+        return cls(user_id, resume_hash(text), chunk_resume(text))
+
+    def to_dict(self):
+        return {'version': INDEX_VERSION, 'userId': self.user_id, 'digest': self.digest, 'chunks': self.chunks}
+
+    @classmethod
+    def from_dict(cls, saved):
+        return cls(saved['userId'], saved['digest'], saved['chunks'])
+
+    def search(self, question, k=TOP_PASSAGES, max_words=MAX_PASSAGE_WORDS):
+        """Best passages for a question in resume order; the opening passage when nothing matches"""
+        n = len(self.chunks)
+        scores = [0.0] * n
+        for term in set(analyze(question)):
+            df = self.df.get(term)
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for position, terms in enumerate(self.terms):
+                tf = terms.get(term)
+                if tf:
+                    norm = K1 * (1 - B + B * self.lengths[position] / self.avgdl)
+                    scores[position] += idf * tf * (K1 + 1) / (tf + norm)
+
+        ranked = sorted((position for position in range(n) if scores[position] > 0),
+                        key=lambda position: -scores[position])
+        if not ranked and n:
+            ranked = [0]
+        chosen = []
+        words = 0
+        for position in ranked[:k]:
+            length = len(self.chunks[position]['text'].split())
+            if chosen and words + length > max_words:
+                break
+            chosen.append(position)
+            words += length
+        return [self.chunks[position] for position in sorted(chosen)]
+
+
+class ResumeStore:
+    """Per-user resume indexes on disk, with the most recently used kept in memory"""
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR, cache_size=CACHE_SIZE):
+        self.index_dir = index_dir
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def path(self, user_id):
+        # User ids like "auth0|123" are not safe file names
+        return os.path.join(self.index_dir, f"{hashlib.sha1(user_id.encode('utf-8')).hexdigest()}.json")
+
+    def _remember(self, user_id, index):
+        self.cache[user_id] = index
+        self.cache.move_to_end(user_id)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def get(self, user_id):
+        """The user's index, or None if they have no resume indexed"""
+        with self.lock:
+            index = self.cache.get(user_id)
+            if index is not None:
+                self.cache.move_to_end(user_id)
+                return index
+        try:
+            with open(self.path(user_id), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get('version') != INDEX_VERSION:
+            return None
+        index = ResumeIndex.from_dict(saved)
+        with self.lock:
+            self._remember(user_id, index)
+        return index
+
+    def put(self, user_id, text):
+        """Index a resume unless the same text is already indexed; returns the index"""
+        index = self.get(user_id)
+        if index is not None and index.digest == resume_hash(text):
+            return index
+        index = ResumeIndex.from_text(user_id, text)
+        os.makedirs(self.index_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(index.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp_path, self.path(user_id))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self.lock:
+            self._remember(user_id, index)
+        return index
+
+    def delete(self, user_id):
+        with self.lock:
+            self.cache.pop(user_id, None)
+        try:
+            os.remove(self.path(user_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+
+def grant_requirements(grant):
+    """The parts of a scholarship document that matter when writing an application for it"""
+    if not grant:
+        return ''
+    lines = []
+    if grant.get('title'):
+        lines.append(f"Title: {grant['title']}" + (f" ({grant['organization']})" if grant.get('organization') else ''))
+    amount = grant.get('amount') or {}
+    if isinstance(amount, dict) and (amount.get('min') or amount.get('max')):
+        lines.append(f"Amount: ${amount.get('min') or 0:,} - ${amount.get('max') or 0:,}")
+    deadline = (grant.get('application') or {}).get('deadline')
+    if isinstance(deadline, dict):
+        deadline = deadline.get('$date')
+    if deadline:
+        lines.append(f"Deadline: {str(deadline)[:10]}")
+    eligibility = grant.get('eligibility') or {}
+    for field, label in (('gradeLevels', 'Grades'), ('subjects', 'Subjects'), ('fundingTypes', 'Funds')):
+        if eligibility.get(field):
+            lines.append(f"{label}: {', '.join(eligibility[field])}")
+    if eligibility.get('requirements'):
+        lines.append(f"Requirements: {eligibility['requirements']}")
+    return '\n'.join(lines)
+
+
+def build_prompt(question, passages=(), grant=None):
+    """The user turn: retrieved resume passages, the target grant, then the question"""
+    parts = []
+    if passages:
+        parts.append("Relevant parts of the user's resume:\n" + '\n\n'.join(
+            f"[{passage['heading']}] {passage['text']}" if passage['heading'] else passage['text']
+            for passage in passages))
+    requirements = grant_requirements(grant)
+    if requirements:
+        parts.append(f"Grant the user is applying for:\n{requirements}")
+    parts.append(f"User Question: {question}")
+    return '\n\n'.join(parts)
+
+
+def measure_first_token(upstream, model, system, prompt):
+    """Seconds until an Ollama-compatible server streams its first token"""
+    import requests
+    start = time.perf_counter()
+    with requests.post(f"{upstream.rstrip('/')}/api/generate", stream=True, timeout=(5, 300),
+                       json={'model': model, 'system': system, 'prompt': prompt, 'stream': True,
+                             'options': {'num_predict': 1}}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line and json.loads(line).get('response'):
+                break
+    return time.perf_counter() - start
+
+
+def run_benchmark(resume_dir, upstream=None, model=None):
+    """Compare full-resume and retrieved-passage prompts over a directory of <userId>.txt resumes
+
+    Prompt size and retrieval time are always reported; time to first token
+    is only measured when a real Ollama-compatible upstream is given, since a
+    stub's prefill delay would just restate the prompt lengths.
+    """
+    from essay_gateway import DEFAULT_MODEL, build_system_prompt
+    model = model or DEFAULT_MODEL
+
+    paths = sorted(glob.glob(os.path.join(resume_dir, '*.txt')))
+    store = ResumeStore(tempfile.mkdtemp(prefix='resume_index_'))
+    full_chars, retrieved_chars, full_ttft, retrieved_ttft, lookups = [], [], [], [], []
+    start = time.perf_counter()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            store.put(os.path.basename(path)[:-len('.txt')], f.read())
+    build_seconds = time.perf_counter() - start
+
+    for path in paths:
+        user_id = os.path.basename(path)[:-len('.txt')]
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            resume = f.read()
+        for question in EXAMPLE_QUESTIONS:
+            full = (build_system_prompt(resume), f"User Question: {question}")
+            started = time.perf_counter()
+            passages = store.get(user_id).search(question)
+            lookups.append(time.perf_counter() - started)
+            retrieved = (build_system_prompt(''), build_prompt(question, passages))
+            full_chars.append(sum(map(len, full)))
+            retrieved_chars.append(sum(map(len, retrieved)))
+            if upstream:
+                full_ttft.append(measure_first_token(upstream, model, *full))
+                retrieved_ttft.append(measure_first_token(upstream, model, *retrieved))
+
+    def mean(values):
+        return sum(values) / len(values) if values else 0.0
+
+    def p50(values):
+        return sorted(values)[len(values) // 2] if values else 0.0
+
+    print(f"📊 {len(paths)} resumes x {len(EXAMPLE_QUESTIONS)} questions; indexed in {build_seconds * 1000:.1f}ms, "
+          f"retrieval p50 {p50(lookups) * 1e6:.0f}µs")
+    print(f"   Prompt characters: full resume {mean(full_chars):,.0f}, retrieved passages {mean(retrieved_chars):,.0f} "
+          f"({1 - mean(retrieved_chars) / max(mean(full_chars), 1):.0%} shorter)")
+    if upstream:
+        print(f"   Time to first token p50 ({model} at {upstream}): full resume {p50(full_ttft) * 1000:.0f}ms, "
+              f"retrieved passages {p50(retrieved_ttft) * 1000:.0f}ms")
+    else:
+        print("   Time to first token not measured; pass --upstream to time a real model")
+
+
+def parse_args():
+    """Parse command line options for the resume index"""
+    parser = argparse.ArgumentParser(description="Index resumes and retrieve the passages relevant to a question")
+    parser.add_argument('--index-dir', default=DEFAULT_INDEX_DIR, help="Directory of per-user index files")
+    parser.add_argument('--user', help="User id to index or search")
+    parser.add_argument('--resume', help="Resume text file to index for --user")
+    parser.add_argument('--question', help="Show the passages --user's resume gives for this question")
+    parser.add_argument('--benchmark', metavar='DIR', help="Benchmark over a directory of <userId>.txt resumes")
+    parser.add_argument('--upstream', help="Ollama-compatible URL to measure time to first token against")
+    parser.add_argument('--model', help="Model for --upstream")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run the resume index"""
+    args = parse_args()
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.upstream, args.model)
+        return
+    if not args.user:
+        print("❌ --user is required unless running --benchmark")
+        return
+    store = ResumeStore(args.index_dir)
+    if args.resume:
+        with open(args.resume, 'r', encoding='utf-8', errors='ignore') as f:
+            index = store.put(args.user, f.read())
+        print(f"✅ Indexed {len(index.chunks)} passages for {args.user}")
+    if args.question:
+        index = store.get(args.user)
+        if index is None:
+            print(f"❌ No resume indexed for {args.user}")
+            return
+        print(build_prompt(args.question, index.search(args.question)))
+
+
+if __name__ == "__main__":
+    main()
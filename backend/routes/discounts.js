@@ -1,6 +1,33 @@
 const express = require('express');
+const mongoose = require('mongoose');
 const router = express.Router();
 const Discount = require('../models/Discount');
+const { currentGeneration } = require('../models/writeGeneration');
+
+// Search text is matched literally: user input is never compiled as a pattern
+const escapeRegex = value => String(value).replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+
+// The materialized view is only served while it is current: no discount was written after
+// it was imported. Otherwise the distinct endpoints count live.
+const isCurrentView = async materialized =>
+  Number.isInteger(materialized?.generation) &&
+  materialized.generation === await currentGeneration('discounts');
+
+// Values and counts for a discount field, from the view facet_counts.py materializes,
+// falling back to a distinct query when it has not been imported or is stale
+const facetValues = async (facet, field) => {
+  const materialized = await mongoose.connection.db
+    .collection('facetcounts')
+    .findOne({ name: 'discounts' }, { projection: { generation: 1, [`facets.${facet}`]: 1 } });
+  const entries = materialized?.facets?.[facet];
+  if (!entries || !(await isCurrentView(materialized))) {
+    return { values: (await Discount.distinct(field)).sort() };
+  }
+  return {
+    values: entries.map(entry => entry.value).sort(),
+    counts: Object.fromEntries(entries.map(entry => [entry.value, entry.count]))
+  };
+};
 
 // GET /api/discounts - Get all discounts with filtering and pagination
 router.get('/', async (req, res) => {
@@ -53,11 +80,12 @@ router.get('/', async (req, res) => {
 
     // Search filter
     if (search) {
+      const pattern = escapeRegex(search);
       filter.$or = [
-        { title: { $regex: search, $options: 'i' } },
-        { description: { $regex: search, $options: 'i' } },
-        { company: { $regex: search, $options: 'i' } },
-        { tags: { $in: [new RegExp(search, 'i')] } }
+        { title: { $regex: pattern, $options: 'i' } },
+        { description: { $regex: pattern, $options: 'i' } },
+        { company: { $regex: pattern, $options: 'i' } },
+        { tags: { $in: [new RegExp(pattern, 'i')] } }
       ];
     }
 
@@ -148,11 +176,12 @@ router.get('/featured', async (req, res) => {
 // GET /api/discounts/categories - Get all available categories
 router.get('/categories', async (req, res) => {
   try {
-    const categories = await Discount.distinct('category');
+    const { values, counts } = await facetValues('categories', 'category');
     
     res.json({
       success: true,
-      categories: categories.sort()
+      categories: values,
+      ...(counts && { counts })
     });
 
   } catch (error) {
@@ -168,11 +197,12 @@ router.get('/categories', async (req, res) => {
 // GET /api/discounts/companies - Get all available companies
 router.get('/companies', async (req, res) => {
   try {
-    const companies = await Discount.distinct('company');
+    const { values, counts } = await facetValues('companies', 'company');
     
     res.json({
       success: true,
-      companies: companies.sort()
+      companies: values,
+      ...(counts && { counts })
     });
 
   } catch (error) {
@@ -188,11 +218,12 @@ router.get('/companies', async (req, res) => {
 // GET /api/discounts/sources - Get all available sources
 router.get('/sources', async (req, res) => {
   try {
-    const sources = await Discount.distinct('source');
+    const { values, counts } = await facetValues('sources', 'source');
     
     res.json({
       success: true,
-      sources: sources.sort()
+      sources: values,
+      ...(counts && { counts })
     });
 
   } catch (error) {
@@ -3,6 +3,7 @@ const multer = require('multer');
 const pdfParse = require('pdf-parse');
 const mammoth = require('mammoth');
 const axios = require('axios');
+const Scholarship = require('../models/Scholarship');
 const router = express.Router();
 
 // Configure multer for file uploads
@@ -25,9 +26,32 @@ const upload = multer({
 // Store parsed resumes in memory (in production, use a database)
 const userResumes = new Map();
 
+// When set, requests go through essay_gateway.py, which caches the status probe,
+// sends only the resume passages relevant to each question, streams tokens and
+// queues generations fairly across users
+const ESSAY_GATEWAY_URL = process.env.ESSAY_GATEWAY_URL;
+
+// The grant a question is about, so the gateway can add its requirements to the prompt
+async function loadGrant(scholarshipId) {
+  if (!scholarshipId) {
+    return undefined;
+  }
+  try {
+    return await Scholarship.findById(scholarshipId)
+      .select('title organization amount application.deadline eligibility')
+      .lean();
+  } catch (error) {
+    return undefined;
+  }
+}
+
 // Check if Ollama is available
 async function checkOllamaStatus() {
   try {
+    if (ESSAY_GATEWAY_URL) {
+      const response = await axios.get(`${ESSAY_GATEWAY_URL}/status`, { timeout: 5000 });
+      return response.data;
+    }
     const response = await axios.get('http://localhost:11434/api/tags', { timeout: 2000 });
     return { available: true, models: response.data.models || [] };
   } catch (error) {
@@ -56,8 +80,32 @@ async function parseResume(buffer, mimetype) {
   }
 }
 
+// Ask the gateway; it answers with the same messages callOllama uses
+async function callGateway(prompt, resumeContent, userId, grant) {
+  try {
+    const response = await axios.post(`${ESSAY_GATEWAY_URL}/chat`, {
+      message: prompt,
+      userId,
+      resume: resumeContent,
+      grant
+    }, {
+      timeout: 180000 // covers time spent queued behind other users
+    });
+    return response.data.response;
+  } catch (error) {
+    console.error('Essay gateway error:', error.message);
+    if (error.response && error.response.data && error.response.data.error) {
+      throw new Error(error.response.data.error);
+    }
+    throw new Error(`AI service unavailable: ${error.message}`);
+  }
+}
+
 // Call Ollama API for LLM responses
-async function callOllama(prompt, resumeContent = '') {
+async function callOllama(prompt, resumeContent = '', userId = 'anonymous', grant = undefined) {
+  if (ESSAY_GATEWAY_URL) {
+    return callGateway(prompt, resumeContent, userId, grant);
+  }
   try {
     // First check if Ollama is available
     const ollamaStatus = await checkOllamaStatus();
@@ -134,7 +182,7 @@ router.post('/upload-resume', upload.single('resume'), async (req, res) => {
 // Chat with AI assistant
 router.post('/chat', async (req, res) => {
   try {
-    const { message, userId } = req.body;
+    const { message, userId, scholarshipId } = req.body;
     
     if (!message || !message.trim()) {
       return res.status(400).json({ error: 'Message is required' });
@@ -142,8 +190,9 @@ router.post('/chat', async (req, res) => {
 
     const userResume = userResumes.get(userId || 'anonymous');
     const resumeContent = userResume ? userResume.content : '';
+    const grant = ESSAY_GATEWAY_URL ? await loadGrant(scholarshipId) : undefined;
 
-    const aiResponse = await callOllama(message, resumeContent);
+    const aiResponse = await callOllama(message, resumeContent, userId || 'anonymous', grant);
 
     res.json({ 
       response: aiResponse,
@@ -155,6 +204,62 @@ router.post('/chat', async (req, res) => {
   }
 });
 
+// Chat with AI assistant, streaming newline-delimited JSON: {token} lines, then {done, response}
+router.post('/chat/stream', async (req, res) => {
+  const { message, userId, scholarshipId } = req.body;
+
+  if (!message || !message.trim()) {
+    return res.status(400).json({ error: 'Message is required' });
+  }
+
+  const userResume = userResumes.get(userId || 'anonymous');
+  const resumeContent = userResume ? userResume.content : '';
+  res.setHeader('Content-Type', 'application/x-ndjson; charset=utf-8');
+
+  if (!ESSAY_GATEWAY_URL) {
+    // Without the gateway the whole answer arrives as one line
+    try {
+      const aiResponse = await callOllama(message, resumeContent, userId || 'anonymous');
+      res.end(JSON.stringify({ done: true, response: aiResponse, hasResume: !!userResume }) + '\n');
+    } catch (error) {
+      console.error('Chat error:', error);
+      res.status(500).end(JSON.stringify({ error: error.message }) + '\n');
+    }
+    return;
+  }
+
+  try {
+    const upstream = await axios.post(`${ESSAY_GATEWAY_URL}/chat`, {
+      message,
+      userId: userId || 'anonymous',
+      resume: resumeContent,
+      grant: await loadGrant(scholarshipId),
+      stream: true
+    }, {
+      responseType: 'stream',
+      timeout: 180000
+    });
+    // pipe() does not end the response when the source fails, so a gateway that drops
+    // mid-stream would leave the client waiting; finish the stream with an error line
+    upstream.data.on('error', error => {
+      console.error('Essay gateway stream error:', error.message);
+      if (!res.writableEnded) {
+        res.end('\n' + JSON.stringify({ error: 'AI service disconnected' }) + '\n');
+      }
+    });
+    upstream.data.pipe(res);
+    // The request's 'close' fires as soon as its body is read on Node 20, so watch the
+    // response to stop generating when the client goes away before the essay is done
+    res.on('close', () => {
+      if (!res.writableFinished) upstream.data.destroy();
+    });
+  } catch (error) {
+    console.error('Essay gateway error:', error.message);
+    res.status(error.response ? error.response.status : 500)
+      .end(JSON.stringify({ error: 'AI service unavailable' }) + '\n');
+  }
+});
+
 // Get resume status
 router.get('/resume-status/:userId', (req, res) => {
   const userId = req.params.userId || 'anonymous';
@@ -171,6 +276,11 @@ router.get('/resume-status/:userId', (req, res) => {
 router.delete('/resume/:userId', (req, res) => {
   const userId = req.params.userId || 'anonymous';
   const deleted = userResumes.delete(userId);
+  if (deleted && ESSAY_GATEWAY_URL) {
+    // Drop the gateway's copy of the resume and the conversation built on it
+    axios.delete(`${ESSAY_GATEWAY_URL}/resume/${encodeURIComponent(userId)}`, { timeout: 5000 })
+      .catch(error => console.error('Essay gateway error:', error.message));
+  }
   
   res.json({ 
     success: deleted,
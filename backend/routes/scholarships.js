@@ -1,12 +1,17 @@
 const express = require('express');
+const mongoose = require('mongoose');
 const { body, validationResult, query } = require('express-validator');
 const Scholarship = require('../models/Scholarship');
 const User = require('../models/User');
+const { currentGeneration } = require('../models/writeGeneration');
 
 // Note: AI matching removed for project reorganization
 
 const router = express.Router();
 
+// Search text is matched literally: user input is never compiled as a pattern
+const escapeRegex = value => String(value).replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+
 // Simple validation middleware
 const validateScholarshipQuery = [
   query('page').optional().isInt({ min: 1 }),
@@ -70,7 +75,7 @@ router.get('/', validateScholarshipQuery, async (req, res) => {
 
     // Text search - search in title, organization, and description
     if (search) {
-      const searchRegex = new RegExp(search, 'i');
+      const searchRegex = new RegExp(escapeRegex(search), 'i');
       andConditions.push({
         $or: [
           { title: searchRegex },
@@ -130,6 +135,74 @@ router.get('/', validateScholarshipQuery, async (req, res) => {
   }
 });
 
+// Facet counts materialized by facet_counts.py; counted live when the view has not been imported
+// or is stale
+const FACET_PATHS = {
+  gradeLevels: '$eligibility.gradeLevels',
+  subjects: '$eligibility.subjects',
+  fundingTypes: '$eligibility.fundingTypes',
+  regions: '$eligibility.regions',
+  source: '$source'
+};
+
+const countFacetsLive = async () => {
+  const valueCounts = path => [
+    { $unwind: path },
+    { $group: { _id: path, count: { $sum: 1 } } },
+    { $sort: { count: -1, _id: 1 } },
+    { $project: { _id: 0, value: '$_id', count: 1 } }
+  ];
+  const stages = Object.fromEntries(
+    Object.entries(FACET_PATHS).map(([facet, path]) => [facet, valueCounts(path)])
+  );
+  stages.amount = [
+    {
+      $group: {
+        _id: {
+          $switch: {
+            branches: [
+              { case: { $not: [{ $gt: ['$amount.max', 0] }] }, then: 'unspecified' },
+              { case: { $lt: ['$amount.max', 500] }, then: '0-499' },
+              { case: { $lt: ['$amount.max', 1000] }, then: '500-999' },
+              { case: { $lt: ['$amount.max', 5000] }, then: '1000-4999' },
+              { case: { $lt: ['$amount.max', 10000] }, then: '5000-9999' }
+            ],
+            default: '10000+'
+          }
+        },
+        count: { $sum: 1 }
+      }
+    },
+    { $sort: { count: -1, _id: 1 } },
+    { $project: { _id: 0, value: '$_id', count: 1 } }
+  ];
+  stages.total = [{ $count: 'count' }];
+
+  const [result] = await Scholarship.aggregate([{ $match: { isActive: true } }, { $facet: stages }]);
+  const { total, ...facets } = result;
+  return { name: 'scholarships', total: total[0]?.count || 0, facets };
+};
+
+// The view is only current while no write that changes its counts, e.g. an admin edit or
+// an import the pipeline never processed, happened after it was imported
+const isCurrentView = async materialized =>
+  Number.isInteger(materialized?.generation) &&
+  materialized.generation === await currentGeneration('scholarships');
+
+// GET /api/scholarships/facets - Filter values with the number of active opportunities for each
+router.get('/facets', async (req, res) => {
+  try {
+    const materialized = await mongoose.connection.db
+      .collection('facetcounts')
+      .findOne({ name: 'scholarships' }, { projection: { _id: 0 } });
+
+    res.json(await isCurrentView(materialized) ? materialized : await countFacetsLive());
+  } catch (error) {
+    console.error('Error fetching facet counts:', error);
+    res.status(500).json({ message: 'Error fetching facet counts', error: error.message });
+  }
+});
+
 // GET /api/scholarships/:id - Get a specific scholarship
 router.get('/:id', async (req, res) => {
   try {
@@ -153,6 +226,34 @@ router.get('/:id', async (req, res) => {
   }
 });
 
+// GET /api/scholarships/:id/similar - Get similar scholarships precomputed by similar_opportunities.py
+router.get('/:id/similar', async (req, res) => {
+  try {
+    const limit = parseInt(req.query.limit) || 5;
+
+    const precomputed = await mongoose.connection.db
+      .collection('similaropportunities')
+      .findOne({ scholarshipId: req.params.id });
+    if (!precomputed) {
+      return res.json([]);
+    }
+
+    const ids = precomputed.similar
+      .filter(id => mongoose.Types.ObjectId.isValid(id))
+      .slice(0, limit);
+    const scholarships = await Scholarship.find({
+      _id: { $in: ids.map(id => new mongoose.Types.ObjectId(id)) },
+      isActive: true
+    }).select('-__v');
+    const byId = new Map(scholarships.map(s => [s._id.toString(), s]));
+
+    res.json(ids.map(id => byId.get(id)).filter(Boolean));
+  } catch (error) {
+    console.error('Error fetching similar scholarships:', error);
+    res.status(500).json({ message: 'Error fetching similar scholarships', error: error.message });
+  }
+});
+
 // GET /api/scholarships/featured - Get featured/popular scholarships
 router.get('/featured/limit', async (req, res) => {
   try {
@@ -182,15 +283,16 @@ router.get('/search/suggestions', async (req, res) => {
       return res.json([]);
     }
 
+    const pattern = escapeRegex(q);
     const suggestions = await Scholarship.aggregate([
       {
         $match: {
           isActive: true,
           isVerified: true,
           $or: [
-            { title: { $regex: q, $options: 'i' } },
-            { organization: { $regex: q, $options: 'i' } },
-            { tags: { $in: [new RegExp(q, 'i')] } }
+            { title: { $regex: pattern, $options: 'i' } },
+            { organization: { $regex: pattern, $options: 'i' } },
+            { tags: { $in: [new RegExp(pattern, 'i')] } }
           ]
         }
       },
@@ -1,6 +1,8 @@
 const express = require('express');
+const mongoose = require('mongoose');
 const { body, validationResult } = require('express-validator');
 const User = require('../models/User');
+const Scholarship = require('../models/Scholarship');
 
 const router = express.Router();
 
@@ -189,6 +191,23 @@ router.get('/:auth0Id/recommendations', async (req, res) => {
 
     const { limit = 10 } = req.query;
 
+    // Use the list precomputed by recommendation_index.py when it is deep enough
+    const precomputed = await mongoose.connection.db
+      .collection('recommendations')
+      .findOne({ auth0Id: req.params.auth0Id });
+    if (precomputed && precomputed.k >= parseInt(limit)) {
+      const ids = precomputed.scholarshipIds
+        .filter(id => mongoose.Types.ObjectId.isValid(id))
+        .slice(0, parseInt(limit));
+      const scholarships = await Scholarship.find({
+        _id: { $in: ids.map(id => new mongoose.Types.ObjectId(id)) },
+        isActive: true,
+        isVerified: true
+      });
+      const byId = new Map(scholarships.map(s => [s._id.toString(), s]));
+      return res.json(ids.map(id => byId.get(id)).filter(Boolean));
+    }
+
     // Build recommendation query based on user profile
     const recommendationQuery = {
       isActive: true,
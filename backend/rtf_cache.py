@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Persistent cache for cleaned RTF text and parsed grants
+Entries are keyed by the document's content hash and the version of the
+code that produced them, so identical copies of a file share one entry and
+any parser change invalidates old results
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from importlib import metadata
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'rtf')
+
+
+def package_version(name):
+    """Installed version of a package, for cache versions that depend on it"""
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return 'none'
+
+
+def file_digest(path):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RTFCache:
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, digest, name, version):
+        """Where the entry for a document digest, artifact name and version lives"""
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.{name}.{version}.json")
+
+    def load(self, digest, name, version):
+        """Return a cached value, or None on a miss"""
+        try:
+            with open(self.entry_path(digest, name, version), 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def store(self, digest, name, version, value):
+        """Write a value atomically so a concurrent reader never sees a partial entry"""
+        path = self.entry_path(digest, name, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_or_compute(self, digest, name, version, compute):
+        """Return the cached value or compute, store and return it"""
+        value = self.load(digest, name, version)
+        if value is None:
+            value = compute()
+            self.store(digest, name, version, value)
+        return value
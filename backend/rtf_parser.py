@@ -4,15 +4,51 @@ RTF Parser for WeAreTeachers.rtf
 Extracts clean text content from RTF format for grant processing
 """
 
+import os
 import re
+import sys
 import json
+import argparse
 from datetime import datetime
-from striprtf.striprtf import rtf_to_text
+from rtf_tokenizer import RTFTokenizer, TOKENIZER_VERSION, rtf_to_plain_text
+from grant_section_parser import FusedGrantParser, PARSER_VERSION
+from rtf_cache import RTFCache, file_digest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrapers'))
+from pipeline_profiler import PipelineProfiler
+
+# Version of the text every RTF entry point parses, for cache keys
+CLEAN_VERSION = f"tok{TOKENIZER_VERSION}-lines"
+
+
+def clean_lines(text):
+    """Yield the non-empty lines of tokenizer output with their whitespace collapsed
+
+    Every RTF entry point (process_rtf, iter_grants, simple_rtf_parser and
+    batch_ingest) goes through the tokenizer and this, so they all parse the
+    same lines: list bullets (\\listtext) are dropped and line breaks are kept.
+    """
+    for line in text.split('\n'):
+        line = re.sub(r'\s+', ' ', line).strip()
+        if line:
+            yield line
+
+
+def rtf_to_lines(content):
+    """Clean RTF content into the lines the grant parsers read"""
+    return list(clean_lines(rtf_to_plain_text(content)))
+
 
 class RTFParser:
-    def __init__(self, rtf_file_path):
+    def __init__(self, rtf_file_path, profiler=None, cache=None):
         self.rtf_file_path = rtf_file_path
         self.content = ""
+        self.profiler = profiler or PipelineProfiler()
+        self.cache = cache
+    
+    def clean_version(self):
+        """Version of the cleaning path in use, for cache keys"""
+        return CLEAN_VERSION
         
     def read_rtf_file(self):
         """Read the RTF file content"""
@@ -26,92 +62,23 @@ class RTFParser:
             return False
     
     def clean_rtf_content(self):
-        """Remove RTF formatting codes and extract clean text using striprtf"""
+        """Remove RTF formatting codes and extract clean text with the single-pass tokenizer"""
         if not self.content:
             print("❌ No content to clean")
             return ""
         
-        try:
-            # Use striprtf library for better RTF parsing
-            cleaned = rtf_to_text(self.content)
-            
-            # Additional cleaning for better structure
-            # Clean up excessive whitespace
-            cleaned = re.sub(r'\s+', ' ', cleaned)
-            cleaned = re.sub(r'\n\s*\n', '\n\n', cleaned)
-            
-            # Remove empty lines
-            lines = cleaned.split('\n')
-            cleaned_lines = [line.strip() for line in lines if line.strip()]
-            
-            return '\n'.join(cleaned_lines)
-            
-        except Exception as e:
-            print(f"⚠️ Error using striprtf, falling back to manual parsing: {e}")
-            # Fallback to manual parsing if striprtf fails
-            return self._manual_rtf_clean()
-    
-    def _manual_rtf_clean(self):
-        """Manual RTF cleaning as fallback"""
-        cleaned = self.content
-        
-        # Remove RTF document header
-        cleaned = re.sub(r'\\rtf1.*?\\fonttbl.*?}', '', cleaned, flags=re.DOTALL)
-        
-        # Remove color table
-        cleaned = re.sub(r'\\colortbl.*?}', '', cleaned, flags=re.DOTALL)
-        
-        # Remove list table
-        cleaned = re.sub(r'\\listtable.*?}', '', cleaned, flags=re.DOTALL)
-        
-        # Remove font and formatting commands
-        cleaned = re.sub(r'\\f[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\fs[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\cf[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\cb[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\b[0-9]*', '', cleaned)
-        cleaned = re.sub(r'\\i[0-9]*', '', cleaned)
-        cleaned = re.sub(r'\\ul[0-9]*', '', cleaned)
-        cleaned = re.sub(r'\\ulc[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\strokec[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\strokewidth[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\kerning[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\expnd[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\expndtw[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\outl[0-9]+', '', cleaned)
-        
-        # Remove list formatting
-        cleaned = re.sub(r'\\ls[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\ilvl[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\listtext.*?}', '', cleaned, flags=re.DOTALL)
-        
-        # Remove bullet points and special characters
-        cleaned = re.sub(r'\\uc0\\u8226', '•', cleaned)
-        cleaned = re.sub(r'\\uc0\\u[0-9]+', '', cleaned)
-        cleaned = re.sub(r'\\\'[0-9a-f]{2}', '', cleaned)
-        
-        # Remove remaining RTF commands
-        cleaned = re.sub(r'\\[a-zA-Z]+[0-9]*', '', cleaned)
-        
-        # Clean up whitespace
-        cleaned = re.sub(r'\s+', ' ', cleaned)
-        cleaned = re.sub(r'\n\s*\n', '\n\n', cleaned)
-        
-        # Remove empty lines
-        lines = cleaned.split('\n')
-        cleaned_lines = [line.strip() for line in lines if line.strip()]
-        
-        return '\n'.join(cleaned_lines)
+        return '\n'.join(rtf_to_lines(self.content))
     
     def extract_grant_sections(self, cleaned_content):
         """Extract individual grant sections from cleaned content"""
-        sections = []
-        lines = cleaned_content.split('\n')
-        
+        return list(self.iter_grant_sections(cleaned_content.split('\n')))
+    
+    def iter_grant_sections(self, lines):
+        """Yield grant sections from an iterable of lines as each one closes"""
         current_section = []
         current_title = ""
         
-        for i, line in enumerate(lines):
+        for line in lines:
             line = line.strip()
             if not line:
                 continue
@@ -134,12 +101,12 @@ class RTFParser:
             )
             
             if is_grant_title:
-                # Save previous section if exists
+                # Emit previous section if exists
                 if current_title and current_section:
-                    sections.append({
+                    yield {
                         'title': current_title,
                         'content': '\n'.join(current_section)
-                    })
+                    }
                 
                 # Start new section
                 current_title = line
@@ -147,14 +114,35 @@ class RTFParser:
             else:
                 current_section.append(line)
         
-        # Add the last section
+        # Emit the last section
         if current_title and current_section:
-            sections.append({
+            yield {
                 'title': current_title,
                 'content': '\n'.join(current_section)
-            })
+            }
+    
+    def iter_clean_lines(self, chunk_size=65536):
+        """Read the RTF file in chunks and yield cleaned, non-empty text lines"""
+        tokenizer = RTFTokenizer()
+        pending = ''
+        
+        with open(self.rtf_file_path, 'r', encoding='utf-8', errors='ignore') as file:
+            while True:
+                chunk = file.read(chunk_size)
+                pending += tokenizer.feed(chunk) if chunk else tokenizer.close()
+                
+                # Only complete lines leave the buffer; the partial last line waits for more text
+                complete, _, pending = pending.rpartition('\n')
+                yield from clean_lines(complete)
+                
+                if not chunk:
+                    break
         
-        return sections
+        yield from clean_lines(pending)
+    
+    def iter_grants(self, chunk_size=65536):
+        """Stream grants from the RTF file, holding at most one section in memory"""
+        return FusedGrantParser().iter_grants(self.iter_clean_lines(chunk_size))
     
     def parse_grant_info(self, section):
         """Parse individual grant section to extract structured information"""
@@ -269,26 +257,45 @@ class RTFParser:
         """Main method to process the RTF file"""
         print("🚀 Starting RTF processing...")
         
+        # Unchanged files skip straight to the grants parsed last time
+        digest = None
+        grants_version = f"{self.clean_version()}-p{PARSER_VERSION}"
+        if self.cache:
+            digest = file_digest(self.rtf_file_path)
+            grants = self.cache.load(digest, 'rtf_parser.grants', grants_version)
+            if grants is not None:
+                print(f"♻️ Loaded {len(grants)} grant sections from cache")
+                return grants
+        
         # Step 1: Read file
-        if not self.read_rtf_file():
-            return None
+        with self.profiler.stage('read') as stage:
+            if not self.read_rtf_file():
+                return None
+            stage['bytes_fetched'] = len(self.content)
         
         # Step 2: Clean content
         print("🧹 Cleaning RTF content...")
-        cleaned_content = self.clean_rtf_content()
+        with self.profiler.stage('clean') as stage:
+            if self.cache:
+                cleaned_content = self.cache.get_or_compute(digest, 'rtf_parser.clean', self.clean_version(),
+                                                            self.clean_rtf_content)
+            else:
+                cleaned_content = self.clean_rtf_content()
         
-        # Step 3: Extract sections
-        print("📋 Extracting grant sections...")
-        sections = self.extract_grant_sections(cleaned_content)
-        print(f"✅ Found {len(sections)} grant sections")
+        # Step 3: Split sections and parse each grant in one pass; the output
+        # matches extract_grant_sections followed by parse_grant_info
+        print("📋 Extracting and parsing grant sections...")
+        lines = cleaned_content.split('\n')
+        with self.profiler.stage('parse_sections') as stage:
+            stage['records_in'] = len(lines)
+            grants = FusedGrantParser().parse(lines)
+            stage['records_out'] = len(grants)
+        print(f"✅ Found {len(grants)} grant sections")
+        for i, grant_info in enumerate(grants):
+            print(f"  Parsed section {i+1}/{len(grants)}: {grant_info['title'][:50]}...")
         
-        # Step 4: Parse each section
-        print("🔍 Parsing grant information...")
-        grants = []
-        for i, section in enumerate(sections):
-            print(f"  Processing section {i+1}/{len(sections)}: {section['title'][:50]}...")
-            grant_info = self.parse_grant_info(section)
-            grants.append(grant_info)
+        if self.cache:
+            self.cache.store(digest, 'rtf_parser.grants', grants_version, grants)
         
         return grants
     
@@ -302,10 +309,48 @@ class RTFParser:
         except Exception as e:
             print(f"❌ Error saving results: {e}")
             return False
+    
+    def stream_results(self, output_file, chunk_size=65536):
+        """Stream grants straight from the RTF file to an NDJSON file; returns the count"""
+        count = 0
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for grant_info in self.iter_grants(chunk_size):
+                f.write(json.dumps(grant_info, ensure_ascii=False) + '\n')
+                count += 1
+        print(f"✅ Streamed {count} grants to {output_file}")
+        return count
+
+def parse_args():
+    """Parse command line options for the RTF parser"""
+    arg_parser = argparse.ArgumentParser(description="Extract grants from WeAreTeachers.rtf")
+    arg_parser.add_argument('--profile', action='store_true',
+                            help="Record per-stage timings and memory in a run report")
+    arg_parser.add_argument('--profile-pstats', metavar='DIR',
+                            help="Also dump cProfile stats for each stage into DIR")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="Re-parse the file even if a cached result exists")
+    arg_parser.add_argument('--stream', action='store_true',
+                            help="Parse the file in chunks and write grants to NDJSON as they are found")
+    arg_parser.add_argument('--chunk-size', type=int, default=65536,
+                            help="Characters read per chunk in --stream mode (default: 65536)")
+    return arg_parser.parse_args()
 
 def main():
     """Main function to run the RTF parser"""
-    parser = RTFParser('WeAreTeachers.rtf')
+    args = parse_args()
+    profiler = PipelineProfiler(enabled=args.profile or bool(args.profile_pstats),
+                                pstats_dir=args.profile_pstats)
+    cache = None if args.no_cache else RTFCache()
+    parser = RTFParser('WeAreTeachers.rtf', profiler=profiler, cache=cache)
+    
+    if args.stream:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = f"extracted_grants_{timestamp}.ndjson"
+        with profiler.stage('stream') as stage:
+            stage['records_out'] = parser.stream_results(output_file, args.chunk_size)
+            stage['bytes_fetched'] = os.path.getsize(parser.rtf_file_path)
+        profiler.save_report(f"run_report_{timestamp}.json")
+        return
     
     # Process the RTF file
     grants = parser.process_rtf()
@@ -314,7 +359,10 @@ def main():
         # Save results
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_file = f"extracted_grants_{timestamp}.json"
-        parser.save_results(grants, output_file)
+        with profiler.stage('save') as stage:
+            parser.save_results(grants, output_file)
+            stage['records_in'] = len(grants)
+        profiler.save_report(f"run_report_{timestamp}.json")
         
         # Print summary
         print(f"\n📊 Processing Summary:")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Single-pass RTF tokenizer
+Converts RTF to plain text in one linear scan, tracking group depth,
+skipping destination groups and decoding \\u and \\' escapes
+"""
+
+import re
+
+# Bump when a change alters the text the tokenizer produces
+TOKENIZER_VERSION = 2
+
+# Groups whose content is never part of the document text
+DESTINATIONS = frozenset((
+    'fonttbl', 'colortbl', 'expandedcolortbl', 'stylesheet', 'info', 'listtable',
+    'listoverridetable', 'listtext', 'pntext', 'pntxta', 'pntxtb', 'pict', 'object',
+    'header', 'headerl', 'headerr', 'headerf', 'footer', 'footerl', 'footerr', 'footerf',
+    'footnote', 'annotation', 'comment', 'themedata', 'colorschememapping', 'latentstyles',
+    'datastore', 'xmlnstbl', 'rsidtbl', 'generator', 'levelnumbers', 'leveltext',
+    'listname', 'listpicture', 'fldtype', 'bkmkstart', 'bkmkend',
+))
+
+# Control words and symbols that produce text
+SPECIAL_WORDS = {
+    'par': '\n', 'line': '\n', 'sect': '\n\n', 'page': '\n\n', 'row': '\n',
+    'tab': '\t', 'cell': '|', 'nestcell': '|',
+    'emdash': '\u2014', 'endash': '\u2013', 'emspace': '\u2003', 'enspace': '\u2002',
+    'qmspace': '\u2005', 'bullet': '\u2022', 'lquote': '\u2018', 'rquote': '\u2019',
+    'ldblquote': '\u201c', 'rdblquote': '\u201d',
+}
+SPECIAL_SYMBOLS = {
+    '\\': '\\', '{': '{', '}': '}', '~': '\xa0', '_': '\u2011', '-': '',
+    '\n': '\n', '\r': '\n',
+}
+
+# Control words the tokenizer acts on; everything else is formatting
+MEANINGFUL_WORDS = DESTINATIONS | frozenset(SPECIAL_WORDS) | {'u', 'uc', 'field', 'fldinst', 'ansicpg'}
+
+
+def _trie_pattern(words):
+    """Build a prefix-factored alternation so the regex engine never retries shared prefixes"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        optional = '' in node
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 and not optional else '(?:%s)' % '|'.join(branches)
+        return body + '?' if optional else body
+
+    return build(trie)
+
+
+# One alternation covering every RTF token. Runs of formatting-only control
+# words and raw line breaks are swallowed by the first branch in a single
+# match, and each branch is anchored on its first character so the scan
+# never backtracks.
+INERT_WORD = r"\\(?!%s(?![a-zA-Z]))[a-zA-Z]{1,32}-?\d{0,10} ?" % _trie_pattern(MEANINGFUL_WORDS)
+TOKEN_PATTERN = re.compile(
+    r"(?:%s|[\r\n])+" % INERT_WORD +       # formatting control words and raw line breaks (ignored)
+    r"|\\([a-zA-Z]{1,32})(-?\d{1,10})? ?"   # control word with optional numeric argument
+    r"|\\'([0-9a-fA-F]{2})"                # hex-escaped byte
+    r"|\\([^a-zA-Z'])"                     # control symbol (including \<newline>)
+    r"|([{}])"                             # group open/close
+    r"|([^\\{}\r\n]+)"                     # run of literal text
+    r"|(\\)"                               # stray trailing backslash
+)
+
+# Longest control word (\ + 32 letters + signed 10-digit argument + delimiter)
+MAX_TOKEN_LENGTH = 46
+
+HYPERLINK_PATTERN = re.compile(r'HYPERLINK\s+("[^"]*"|\S+)')
+
+
+class RTFTokenizer:
+    def __init__(self, encoding='cp1252'):
+        self.encoding = encoding
+        self.depth = 0
+        self.ucskip = 1
+        self.ignorable = False
+        self.stack = []
+        self.pending_skip = 0
+        self.hex_bytes = bytearray()
+        # Open \field groups: [depth, instruction text parts, capturing instruction]
+        self.fields = []
+        # Unconsumed tail of the previous chunk when feeding incrementally
+        self.carry = ''
+
+    def _close_field(self, out):
+        """Emit a closed hyperlink field as text("target"), as striprtf does"""
+        _, instruction, _ = self.fields.pop()
+        match = HYPERLINK_PATTERN.search(''.join(instruction))
+        if match:
+            target = match.group(1)
+            if not target.startswith('"'):
+                target = f'"{target}"'
+            out.append(f"({target})")
+
+    def _tokens(self, content, out):
+        """Consume every token in `content`, appending decoded text to `out`"""
+        # State lives in locals for the duration of the scan; the loop body is
+        # the hot path for every document
+        ucskip = self.ucskip
+        ignorable = self.ignorable
+        pending_skip = self.pending_skip
+        hex_bytes = self.hex_bytes
+        stack = self.stack
+        fields = self.fields
+        append = out.append
+
+        for match in TOKEN_PATTERN.finditer(content):
+            kind = match.lastindex
+
+            if kind == 3:  # \'hh
+                if pending_skip:
+                    pending_skip -= 1
+                elif not ignorable:
+                    hex_bytes.append(int(match.group(3), 16))
+                continue
+
+            if hex_bytes:
+                append(hex_bytes.decode(self.encoding, errors='replace'))
+                hex_bytes.clear()
+
+            if kind == 6:  # literal text
+                text = match.group(6)
+                if pending_skip:
+                    skip = min(pending_skip, len(text))
+                    pending_skip -= skip
+                    text = text[skip:]
+                if fields and fields[-1][2]:
+                    fields[-1][1].append(text)
+                elif not ignorable:
+                    append(text)
+                continue
+
+            # Raw line breaks are ignorable whitespace, so a \uN fallback after one is still skipped
+            if kind is None and pending_skip and not match.group().strip('\r\n'):
+                continue
+            pending_skip = 0
+
+            if kind == 5:  # group open/close
+                if match.group(5) == '{':
+                    stack.append((ucskip, ignorable, bool(fields) and fields[-1][2]))
+                    self.depth += 1
+                else:
+                    self.depth -= 1
+                    if stack:
+                        ucskip, ignorable, capturing = stack.pop()
+                        if fields:
+                            fields[-1][2] = capturing
+                    if fields and self.depth < fields[-1][0]:
+                        self._close_field(out)
+            elif kind == 1 or kind == 2:  # control word
+                word = match.group(1)
+                arg = match.group(2)
+                if word in DESTINATIONS:
+                    ignorable = True
+                elif word == 'fldinst' and fields:
+                    fields[-1][2] = True
+                    ignorable = True
+                elif word == 'field':
+                    fields.append([self.depth, [], False])
+                elif word == 'ansicpg' and arg:
+                    self.encoding = f"cp{arg}"
+                elif ignorable:
+                    pass
+                elif word in SPECIAL_WORDS:
+                    append(SPECIAL_WORDS[word])
+                elif word == 'uc' and arg:
+                    ucskip = int(arg)
+                elif word == 'u' and arg:
+                    code = int(arg)
+                    append(chr(code + 0x10000 if code < 0 else code))
+                    pending_skip = ucskip
+            elif kind == 4:  # control symbol
+                symbol = match.group(4)
+                if symbol == '*':
+                    ignorable = True
+                elif not ignorable and symbol in SPECIAL_SYMBOLS:
+                    append(SPECIAL_SYMBOLS[symbol])
+
+        self.ucskip = ucskip
+        self.ignorable = ignorable
+        self.pending_skip = pending_skip
+
+    def feed(self, chunk):
+        """Consume the next chunk of a document and return the text it completes"""
+        buffer = self.carry + chunk
+        # Hold back a possibly incomplete control word, symbol or \'hh escape
+        # (plus any backslashes right before it) until the next chunk arrives
+        cut = buffer.rfind('\\', max(0, len(buffer) - MAX_TOKEN_LENGTH))
+        if cut == -1:
+            cut = len(buffer)
+        while cut > 0 and buffer[cut - 1] == '\\':
+            cut -= 1
+        self.carry = buffer[cut:]
+
+        out = []
+        self._tokens(buffer[:cut], out)
+        return ''.join(out)
+
+    def close(self):
+        """Flush whatever is still buffered at the end of the document"""
+        out = []
+        self._tokens(self.carry, out)
+        self.carry = ''
+        if self.hex_bytes:
+            out.append(self.hex_bytes.decode(self.encoding, errors='replace'))
+            self.hex_bytes.clear()
+        return ''.join(out)
+
+    def convert(self, content):
+        """Convert a complete RTF document to plain text"""
+        out = []
+        self._tokens(content, out)
+        if self.hex_bytes:
+            out.append(self.hex_bytes.decode(self.encoding, errors='replace'))
+            self.hex_bytes.clear()
+        return ''.join(out)
+
+
+def rtf_to_plain_text(content):
+    """Convert RTF to plain text with paragraph breaks as newlines"""
+    return RTFTokenizer().convert(content)
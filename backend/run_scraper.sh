@@ -5,7 +5,7 @@ echo "🚀 Starting Grants and Scholarships Scraper..."
 # Activate virtual environment
 source scraper_env/bin/activate
 
-# Run the comprehensive scraper
-python3 scrapers/comprehensive_scraper_manager.py
+# Run the comprehensive scraper (pass --schedule to keep it running per source)
+python3 scrapers/comprehensive_scraper_manager.py "$@"
 
 echo "✅ Scraping completed!"
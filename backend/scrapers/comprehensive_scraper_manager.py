@@ -8,27 +8,54 @@ import os
 import sys
 import json
 import logging
+import argparse
+import threading
 from datetime import datetime
 import subprocess
 
-# Add the scrapers directory to the path
+# Add the scrapers directory and the backend directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from grants_scholarships_scraper import GrantsScholarshipsScraper
 from llm_processor import LLMOpportunityProcessor
+from pipeline_profiler import PipelineProfiler
+from source_health import SourceHealthLedger, fingerprint_opportunities, load_settings
+from opportunity_query import record_key
+from mongo_export import load_export, write_ndjson
+from link_checker import LinkChecker
+from deadline_index import sweep_data_dir, write_updates
+from facet_counts import update_facets
+from search_index import SearchIndex
+from typeahead_index import collect_opportunities, build_index
+from similar_opportunities import update_similar
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ComprehensiveScraperManager:
-    def __init__(self):
+    def __init__(self, profiler=None, check_links=True):
         self.scraper = GrantsScholarshipsScraper()
         self.processor = LLMOpportunityProcessor()
+        self.profiler = profiler or PipelineProfiler()
+        self.check_links = check_links
         self.data_dir = "data"
         
         # Ensure data directory exists
         os.makedirs(self.data_dir, exist_ok=True)
+        
+        # Every scrape_source call records its yield, errors and latency here
+        self.health = SourceHealthLedger(os.path.join(self.data_dir, 'source_health.json'), load_settings())
+        self.scraper.health = self.health
+        
+        # Scheduled sources scrape in parallel, but processing and the index/state
+        # files the later stages rewrite are shared, so only one source at a time
+        self.pipeline_lock = threading.Lock()
+        
+        # Deadline sweep updates written since the last import; they run after it, so
+        # opportunities the import inserts are retired too
+        self.pending_sweep_imports = []
     
     def run_comprehensive_scraping(self):
         """Run the complete scraping and processing pipeline"""
@@ -37,7 +64,9 @@ class ComprehensiveScraperManager:
         try:
             # Step 1: Scrape all sources
             logger.info("Step 1: Scraping opportunities from all sources...")
-            raw_opportunities = self.scraper.scrape_all()
+            with self.profiler.stage('scrape') as stage:
+                raw_opportunities = self.scraper.scrape_all(profiler=self.profiler)
+                stage['records_out'] = len(raw_opportunities)
             
             if not raw_opportunities:
                 logger.error("No opportunities scraped. Exiting.")
@@ -48,26 +77,52 @@ class ComprehensiveScraperManager:
             raw_filename = f"raw_scraped_opportunities_{timestamp}.json"
             raw_filepath = os.path.join(self.data_dir, raw_filename)
             
-            with open(raw_filepath, 'w', encoding='utf-8') as f:
-                json.dump(raw_opportunities, f, indent=2, ensure_ascii=False)
+            with self.profiler.stage('save_raw') as stage:
+                with open(raw_filepath, 'w', encoding='utf-8') as f:
+                    json.dump(raw_opportunities, f, indent=2, ensure_ascii=False)
+                stage['records_in'] = len(raw_opportunities)
             
             logger.info(f"Raw data saved to {raw_filepath}")
             
             # Step 2: Process with LLM-like enhancements
             logger.info("Step 2: Processing opportunities with LLM-like enhancements...")
-            processed_opportunities = self.processor.process_opportunities(raw_opportunities)
+            with self.profiler.stage('process') as stage:
+                stage['records_in'] = len(raw_opportunities)
+                processed_opportunities = self.processor.process_opportunities(raw_opportunities)
+                self.assign_ids(processed_opportunities)
+                stage['records_out'] = len(processed_opportunities)
+            
+            with self.profiler.stage('link_check') as stage:
+                stage['records_in'] = len(processed_opportunities)
+                stage['records_out'] = self.flag_broken_links(processed_opportunities)
             
             # Save processed data
             processed_filename = f"processed_opportunities_{timestamp}.json"
             processed_filepath = os.path.join(self.data_dir, processed_filename)
             
-            with open(processed_filepath, 'w', encoding='utf-8') as f:
-                json.dump(processed_opportunities, f, indent=2, ensure_ascii=False)
+            with self.profiler.stage('save_processed') as stage:
+                with open(processed_filepath, 'w', encoding='utf-8') as f:
+                    json.dump(processed_opportunities, f, indent=2, ensure_ascii=False)
+                stage['records_in'] = len(processed_opportunities)
             
             logger.info(f"Processed data saved to {processed_filepath}")
             
+            with self.profiler.stage('deadline_sweep') as stage:
+                stage['records_out'] = self.sweep_deadlines()
+            with self.profiler.stage('facet_counts') as stage:
+                stage['records_out'] = self.update_facet_counts()
+            with self.profiler.stage('search_index') as stage:
+                stage['records_in'] = len(processed_opportunities)
+                stage['records_out'] = self.update_search_index()
+            with self.profiler.stage('typeahead_index'):
+                self.build_typeahead_index()
+            with self.profiler.stage('similar_opportunities') as stage:
+                stage['records_out'] = self.update_similar_opportunities(processed_filepath)
+            
             # Step 3: Generate summary
-            summary = self.processor.generate_summary(processed_opportunities)
+            with self.profiler.stage('summary') as stage:
+                summary = self.processor.generate_summary(processed_opportunities)
+                stage['records_in'] = len(processed_opportunities)
             summary_filename = f"scraping_summary_{timestamp}.json"
             summary_filepath = os.path.join(self.data_dir, summary_filename)
             
@@ -77,7 +132,9 @@ class ComprehensiveScraperManager:
             logger.info(f"Summary saved to {summary_filepath}")
             
             # Step 4: Create import script
-            import_script = self.create_import_script(processed_opportunities, timestamp)
+            with self.profiler.stage('import_script') as stage:
+                import_script = self.create_import_script(processed_opportunities, timestamp)
+                stage['records_in'] = len(processed_opportunities)
             import_filename = f"import_opportunities_{timestamp}.js"
             import_filepath = os.path.join(self.data_dir, import_filename)
             
@@ -86,6 +143,11 @@ class ComprehensiveScraperManager:
             
             logger.info(f"Import script created: {import_filepath}")
             
+            # Save the run report next to the summary when profiling
+            report_filepath = self.profiler.save_report(
+                os.path.join(self.data_dir, f"run_report_{timestamp}.json")
+            )
+            
             # Print summary
             self.print_summary(summary, processed_opportunities)
             
@@ -94,6 +156,7 @@ class ComprehensiveScraperManager:
                 'processed_file': processed_filepath,
                 'summary_file': summary_filepath,
                 'import_script': import_filepath,
+                'run_report': report_filepath,
                 'opportunities': processed_opportunities
             }
             
@@ -101,14 +164,200 @@ class ComprehensiveScraperManager:
             logger.error(f"Error in comprehensive scraping: {e}")
             return None
     
+    def run_pipelined_scraping(self, fetch_workers=4, parse_workers=None, queue_size=16):
+        """Run fetch, parse/process and write as overlapping stages with bounded queues"""
+        from pipeline_executor import PipelineExecutor
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        processed_filepath = os.path.join(self.data_dir, f"processed_opportunities_{timestamp}.ndjson")
+        
+        executor = PipelineExecutor(self.scraper, fetch_workers=fetch_workers,
+                                    parse_workers=parse_workers, queue_size=queue_size)
+        metrics = executor.run(processed_filepath)
+        
+        # The executor streams records straight to disk; the stages that need the whole
+        # batch (link check, ids, sweeps and indexes) run on the written file afterwards
+        with self.pipeline_lock:
+            processed_opportunities = self.assign_ids(load_export(processed_filepath))
+            self.flag_broken_links(processed_opportunities)
+            write_ndjson(processed_filepath, processed_opportunities)
+            self.sweep_deadlines()
+            self.update_facet_counts()
+            self.update_search_index()
+            self.build_typeahead_index()
+            self.update_similar_opportunities(processed_filepath)
+            
+            import_filepath = os.path.join(self.data_dir, f"import_opportunities_{timestamp}.js")
+            with open(import_filepath, 'w', encoding='utf-8') as f:
+                f.write(self.create_import_script(processed_opportunities, timestamp))
+            logger.info(f"Import script created: {import_filepath}")
+        
+        metrics_filepath = os.path.join(self.data_dir, f"pipeline_metrics_{timestamp}.json")
+        with open(metrics_filepath, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+        
+        logger.info(f"Pipeline metrics saved to {metrics_filepath}")
+        return {
+            'processed_file': processed_filepath,
+            'import_script': import_filepath,
+            'metrics_file': metrics_filepath,
+            'metrics': metrics
+        }
+    
+    def fingerprint_opportunities(self, opportunities):
+        """Hash the stable fields of scraped opportunities to detect content changes"""
+        return fingerprint_opportunities(opportunities)
+    
+    def run_source_pipeline(self, source_name, previous_fingerprint=None, auto_import=False):
+        """Scrape and process a single source, skipping processing when nothing changed"""
+        logger.info(f"Running pipeline for source: {source_name}")
+        raw_opportunities = self.scraper.scrape_source(source_name)
+        fingerprint = self.fingerprint_opportunities(raw_opportunities)
+        
+        result = {
+            'source': source_name,
+            'count': len(raw_opportunities),
+            'fingerprint': fingerprint,
+            'changed': fingerprint != previous_fingerprint,
+            'processed_file': None,
+            'import_script': None
+        }
+        
+        if not raw_opportunities or not result['changed']:
+            logger.info(f"No new content from {source_name}")
+            return result
+        
+        with self.pipeline_lock:
+            processed_opportunities = self.processor.process_opportunities(raw_opportunities)
+            self.assign_ids(processed_opportunities)
+            self.flag_broken_links(processed_opportunities)
+            
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            source_slug = source_name.lower().replace(' ', '_')
+            processed_filename = f"processed_{source_slug}_{timestamp}.json"
+            processed_filepath = os.path.join(self.data_dir, processed_filename)
+            
+            with open(processed_filepath, 'w', encoding='utf-8') as f:
+                json.dump(processed_opportunities, f, indent=2, ensure_ascii=False)
+            
+            logger.info(f"Processed data for {source_name} saved to {processed_filepath}")
+            result['processed_file'] = processed_filepath
+            self.sweep_deadlines()
+            self.update_facet_counts()
+            self.update_search_index()
+            self.build_typeahead_index()
+            self.update_similar_opportunities(processed_filepath)
+            
+            import_filepath = os.path.join(self.data_dir, f"import_{source_slug}_{timestamp}.js")
+            with open(import_filepath, 'w', encoding='utf-8') as f:
+                f.write(self.create_import_script(processed_opportunities, timestamp))
+            result['import_script'] = import_filepath
+            
+            if auto_import:
+                self.run_import(import_filepath)
+            else:
+                logger.info(f"Import script for {source_name} created; run `node {import_filepath}` from backend/")
+        return result
+    
+    def assign_ids(self, opportunities):
+        """Give each opportunity its record_key as _id, so imports upsert instead of duplicating
+        and the pipeline's per-record output (similar lists, deadline and link updates) uses
+        the ids the database will hold"""
+        for op in opportunities:
+            op['_id'] = record_key(op)
+        return opportunities
+    
+    def flag_broken_links(self, opportunities):
+        """Check every opportunity's links (cached between runs) and set its linkHealth"""
+        if not self.check_links:
+            return 0
+        try:
+            checker = LinkChecker(os.path.join(self.data_dir, 'link_checker', 'cache.json'))
+            checked, flagged = checker.annotate(opportunities)
+            if checker.offline:
+                logger.warning("Link check skipped: no site answered")
+                return 0
+            checker.save_cache()
+            logger.info(f"Link check: {checked} URLs checked, {flagged} opportunities with broken links")
+            return flagged
+        except Exception as e:
+            logger.warning(f"Could not check links: {e}")
+            return 0
+    
+    def sweep_deadlines(self):
+        """Advance or retire opportunities whose deadline passed since the last sweep"""
+        try:
+            output_file, changes = sweep_data_dir(self.data_dir)
+            if output_file:
+                logger.info(f"Deadline sweep saved to {output_file} ({len(changes)} opportunities)")
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                updates_file = os.path.join(self.data_dir, f"deadline_updates_{timestamp}.ndjson")
+                written, script_file = write_updates(load_export(output_file), changes, updates_file, timestamp)
+                self.pending_sweep_imports.append(script_file)
+                logger.info(f"Deadline sweep updates: {written} saved to {updates_file}; "
+                            f"run `node {script_file}` from backend/ after the import")
+            return len(changes)
+        except Exception as e:
+            logger.warning(f"Could not sweep deadlines: {e}")
+            return 0
+    
+    def update_facet_counts(self):
+        """Fold new processed files into the materialized facet counts"""
+        try:
+            output_file, script_file, changed = update_facets(self.data_dir)
+            logger.info(f"Facet counts saved to {output_file} ({changed} records changed); import with {script_file}")
+            return changed
+        except Exception as e:
+            logger.warning(f"Could not update facet counts: {e}")
+            return 0
+    
+    def update_search_index(self):
+        """Fold new processed files, deadline sweep output included, into the saved BM25 search index"""
+        try:
+            index = SearchIndex.load(os.path.join(self.data_dir, 'search_index'))
+            changed = index.refresh(self.data_dir)
+            if changed:
+                index.save()
+            logger.info(f"Search index updated: {changed} opportunities (re)indexed, {index.size} total")
+            return changed
+        except Exception as e:
+            logger.warning(f"Could not update search index: {e}")
+            return 0
+    
+    def build_typeahead_index(self):
+        """Rebuild the suggestion file from every processed file in the data directory"""
+        try:
+            path = build_index(collect_opportunities(self.data_dir), os.path.join(self.data_dir, 'typeahead.idx'))
+            logger.info(f"Typeahead index rebuilt: {path}")
+            return path
+        except Exception as e:
+            logger.warning(f"Could not build typeahead index: {e}")
+            return None
+    
+    def update_similar_opportunities(self, snapshot_path):
+        """Refresh the similar-opportunity lists for the catalog and write them next to the snapshot"""
+        try:
+            output_file, script_file, rescored = update_similar(
+                collect_opportunities(self.data_dir), snapshot_path,
+                os.path.join(self.data_dir, 'similar_opportunities', 'state.npz'))
+            logger.info(f"Similar opportunities saved to {output_file} ({rescored} rescored); import with {script_file}")
+            return rescored
+        except Exception as e:
+            logger.warning(f"Could not update similar opportunities: {e}")
+            return 0
+    
     def create_import_script(self, opportunities, timestamp):
         """Create a Node.js import script for the processed opportunities"""
+        processed_at = datetime.strptime(timestamp, '%Y%m%d_%H%M%S').astimezone().isoformat()
         script_content = f'''const mongoose = require('mongoose');
 const Scholarship = require('../models/Scholarship');
+const {{ bumpGeneration }} = require('../models/writeGeneration');
 require('dotenv').config();
 
 // Processed opportunities data (timestamp: {timestamp})
 const opportunities = {json.dumps(opportunities, indent=2)};
+// Records carry the time they were processed
+const processedAt = new Date({json.dumps(processed_at)});
 
 async function importOpportunities() {{
     try {{
@@ -116,9 +365,19 @@ async function importOpportunities() {{
         await mongoose.connect(process.env.MONGODB_URI || 'mongodb://localhost:27017/teacheasy');
         console.log('✅ Connected to MongoDB');
 
-        // Import opportunities (this will add to existing data, not replace)
-        const importedOpportunities = await Scholarship.insertMany(opportunities);
-        console.log(`✅ Imported ${{importedOpportunities.length}} opportunities`);
+        // Upsert by _id so re-running a script, or importing a source again, updates in place.
+        // Some fields only seed new records: the popularity job owns popularity and bookmarkCount,
+        // and the deadline sweep retires records, so the scrapers' values must not overwrite theirs
+        const result = await Scholarship.bulkWrite(opportunities.map(({{ _id, isActive, popularity, viewCount, bookmarkCount, ...op }}) => {{
+            const seeded = Object.fromEntries(Object.entries({{ isActive, popularity, viewCount, bookmarkCount }})
+                .filter(([, value]) => value !== undefined));
+            return _id
+                ? {{ updateOne: {{ filter: {{ _id }}, update: {{ $set: {{ ...op, updatedAt: processedAt }}, $setOnInsert: seeded }}, upsert: true }} }}
+                : {{ insertOne: {{ document: {{ ...op, ...seeded, updatedAt: processedAt }} }} }};
+        }}), {{ ordered: false }});
+        // bulkWrite skips model middleware, so mark the facet counts stale here
+        await bumpGeneration('scholarships');
+        console.log(`✅ Imported ${{result.upsertedCount + result.insertedCount}} new and updated ${{result.modifiedCount}} opportunities`);
 
         // Print summary
         const grants = opportunities.filter(op => op.type === 'grant');
@@ -188,21 +447,78 @@ importOpportunities();
         """Run the import script to add opportunities to the database"""
         try:
             logger.info(f"Running import script: {import_script_path}")
-            result = subprocess.run(['node', import_script_path], 
+            result = subprocess.run(['node', os.path.abspath(import_script_path)],
                                   capture_output=True, text=True, cwd='..')
             
             if result.returncode == 0:
                 logger.info("Import completed successfully!")
                 print(result.stdout)
+                self.import_deadline_updates()
+                self.import_facet_counts()
             else:
                 logger.error(f"Import failed: {result.stderr}")
                 print(result.stderr)
                 
         except Exception as e:
             logger.error(f"Error running import script: {e}")
+    
+    def import_deadline_updates(self):
+        """Apply the deadline sweep updates written since the last import"""
+        while self.pending_sweep_imports:
+            script_path = os.path.abspath(self.pending_sweep_imports.pop(0))
+            result = subprocess.run(['node', script_path], capture_output=True, text=True, cwd='..')
+            if result.returncode == 0:
+                logger.info(f"Deadline sweep updates imported: {script_path}")
+            else:
+                logger.warning(f"Could not import deadline sweep updates {script_path}: {result.stderr}")
+    
+    def import_facet_counts(self):
+        """Load the facet counts written for this run, so the routes keep serving the materialized view"""
+        script_path = os.path.abspath(os.path.join(self.data_dir, 'import_facet_counts.js'))
+        if not os.path.exists(script_path):
+            return
+        result = subprocess.run(['node', script_path], capture_output=True, text=True, cwd='..')
+        if result.returncode == 0:
+            logger.info("Facet counts imported")
+        else:
+            logger.warning(f"Could not import facet counts: {result.stderr}")
+
+def parse_args():
+    """Parse command line options for the manager"""
+    parser = argparse.ArgumentParser(description="Scrape, process and import grants and scholarships")
+    parser.add_argument('--schedule', action='store_true',
+                        help="Run as a long-lived scheduler with per-source cadence")
+    parser.add_argument('--import', dest='auto_import', action='store_true',
+                        help="Import the processed opportunities without prompting (with --schedule, after every run)")
+    parser.add_argument('--pipelined', action='store_true',
+                        help="Stream fetch, parse/process and write through bounded queues")
+    parser.add_argument('--skip-link-check', action='store_true',
+                        help="Do not check opportunity links before saving processed data")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record per-stage timings and memory in a run report")
+    parser.add_argument('--profile-pstats', metavar='DIR',
+                        help="Also dump cProfile stats for each stage into DIR")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    manager = ComprehensiveScraperManager()
+    args = parse_args()
+    profiler = PipelineProfiler(enabled=args.profile or bool(args.profile_pstats),
+                                pstats_dir=args.profile_pstats)
+    manager = ComprehensiveScraperManager(profiler=profiler, check_links=not args.skip_link_check)
+    
+    if args.schedule:
+        from scheduler import SourceScheduler
+        SourceScheduler(manager, auto_import=args.auto_import).run_forever()
+        sys.exit(0)
+    
+    if args.pipelined:
+        result = manager.run_pipelined_scraping()
+        print(f"\n✅ Pipeline wrote {result['metrics']['records_written']} opportunities to {result['processed_file']}")
+        if args.auto_import:
+            manager.run_import(result['import_script'])
+        else:
+            print(f"🚀 Import with: node {result['import_script']}")
+        sys.exit(0)
     
     # Run comprehensive scraping
     result = manager.run_comprehensive_scraping()
@@ -212,9 +528,12 @@ if __name__ == "__main__":
         print(f"📁 Files created in data/ directory")
         print(f"🚀 Ready to import to database")
         
-        # Ask if user wants to import immediately
-        import_choice = input("\nWould you like to import the opportunities to the database now? (y/n): ")
-        if import_choice.lower() == 'y':
+        if args.auto_import:
             manager.run_import(result['import_script'])
+        elif sys.stdin.isatty():
+            # Ask if user wants to import immediately
+            import_choice = input("\nWould you like to import the opportunities to the database now? (y/n): ")
+            if import_choice.lower() == 'y':
+                manager.run_import(result['import_script'])
     else:
         print("❌ Scraping failed. Check logs for details.")
@@ -9,39 +9,81 @@ from bs4 import BeautifulSoup
 import json
 import time
 import re
+import threading
 from datetime import datetime, timedelta
 from fake_useragent import UserAgent
 import logging
+from pipeline_profiler import PipelineProfiler
+from source_health import fingerprint_opportunities
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class GrantsScholarshipsScraper:
+    # Listing page URL and page parser for each source
+    SOURCE_PAGES = {
+        'We Are Teachers': ("https://www.weareteachers.com/education-grants/", 'parse_weareteachers_grants'),
+        'Texas GrantWatch': ("https://texas.grantwatch.com/cat/42/teachers-grants.html", 'parse_texas_grants'),
+        'Teachers of Tomorrow': ("https://www.teachersoftomorrow.org/blog/insights/teacher-scholarships-texas/",
+                                 'parse_teacher_scholarships'),
+    }
+    
     def __init__(self):
         self.ua = UserAgent()
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': self.ua.random,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        })
-        
+        # Sessions are not thread-safe, and the scheduler and pipeline fetch from several threads
+        self.local = threading.local()
+        self.bytes_lock = threading.Lock()
+        self.bytes_fetched = 0
+        # Optional SourceHealthLedger that scrape_source records every run in
+        self.health = None
+        # Seconds between fetch attempts
+        self.retry_delay = 2
+        
+    @property
+    def session(self):
+        """This thread's requests session"""
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            session.headers.update({
+                'User-Agent': self.ua.random,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.5',
+                'Accept-Encoding': 'gzip, deflate',
+                'Connection': 'keep-alive',
+            })
+        return session
+    
+    def thread_bytes_fetched(self):
+        """Bytes fetched by this thread, so concurrent sources are measured separately"""
+        return getattr(self.local, 'bytes_fetched', 0)
+    
+    def fetch_error(self):
+        """The error of this thread's last page that could not be fetched, if any"""
+        return getattr(self.local, 'fetch_error', None)
+    
     def get_page(self, url, retries=3):
-        """Fetch a webpage with retries and error handling"""
+        """Fetch a webpage with retries and error handling
+
+        Returns None once every attempt failed, keeping the last error in
+        fetch_error() so scrape_source can record the run as failed.
+        """
         for attempt in range(retries):
             try:
                 response = self.session.get(url, timeout=10)
                 response.raise_for_status()
+                with self.bytes_lock:
+                    self.bytes_fetched += len(response.content)
+                self.local.bytes_fetched = self.thread_bytes_fetched() + len(response.content)
                 return response
             except Exception as e:
                 logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
                 if attempt < retries - 1:
-                    time.sleep(2)
+                    time.sleep(self.retry_delay)
                 else:
                     logger.error(f"Failed to fetch {url} after {retries} attempts")
+                    self.local.fetch_error = e
                     return None
     
     def extract_amount(self, text):
@@ -122,13 +164,20 @@ class GrantsScholarshipsScraper:
     def scrape_weareteachers_grants(self):
         """Scrape grants from We Are Teachers website"""
         logger.info("Scraping grants from We Are Teachers...")
-        url = "https://www.weareteachers.com/education-grants/"
+        url = self.SOURCE_PAGES['We Are Teachers'][0]
         
         response = self.get_page(url)
         if not response:
             return []
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        grants = self.parse_weareteachers_grants(response.content, url)
+        
+        logger.info(f"Found {len(grants)} grants from We Are Teachers")
+        return grants
+    
+    def parse_weareteachers_grants(self, content, url):
+        """Parse grant sections from a We Are Teachers page"""
+        soup = BeautifulSoup(content, 'html.parser')
         grants = []
         
         # Find all grant sections
@@ -209,19 +258,25 @@ class GrantsScholarshipsScraper:
                 logger.error(f"Error processing grant section: {e}")
                 continue
         
-        logger.info(f"Found {len(grants)} grants from We Are Teachers")
         return grants
     
     def scrape_texas_grants(self):
         """Scrape grants from Texas GrantWatch"""
         logger.info("Scraping grants from Texas GrantWatch...")
-        url = "https://texas.grantwatch.com/cat/42/teachers-grants.html"
+        url = self.SOURCE_PAGES['Texas GrantWatch'][0]
         
         response = self.get_page(url)
         if not response:
             return []
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        grants = self.parse_texas_grants(response.content, url)
+        
+        logger.info(f"Found {len(grants)} grants from Texas GrantWatch")
+        return grants
+    
+    def parse_texas_grants(self, content, url):
+        """Parse grant listings from a Texas GrantWatch page"""
+        soup = BeautifulSoup(content, 'html.parser')
         grants = []
         
         # Find grant listings
@@ -289,19 +344,25 @@ class GrantsScholarshipsScraper:
                 logger.error(f"Error processing Texas grant listing: {e}")
                 continue
         
-        logger.info(f"Found {len(grants)} grants from Texas GrantWatch")
         return grants
     
     def scrape_teacher_scholarships(self):
         """Scrape scholarships from Teachers of Tomorrow"""
         logger.info("Scraping scholarships from Teachers of Tomorrow...")
-        url = "https://www.teachersoftomorrow.org/blog/insights/teacher-scholarships-texas/"
+        url = self.SOURCE_PAGES['Teachers of Tomorrow'][0]
         
         response = self.get_page(url)
         if not response:
             return []
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        scholarships = self.parse_teacher_scholarships(response.content, url)
+        
+        logger.info(f"Found {len(scholarships)} scholarships from Teachers of Tomorrow")
+        return scholarships
+    
+    def parse_teacher_scholarships(self, content, url):
+        """Parse scholarship sections from a Teachers of Tomorrow page"""
+        soup = BeautifulSoup(content, 'html.parser')
         scholarships = []
         
         # Find scholarship sections
@@ -376,34 +437,76 @@ class GrantsScholarshipsScraper:
                 logger.error(f"Error processing scholarship section: {e}")
                 continue
         
-        logger.info(f"Found {len(scholarships)} scholarships from Teachers of Tomorrow")
         return scholarships
     
-    def scrape_all(self):
+    def get_sources(self):
+        """Return the scrape function for each source, keyed by source name"""
+        return {
+            'We Are Teachers': self.scrape_weareteachers_grants,
+            'Texas GrantWatch': self.scrape_texas_grants,
+            'Teachers of Tomorrow': self.scrape_teacher_scholarships,
+        }
+    
+    def scrape_source(self, source_name):
+        """Scrape a single source by name"""
+        sources = self.get_sources()
+        if source_name not in sources:
+            raise KeyError(f"Unknown source: {source_name}")
+        if self.health is None:
+            return sources[source_name]()
+        
+        start = time.perf_counter()
+        bytes_before = self.thread_bytes_fetched()
+        self.local.fetch_error = None
+        try:
+            opportunities = sources[source_name]()
+        except Exception as e:
+            self.health.record(source_name, seconds=time.perf_counter() - start, error=e,
+                               bytes_fetched=self.thread_bytes_fetched() - bytes_before)
+            raise
+        if self.fetch_error() is not None:
+            # The scrape methods return [] when their page cannot be fetched; that is a
+            # failed run, not a successful one with no records (which would look like a collapse)
+            self.health.record(source_name, seconds=time.perf_counter() - start, error=self.fetch_error(),
+                               bytes_fetched=self.thread_bytes_fetched() - bytes_before)
+            return opportunities
+        self.health.record(source_name, records=len(opportunities), seconds=time.perf_counter() - start,
+                           fingerprint=fingerprint_opportunities(opportunities),
+                           bytes_fetched=self.thread_bytes_fetched() - bytes_before)
+        return opportunities
+    
+    def parse_source_page(self, source_name, content, url):
+        """Parse an already-fetched listing page with the source's parser"""
+        parser_name = self.SOURCE_PAGES[source_name][1]
+        return getattr(self, parser_name)(content, url)
+    
+    def scrape_all(self, profiler=None):
         """Scrape all sources and return combined results"""
         logger.info("Starting comprehensive scraping of grants and scholarships...")
+        profiler = profiler or PipelineProfiler()
         
         all_opportunities = []
         
-        # Scrape grants
-        try:
-            weareteachers_grants = self.scrape_weareteachers_grants()
-            all_opportunities.extend(weareteachers_grants)
-        except Exception as e:
-            logger.error(f"Error scraping We Are Teachers: {e}")
-        
-        try:
-            texas_grants = self.scrape_texas_grants()
-            all_opportunities.extend(texas_grants)
-        except Exception as e:
-            logger.error(f"Error scraping Texas GrantWatch: {e}")
-        
-        # Scrape scholarships
-        try:
-            teacher_scholarships = self.scrape_teacher_scholarships()
-            all_opportunities.extend(teacher_scholarships)
-        except Exception as e:
-            logger.error(f"Error scraping Teachers of Tomorrow: {e}")
+        source_names = list(self.get_sources())
+        if self.health is not None:
+            # Healthy, productive sources first; backed-off ones only when their probe is due
+            source_names.sort(key=self.health.priority)
+            skipped = [name for name in source_names if self.health.should_skip(name)]
+            for source_name in skipped:
+                logger.info(f"Skipping {source_name}: backed off after "
+                            f"{self.health.unhealthy_streak(source_name)} failed or empty runs")
+            source_names = [name for name in source_names if name not in skipped]
+        
+        for source_name in source_names:
+            with profiler.stage('scrape', source=source_name) as stage:
+                bytes_before = self.bytes_fetched
+                try:
+                    opportunities = self.scrape_source(source_name)
+                    all_opportunities.extend(opportunities)
+                    stage['records_out'] = len(opportunities)
+                except Exception as e:
+                    logger.error(f"Error scraping {source_name}: {e}")
+                stage['bytes_fetched'] = self.bytes_fetched - bytes_before
         
         logger.info(f"Total opportunities scraped: {len(all_opportunities)}")
         return all_opportunities
@@ -4,11 +4,18 @@ LLM-enhanced processor for scraped grants and scholarships data
 Validates, enhances, and standardizes the scraped information
 """
 
+import os
+import sys
 import json
 import re
 from datetime import datetime, timedelta
 import logging
 
+# Add the scrapers directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from vocabulary import get_vocabulary
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -176,6 +183,13 @@ class LLMOpportunityProcessor:
             else:
                 eligibility_data['requirements'] = "Must be pursuing or planning to pursue a teaching career. See website for specific requirements."
         
+        # Map scraped labels (regions like "Texas", "Education Programs", grade ranges) onto the model's enums
+        get_vocabulary().canonicalize_eligibility(eligibility_data)
+        if not eligibility_data['gradeLevels']:
+            eligibility_data['gradeLevels'] = ["K", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12"]
+        if not eligibility_data['regions']:
+            eligibility_data['regions'] = ["National"]
+        
         return eligibility_data
     
     def process_opportunity(self, opportunity):
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Pipelined executor for the scraping pipeline
+Fetch workers feed a bounded queue of raw pages, a CPU pool parses and
+processes them, and a single writer streams results to NDJSON. Bounded
+queues give backpressure so memory stays capped between stages.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Add the scrapers directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from grants_scholarships_scraper import GrantsScholarshipsScraper
+from llm_processor import LLMOpportunityProcessor
+from source_health import fingerprint_opportunities
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+# Per-process parser state, created lazily in each pool worker
+_worker_scraper = None
+_worker_processor = None
+
+
+def parse_and_process_page(source_name, url, content):
+    """Parse a fetched page and process its opportunities (runs in a pool worker)
+
+    Returns the fingerprint of the parsed opportunities, as scrape_source
+    computes it for the health ledger, and the processed opportunities.
+    """
+    global _worker_scraper, _worker_processor
+    if _worker_scraper is None:
+        _worker_scraper = GrantsScholarshipsScraper()
+        _worker_processor = LLMOpportunityProcessor()
+
+    opportunities = _worker_scraper.parse_source_page(source_name, content, url)
+    return fingerprint_opportunities(opportunities), [_worker_processor.process_opportunity(op) for op in opportunities]
+
+
+class InstrumentedQueue(queue.Queue):
+    """Bounded queue that records depth and time spent blocked on put/get"""
+
+    def __init__(self, name, maxsize):
+        super().__init__(maxsize)
+        self.name = name
+        self.metrics_lock = threading.Lock()
+        self.put_stall = 0.0
+        self.get_stall = 0.0
+        self.max_depth = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+
+    def put(self, item, block=True, timeout=None):
+        start = time.perf_counter()
+        super().put(item, block, timeout)
+        waited = time.perf_counter() - start
+        depth = self.qsize()
+        with self.metrics_lock:
+            self.put_stall += waited
+            self.max_depth = max(self.max_depth, depth)
+            self.depth_total += depth
+            self.depth_samples += 1
+
+    def get(self, block=True, timeout=None):
+        start = time.perf_counter()
+        item = super().get(block, timeout)
+        with self.metrics_lock:
+            self.get_stall += time.perf_counter() - start
+        return item
+
+    def metrics(self):
+        """Return the queue's depth and stall metrics"""
+        return {
+            'maxsize': self.maxsize,
+            'max_depth': self.max_depth,
+            'mean_depth': round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0,
+            'producer_stall_seconds': round(self.put_stall, 6),
+            'consumer_stall_seconds': round(self.get_stall, 6),
+        }
+
+
+class PipelineExecutor:
+    def __init__(self, scraper=None, fetch_workers=4, parse_workers=None, queue_size=16, use_processes=True):
+        self.scraper = scraper or GrantsScholarshipsScraper()
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.use_processes = use_processes
+
+    @property
+    def health(self):
+        """The scraper's SourceHealthLedger, if it has one"""
+        return getattr(self.scraper, 'health', None)
+
+    def default_tasks(self):
+        """One fetch task per source listing page, leaving out sources the health ledger has backed off"""
+        tasks = []
+        for source_name, (url, _) in self.scraper.SOURCE_PAGES.items():
+            if self.health is not None and self.health.should_skip(source_name):
+                logger.info(f"Skipping {source_name}: backed off after "
+                            f"{self.health.unhealthy_streak(source_name)} failed or empty runs")
+                continue
+            tasks.append((source_name, url))
+        return tasks
+
+    def record_health(self, source_name, started, **run):
+        """Record a page's run in the health ledger, as scrape_source does for the batch path"""
+        if self.health is not None:
+            self.health.record(source_name, seconds=time.perf_counter() - started, **run)
+
+    def fetch_page(self, source_name, url):
+        """Fetch a page's raw bytes; raises the last attempt's error on failure"""
+        self.scraper.local.fetch_error = None
+        response = self.scraper.get_page(url)
+        if response is None:
+            raise self.scraper.fetch_error() or ConnectionError(f"Could not fetch {url}")
+        return response.content
+
+    def run(self, output_path, tasks=None):
+        """Run fetch → parse/process → write with bounded queues; returns run metrics"""
+        tasks = list(tasks if tasks is not None else self.default_tasks())
+        task_queue = queue.Queue()
+        for task in tasks:
+            task_queue.put(task)
+
+        page_queue = InstrumentedQueue('pages', self.queue_size)
+        result_queue = InstrumentedQueue('results', self.queue_size)
+        counters = {'pages_fetched': 0, 'fetch_failures': 0, 'bytes_fetched': 0,
+                    'parse_failures': 0, 'records_written': 0}
+        counters_lock = threading.Lock()
+        # Set when the writer fails: fetchers stop taking tasks and the writer drains
+        # the result queue, so no producer stays blocked on a queue nobody reads
+        writer_failed = threading.Event()
+        writer_errors = []
+
+        def fetch_worker():
+            while not writer_failed.is_set():
+                try:
+                    source_name, url = task_queue.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.perf_counter()
+                error = None
+                try:
+                    content = self.fetch_page(source_name, url)
+                except Exception as e:
+                    logger.error(f"Error fetching {url}: {e}")
+                    content, error = None, e
+                with counters_lock:
+                    if content is None:
+                        counters['fetch_failures'] += 1
+                    else:
+                        counters['pages_fetched'] += 1
+                        counters['bytes_fetched'] += len(content)
+                if content is None:
+                    self.record_health(source_name, started, error=error)
+                    continue
+                page_queue.put((source_name, url, content, started))
+
+        def parse_worker(pool):
+            # Each worker keeps one page in flight in the pool, so the pool
+            # never holds more than parse_workers pages at once
+            while True:
+                item = page_queue.get()
+                if item is _DONE:
+                    return
+                source_name, url, content, started = item
+                try:
+                    fingerprint, records = pool.submit(parse_and_process_page, source_name, url, content).result()
+                except Exception as e:
+                    logger.error(f"Error parsing page from {source_name}: {e}")
+                    with counters_lock:
+                        counters['parse_failures'] += 1
+                    self.record_health(source_name, started, error=e, bytes_fetched=len(content))
+                    continue
+                self.record_health(source_name, started, records=len(records), fingerprint=fingerprint,
+                                   bytes_fetched=len(content))
+                result_queue.put(records)
+
+        def writer():
+            try:
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    while True:
+                        records = result_queue.get()
+                        if records is _DONE:
+                            return
+                        for record in records:
+                            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                        counters['records_written'] += len(records)
+            except Exception as e:
+                logger.error(f"Error writing {output_path}: {e}")
+                writer_errors.append(e)
+                writer_failed.set()
+                while result_queue.get() is not _DONE:
+                    pass
+
+        logger.info(f"Running pipeline over {len(tasks)} pages "
+                    f"({self.fetch_workers} fetchers, {self.parse_workers} parsers, queue size {self.queue_size})")
+        start = time.perf_counter()
+
+        pool_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        with pool_class(max_workers=self.parse_workers) as pool:
+            writer_thread = threading.Thread(target=writer)
+            writer_thread.start()
+
+            parse_threads = [threading.Thread(target=parse_worker, args=(pool,)) for _ in range(self.parse_workers)]
+            for thread in parse_threads:
+                thread.start()
+
+            fetch_threads = [threading.Thread(target=fetch_worker) for _ in range(self.fetch_workers)]
+            for thread in fetch_threads:
+                thread.start()
+
+            for thread in fetch_threads:
+                thread.join()
+            for _ in parse_threads:
+                page_queue.put(_DONE)
+            for thread in parse_threads:
+                thread.join()
+            result_queue.put(_DONE)
+            writer_thread.join()
+
+        if writer_errors:
+            raise RuntimeError(f"Pipeline writer failed: {writer_errors[0]}") from writer_errors[0]
+
+        elapsed = time.perf_counter() - start
+        metrics = dict(counters)
+        metrics.update({
+            'output_file': output_path,
+            'wall_time': round(elapsed, 6),
+            'records_per_second': round(counters['records_written'] / elapsed, 2) if elapsed else None,
+            'queues': {
+                page_queue.name: page_queue.metrics(),
+                result_queue.name: result_queue.metrics(),
+            },
+        })
+        logger.info(f"Pipeline wrote {counters['records_written']} records in {elapsed:.2f}s")
+        return metrics
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Profiling and instrumentation for the scraping pipeline
+Records per-stage and per-source timings, memory and record counts
+and writes them to a machine-readable run report
+"""
+
+import os
+import json
+import time
+import cProfile
+import logging
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class PipelineProfiler:
+    def __init__(self, enabled=False, pstats_dir=None):
+        self.enabled = enabled
+        self.pstats_dir = pstats_dir
+        self.stages = []
+        self.stack = []
+        self.started_at = datetime.now().isoformat()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+        if self.enabled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if self.pstats_dir:
+                os.makedirs(self.pstats_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name, source=None):
+        """Time a pipeline stage; callers fill in records_in/records_out/bytes_fetched"""
+        record = {
+            'stage': name,
+            'source': source,
+            'records_in': None,
+            'records_out': None,
+            'bytes_fetched': 0,
+        }
+
+        if not self.enabled:
+            yield record
+            return
+
+        # Fold the parent's peak so far into its running maximum before resetting
+        if self.stack:
+            parent = self.stack[-1]
+            parent['_peak'] = max(parent['_peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        record['_peak'] = 0
+        self.stack.append(record)
+
+        # cProfile only supports one active profiler, so only top-level stages get one
+        profile = None
+        if self.pstats_dir and len(self.stack) == 1:
+            profile = cProfile.Profile()
+            profile.enable()
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_time'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_time'] = round(time.process_time() - cpu_start, 6)
+
+            if profile:
+                profile.disable()
+                stage_slug = name if not source else f"{name}_{source}"
+                stage_slug = stage_slug.lower().replace(' ', '_')
+                pstats_path = os.path.join(self.pstats_dir, f"{stage_slug}.pstats")
+                profile.dump_stats(pstats_path)
+                record['pstats_file'] = pstats_path
+
+            self.stack.pop()
+            peak = max(record.pop('_peak'), tracemalloc.get_traced_memory()[1])
+            record['peak_memory_bytes'] = peak
+            if self.stack:
+                self.stack[-1]['_peak'] = max(self.stack[-1]['_peak'], peak)
+                self.stack[-1]['bytes_fetched'] += record['bytes_fetched']
+
+            record['depth'] = len(self.stack)
+            self.stages.append(record)
+
+    def report(self):
+        """Build the run report"""
+        # Every top-level stage resets tracemalloc's peak, so the run's peak is the largest stage peak
+        peak_memory = None
+        if tracemalloc.is_tracing():
+            peak_memory = max([tracemalloc.get_traced_memory()[1]] +
+                              [record['peak_memory_bytes'] for record in self.stages])
+        return {
+            'started_at': self.started_at,
+            'finished_at': datetime.now().isoformat(),
+            'wall_time': round(time.perf_counter() - self.wall_start, 6),
+            'cpu_time': round(time.process_time() - self.cpu_start, 6),
+            'peak_memory_bytes': peak_memory,
+            'stages': self.stages,
+        }
+
+    def save_report(self, filepath):
+        """Write the run report as JSON; does nothing when profiling is disabled"""
+        if not self.enabled:
+            return None
+
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+        logger.info(f"Run report saved to {filepath}")
+        return filepath
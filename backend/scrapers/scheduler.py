@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Long-running scheduler for the scraping pipeline
+Runs each source on its own cadence with jitter, prevents overlapping runs
+of the same source, and backs off sources whose content rarely changes or
+that keep failing or coming back empty
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import schedule
+
+# Add the scrapers directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# config.json lives in the backend directory, wherever the scheduler is started from
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+# Default cadence per source, in minutes
+DEFAULT_CADENCE = {
+    'We Are Teachers': 360,
+    'Texas GrantWatch': 720,
+    'Teachers of Tomorrow': 1440,
+}
+
+DEFAULT_SETTINGS = {
+    'default_interval_minutes': 720,
+    'jitter_fraction': 0.1,
+    'unchanged_runs_before_backoff': 3,
+    'backoff_factor': 2.0,
+    'max_interval_minutes': 10080,
+}
+
+
+class SourceScheduler:
+    def __init__(self, manager, config_path=DEFAULT_CONFIG_PATH, auto_import=False):
+        self.manager = manager
+        self.auto_import = auto_import
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.cadence = dict(DEFAULT_CADENCE)
+        self.load_config(config_path)
+
+        self.scheduler = schedule.Scheduler()
+        self.jobs = {}
+        self.locks = {}
+        self.state = {}
+        # One long-lived worker thread per source, so the scraper's per-thread session (and its
+        # connection pool and cookies) stays warm from one run of the source to the next
+        self.workers = {}
+        self.runs = {}
+        # Interval changes made by worker threads, applied on the scheduler thread
+        self.pending_reschedules = set()
+        self.reschedule_lock = threading.Lock()
+
+        for source_name in self.manager.scraper.get_sources():
+            base_interval = self.cadence.get(source_name, self.settings['default_interval_minutes'])
+            self.locks[source_name] = threading.Lock()
+            self.workers[source_name] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"source-{source_name.lower().replace(' ', '_')}")
+            self.state[source_name] = {
+                'base_interval': base_interval,
+                'interval': base_interval,
+                'fingerprint': None,
+                'unchanged_runs': 0,
+                'last_run': None,
+                'scheduled_interval': None,
+            }
+
+    def load_config(self, config_path):
+        """Load the optional scheduling section of config.json"""
+        if not os.path.exists(config_path):
+            return
+
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read {config_path}: {e}")
+            return
+
+        scheduling = config.get('scheduling', {})
+        self.cadence.update(scheduling.get('sources', {}))
+        for key in DEFAULT_SETTINGS:
+            if key in scheduling:
+                self.settings[key] = scheduling[key]
+
+    def schedule_source(self, source_name):
+        """(Re)register a source's job at its current interval with jitter"""
+        if source_name in self.jobs:
+            self.scheduler.cancel_job(self.jobs[source_name])
+
+        interval = self.effective_interval(source_name)
+        self.state[source_name]['scheduled_interval'] = interval
+        jitter = max(1, int(interval * self.settings['jitter_fraction']))
+        job = self.scheduler.every(max(1, interval - jitter)).to(interval + jitter).minutes.do(
+            self.trigger, source_name
+        )
+        self.jobs[source_name] = job
+        logger.info(f"Scheduled {source_name} every {interval} ± {jitter} minutes")
+
+    def trigger(self, source_name):
+        """Hand a source run to the source's worker so other sources keep their cadence"""
+        previous = self.runs.get(source_name)
+        if previous is not None and not previous.done():
+            logger.warning(f"Skipping {source_name}: previous run still in progress")
+            return previous
+        self.runs[source_name] = self.workers[source_name].submit(self.run_source, source_name)
+        return self.runs[source_name]
+
+    def run_source(self, source_name):
+        """Run one source unless a previous run of the same source is still going"""
+        lock = self.locks[source_name]
+        if not lock.acquire(blocking=False):
+            logger.warning(f"Skipping {source_name}: previous run still in progress")
+            return None
+
+        try:
+            state = self.state[source_name]
+            result = self.manager.run_source_pipeline(source_name, state['fingerprint'],
+                                                      auto_import=self.auto_import)
+            state['last_run'] = time.time()
+            self.update_backoff(source_name, result)
+            return result
+        except Exception as e:
+            logger.error(f"Error running {source_name}: {e}")
+            self.state[source_name]['last_run'] = time.time()
+            self.update_backoff(source_name, None)
+            return None
+        finally:
+            lock.release()
+
+    def effective_interval(self, source_name):
+        """The unchanged-content interval, stretched further for sources the health ledger has backed off"""
+        state = self.state[source_name]
+        health = getattr(self.manager, 'health', None)
+        if health is None:
+            return state['interval']
+        return min(max(state['interval'], state['base_interval'] * health.backoff_factor(source_name)),
+                   self.settings['max_interval_minutes'])
+
+    def update_backoff(self, source_name, result):
+        """Stretch the interval of sources that keep returning unchanged content; result is None after an error"""
+        state = self.state[source_name]
+
+        if result is None:
+            # Failed runs are backed off through the health ledger alone
+            pass
+        elif result['changed']:
+            state['fingerprint'] = result['fingerprint']
+            state['unchanged_runs'] = 0
+            state['interval'] = state['base_interval']
+        else:
+            state['unchanged_runs'] += 1
+            if state['unchanged_runs'] >= self.settings['unchanged_runs_before_backoff']:
+                state['interval'] = min(
+                    int(state['interval'] * self.settings['backoff_factor']),
+                    self.settings['max_interval_minutes']
+                )
+                state['unchanged_runs'] = 0
+
+        interval = self.effective_interval(source_name)
+        if state['scheduled_interval'] is not None and interval != state['scheduled_interval']:
+            logger.info(f"{source_name} interval changed from {state['scheduled_interval']} to {interval} minutes")
+            with self.reschedule_lock:
+                self.pending_reschedules.add(source_name)
+
+    def apply_reschedules(self):
+        """Re-register jobs whose interval changed since the last tick"""
+        with self.reschedule_lock:
+            pending = list(self.pending_reschedules)
+            self.pending_reschedules.clear()
+
+        for source_name in pending:
+            self.schedule_source(source_name)
+
+    def run_forever(self, run_immediately=True, poll_seconds=30):
+        """Keep the scraper and processor warm and run sources as they come due"""
+        logger.info("Starting source scheduler...")
+        source_names = list(self.state)
+        health = getattr(self.manager, 'health', None)
+        if health is not None:
+            source_names.sort(key=health.priority)
+        for source_name in source_names:
+            self.schedule_source(source_name)
+            if run_immediately:
+                self.trigger(source_name)
+
+        try:
+            while True:
+                self.apply_reschedules()
+                self.scheduler.run_pending()
+                time.sleep(poll_seconds)
+        except KeyboardInterrupt:
+            logger.info("Scheduler stopped")
+        finally:
+            for worker in self.workers.values():
+                worker.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    from comprehensive_scraper_manager import ComprehensiveScraperManager
+
+    SourceScheduler(ComprehensiveScraperManager()).run_forever()
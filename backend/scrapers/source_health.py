@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Per-source health ledger for the scraping pipeline
+Records every source run (records returned, error, latency, whether the
+content changed) in a persisted ledger, summarizes yield, error rate,
+latency and change frequency per source, and tells the scraper and the
+scheduler which sources to skip, back off or run last. A productive source
+whose yield suddenly collapses, which usually means the site's layout
+changed, raises an alert.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from statistics import median
+
+import requests
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEDGER_VERSION = 1
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+DEFAULT_SETTINGS = {
+    # Runs kept per source
+    'ledger_window': 50,
+    # Failed or empty runs in a row before a source is backed off
+    'empty_runs_before_backoff': 3,
+    # Longest back-off, as a multiple of the source's normal interval
+    'max_health_backoff': 64,
+    # Interval scrape_all probes backed-off sources at, before back-off
+    'probe_interval_minutes': 720,
+    # A run returning less than this fraction of the usual yield is a collapse...
+    'collapse_ratio': 0.2,
+    # ...for sources that usually return at least this many records, over at least this many runs
+    'collapse_min_baseline': 5,
+    'collapse_min_runs': 3,
+    # Optional URL that alerts are POSTed to as JSON
+    'alert_webhook_url': None,
+}
+
+
+def load_settings(config_path=DEFAULT_CONFIG_PATH):
+    """Health settings from the scheduling section of config.json"""
+    settings = dict(DEFAULT_SETTINGS)
+    if not os.path.exists(config_path):
+        return settings
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            scheduling = json.load(f).get('scheduling', {})
+    except Exception as e:
+        logger.warning(f"Could not read {config_path}: {e}")
+        return settings
+    for key in DEFAULT_SETTINGS:
+        if key in scheduling:
+            settings[key] = scheduling[key]
+    return settings
+
+
+def fingerprint_opportunities(opportunities):
+    """Hash the stable fields of scraped opportunities to detect content changes"""
+    # Deadlines are excluded because parse_deadline fills gaps relative to now()
+    stable = sorted(
+        json.dumps({
+            'title': op.get('title', ''),
+            'description': op.get('description', ''),
+            'website': op.get('website', ''),
+            'amount': op.get('amount', {}),
+        }, sort_keys=True)
+        for op in opportunities
+    )
+    return hashlib.sha256('\n'.join(stable).encode('utf-8')).hexdigest()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else None
+
+
+class SourceHealthLedger:
+    def __init__(self, path=os.path.join('data', 'source_health.json'), settings=None,
+                 alerts_path=None):
+        self.path = path
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.alerts_path = alerts_path or os.path.join(os.path.dirname(path) or '.', 'source_alerts.ndjson')
+        self.lock = threading.Lock()
+        self.sources = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                ledger = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return ledger.get('sources', {}) if ledger.get('version') == LEDGER_VERSION else {}
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Held across the write, so concurrent saves cannot replace a newer ledger with an older one
+        with self.lock:
+            data = json.dumps({'version': LEDGER_VERSION, 'sources': self.sources}, indent=2, ensure_ascii=False)
+            fd, tmp_path = tempfile.mkstemp(dir=directory or '.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return self.path
+
+    def entry(self, source_name):
+        return self.sources.setdefault(source_name, {'runs': [], 'fingerprint': None, 'collapsed': False})
+
+    def record(self, source_name, records=0, seconds=0.0, error=None, fingerprint=None, bytes_fetched=0,
+               now=None):
+        """Add one run to the ledger, raise a collapse alert if it warrants one, and save
+
+        Returns the alert, if any.
+        """
+        with self.lock:
+            entry = self.entry(source_name)
+            changed = None
+            if error is None and fingerprint is not None:
+                changed = fingerprint != entry['fingerprint']
+                entry['fingerprint'] = fingerprint
+            run = {
+                'at': time.time() if now is None else now,
+                'records': records,
+                'seconds': round(seconds, 3),
+                'error': str(error)[:200] if error is not None else None,
+                'changed': changed,
+                'bytes': bytes_fetched,
+            }
+            baseline = self.baseline(entry['runs'])
+            entry['runs'] = (entry['runs'] + [run])[-self.settings['ledger_window']:]
+
+            alert = None
+            # Only a successful run with a low yield is a collapse; a failed run is just a failure
+            collapsed = (error is None and baseline is not None and baseline >= self.settings['collapse_min_baseline']
+                         and records < self.settings['collapse_ratio'] * baseline)
+            if collapsed and not entry['collapsed']:
+                alert = {
+                    'source': source_name,
+                    'at': datetime.fromtimestamp(run['at']).isoformat(),
+                    'records': records,
+                    'usualRecords': baseline,
+                    'error': run['error'],
+                    'message': f"{source_name} returned {records} records, usually {baseline:g}; "
+                               f"the page layout may have changed",
+                }
+            # Alert once per collapse; a recovered run re-arms it
+            if error is None and baseline is not None and records >= self.settings['collapse_ratio'] * baseline:
+                entry['collapsed'] = False
+            elif collapsed:
+                entry['collapsed'] = True
+
+        if alert:
+            self.alert(alert)
+        self.save()
+        return alert
+
+    def baseline(self, runs):
+        """Usual yield: the median of the productive runs, once there are enough of them"""
+        productive = [run['records'] for run in runs if run['error'] is None and run['records'] > 0]
+        if len(productive) < self.settings['collapse_min_runs']:
+            return None
+        return median(productive)
+
+    def alert(self, alert):
+        logger.error(f"🚨 {alert['message']}")
+        try:
+            with open(self.alerts_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+        except OSError as e:
+            logger.warning(f"Could not write alert to {self.alerts_path}: {e}")
+        if self.settings['alert_webhook_url']:
+            try:
+                requests.post(self.settings['alert_webhook_url'], json=alert, timeout=10)
+            except requests.RequestException as e:
+                logger.warning(f"Could not post alert: {e}")
+
+    def unhealthy_streak(self, source_name):
+        """Failed or empty runs in a row, most recent first"""
+        streak = 0
+        for run in reversed(self.sources.get(source_name, {}).get('runs', [])):
+            if run['error'] is None and run['records'] > 0:
+                break
+            streak += 1
+        return streak
+
+    def backoff_factor(self, source_name):
+        """Multiple of the normal interval to wait between runs of a failing or empty source"""
+        excess = self.unhealthy_streak(source_name) - self.settings['empty_runs_before_backoff']
+        if excess < 0:
+            return 1
+        return min(2 ** (excess + 1), self.settings['max_health_backoff'])
+
+    def should_skip(self, source_name, interval_minutes=None, now=None):
+        """Whether a backed-off source's next probe is not due yet"""
+        factor = self.backoff_factor(source_name)
+        runs = self.sources.get(source_name, {}).get('runs')
+        if factor == 1 or not runs:
+            return False
+        interval = (interval_minutes or self.settings['probe_interval_minutes']) * 60 * factor
+        return (time.time() if now is None else now) - runs[-1]['at'] < interval
+
+    def priority(self, source_name):
+        """Sort key that puts healthy, productive sources first"""
+        summary = self.summary(source_name)
+        return (self.unhealthy_streak(source_name), summary['errorRate'] or 0, -(summary['yield'] or 0))
+
+    def summary(self, source_name):
+        """Yield, error rate, latency and change frequency over the ledger window"""
+        runs = self.sources.get(source_name, {}).get('runs', [])
+        succeeded = [run for run in runs if run['error'] is None]
+        compared = [run for run in succeeded if run['changed'] is not None]
+        latencies = [run['seconds'] for run in runs]
+        return {
+            'runs': len(runs),
+            'yield': sum(run['records'] for run in succeeded) / len(succeeded) if succeeded else None,
+            'errorRate': (len(runs) - len(succeeded)) / len(runs) if runs else None,
+            'latencyP50': percentile(latencies, 0.5),
+            'latencyP95': percentile(latencies, 0.95),
+            'changeFrequency': sum(run['changed'] for run in compared) / len(compared) if compared else None,
+            'unhealthyStreak': self.unhealthy_streak(source_name),
+            'backoffFactor': self.backoff_factor(source_name),
+            'lastRun': datetime.fromtimestamp(runs[-1]['at']).isoformat() if runs else None,
+        }
+
+    def report(self):
+        return {source_name: self.summary(source_name) for source_name in sorted(self.sources)}
+
+
+def run_checks():
+    """Drive a ledger through typical source histories; returns True when every check passes"""
+    results = []
+
+    def check(name, passed, detail=''):
+        results.append(passed)
+        print(f"  {'✅' if passed else '❌'} {name}{f' ({detail})' if detail else ''}")
+
+    directory = tempfile.mkdtemp(prefix='source_health_')
+    ledger = SourceHealthLedger(os.path.join(directory, 'source_health.json'))
+    start = time.time() - 100 * 3600
+    hour = 3600
+
+    # A steady source: productive runs, content changing every other run
+    for i in range(6):
+        ledger.record('Steady', records=40 + i % 2, seconds=1.0 + i / 10, fingerprint=f"v{i // 2}",
+                      now=start + i * hour)
+    steady = ledger.summary('Steady')
+    check("yield and change frequency summarized", steady['yield'] == 40.5 and steady['changeFrequency'] == 0.5,
+          f"yield {steady['yield']}, changes {steady['changeFrequency']}")
+    check("healthy source not backed off", ledger.backoff_factor('Steady') == 1
+          and not ledger.should_skip('Steady', now=start + 6 * hour))
+
+    # The layout changes: yield collapses, one alert, not one per run
+    first = ledger.record('Steady', records=0, seconds=0.4, fingerprint='empty', now=start + 6 * hour)
+    second = ledger.record('Steady', records=0, seconds=0.4, fingerprint='empty', now=start + 7 * hour)
+    check("collapse alerts once", first is not None and second is None and first['usualRecords'] == 40.5)
+    with open(ledger.alerts_path, 'r', encoding='utf-8') as f:
+        check("alert written to the alerts file", len(f.readlines()) == 1)
+
+    # Empty runs keep coming: the source is backed off and probed less and less often
+    ledger.record('Steady', records=0, seconds=0.4, fingerprint='empty', now=start + 8 * hour)
+    factor_three = ledger.backoff_factor('Steady')
+    ledger.record('Steady', records=0, seconds=0.4, fingerprint='empty', now=start + 9 * hour)
+    factor_four = ledger.backoff_factor('Steady')
+    check("back-off grows with the empty streak", factor_three == 2 and factor_four == 4,
+          f"×{factor_three}, ×{factor_four}")
+    check("backed-off source skipped until its probe is due",
+          ledger.should_skip('Steady', 60, now=start + 10 * hour)
+          and not ledger.should_skip('Steady', 60, now=start + 14 * hour))
+
+    # It recovers: back-off resets and a later collapse alerts again
+    ledger.record('Steady', records=42, seconds=1.0, fingerprint='v9', now=start + 14 * hour)
+    check("recovery resets the back-off", ledger.backoff_factor('Steady') == 1)
+    again = ledger.record('Steady', records=1, seconds=1.0, fingerprint='v10', now=start + 15 * hour)
+    check("a new collapse alerts again", again is not None)
+
+    # A timeout from a productive source is a failed run, not a layout change
+    for i in range(3):
+        ledger.record('Flaky', records=30, seconds=1.0, fingerprint='f', now=start + i * hour)
+    timeout = ledger.record('Flaky', error=TimeoutError('timed out'), seconds=30.0, now=start + 3 * hour)
+    check("a failed run does not alert", timeout is None and not ledger.sources['Flaky']['collapsed'])
+
+    # Errors count towards the error rate and the back-off, and sort the source last
+    for i in range(4):
+        ledger.record('Broken', error=ConnectionError('refused'), seconds=10.0, now=start + i * hour)
+    ledger.record('Small', records=2, seconds=0.5, fingerprint='s', now=start)
+    broken = ledger.summary('Broken')
+    check("error rate and latency tracked", broken['errorRate'] == 1.0 and broken['latencyP50'] == 10.0)
+    order = sorted(['Broken', 'Steady', 'Small'], key=ledger.priority)
+    check("failing sources deprioritized", order[-1] == 'Broken', ' > '.join(order))
+    check("sources that were never productive do not alert",
+          not os.path.exists(ledger.alerts_path) or all(
+              json.loads(line)['source'] == 'Steady' for line in open(ledger.alerts_path, encoding='utf-8')))
+
+    # The same through the scraper: a page that cannot be fetched makes scrape_source
+    # record a failed run, not a successful empty one that looks like a collapse
+    from grants_scholarships_scraper import GrantsScholarshipsScraper
+
+    class TimingOutSession:
+        def get(self, url, timeout=None):
+            raise requests.Timeout(f"{url} timed out")
+
+    scraper = GrantsScholarshipsScraper()
+    scraper.health = ledger
+    scraper.retry_delay = 0
+    scraper.local.session = TimingOutSession()
+    source_name = next(iter(scraper.get_sources()))
+    for i in range(3):
+        ledger.record(source_name, records=30, seconds=1.0, fingerprint='p', now=start + i * hour)
+    opportunities = scraper.scrape_source(source_name)
+    scraped = ledger.summary(source_name)
+    check("scrape_source records a fetch failure as an error",
+          opportunities == [] and not ledger.sources[source_name]['collapsed'] and scraped['errorRate'] > 0,
+          f"error rate {scraped['errorRate']:.2f}")
+
+    reloaded = SourceHealthLedger(ledger.path)
+    check("ledger persisted", reloaded.report() == ledger.report())
+    return all(results)
+
+
+def parse_args():
+    """Parse command line options for the source health report"""
+    parser = argparse.ArgumentParser(description="Show the per-source health ledger")
+    parser.add_argument('--ledger', default=os.path.join('data', 'source_health.json'), help="Ledger file")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    parser.add_argument('--check', action='store_true', help="Run the ledger's checks on synthetic histories")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to show source health"""
+    args = parse_args()
+    if args.check:
+        print("🚀 Checking the source health ledger...")
+        sys.exit(0 if run_checks() else 1)
+
+    ledger = SourceHealthLedger(args.ledger, load_settings())
+    report = ledger.report()
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    if not report:
+        print(f"❌ No runs recorded in {args.ledger}")
+        return
+
+    print(f"📊 Source health ({args.ledger})")
+    for source_name, summary in report.items():
+        status = '✅' if summary['unhealthyStreak'] == 0 else '⚠️ '
+        yield_text = f"{summary['yield']:.1f}" if summary['yield'] is not None else '-'
+        changes = f"{summary['changeFrequency']:.0%}" if summary['changeFrequency'] is not None else '-'
+        print(f"{status} {source_name}: {summary['runs']} runs, yield {yield_text}, "
+              f"errors {summary['errorRate']:.0%}, p50 {summary['latencyP50']:.1f}s, changed {changes}, "
+              f"back-off ×{summary['backoffFactor']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Canonical vocabulary for opportunity eligibility labels
+Builds lookup tables once from the enums in models/Scholarship.js and maps
+scraped labels, synonyms and grade ranges onto canonical enum values with
+one table lookup per label. Each field's values are encoded as bitmasks.
+"""
+
+import os
+import re
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHOLARSHIP_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                      'models', 'Scholarship.js')
+
+ELIGIBILITY_FIELDS = ('gradeLevels', 'subjects', 'regions', 'districts', 'fundingTypes')
+
+# Grade units in order; ranges like "K-5" cover every unit between their ends.
+# These are the spellings User.gradeLevel uses, so canonical grades match user profiles.
+GRADE_ORDER = ['Pre-K', 'K', '1', '2', '3', '4', '5', '6', '7', '8', '9', '10', '11', '12']
+GRADE_NAMES = {
+    'Pre-K': ['pre-k', 'prek', 'pre-kindergarten', 'preschool', 'pk'],
+    'K': ['k', 'kindergarten', 'kinder'],
+    '1': ['1st grade', 'first grade', 'grade 1'], '2': ['2nd grade', 'second grade', 'grade 2'],
+    '3': ['3rd grade', 'third grade', 'grade 3'], '4': ['4th grade', 'fourth grade', 'grade 4'],
+    '5': ['5th grade', 'fifth grade', 'grade 5'], '6': ['6th grade', 'sixth grade', 'grade 6'],
+    '7': ['7th grade', 'seventh grade', 'grade 7'], '8': ['8th grade', 'eighth grade', 'grade 8'],
+    '9': ['9th grade', 'ninth grade', 'grade 9'], '10': ['10th grade', 'tenth grade', 'grade 10'],
+    '11': ['11th grade', 'eleventh grade', 'grade 11'], '12': ['12th grade', 'twelfth grade', 'grade 12'],
+}
+# Named bands, as (first unit, last unit)
+GRADE_BANDS = {
+    'early childhood': ('Pre-K', '2'),
+    'elementary': ('K', '5'),
+    'elementary school': ('K', '5'),
+    'primary': ('K', '5'),
+    'middle school': ('6', '8'),
+    'junior high': ('6', '8'),
+    'high school': ('9', '12'),
+    'secondary': ('9', '12'),
+    'k-12': ('K', '12'),
+    'all grades': ('Pre-K', '12'),
+}
+
+# Spellings folded onto one canonical enum value
+SYNONYMS = {
+    'gradeLevels': {
+        'College': ['college', 'university', 'higher education', 'undergraduate', 'postsecondary'],
+        'Adult Education': ['adult education', 'adult ed', 'adult learners'],
+    },
+    'subjects': {
+        'Mathematics': ['math', 'maths'],
+        'English/Language Arts': ['english language arts', 'english', 'ela', 'language arts'],
+        'Art': ['arts', 'visual arts', 'fine arts'],
+        'Computer Science': ['coding', 'programming', 'cs'],
+        'ESL/ELL': ['esl', 'ell', 'english learners', 'english language learners'],
+        'Physical Education': ['pe', 'p.e.', 'physical ed', 'health and pe'],
+        'Foreign Language': ['world languages', 'world language', 'foreign languages'],
+        'Science': ['stem', 'steam'],
+        'Any': ['all', 'all subjects', 'any subject', 'general'],
+    },
+    'regions': {
+        'National': ['nationwide', 'national', 'usa', 'us', 'united states'],
+        'International': ['global', 'worldwide', 'international'],
+        'Rural Areas': ['rural'],
+        'Local Communities': ['local', 'community'],
+    },
+    'districts': {
+        'All Districts': ['all', 'any', 'all districts'],
+        'Texas Districts': ['texas', 'tx'],
+    },
+    'fundingTypes': {
+        'Special Programs': ['education programs', 'programs', 'program'],
+        'Technology Equipment': ['technology', 'tech', 'computers', 'devices'],
+        'Books and Materials': ['books', 'materials', 'library'],
+        'Classroom Supplies': ['supplies', 'classroom'],
+        'STEM Materials': ['stem', 'steam', 'stem supplies'],
+        'Classroom Furniture': ['furniture', 'flexible seating'],
+        'Professional Development': ['pd', 'training', 'conferences'],
+        'Field Trips': ['field trip', 'travel'],
+        'Student Support': ['tutoring', 'student needs'],
+    },
+}
+
+# Labels that expand to several canonical values
+REGION_EXPANSIONS = {
+    # Users are Texas schools, so a statewide Texas opportunity covers every region
+    'texas': ['North', 'South', 'East', 'West', 'Central', 'Northeast', 'Northwest', 'Southeast', 'Southwest'],
+    'tx': ['North', 'South', 'East', 'West', 'Central', 'Northeast', 'Northwest', 'Southeast', 'Southwest'],
+    'statewide': ['North', 'South', 'East', 'West', 'Central', 'Northeast', 'Northwest', 'Southeast', 'Southwest'],
+}
+
+# Value assigned to labels the tables do not know, per field (None drops them)
+UNKNOWN_VALUE = {
+    'gradeLevels': None,
+    'subjects': 'Other',
+    'regions': None,
+    'districts': None,
+    'fundingTypes': 'Other',
+}
+
+DASHES = re.compile(r'\s*(?:[-‐-―]|\bto\b|\bthrough\b|\bthru\b)\s*')
+SPACES = re.compile(r'\s+')
+
+
+def normalize_label(label):
+    """Lower-case a label, collapse spaces and write every range separator as '-'"""
+    label = SPACES.sub(' ', str(label).strip().lower())
+    label = DASHES.sub('-', label)
+    if label.startswith('grades '):
+        label = label[len('grades '):]
+    return label.replace('independent school district', 'isd')
+
+
+def load_enums(model_path=SCHOLARSHIP_MODEL_PATH):
+    """Read the eligibility enum lists out of the Scholarship model"""
+    with open(model_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    source = re.sub(r'//[^\n]*', '', source)
+
+    enums = {}
+    for field in ELIGIBILITY_FIELDS:
+        match = re.search(field + r':\s*\[\{\s*type:\s*String,\s*enum:\s*\[(.*?)\]', source, re.DOTALL)
+        if not match:
+            raise ValueError(f"No enum for eligibility.{field} in {model_path}")
+        enums[field] = re.findall(r"'([^']*)'", match.group(1))
+    return enums
+
+
+class VocabularyMapper:
+    def __init__(self, model_path=SCHOLARSHIP_MODEL_PATH):
+        self.enums = load_enums(model_path)
+        # Canonical values per field, in the order their bits are assigned
+        self.values = {}
+        self.bits = {}
+        # normalized label -> bitmask of canonical values
+        self.tables = {}
+        self.decoded = {field: {} for field in ELIGIBILITY_FIELDS}
+        # Raw label -> mask, so a label seen before skips normalization
+        self.seen = {field: {} for field in ELIGIBILITY_FIELDS}
+
+        for field in ELIGIBILITY_FIELDS:
+            self._build_field(field)
+
+    def _build_field(self, field):
+        enum = self.enums[field]
+        # Enum spellings that are synonyms of another value are folded into it
+        folded = {normalize_label(alias) for value, aliases in SYNONYMS.get(field, {}).items()
+                  for alias in aliases if normalize_label(alias) != normalize_label(value)}
+        if field == 'gradeLevels':
+            canonical = GRADE_ORDER + [value for value in enum
+                                       if value not in GRADE_ORDER and normalize_label(value) not in GRADE_BANDS
+                                       and not re.match(r'\d+(st|nd|rd|th) Grade$|Kindergarten$', value)]
+        else:
+            canonical = [value for value in enum if normalize_label(value) not in folded]
+        self.values[field] = canonical
+        self.bits[field] = {value: 1 << index for index, value in enumerate(canonical)}
+
+        bits = self.bits[field]
+        table = {}
+        for value in canonical:
+            table[normalize_label(value)] = bits[value]
+        for value, aliases in SYNONYMS.get(field, {}).items():
+            for alias in aliases:
+                table[normalize_label(alias)] = bits[value]
+
+        if field == 'gradeLevels':
+            table.update(self._grade_table(bits))
+        elif field == 'regions':
+            for label, regions in REGION_EXPANSIONS.items():
+                table[label] = self.encode_values(field, regions)
+
+        # Every enum spelling must resolve, even the ones folded into another
+        for value in enum:
+            if normalize_label(value) not in table:
+                raise ValueError(f"eligibility.{field} value {value!r} has no canonical mapping")
+        self.tables[field] = table
+
+    def _grade_table(self, bits):
+        """Single grades, their spellings, every "a-b" range and the named bands"""
+        table = {}
+        unit_masks = [bits[unit] for unit in GRADE_ORDER]
+        spellings = {unit: [normalize_label(unit)] + GRADE_NAMES[unit] for unit in GRADE_ORDER}
+        for unit, names in spellings.items():
+            for name in names:
+                table[name] = bits[unit]
+
+        # Precompute every range so "K-5", "3rd-5th" or "grades 6 to 8" is one lookup
+        short = {unit: [normalize_label(unit)] for unit in GRADE_ORDER}
+        for unit in GRADE_ORDER[2:]:
+            short[unit].append(GRADE_NAMES[unit][0].split(' ')[0])  # "3rd"
+        short['Pre-K'] = ['pre-k', 'prek', 'pk']
+        for start, first in enumerate(GRADE_ORDER):
+            for end in range(start + 1, len(GRADE_ORDER)):
+                mask = 0
+                for unit_mask in unit_masks[start:end + 1]:
+                    mask |= unit_mask
+                for low in short[first]:
+                    for high in short[GRADE_ORDER[end]]:
+                        table[f"{low}-{high}"] = mask
+
+        for band, (first, last) in GRADE_BANDS.items():
+            start, end = GRADE_ORDER.index(first), GRADE_ORDER.index(last)
+            mask = 0
+            for unit_mask in unit_masks[start:end + 1]:
+                mask |= unit_mask
+            table[normalize_label(band)] = mask
+        return table
+
+    def encode_values(self, field, values):
+        """Bitmask for canonical values"""
+        mask = 0
+        for value in values:
+            mask |= self.bits[field][value]
+        return mask
+
+    def encode(self, field, labels):
+        """Bitmask for arbitrary scraped labels; one table lookup per label"""
+        seen = self.seen[field]
+        mask = 0
+        for label in labels:
+            label_mask = seen.get(label)
+            if label_mask is None:
+                label_mask = self._lookup(field, label)
+                seen[label] = label_mask
+            mask |= label_mask
+        return mask
+
+    def _lookup(self, field, label):
+        label_mask = self.tables[field].get(normalize_label(label))
+        if label_mask is None:
+            fallback = UNKNOWN_VALUE[field]
+            if fallback is None:
+                logger.debug(f"Dropping unknown {field} label: {label!r}")
+                return 0
+            label_mask = self.bits[field][fallback]
+        return label_mask
+
+    def decode(self, field, mask):
+        """Canonical values for a bitmask, in enum order"""
+        cache = self.decoded[field]
+        values = cache.get(mask)
+        if values is None:
+            values = [value for value, bit in self.bits[field].items() if mask & bit]
+            cache[mask] = values
+        return list(values)
+
+    def canonicalize(self, field, labels):
+        """Map scraped labels to canonical enum values"""
+        return self.decode(field, self.encode(field, labels))
+
+    def canonicalize_eligibility(self, eligibility):
+        """Canonicalize every enum field of an eligibility dict in place"""
+        for field in ELIGIBILITY_FIELDS:
+            if eligibility.get(field):
+                eligibility[field] = self.canonicalize(field, eligibility[field])
+        return eligibility
+
+
+_vocabulary = None
+
+
+def get_vocabulary():
+    """The shared mapper, built on first use"""
+    global _vocabulary
+    if _vocabulary is None:
+        _vocabulary = VocabularyMapper()
+    return _vocabulary
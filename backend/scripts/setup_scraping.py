@@ -70,12 +70,33 @@ def create_config_files():
         "ai_matching": {
             "min_similarity_threshold": 0.1,
             "max_recommendations": 10,
-            "enable_ml_matching": True
+            "enable_ml_matching": True,
+            "svd_components": 128,
+            "ann_probes": 128
         },
         "data_processing": {
             "remove_duplicates": True,
             "validate_required_fields": True,
             "normalize_text": True
+        },
+        "scheduling": {
+            "sources": {
+                "We Are Teachers": 360,
+                "Texas GrantWatch": 720,
+                "Teachers of Tomorrow": 1440
+            },
+            "default_interval_minutes": 720,
+            "jitter_fraction": 0.1,
+            "unchanged_runs_before_backoff": 3,
+            "backoff_factor": 2.0,
+            "max_interval_minutes": 10080,
+            "empty_runs_before_backoff": 3,
+            "max_health_backoff": 64,
+            "probe_interval_minutes": 720,
+            "collapse_ratio": 0.2,
+            "collapse_min_baseline": 5,
+            "collapse_min_runs": 3,
+            "alert_webhook_url": None
         }
     }
     
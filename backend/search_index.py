@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+BM25 full-text index over processed opportunities
+Tokenizes and stems title, organization, description and tags into an
+inverted index that is persisted to disk and updated incrementally, and
+answers queries with ranked ids and highlighted snippets. Queries are
+tokenized, never compiled as regular expressions.
+"""
+
+import os
+import re
+import glob
+import html
+import json
+import math
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from mongo_export import iter_export
+from opportunity_query import DELTA_PATTERNS, get_path, record_key
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = os.path.join('data', 'search_index')
+INDEX_FILE = 'search_index.json'
+
+# Field weights (BM25F-style: weighted term frequencies share one length)
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'organization': 2.0,
+    'tags': 2.0,
+    'description': 1.0,
+}
+
+K1 = 1.2
+B = 0.75
+# Cached impacts are rebuilt once the average length moves this far
+AVGDL_TOLERANCE = 0.02
+# Postings read per term on the first pass of a query, as a multiple of the results wanted
+INITIAL_DEPTH_FACTOR = 4
+# Once a prefix reaches 1/FULL_SCAN_FRACTION of the longest list, all postings are scored instead
+FULL_SCAN_FRACTION = 4
+SNIPPET_CHARS = 160
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the their this to was were will
+with you your our we can all any not no
+""".split())
+
+
+def is_consonant(word, i):
+    char = word[i]
+    if char in 'aeiou':
+        return False
+    if char == 'y':
+        return i == 0 or not is_consonant(word, i - 1)
+    return True
+
+
+def measure(stem):
+    """Porter's m: the number of vowel-consonant sequences"""
+    m = 0
+    previous_vowel = False
+    for i in range(len(stem)):
+        consonant = is_consonant(stem, i)
+        if consonant and previous_vowel:
+            m += 1
+        previous_vowel = not consonant
+    return m
+
+
+def has_vowel(stem):
+    return any(not is_consonant(stem, i) for i in range(len(stem)))
+
+
+def ends_cvc(word):
+    """Consonant-vowel-consonant ending, where the last consonant is not w, x or y"""
+    n = len(word)
+    return (n >= 3 and is_consonant(word, n - 3) and not is_consonant(word, n - 2)
+            and is_consonant(word, n - 1) and word[-1] not in 'wxy')
+
+
+def stem(word):
+    """Porter stemmer steps 1 (plurals, -ed, -ing, -y) and 5 (final -e, -ll)"""
+    if len(word) <= 2 or not word.isalpha():
+        return word
+
+    # Step 1a
+    if word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('ies'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+
+    # Step 1b
+    if word.endswith('eed'):
+        if measure(word[:-3]) > 0:
+            word = word[:-1]
+    else:
+        for suffix in ('ed', 'ing'):
+            if word.endswith(suffix) and has_vowel(word[:-len(suffix)]):
+                word = word[:-len(suffix)]
+                if word.endswith(('at', 'bl', 'iz')):
+                    word += 'e'
+                elif len(word) >= 2 and word[-1] == word[-2] and is_consonant(word, len(word) - 1) \
+                        and word[-1] not in 'lsz':
+                    word = word[:-1]
+                elif measure(word) == 1 and ends_cvc(word):
+                    word += 'e'
+                break
+
+    # Step 1c
+    if word.endswith('y') and has_vowel(word[:-1]):
+        word = word[:-1] + 'i'
+
+    # Step 5
+    if word.endswith('e'):
+        m = measure(word[:-1])
+        if m > 1 or (m == 1 and not ends_cvc(word[:-1])):
+            word = word[:-1]
+    if word.endswith('ll') and measure(word) > 1:
+        word = word[:-1]
+    return word
+
+
+_stems = {}
+
+
+def term_of(token):
+    """Index term for a lower-cased token, or None for stopwords"""
+    term = _stems.get(token)
+    if term is None:
+        word = token.replace("'", '')
+        term = _stems[token] = '' if word in STOPWORDS else stem(word)
+    return term or None
+
+
+def analyze(text):
+    """Stemmed terms of a text, stopwords dropped"""
+    return [term for term in map(term_of, TOKEN_PATTERN.findall(text.lower())) if term]
+
+
+def document_fields(document):
+    """The indexed text of a document, per field"""
+    return {field: ' '.join(v for v in get_path(document, field) if isinstance(v, str))
+            for field in FIELD_WEIGHTS}
+
+
+def highlight(text, terms, snippet_chars=None):
+    """HTML-escaped text with matching words in <mark>, optionally cut to a window around the first match"""
+    matches = [m for m in TOKEN_PATTERN.finditer(text.lower()) if term_of(m.group()) in terms]
+    if not matches:
+        return None
+
+    start, end = 0, len(text)
+    if snippet_chars and len(text) > snippet_chars:
+        start = max(0, matches[0].start() - snippet_chars // 4)
+        end = min(len(text), start + snippet_chars)
+        # Widen to word boundaries
+        while start > 0 and not text[start - 1].isspace():
+            start -= 1
+        while end < len(text) and not text[end].isspace():
+            end += 1
+
+    parts = ['…' if start > 0 else '']
+    position = start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f"<mark>{html.escape(text[match.start():match.end()])}</mark>")
+        position = match.end()
+    parts.append(html.escape(text[position:end]))
+    parts.append('…' if end < len(text) else '')
+    return ''.join(parts)
+
+
+def rank_top(candidates, scores, needed):
+    """Positions of the best `needed` scores, ties broken by document number"""
+    if len(scores) > needed:
+        # Keep everything scoring at least the needed-th best, so ties are ranked fairly
+        cutoff = np.partition(scores, len(scores) - needed)[len(scores) - needed]
+        kept = np.flatnonzero(scores >= cutoff)
+    else:
+        kept = np.arange(len(scores))
+    return kept[np.lexsort((candidates[kept], -scores[kept]))]
+
+
+class SearchIndex:
+    """Inverted index with BM25 scoring, updated in place and saved as one JSON file"""
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        self.index_dir = index_dir
+        # key -> {'fields': {...}, 'terms': {term: weighted tf}, 'length': weighted length}
+        self.documents = {}
+        # term -> {doc number: weighted tf}
+        self.postings = {}
+        self.doc_numbers = {}
+        self.keys = []
+        self.total_length = 0.0
+        self.applied_files = {}
+        self._impacts = {}
+        self._impacts_avgdl = None
+
+    @property
+    def size(self):
+        return len(self.documents)
+
+    @property
+    def avgdl(self):
+        return self.total_length / self.size if self.size else 0.0
+
+    @classmethod
+    def load(cls, index_dir=DEFAULT_INDEX_DIR):
+        """Load a saved index, or return an empty one"""
+        index = cls(index_dir)
+        try:
+            with open(os.path.join(index_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return index
+        if saved.get('version') != INDEX_VERSION:
+            return index
+
+        index.applied_files = saved.get('applied_files', {})
+        for key, entry in saved['documents'].items():
+            index._add(key, entry)
+        return index
+
+    def save(self):
+        """Write the index atomically"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        path = os.path.join(self.index_dir, INDEX_FILE)
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': INDEX_VERSION,
+                    'applied_files': self.applied_files,
+                    'documents': self.documents,
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def _add(self, key, entry):
+        number = self.doc_numbers.get(key)
+        if number is None:
+            number = self.doc_numbers[key] = len(self.keys)
+            self.keys.append(key)
+        self.documents[key] = entry
+        self.total_length += entry['length']
+        for term, tf in entry['terms'].items():
+            self.postings.setdefault(term, {})[number] = tf
+            self._impacts.pop(term, None)
+
+    def _drop(self, key):
+        entry = self.documents.pop(key)
+        number = self.doc_numbers[key]
+        self.total_length -= entry['length']
+        for term in entry['terms']:
+            postings = self.postings[term]
+            del postings[number]
+            if not postings:
+                del self.postings[term]
+            self._impacts.pop(term, None)
+
+    def update(self, documents):
+        """Index new or changed documents and drop inactive ones; returns the number changed"""
+        changed = 0
+        for document in documents:
+            key = record_key(document)
+            if document.get('isActive') is False:
+                # Retired by the source or by the deadline sweep: no longer searchable
+                changed += self.remove([key])
+                continue
+            fields = document_fields(document)
+            existing = self.documents.get(key)
+            if existing is not None:
+                if existing['fields'] == fields:
+                    continue
+                self._drop(key)
+
+            terms = {}
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in analyze(fields[field]):
+                    terms[term] = terms.get(term, 0.0) + weight
+                    length += weight
+            self._add(key, {'fields': fields, 'terms': terms, 'length': length})
+            changed += 1
+        return changed
+
+    def remove(self, keys):
+        """Remove documents by key; returns the number removed"""
+        removed = 0
+        for key in keys:
+            if key in self.documents:
+                self._drop(key)
+                removed += 1
+        return removed
+
+    def refresh(self, data_dir):
+        """Index processed files the pipeline wrote since the last refresh"""
+        paths = [path for pattern in DELTA_PATTERNS for path in glob.glob(os.path.join(data_dir, pattern))]
+        changed = 0
+        for path in sorted(paths, key=os.path.getmtime):
+            mtime = os.path.getmtime(path)
+            if self.applied_files.get(path) == mtime:
+                continue
+            changed += self.update(iter_export(path))
+            self.applied_files[path] = mtime
+        return changed
+
+    def _term_impacts(self, term):
+        """A term's BM25 impacts, ordered by impact and by document number"""
+        avgdl = self.avgdl
+        if self._impacts_avgdl is None or abs(avgdl - self._impacts_avgdl) > AVGDL_TOLERANCE * self._impacts_avgdl:
+            self._impacts = {}
+            self._impacts_avgdl = avgdl
+
+        cached = self._impacts.get(term)
+        if cached is None:
+            postings = self.postings[term]
+            numbers = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            lengths = np.fromiter((self.documents[self.keys[n]]['length'] for n in postings),
+                                  dtype=np.float64, count=len(postings))
+            impacts = tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths / (self._impacts_avgdl or 1.0)))
+
+            by_number = np.argsort(numbers)
+            by_impact = np.argsort(-impacts, kind='stable')
+            cached = self._impacts[term] = (numbers[by_impact], impacts[by_impact],
+                                            numbers[by_number], impacts[by_number])
+        return cached
+
+    def _idf(self, term):
+        df = len(self.postings[term])
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    def search(self, query, limit=20, offset=0, highlights=True):
+        """Ranked matches for a free-text query: [{'id', 'score', 'highlights'}]
+
+        Postings are read in impact order: each pass scores the union of every
+        term's top postings exactly and stops once no unread posting could
+        lift a document into the results, so a query reads a bounded prefix
+        of each list however large the corpus grows.
+        """
+        terms = [term for term in dict.fromkeys(analyze(query)) if term in self.postings]
+        needed = offset + limit
+        if not terms or needed <= 0:
+            return []
+
+        lists = [(self._idf(term), self._term_impacts(term)) for term in terms]
+        longest = max(len(impacts) for _, (_, impacts, _, _) in lists)
+        depth = max(needed * INITIAL_DEPTH_FACTOR, 64)
+        while True:
+            if depth * FULL_SCAN_FRACTION >= longest:
+                # Prefixes this deep save nothing; score every posting at once
+                candidates, scores = self._score_all(lists)
+                ranked = rank_top(candidates, scores, needed)
+                break
+            candidates = np.sort(np.concatenate([impact_order[:depth] for _, (impact_order, _, _, _) in lists]))
+            candidates = candidates[np.concatenate(([True], candidates[1:] != candidates[:-1]))]
+            scores = np.zeros(len(candidates))
+            for idf, (_, _, numbers, impacts) in lists:
+                positions = np.searchsorted(numbers, candidates)
+                positions[positions == len(numbers)] = 0
+                present = numbers[positions] == candidates
+                scores += np.where(present, idf * impacts[positions], 0.0)
+
+            # Best score any document outside every list's prefix could reach
+            threshold = sum(idf * impacts[depth] for idf, (_, impacts, _, _) in lists if depth < len(impacts))
+            exhausted = all(depth >= len(impacts) for _, (_, impacts, _, _) in lists)
+            ranked = rank_top(candidates, scores, needed)
+            if exhausted or (len(ranked) >= needed and scores[ranked[needed - 1]] >= threshold):
+                break
+            depth *= 4
+
+        results = []
+        query_terms = set(terms)
+        for position in ranked[offset:needed].tolist():
+            key = self.keys[int(candidates[position])]
+            result = {'id': key, 'score': round(float(scores[position]), 6)}
+            if highlights:
+                fields = self.documents[key]['fields']
+                result['highlights'] = {
+                    field: snippet for field in FIELD_WEIGHTS
+                    if (snippet := highlight(fields[field], query_terms,
+                                             SNIPPET_CHARS if field == 'description' else None))
+                }
+            results.append(result)
+        return results
+
+    def _score_all(self, lists):
+        """Exact scores of every document holding any of the terms"""
+        numbers = np.concatenate([numbers for _, (_, _, numbers, _) in lists])
+        weights = np.concatenate([idf * impacts for idf, (_, _, _, impacts) in lists])
+        totals = np.bincount(numbers, weights=weights, minlength=len(self.keys))
+        # Every posting has a positive impact, so nonzero totals are exactly the matches
+        candidates = np.flatnonzero(totals)
+        return candidates, totals[candidates]
+
+    def search_exhaustive(self, query, limit=20, offset=0):
+        """Score every posting of every query term (reference for search())"""
+        scores = {}
+        for term in dict.fromkeys(analyze(query)):
+            if term not in self.postings:
+                continue
+            idf = self._idf(term)
+            _, _, numbers, impacts = self._term_impacts(term)
+            for number, impact in zip(numbers.tolist(), impacts.tolist()):
+                scores[number] = scores.get(number, 0.0) + idf * impact
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[offset:offset + limit]
+        return [{'id': self.keys[number], 'score': round(score, 6)} for number, score in ranked]
+
+
+def parse_args():
+    """Parse command line options for the search index"""
+    parser = argparse.ArgumentParser(description="Build, update and query the BM25 opportunity search index")
+    parser.add_argument('query', nargs='?', help="Search the index for this text")
+    parser.add_argument('--index-dir', default=DEFAULT_INDEX_DIR, help="Where the index is saved")
+    parser.add_argument('--data-dir', default='data', help="Directory holding processed_*.json files")
+    parser.add_argument('--input', action='append', help="Index this export or processed file")
+    parser.add_argument('--rebuild', action='store_true', help="Discard the saved index first")
+    parser.add_argument('--limit', type=int, default=10, help="Results to show")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to update and query the search index"""
+    args = parse_args()
+    start = time.perf_counter()
+    index = SearchIndex(args.index_dir) if args.rebuild else SearchIndex.load(args.index_dir)
+    loaded = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if args.input:
+        changed = sum(index.update(iter_export(path)) for path in args.input)
+    else:
+        changed = index.refresh(args.data_dir)
+    if changed or args.rebuild:
+        index.save()
+    print(f"📊 {index.size:,} documents, {len(index.postings):,} terms "
+          f"(loaded in {loaded:.2f}s, {changed:,} indexed in {time.perf_counter() - start:.2f}s)")
+
+    if args.query:
+        start = time.perf_counter()
+        results = index.search(args.query, limit=args.limit)
+        print(f"🔍 {len(results)} results in {(time.perf_counter() - start) * 1000:.2f}ms")
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
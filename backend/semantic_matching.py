@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Semantic opportunity matching
+Trains TF-IDF and a truncated SVD on opportunity text, projects opportunities
+and teacher profiles (subjects, school, funding needs and resume text) into
+the same dense space, and finds each profile's most similar opportunities
+through an inverted-file (IVF) nearest-neighbour index scored in batches.
+Everything runs locally on NumPy.
+"""
+
+import os
+import json
+import math
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from mongo_export import load_export, document_id, write_ndjson, bulk_upsert_script
+from search_index import analyze
+
+MODEL_VERSION = 1
+DEFAULT_MODEL_PATH = os.path.join('data', 'semantic_model.npz')
+
+# ai_matching settings in config.json (scripts/setup_scraping.py), with the values used when absent
+DEFAULT_SETTINGS = {
+    'min_similarity_threshold': 0.1,
+    'max_recommendations': 10,
+    'svd_components': 128,
+    'ann_probes': 128,
+}
+
+# Opportunity text: field path and how many times it is repeated (a cheap field weight)
+OPPORTUNITY_FIELDS = [
+    ('title', 2),
+    ('organization', 1),
+    ('description', 1),
+    ('tags', 1),
+    ('eligibility.subjects', 2),
+    ('eligibility.fundingTypes', 1),
+    ('eligibility.requirements', 1),
+]
+PROFILE_FIELDS = [
+    ('subjects', 2),
+    ('fundingNeeds', 1),
+    ('schoolName', 1),
+    ('schoolDistrict', 1),
+    ('resumeText', 1),
+]
+
+# Terms in fewer documents than this, or in more than this share of them, are left out;
+# small catalogs keep terms seen once, since most of their vocabulary is
+MIN_DF = 2
+MIN_DF_CORPUS = 1000
+MAX_DF_RATIO = 0.9
+MAX_FEATURES = 50000
+# Non-zeros multiplied per step in sparse-dense products, bounding the temporary
+NNZ_CHUNK = 1 << 15
+# Above this density a row block is expanded and multiplied densely, which BLAS does faster than gathers
+DENSE_DENSITY = 0.02
+DENSE_CHUNK = 1 << 22
+# Candidate vectors scored per query batch
+QUERY_BATCH = 256
+
+
+def load_settings(config_path='config.json'):
+    """The ai_matching section of config.json over the defaults"""
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                settings.update(json.load(f).get('ai_matching', {}))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read {config_path}: {e}")
+    return settings
+
+
+def field_text(document, fields):
+    """Concatenated text of the given fields, repeating weighted ones"""
+    parts = []
+    for path, repeat in fields:
+        value = document
+        for part in path.split('.'):
+            value = value.get(part) if isinstance(value, dict) else None
+        if isinstance(value, list):
+            value = ' '.join(str(item) for item in value if item)
+        if value:
+            parts.extend([str(value)] * repeat)
+    return ' '.join(parts)
+
+
+def opportunity_text(document):
+    return field_text(document, OPPORTUNITY_FIELDS)
+
+
+def profile_text(user, resume_text=None):
+    """A teacher's profile as text; resume text may come from the user document or separately"""
+    if resume_text:
+        user = dict(user, resumeText=resume_text)
+    return field_text(user, PROFILE_FIELDS)
+
+
+class SparseRows:
+    """Minimal CSR matrix: enough for TF-IDF rows and the products the SVD needs"""
+
+    def __init__(self, indptr, indices, data, columns):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = (len(indptr) - 1, columns)
+        self._columns = None
+
+    def dot(self, dense):
+        """self @ dense"""
+        out = np.zeros((self.shape[0], dense.shape[1]), dtype=np.float32)
+        if self.indptr[-1] > DENSE_DENSITY * self.shape[0] * self.shape[1]:
+            step = max(1, DENSE_CHUNK // max(self.shape[1], 1))
+            for start in range(0, self.shape[0], step):
+                stop = min(start + step, self.shape[0])
+                lo, hi = self.indptr[start], self.indptr[stop]
+                block = np.zeros((stop - start, self.shape[1]), dtype=np.float32)
+                rows = np.repeat(np.arange(stop - start), np.diff(self.indptr[start:stop + 1]))
+                block[rows, self.indices[lo:hi]] = self.data[lo:hi]
+                out[start:stop] = block @ dense
+            return out
+        # Row boundaries closest to every NNZ_CHUNK non-zeros; a single long row is its own step
+        marks = np.searchsorted(self.indptr, np.arange(0, self.indptr[-1], NNZ_CHUNK), side='right') - 1
+        bounds = np.unique(np.concatenate((marks, [self.shape[0]])))
+        for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            lo, hi = self.indptr[start], self.indptr[stop]
+            if lo == hi:
+                continue
+            products = self.data[lo:hi, None] * dense[self.indices[lo:hi]]
+            # reduceat cannot express empty rows, so only non-empty rows are summed; the rest stay zero
+            nonempty = np.flatnonzero(np.diff(self.indptr[start:stop + 1]) > 0)
+            out[start + nonempty] = np.add.reduceat(products, self.indptr[start + nonempty] - lo, axis=0)
+        return out
+
+    def tdot(self, dense):
+        """self.T @ dense, through a column-major copy built on first use"""
+        if self._columns is None:
+            rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+            order = np.argsort(self.indices, kind='stable')
+            counts = np.bincount(self.indices, minlength=self.shape[1])
+            col_indptr = np.concatenate(([0], np.cumsum(counts)))
+            self._columns = SparseRows(col_indptr, rows[order], self.data[order], self.shape[0])
+        return self._columns.dot(dense)
+
+
+class TfidfModel:
+    """Sublinear TF-IDF over stemmed terms, rows L2-normalized"""
+
+    def __init__(self, vocabulary=None, idf=None):
+        self.vocabulary = vocabulary or {}
+        self.idf = idf
+
+    def fit(self, texts):
+        documents = [set(analyze(text)) for text in texts]
+        df = {}
+        for terms in documents:
+            for term in terms:
+                df[term] = df.get(term, 0) + 1
+        min_df = MIN_DF if len(documents) >= MIN_DF_CORPUS else 1
+        max_df = max(min_df, int(MAX_DF_RATIO * len(documents)))
+        kept = [term for term, count in df.items() if min_df <= count <= max_df]
+        kept.sort(key=lambda term: (-df[term], term))
+        kept = sorted(kept[:MAX_FEATURES])
+        self.vocabulary = {term: column for column, term in enumerate(kept)}
+        n = len(documents)
+        self.idf = np.array([math.log((1 + n) / (1 + df[term])) + 1 for term in kept], dtype=np.float32)
+        return self
+
+    def transform(self, texts):
+        indptr = [0]
+        indices = []
+        data = []
+        vocabulary = self.vocabulary
+        for text in texts:
+            counts = {}
+            for term in analyze(text):
+                column = vocabulary.get(term)
+                if column is not None:
+                    counts[column] = counts.get(column, 0) + 1
+            columns = sorted(counts)
+            weights = np.array([1 + math.log(counts[c]) for c in columns], dtype=np.float32) * self.idf[columns]
+            norm = float(np.sqrt(np.dot(weights, weights))) if columns else 0.0
+            indices.extend(columns)
+            data.extend((weights / norm).tolist() if norm else [])
+            indptr.append(len(indices))
+        return SparseRows(np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int64),
+                          np.array(data, dtype=np.float32), len(self.vocabulary))
+
+
+def truncated_svd(matrix, components, oversample=10, iterations=4, seed=0):
+    """Top right singular vectors of a sparse matrix by randomized range finding (Halko et al.)"""
+    rng = np.random.default_rng(seed)
+    rank = min(components + oversample, *matrix.shape)
+    sketch = matrix.dot(rng.standard_normal((matrix.shape[1], rank)).astype(np.float32))
+    basis, _ = np.linalg.qr(sketch)
+    for _ in range(iterations):
+        basis, _ = np.linalg.qr(matrix.tdot(basis))
+        basis, _ = np.linalg.qr(matrix.dot(basis))
+    # B = Q^T X is small (rank x terms); its SVD gives X's leading right singular vectors
+    small = matrix.tdot(basis).T
+    _, singular_values, right = np.linalg.svd(small, full_matrices=False)
+    components = min(components, len(singular_values))
+    return right[:components].astype(np.float32), singular_values[:components]
+
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def top_k_rows(scores, k):
+    """Column positions of each row's k largest scores, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1)
+
+
+class IVFIndex:
+    """Inverted-file index: vectors grouped by their nearest k-means centroid
+
+    A query scores the centroids, then only the vectors in its `probes`
+    best lists.
+    """
+
+    def __init__(self, vectors, lists=None, iterations=10, seed=0):
+        self.vectors = vectors
+        n = len(vectors)
+        lists = lists or max(1, min(n, int(4 * math.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(n, size=min(n, max(lists * 32, 1)), replace=False)] if n else vectors
+        centroids = sample[rng.choice(len(sample), size=lists, replace=False)] if n else sample[:0]
+        # Spherical k-means: vectors and centroids stay unit length, similarity is the dot product.
+        # An empty corpus (fresh install, nothing active) gets an index with no lists
+        for _ in range(iterations if n else 0):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.flatnonzero(~sums.any(axis=1))
+            sums[empty] = sample[rng.choice(len(sample), size=len(empty))]
+            centroids = normalize_rows(sums)
+        self.centroids = centroids
+
+        assignment = np.concatenate([np.argmax(vectors[start:start + 8192] @ centroids.T, axis=1)
+                                     for start in range(0, n, 8192)]) if n else np.zeros(0, dtype=np.int64)
+        self.order = np.argsort(assignment, kind='stable')
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))))
+        self.grouped = vectors[self.order]
+
+    def search(self, queries, k, probes):
+        """(positions, similarities) of each query's k nearest vectors; -1 pads short rows
+
+        The batch's (query, list) pairs are grouped by list so every probed
+        list is scored once against all the queries that probe it; scores
+        land in a padded candidates-per-query matrix ranked in one pass.
+        """
+        if not len(self.vectors) or not len(queries):
+            return np.full((len(queries), k), -1, dtype=np.int64), np.zeros((len(queries), k), dtype=np.float32)
+        probes = min(probes, len(self.centroids))
+        lists = top_k_rows(queries @ self.centroids.T, probes)
+        sizes = np.diff(self.offsets)[lists]
+        starts = np.cumsum(sizes, axis=1) - sizes
+        width = max(int(sizes.sum(axis=1).max()), k)
+        scores = np.full((len(queries), width), -np.inf, dtype=np.float32)
+        members = np.full((len(queries), width), -1, dtype=np.int64)
+
+        pairs = np.argsort(lists, axis=None, kind='stable')
+        pair_lists = lists.reshape(-1)[pairs]
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(pair_lists)) + 1, [len(pairs)]))
+        for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            list_id = pair_lists[lo]
+            first, last = self.offsets[list_id], self.offsets[list_id + 1]
+            if first == last:
+                continue
+            rows = pairs[lo:hi] // probes
+            columns = starts.reshape(-1)[pairs[lo:hi], None] + np.arange(last - first)
+            scores[rows[:, None], columns] = queries[rows] @ self.grouped[first:last].T
+            members[rows[:, None], columns] = self.order[first:last]
+
+        best = top_k_rows(scores, k)
+        similarities = np.take_along_axis(scores, best, axis=1)
+        positions = np.take_along_axis(members, best, axis=1)
+        missing = ~np.isfinite(similarities)
+        positions[missing] = -1
+        similarities[missing] = 0.0
+        return positions, similarities
+
+    def search_exact(self, queries, k):
+        """Exact (positions, similarities) by scoring every vector, for recall checks"""
+        scores = queries @ self.vectors.T
+        positions = top_k_rows(scores, k)
+        return positions, np.take_along_axis(scores, positions, axis=1)
+
+
+class SemanticMatcher:
+    """TF-IDF + SVD projection of opportunities and profiles, with an IVF index over opportunities"""
+
+    def __init__(self, settings=None):
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.tfidf = None
+        self.components = None
+        self.ids = []
+        self.vectors = None
+        self.index = None
+
+    def fit(self, opportunities):
+        """Train on the active, verified opportunities and index them"""
+        opportunities = [op for op in opportunities if op.get('isActive', True) and op.get('isVerified', True)]
+        texts = [opportunity_text(op) for op in opportunities]
+        self.ids = [document_id(op, default=str(position)) for position, op in enumerate(opportunities)]
+        self.tfidf = TfidfModel().fit(texts)
+        matrix = self.tfidf.transform(texts)
+        self.components, _ = truncated_svd(matrix, int(self.settings['svd_components']))
+        self.vectors = normalize_rows(matrix.dot(self.components.T))
+        self.index = IVFIndex(self.vectors)
+        return self
+
+    def embed(self, texts):
+        """Unit vectors for arbitrary texts in the opportunity space"""
+        return normalize_rows(self.tfidf.transform(texts).dot(self.components.T))
+
+    def match(self, users, resumes=None, k=None, exact=False):
+        """Yield (user, [(opportunity id, similarity)]) for every user, scored in batches"""
+        resumes = resumes or {}
+        k = k or int(self.settings['max_recommendations'])
+        threshold = float(self.settings['min_similarity_threshold'])
+        for start in range(0, len(users), QUERY_BATCH):
+            batch = users[start:start + QUERY_BATCH]
+            queries = self.embed([profile_text(user, resumes.get(user.get('auth0Id'))) for user in batch])
+            if exact:
+                positions, similarities = self.index.search_exact(queries, k)
+            else:
+                positions, similarities = self.index.search(queries, k, int(self.settings['ann_probes']))
+            for user, row, scores in zip(batch, positions.tolist(), similarities.tolist()):
+                yield user, [(self.ids[p], round(s, 4)) for p, s in zip(row, scores) if p >= 0 and s >= threshold]
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        terms = sorted(self.tfidf.vocabulary, key=self.tfidf.vocabulary.get)
+        with open(path, 'wb') as f:
+            np.savez(f, version=np.array(MODEL_VERSION), terms=np.array(terms), idf=self.tfidf.idf,
+                     components=self.components, ids=np.array(self.ids), vectors=self.vectors,
+                     centroids=self.index.centroids, order=self.index.order, offsets=self.index.offsets,
+                     settings=np.array(json.dumps(self.settings)))
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH, settings=None):
+        with np.load(path, allow_pickle=False) as saved:
+            if int(saved['version']) != MODEL_VERSION:
+                raise ValueError(f"{path} has model version {int(saved['version'])}, expected {MODEL_VERSION}")
+            matcher = cls(dict(json.loads(str(saved['settings'])), **(settings or {})))
+            terms = saved['terms'].tolist()
+            matcher.tfidf = TfidfModel({term: column for column, term in enumerate(terms)}, saved['idf'])
+            matcher.components = saved['components']
+            matcher.ids = saved['ids'].tolist()
+            matcher.vectors = saved['vectors']
+            index = IVFIndex.__new__(IVFIndex)
+            index.vectors = matcher.vectors
+            index.centroids = saved['centroids']
+            index.order = saved['order']
+            index.offsets = saved['offsets']
+            index.grouped = matcher.vectors[index.order]
+            matcher.index = index
+        return matcher
+
+
+def load_resumes(resume_dir):
+    """Resume text per auth0Id from <auth0Id>.txt files"""
+    resumes = {}
+    if resume_dir:
+        for name in os.listdir(resume_dir):
+            if name.endswith('.txt'):
+                with open(os.path.join(resume_dir, name), 'r', encoding='utf-8', errors='ignore') as f:
+                    resumes[name[:-len('.txt')]] = f.read()
+    return resumes
+
+
+def parse_args():
+    """Parse command line options for semantic matching"""
+    parser = argparse.ArgumentParser(description="Match teacher profiles to opportunities by text similarity")
+    parser.add_argument('--users', required=True, help="Users export (mongoexport NDJSON or JSON array)")
+    parser.add_argument('--scholarships', help="Scholarships export to train on (default: reuse --model)")
+    parser.add_argument('--resumes', help="Directory of <auth0Id>.txt resume texts")
+    parser.add_argument('--config', default='config.json', help="Config file with an ai_matching section")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Where the trained model is saved")
+    parser.add_argument('--exact', action='store_true', help="Score every opportunity instead of the IVF lists")
+    parser.add_argument('--check-recall', type=int, metavar='N', help="Compare IVF and exact results for N users")
+    parser.add_argument('--output', help="NDJSON output (default: data/semantic_matches_<timestamp>.ndjson)")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run semantic matching"""
+    args = parse_args()
+    settings = load_settings(args.config)
+    if not settings.get('enable_ml_matching', True):
+        print("⏸️ ai_matching.enable_ml_matching is off; nothing to do")
+        return
+    print("🚀 Semantic matching...")
+
+    start = time.perf_counter()
+    if args.scholarships:
+        matcher = SemanticMatcher(settings).fit(load_export(args.scholarships))
+        matcher.save(args.model)
+        print(f"🧠 Trained on {len(matcher.ids):,} opportunities ({len(matcher.tfidf.vocabulary):,} terms, "
+              f"{matcher.components.shape[0]} dimensions) in {time.perf_counter() - start:.2f}s")
+    else:
+        matcher = SemanticMatcher.load(args.model, settings)
+
+    users = load_export(args.users)
+    resumes = load_resumes(args.resumes)
+
+    if args.check_recall:
+        sample = users[:args.check_recall]
+        approximate = dict((u['auth0Id'], [i for i, _ in m]) for u, m in matcher.match(sample))
+        exact = dict((u['auth0Id'], [i for i, _ in m]) for u, m in matcher.match(sample, exact=True))
+        found = sum(len(set(approximate[key]) & set(ids)) for key, ids in exact.items())
+        total = sum(len(ids) for ids in exact.values())
+        print(f"🎯 IVF recall@{matcher.settings['max_recommendations']}: {found / max(total, 1):.3f} "
+              f"over {len(sample)} users")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = args.output or os.path.join('data', f"semantic_matches_{timestamp}.ndjson")
+    generated_at = datetime.now().isoformat()
+    start = time.perf_counter()
+    written = write_ndjson(output_file, (
+        {'auth0Id': user.get('auth0Id'),
+         'matches': [{'scholarshipId': scholarship_id, 'similarity': similarity}
+                     for scholarship_id, similarity in matches],
+         'generatedAt': generated_at}
+        for user, matches in matcher.match(users, resumes, exact=args.exact)
+    ))
+    elapsed = time.perf_counter() - start
+
+    script_file = os.path.join(os.path.dirname(output_file) or '.', f"import_semantic_matches_{timestamp}.js")
+    with open(script_file, 'w', encoding='utf-8') as f:
+        f.write(bulk_upsert_script('semanticmatches', os.path.abspath(output_file), 'auth0Id',
+                                   f"Semantic matches (timestamp: {timestamp})"))
+
+    print(f"✅ Matched {written:,} users in {elapsed:.2f}s ({elapsed / max(written, 1) * 1000:.2f}ms per user)")
+    print(f"📁 Saved to: {output_file}")
+    print(f"📁 Import script: {script_file}")
+
+
+if __name__ == "__main__":
+    main()
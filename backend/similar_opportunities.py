@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Similar opportunities precompute
+For every opportunity, finds the top-N most similar other opportunities by a
+blend of text similarity (TF-IDF + SVD vectors, as in semantic_matching) and
+Jaccard overlap of the grade, subject and funding-type sets. Pairs are scored
+a block of rows at a time with matrix products. The lists are written next to
+the processed snapshot they were computed for, and a saved state lets the
+next snapshot recompute only the rows its changes can affect.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrapers'))
+from vocabulary import get_vocabulary
+from mongo_export import load_export, write_ndjson, bulk_upsert_script
+from opportunity_query import record_key
+from semantic_matching import (DEFAULT_SETTINGS, TfidfModel, truncated_svd, normalize_rows, top_k_rows,
+                               opportunity_text)
+from typeahead_index import collect_opportunities
+
+STATE_VERSION = 1
+DEFAULT_STATE_PATH = os.path.join('data', 'similar_opportunities', 'state.npz')
+
+TOP_N = 10
+# Weight of text similarity; the rest goes to eligibility overlap
+TEXT_WEIGHT = 0.7
+SET_FIELDS = ('gradeLevels', 'subjects', 'fundingTypes')
+# Rows scored against the whole catalog per step (each step holds a few rows x catalog float arrays)
+BLOCK_ROWS = 128
+# Retrain the text model instead of reusing it once this share of the catalog has changed
+RETRAIN_FRACTION = 0.25
+
+
+def fingerprint(document):
+    """Hash of everything the similarity of a document depends on"""
+    eligibility = document.get('eligibility') or {}
+    content = [opportunity_text(document), [eligibility.get(field) or [] for field in SET_FIELDS],
+               bool(document.get('isActive', True))]
+    return hashlib.sha1(json.dumps(content, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def eligibility_sets(documents):
+    """Grade, subject and funding-type sets as 0/1 columns of one matrix"""
+    vocabulary = get_vocabulary()
+    widths = [len(vocabulary.values[field]) for field in SET_FIELDS]
+    sets = np.zeros((len(documents), sum(widths)), dtype=np.float32)
+    offset = 0
+    for field, width in zip(SET_FIELDS, widths):
+        bits = 1 << np.arange(width, dtype=np.uint64)
+        masks = np.zeros(len(documents), dtype=np.uint64)
+        for row, document in enumerate(documents):
+            labels = (document.get('eligibility') or {}).get(field) or []
+            if field == 'gradeLevels' and 'Any' in labels:
+                labels = ['all grades']
+            masks[row] = vocabulary.encode(field, labels)
+        sets[:, offset:offset + width] = (masks[:, None] & bits[None, :]) != 0
+        offset += width
+    return sets
+
+
+class SimilarityModel:
+    """Vectors, eligibility sets and top-N lists for a catalog, in catalog order"""
+
+    def __init__(self):
+        self.keys = []
+        self.hashes = []
+        self.tfidf = None
+        self.components = None
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.sets = np.zeros((0, 0), dtype=np.float32)
+        self.active = np.zeros(0, dtype=bool)
+        self.neighbors = np.zeros((0, TOP_N), dtype=np.int64)
+        self.scores = np.zeros((0, TOP_N), dtype=np.float32)
+        self._set_sizes = None
+
+    @property
+    def size(self):
+        return len(self.keys)
+
+    def train(self, documents, components):
+        texts = [opportunity_text(document) for document in documents]
+        self.tfidf = TfidfModel().fit(texts)
+        self.components, _ = truncated_svd(self.tfidf.transform(texts), components)
+
+    def embed(self, documents):
+        texts = [opportunity_text(document) for document in documents]
+        return normalize_rows(self.tfidf.transform(texts).dot(self.components.T))
+
+    def score(self, rows, text_weight=TEXT_WEIGHT):
+        """Blended similarity of the given rows to every opportunity"""
+        if self._set_sizes is None or len(self._set_sizes) != self.size:
+            self._set_sizes = self.sets.sum(axis=1)
+        scores = self.vectors[rows] @ self.vectors.T
+        # Jaccard = |a & b| / (|a| + |b| - |a & b|), with two empty sets scoring 0; worked in place
+        shared = self.sets[rows] @ self.sets.T
+        union = self._set_sizes[None, :] - shared
+        union += self._set_sizes[rows, None]
+        np.maximum(union, 1, out=union)
+        shared /= union
+        scores *= text_weight
+        shared *= 1 - text_weight
+        scores += shared
+        return scores
+
+    def candidate_scores(self, rows, text_weight=TEXT_WEIGHT):
+        """score() with self-pairs and inactive opportunities ruled out as neighbours"""
+        return self.exclude(self.score(rows, text_weight), rows)
+
+    def exclude(self, scores, rows):
+        scores[:, ~self.active] = -np.inf
+        scores[np.arange(len(rows)), rows] = -np.inf
+        return scores
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        terms = sorted(self.tfidf.vocabulary, key=self.tfidf.vocabulary.get)
+        fd, tmp_path = tempfile.mkstemp(dir=directory or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, version=np.array(STATE_VERSION), keys=np.array(self.keys), hashes=np.array(self.hashes),
+                         terms=np.array(terms), idf=self.tfidf.idf, components=self.components,
+                         vectors=self.vectors, sets=self.sets, active=self.active,
+                         neighbors=self.neighbors, scores=self.scores)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved state, or return None when there is none to build on"""
+        try:
+            saved = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        with saved:
+            if int(saved['version']) != STATE_VERSION or saved['neighbors'].shape[1] != TOP_N:
+                return None
+            model = cls()
+            model.keys = saved['keys'].tolist()
+            model.hashes = saved['hashes'].tolist()
+            terms = saved['terms'].tolist()
+            model.tfidf = TfidfModel({term: column for column, term in enumerate(terms)}, saved['idf'])
+            for name in ('components', 'vectors', 'sets', 'active', 'neighbors', 'scores'):
+                setattr(model, name, saved[name])
+        return model
+
+
+def top_rows(scores, n):
+    """(positions, scores) of each row's n best finite scores, -1 / -inf padded"""
+    positions = top_k_rows(scores, n)
+    best = np.take_along_axis(scores, positions, axis=1)
+    positions = np.where(np.isfinite(best), positions, -1)
+    pad = n - positions.shape[1]
+    if pad > 0:
+        positions = np.pad(positions, ((0, 0), (0, pad)), constant_values=-1)
+        best = np.pad(best, ((0, 0), (0, pad)), constant_values=-np.inf)
+    return positions, best
+
+
+def build(documents, previous=None, components=DEFAULT_SETTINGS['svd_components'], text_weight=TEXT_WEIGHT,
+          rebuild=False):
+    """Top-N similar lists for a catalog, reusing an earlier state where nothing relevant changed
+
+    Returns the new model and the number of rows that were scored in full.
+    Rows whose opportunity changed, or whose list mentioned a changed or
+    removed opportunity, are rescored against the whole catalog. Every other
+    row keeps its list and only considers the changed opportunities as new
+    candidates, which the rescored blocks already provide by symmetry.
+    """
+    # A key seen twice keeps its later copy, as when processed files are merged
+    by_key = {record_key(document): document for document in documents}
+    documents = list(by_key.values())
+    model = SimilarityModel()
+    model.keys = list(by_key)
+    model.hashes = [fingerprint(document) for document in documents]
+    n = model.size
+
+    old_position = {}
+    if previous is not None and not rebuild:
+        old_position = {key: position for position, key in enumerate(previous.keys)}
+    unchanged = np.array([old_position.get(key, -1) >= 0 and previous.hashes[old_position[key]] == digest
+                          for key, digest in zip(model.keys, model.hashes)], dtype=bool)
+    if n and (not unchanged.any() or 1 - unchanged.mean() > RETRAIN_FRACTION):
+        unchanged[:] = False
+
+    if unchanged.any():
+        model.tfidf, model.components = previous.tfidf, previous.components
+        vectors = np.zeros((n, previous.vectors.shape[1]), dtype=np.float32)
+        kept = np.flatnonzero(unchanged)
+        kept_old = np.array([old_position[model.keys[row]] for row in kept], dtype=np.int64)
+        vectors[kept] = previous.vectors[kept_old]
+        changed = np.flatnonzero(~unchanged)
+        if len(changed):
+            vectors[changed] = model.embed([documents[row] for row in changed])
+    else:
+        model.train(documents, components)
+        vectors = model.embed(documents)
+        kept = kept_old = np.zeros(0, dtype=np.int64)
+        changed = np.arange(n)
+    model.vectors = vectors
+    model.sets = eligibility_sets(documents)
+    model.active = np.array([bool(document.get('isActive', True)) for document in documents], dtype=bool)
+
+    # Carry kept rows' lists over into new positions; a list naming a changed or removed opportunity is rescored
+    new_of_old = np.full(previous.size if previous is not None else 0, -1, dtype=np.int64)
+    new_of_old[kept_old] = kept
+    model.neighbors = np.full((n, TOP_N), -1, dtype=np.int64)
+    model.scores = np.full((n, TOP_N), -np.inf, dtype=np.float32)
+    dirty = ~unchanged
+    if len(kept):
+        old_lists = previous.neighbors[kept_old]
+        carried = np.where(old_lists >= 0, new_of_old[np.maximum(old_lists, 0)], -1)
+        stale = (old_lists >= 0) & ((carried < 0) | ~unchanged[np.maximum(carried, 0)])
+        model.neighbors[kept] = carried
+        model.scores[kept] = np.where(carried >= 0, previous.scores[kept_old], -np.inf)
+        dirty[kept[stale.any(axis=1)]] = True
+
+    dirty_rows = np.flatnonzero(dirty)
+    clean_rows = np.flatnonzero(~dirty)
+    new_candidates = dirty & ~unchanged & model.active
+    for start in range(0, len(dirty_rows), BLOCK_ROWS):
+        block = dirty_rows[start:start + BLOCK_ROWS]
+        scores = model.score(block, text_weight)
+        # Changed opportunities may now belong in the lists of rows that were not rescored
+        sources = new_candidates[block]
+        incoming = scores[sources][:, clean_rows].T if sources.any() and len(clean_rows) else None
+        model.neighbors[block], model.scores[block] = top_rows(model.exclude(scores, block), TOP_N)
+
+        if incoming is not None:
+            merged_scores = np.concatenate((model.scores[clean_rows], incoming), axis=1)
+            merged_ids = np.concatenate((model.neighbors[clean_rows],
+                                         np.broadcast_to(block[sources], incoming.shape)), axis=1)
+            best, model.scores[clean_rows] = top_rows(merged_scores, TOP_N)
+            model.neighbors[clean_rows] = np.where(best >= 0, np.take_along_axis(merged_ids, np.maximum(best, 0), 1),
+                                                   -1)
+    return model, len(dirty_rows)
+
+
+def build_exhaustive(model, text_weight=TEXT_WEIGHT):
+    """Top-N lists scored from scratch for the model's vectors, for checking incremental results"""
+    neighbors = np.full((model.size, TOP_N), -1, dtype=np.int64)
+    scores = np.full((model.size, TOP_N), -np.inf, dtype=np.float32)
+    for start in range(0, model.size, BLOCK_ROWS):
+        block = np.arange(start, min(start + BLOCK_ROWS, model.size))
+        neighbors[block], scores[block] = top_rows(model.candidate_scores(block, text_weight), TOP_N)
+    return neighbors, scores
+
+
+def iter_lists(model, generated_at):
+    for row, key in enumerate(model.keys):
+        similar = [(model.keys[position], round(float(score), 4))
+                   for position, score in zip(model.neighbors[row].tolist(), model.scores[row].tolist())
+                   if position >= 0]
+        yield {
+            'scholarshipId': key,
+            'similar': [key for key, _ in similar],
+            'scores': [score for _, score in similar],
+            'generatedAt': generated_at,
+        }
+
+
+def output_path(snapshot_path):
+    """similar_<snapshot name>.ndjson next to the snapshot"""
+    directory, name = os.path.split(snapshot_path)
+    return os.path.join(directory, f"similar_{os.path.splitext(name)[0]}.ndjson")
+
+
+def write_lists(model, snapshot_path):
+    """Write the lists next to the snapshot with a script importing them; returns (output file, script)"""
+    output_file = output_path(snapshot_path)
+    write_ndjson(output_file, iter_lists(model, datetime.now().isoformat()))
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    script_file = os.path.join(os.path.dirname(output_file) or '.', f"import_similar_opportunities_{timestamp}.js")
+    with open(script_file, 'w', encoding='utf-8') as f:
+        f.write(bulk_upsert_script('similaropportunities', os.path.abspath(output_file), 'scholarshipId',
+                                   f"Similar opportunities (timestamp: {timestamp})"))
+    return output_file, script_file
+
+
+def update_similar(documents, snapshot_path, state_path=DEFAULT_STATE_PATH, rebuild=False):
+    """Refresh the saved state for a catalog and write its lists and import script next to the snapshot
+
+    Returns (output file, import script, rows scored in full).
+    """
+    model, rescored = build(documents, SimilarityModel.load(state_path), rebuild=rebuild)
+    model.save(state_path)
+    output_file, script_file = write_lists(model, snapshot_path)
+    return output_file, script_file, rescored
+
+
+def parse_args():
+    """Parse command line options for the similar opportunities job"""
+    parser = argparse.ArgumentParser(description="Precompute the most similar opportunities for every opportunity")
+    parser.add_argument('--input', help="Snapshot to compute lists for: processed JSON or a scholarships export "
+                                        "(lists are keyed by _id; the manager stamps processed files with the "
+                                        "_id their import gives them)")
+    parser.add_argument('--data-dir', default='data',
+                        help="Without --input, use every processed file here and the newest one as the snapshot")
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help="Saved state used for incremental refreshes")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore the saved state and score everything")
+    parser.add_argument('--check', action='store_true', help="Compare the lists with a from-scratch scoring")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run the similar opportunities job"""
+    args = parse_args()
+    print("🚀 Computing similar opportunities...")
+
+    if args.input:
+        snapshot = args.input
+        documents = load_export(args.input)
+    else:
+        snapshots = glob.glob(os.path.join(args.data_dir, 'processed_*.json'))
+        if not snapshots:
+            print(f"❌ No processed snapshots in {args.data_dir}")
+            return
+        snapshot = max(snapshots, key=os.path.getmtime)
+        documents = collect_opportunities(args.data_dir)
+
+    start = time.perf_counter()
+    model, rescored = build(documents, SimilarityModel.load(args.state), rebuild=args.rebuild)
+    elapsed = time.perf_counter() - start
+    model.save(args.state)
+    print(f"📊 {model.size:,} opportunities, {rescored:,} rescored in {elapsed:.2f}s")
+
+    if args.check:
+        neighbors, scores = build_exhaustive(model)
+        # Ties may order differently, so lists are compared by score
+        matches = np.isclose(np.where(np.isfinite(scores), scores, 0),
+                             np.where(np.isfinite(model.scores), model.scores, 0), atol=1e-5).all(axis=1)
+        print(f"🎯 {int(matches.sum()):,}/{model.size:,} lists match a from-scratch scoring")
+
+    output_file, script_file = write_lists(model, snapshot)
+    print(f"📁 Saved to: {output_file}")
+    print(f"📁 Import script: {script_file}")
+
+
+if __name__ == "__main__":
+    main()
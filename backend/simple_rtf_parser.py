@@ -4,139 +4,87 @@ Simple RTF Parser for WeAreTeachers.rtf
 Uses a more direct approach to extract grant information
 """
 
-import re
+import os
+import sys
 import json
+import argparse
 from datetime import datetime
-from striprtf.striprtf import rtf_to_text
+from grant_section_parser import FusedGrantParser, PARSER_VERSION
+from rtf_cache import RTFCache, file_digest
+from rtf_parser import CLEAN_VERSION, rtf_to_lines
 
-def parse_weareteachers_grants():
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrapers'))
+from pipeline_profiler import PipelineProfiler
+
+def parse_weareteachers_grants(profiler=None, rtf_path='WeAreTeachers.rtf', cache=None):
     """Parse the WeAreTeachers RTF file and extract grant information"""
+    profiler = profiler or PipelineProfiler()
+    
+    # Unchanged files skip straight to the grants parsed last time
+    grants_version = f"{CLEAN_VERSION}-p{PARSER_VERSION}"
+    if cache:
+        digest = file_digest(rtf_path)
+        grants = cache.load(digest, 'simple.grants', grants_version)
+        if grants is not None:
+            return grants
     
     # Read and clean the RTF file
-    with open('WeAreTeachers.rtf', 'r', encoding='utf-8', errors='ignore') as file:
-        content = file.read()
+    with profiler.stage('read') as stage:
+        with open(rtf_path, 'r', encoding='utf-8', errors='ignore') as file:
+            content = file.read()
+        stage['bytes_fetched'] = len(content)
     
-    cleaned = rtf_to_text(content)
+    # The same cleaner as RTFParser and batch ingest, so every entry point parses the same lines
+    with profiler.stage('clean'):
+        if cache:
+            cleaned = cache.get_or_compute(digest, 'simple.clean', CLEAN_VERSION,
+                                           lambda: '\n'.join(rtf_to_lines(content)))
+        else:
+            cleaned = '\n'.join(rtf_to_lines(content))
     lines = cleaned.split('\n')
     
-    grants = []
-    current_grant = {}
-    
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Check if this is a grant title (contains organization name and URL)
-        if '(' in line and ')' in line and ('http' in line or 'www.' in line):
-            # Save previous grant if exists
-            if current_grant and current_grant.get('title'):
-                grants.append(current_grant)
-            
-            # Start new grant
-            current_grant = {
-                'title': line,
-                'organization': line.split('(')[0].strip(),
-                'website': '',
-                'description': '',
-                'amount': '',
-                'deadline': '',
-                'eligibility': '',
-                'tags': []
-            }
-            
-            # Extract website from title
-            url_match = re.search(r'\(([^)]+)\)', line)
-            if url_match:
-                current_grant['website'] = url_match.group(1)
-        
-        # Parse grant details
-        elif current_grant:
-            if line.startswith('What It Is:'):
-                current_grant['description'] = line.replace('What It Is:', '').strip()
-            elif line.startswith('Award:'):
-                current_grant['amount'] = line.replace('Award:', '').strip()
-            elif line.startswith('Deadline:'):
-                current_grant['deadline'] = line.replace('Deadline:', '').strip()
-            elif line.startswith('Application Requirements:'):
-                current_grant['eligibility'] = line.replace('Application Requirements:', '').strip()
-            elif line.startswith('What It Is:') or line.startswith('Award:') or line.startswith('Deadline:') or line.startswith('Application Requirements:'):
-                # Skip section headers
-                pass
-            else:
-                # Continue adding to current field
-                if current_grant.get('description') and not line.startswith(('Award:', 'Deadline:', 'Application Requirements:')):
-                    current_grant['description'] += ' ' + line
-                elif current_grant.get('eligibility') and not line.startswith(('Award:', 'Deadline:', 'What It Is:')):
-                    current_grant['eligibility'] += ' ' + line
-    
-    # Add the last grant
-    if current_grant and current_grant.get('title'):
-        grants.append(current_grant)
+    # Titles, field labels and tags are all handled in one pass over the lines
+    with profiler.stage('extract_grants') as stage:
+        stage['records_in'] = len(lines)
+        grants = FusedGrantParser(layout='simple').parse(lines)
+        stage['records_out'] = len(grants)
     
-    # Generate tags for each grant
-    for grant in grants:
-        tags = []
-        content = f"{grant.get('title', '')} {grant.get('description', '')} {grant.get('eligibility', '')}".lower()
-        
-        # Subject area tags
-        if any(word in content for word in ['steam', 'science', 'technology', 'engineering', 'math', 'stem']):
-            tags.append('STEAM')
-        if any(word in content for word in ['professional', 'development', 'training', 'conference']):
-            tags.append('Professional Development')
-        if any(word in content for word in ['classroom', 'supplies', 'materials', 'equipment']):
-            tags.append('Classroom Supplies')
-        if any(word in content for word in ['arts', 'music', 'creative', 'artistic']):
-            tags.append('Arts Education')
-        if any(word in content for word in ['literacy', 'reading', 'books', 'language']):
-            tags.append('Literacy')
-        if any(word in content for word in ['special', 'needs', 'inclusive', 'disabilities']):
-            tags.append('Special Education')
-        
-        # Grade level tags
-        if any(word in content for word in ['elementary', 'primary', 'k-5', 'k-6']):
-            tags.append('Elementary')
-        if any(word in content for word in ['middle school', '6-8', '7-8']):
-            tags.append('Middle School')
-        if any(word in content for word in ['high school', 'secondary', '9-12']):
-            tags.append('High School')
-        if any(word in content for word in ['pre-k', 'preschool', 'early childhood']):
-            tags.append('Early Childhood')
-        
-        # Grant type tags
-        if any(word in content for word in ['mini-grant', 'mini grant', 'small grant']):
-            tags.append('Mini Grant')
-        if any(word in content for word in ['classroom grant', 'teacher grant']):
-            tags.append('Classroom Grant')
-        if any(word in content for word in ['technology', 'computer', 'digital']):
-            tags.append('Technology')
-        
-        # Organization type tags
-        title_lower = grant.get('title', '').lower()
-        if any(word in title_lower for word in ['foundation', 'fund']):
-            tags.append('Foundation')
-        if any(word in title_lower for word in ['corporation', 'corp', 'company']):
-            tags.append('Corporate')
-        if any(word in title_lower for word in ['government', 'federal', 'state']):
-            tags.append('Government')
-        
-        grant['tags'] = list(set(tags))
+    if cache:
+        cache.store(digest, 'simple.grants', grants_version, grants)
     
     return grants
 
+def parse_args():
+    """Parse command line options for the parser"""
+    parser = argparse.ArgumentParser(description="Extract grants from WeAreTeachers.rtf")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record per-stage timings and memory in a run report")
+    parser.add_argument('--profile-pstats', metavar='DIR',
+                        help="Also dump cProfile stats for each stage into DIR")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-parse the file even if a cached result exists")
+    return parser.parse_args()
+
 def main():
     """Main function to run the parser"""
+    args = parse_args()
+    profiler = PipelineProfiler(enabled=args.profile or bool(args.profile_pstats),
+                                pstats_dir=args.profile_pstats)
     print("🚀 Starting WeAreTeachers grant extraction...")
     
-    grants = parse_weareteachers_grants()
+    cache = None if args.no_cache else RTFCache()
+    grants = parse_weareteachers_grants(profiler=profiler, cache=cache)
     
     if grants:
         # Save results
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_file = f"weareteachers_grants_{timestamp}.json"
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(grants, f, indent=2, ensure_ascii=False)
+        with profiler.stage('save') as stage:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(grants, f, indent=2, ensure_ascii=False)
+            stage['records_in'] = len(grants)
+        profiler.save_report(f"run_report_{timestamp}.json")
         
         print(f"✅ Successfully extracted {len(grants)} grants")
         print(f"📁 Saved to: {output_file}")
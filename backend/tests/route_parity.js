@@ -0,0 +1,128 @@
+const fs = require('fs');
+const path = require('path');
+const express = require('express');
+const mongoose = require('mongoose');
+const Scholarship = require('../models/Scholarship');
+require('dotenv').config();
+
+// Runs the queries in tests/fixtures/scholarship_query_cases.json against the real
+// GET /api/scholarships route over the fixture documents.
+//   --record   store each response (status, ids, pagination) in the fixture as the expectation
+//              tests/test_opportunity_query.py checks the Python read side against
+//   (default)  compare the route with the recorded expectations, to catch route changes
+// Uses PARITY_MONGODB_URI when set, else an in-memory server from mongodb-memory-server
+// (npm install --no-save mongodb-memory-server), else a local scratch database.
+// The database is dropped afterwards.
+const fixturePath = path.join(__dirname, 'fixtures', 'scholarship_query_cases.json');
+const fixture = JSON.parse(fs.readFileSync(fixturePath, 'utf8'));
+const record = process.argv.includes('--record');
+
+async function startDatabase() {
+  if (process.env.PARITY_MONGODB_URI) {
+    return { uri: process.env.PARITY_MONGODB_URI, label: process.env.PARITY_MONGODB_URI };
+  }
+  try {
+    const { MongoMemoryServer } = require('mongodb-memory-server');
+    const server = await MongoMemoryServer.create();
+    return { uri: server.getUri('teacheasy_route_parity'), label: 'mongodb-memory-server', server };
+  } catch (error) {
+    const uri = 'mongodb://localhost:27017/teacheasy_route_parity';
+    return { uri, label: uri };
+  }
+}
+
+async function seed() {
+  // Cast through the model (dates, ObjectIds, defaults) but skip validation: processed
+  // opportunities do not fill every required field the admin forms do
+  const documents = fixture.documents.map(document => new Scholarship(document).toObject());
+  await Scholarship.collection.insertMany(documents);
+}
+
+function listen(app) {
+  return new Promise(resolve => {
+    const server = app.listen(0, () => resolve(server));
+  });
+}
+
+async function fetchCase(baseUrl, testCase) {
+  const query = new URLSearchParams(testCase.params).toString();
+  const response = await fetch(`${baseUrl}/api/scholarships?${query}`);
+  const body = await response.json();
+  if (response.status !== 200) {
+    return { query, route: { status: response.status } };
+  }
+  return {
+    query,
+    route: {
+      status: 200,
+      ids: body.scholarships.map(scholarship => String(scholarship._id)),
+      pagination: body.pagination
+    }
+  };
+}
+
+async function runCases(baseUrl) {
+  const failures = [];
+  for (const testCase of fixture.cases) {
+    const { query, route } = await fetchCase(baseUrl, testCase);
+    if (record) {
+      testCase.route = route;
+    } else if (!testCase.route) {
+      failures.push({ query, problem: 'no recorded expectation; run with --record' });
+    } else if (JSON.stringify(route) !== JSON.stringify(testCase.route)) {
+      failures.push({ query, problem: `${JSON.stringify(route)} != ${JSON.stringify(testCase.route)}` });
+    }
+  }
+  return failures;
+}
+
+async function main() {
+  let server;
+  let database;
+  let failures = [];
+  try {
+    database = await startDatabase();
+    await mongoose.connect(database.uri);
+    console.log(`✅ Connected to ${database.label}`);
+    await mongoose.connection.db.dropDatabase();
+    await seed();
+    console.log(`📊 Seeded ${fixture.documents.length} opportunities`);
+
+    const app = express();
+    app.use('/api/scholarships', require('../routes/scholarships'));
+    server = await listen(app);
+
+    failures = await runCases(`http://127.0.0.1:${server.address().port}`);
+    if (record) {
+      fixture.recorded = {
+        at: new Date().toISOString(),
+        route: 'GET /api/scholarships',
+        mongodb: (await mongoose.connection.db.admin().serverInfo()).version
+      };
+      fs.writeFileSync(fixturePath, JSON.stringify(fixture, null, 1) + '\n');
+      console.log(`📁 Recorded ${fixture.cases.length} route responses in ${fixturePath}`);
+    }
+    failures.slice(0, 10).forEach(failure => {
+      console.log(`❌ ${failure.query || '(defaults)'}`);
+      console.log(`   ${failure.problem}`);
+    });
+    if (failures.length) {
+      console.log(`❌ ${failures.length} of ${fixture.cases.length} cases differ from the recording`);
+    } else if (!record) {
+      console.log(`✅ All ${fixture.cases.length} cases match the recording`);
+    }
+  } catch (error) {
+    console.error('❌ Error running route parity:', error);
+    failures.push(error);
+  } finally {
+    if (server) server.close();
+    if (mongoose.connection.readyState === 1) {
+      await mongoose.connection.db.dropDatabase();
+      await mongoose.connection.close();
+    }
+    if (database && database.server) await database.server.stop();
+  }
+  process.exit(failures.length ? 1 : 0);
+}
+
+main();
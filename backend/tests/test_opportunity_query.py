@@ -0,0 +1,92 @@
+"""
+Parity tests for the GET /api/scholarships read side
+The cases in fixtures/scholarship_query_cases.json hold route queries over a
+fixed set of documents. The status, ids and pagination each one expects were
+recorded from the real Express route over MongoDB by
+`npm run test:route-parity:record`, so the Python reference (route_query) and
+the index are checked against the route, not against themselves.
+Regenerate the queries with `python opportunity_query.py --input FILE --write-cases PATH`,
+then record them again.
+"""
+
+import os
+import sys
+import json
+from datetime import datetime
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from opportunity_query import (OpportunityQueryIndex, QueryValidationError, check_parity, normalize_document,
+                               route_query)
+
+CASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'scholarship_query_cases.json')
+
+with open(CASES_PATH, 'r', encoding='utf-8') as f:
+    FIXTURE = json.load(f)
+
+DOCUMENTS = [normalize_document(document) for document in FIXTURE['documents']]
+CASES = [case for case in FIXTURE['cases'] if case.get('route')]
+NOT_RECORDED = "the fixture has no responses recorded from the route; run `npm run test:route-parity:record`"
+
+
+def case_id(case):
+    return '&'.join(f"{name}={value}" for name, value in sorted(case['params'].items())) or 'defaults'
+
+
+@pytest.fixture(scope='module')
+def index():
+    return OpportunityQueryIndex(FIXTURE['documents'])
+
+
+def check_against_route(query, case):
+    expected = case['route']
+    if expected['status'] == 400:
+        with pytest.raises(QueryValidationError):
+            query(case['params'])
+        return
+    assert expected['status'] == 200
+    response = query(case['params'])
+    assert [document['_id'] for document in response['scholarships']] == expected['ids']
+    assert response['pagination'] == expected['pagination']
+
+
+@pytest.mark.skipif(not CASES, reason=NOT_RECORDED)
+@pytest.mark.parametrize('case', CASES, ids=case_id)
+def test_reference_matches_route(case):
+    check_against_route(lambda params: route_query(DOCUMENTS, params), case)
+
+
+@pytest.mark.skipif(not CASES, reason=NOT_RECORDED)
+@pytest.mark.parametrize('case', CASES, ids=case_id)
+def test_index_matches_route(index, case):
+    check_against_route(index.query, case)
+
+
+def test_index_matches_reference_after_delta():
+    assert check_parity(FIXTURE['documents'], queries=100) == []
+
+
+def test_removed_and_deactivated_documents_drop_out(index):
+    first = index.query({'sortBy': 'createdAt', 'sortOrder': 'asc', 'limit': '1'})['scholarships'][0]
+    total = index.query({})['pagination']['totalItems']
+
+    local = OpportunityQueryIndex(FIXTURE['documents'])
+    local.upsert([dict(first, isActive=False)], inserted_at=datetime(2025, 1, 1))
+    assert local.query({})['pagination']['totalItems'] == total - 1
+
+    local.remove([first['_id']])
+    assert first['_id'] not in local.slot_of
+    assert local.query({})['pagination']['totalItems'] == total - 1
+
+
+@pytest.mark.parametrize('search', ['(', 'math|science', '.*', '(a+)+$'])
+def test_search_is_literal(index, search):
+    expected = [document['_id'] for document in DOCUMENTS if document.get('isActive') is True and any(
+        search.lower() in str(value).lower() for value in (document.get('title'), document.get('organization'),
+                                                           document.get('description')))]
+    response = route_query(DOCUMENTS, {'search': search, 'limit': '100'})
+    assert sorted(document['_id'] for document in response['scholarships']) == sorted(expected)
+    assert index.query({'search': search, 'limit': '100'})['pagination'] == response['pagination']
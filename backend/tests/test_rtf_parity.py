@@ -0,0 +1,60 @@
+"""
+Parity tests for the RTF entry points
+Batch parsing (RTFParser.process_rtf) and streaming (RTFParser.iter_grants)
+must produce the same grants for the bundled WeAreTeachers.rtf and for a
+synthetic roundup, whatever the chunk size the stream is read in; batch
+ingest must produce what the single-file simple parser it replaces does.
+"""
+
+import io
+import os
+import sys
+import contextlib
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+import batch_ingest
+import simple_rtf_parser
+from rtf_parser import RTFParser
+from synthetic_corpus import SyntheticCorpusGenerator
+
+BUNDLED_RTF = os.path.join(BACKEND_DIR, 'WeAreTeachers.rtf')
+
+
+@pytest.fixture(scope='module')
+def synthetic_rtf(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('rtf') / 'synthetic.rtf')
+    SyntheticCorpusGenerator().write_rtf(path, 500)
+    return path
+
+
+def batch_grants(path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return RTFParser(path).process_rtf()
+
+
+@pytest.mark.parametrize('chunk_size', [65536, 97, 7])
+@pytest.mark.parametrize('document', ['bundled', 'synthetic'])
+def test_stream_matches_batch(document, chunk_size, synthetic_rtf):
+    path = BUNDLED_RTF if document == 'bundled' else synthetic_rtf
+    grants = batch_grants(path)
+    assert grants
+    assert list(RTFParser(path).iter_grants(chunk_size)) == grants
+
+
+def test_list_bullets_are_not_part_of_the_text():
+    grants = batch_grants(BUNDLED_RTF)
+    assert not any(grant['title'].startswith('•') for grant in grants)
+    assert any(grant['deadline'] for grant in grants) and any(grant['eligibility'] for grant in grants)
+
+
+@pytest.mark.parametrize('document', ['bundled', 'synthetic'])
+def test_batch_ingest_matches_simple_parser(document, synthetic_rtf):
+    path = BUNDLED_RTF if document == 'bundled' else synthetic_rtf
+    grants = simple_rtf_parser.parse_weareteachers_grants(rtf_path=path)
+    assert all(any(grant[field] for grant in grants) for field in ('description', 'amount', 'deadline', 'eligibility'))
+    assert batch_ingest.parse_document(path)['grants'] == grants
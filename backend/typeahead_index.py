@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Typeahead index for search suggestions
+Builds a sorted array of every word-boundary suffix of opportunity titles,
+organizations and tags, with suggestions ranked by popularity, and saves it
+as one binary file the suggestion service memory-maps. A lookup is two
+binary searches plus either a precomputed top list (for prefixes shared by
+many keys) or a scan of a short range.
+"""
+
+import os
+import re
+import glob
+import json
+import mmap
+import time
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+from mongo_export import iter_export
+from opportunity_query import DELTA_PATTERNS, record_key
+
+MAGIC = b'TEASUGG1'
+INDEX_VERSION = 1
+DEFAULT_INDEX_PATH = os.path.join('data', 'typeahead.idx')
+
+SUGGESTION_FIELDS = ['title', 'organization', 'tags']
+# Suggestions stored per precomputed prefix, and the most a query returns
+MAX_SUGGESTIONS = 20
+# Prefixes matching more keys than this get a precomputed top list
+SCAN_LIMIT = 256
+# The route ignores shorter queries
+MIN_QUERY_LENGTH = 2
+# Keys are cut to this many bytes; longer queries are checked against the phrase text
+MAX_KEY_BYTES = 32
+
+SEPARATORS = re.compile(r'[^\w]+')
+
+
+def normalize(text):
+    """Lower-case and collapse punctuation and whitespace to single spaces"""
+    return SEPARATORS.sub(' ', str(text).lower()).strip()
+
+
+def normalize_query(text):
+    """Like normalize(), but a trailing separator is kept so "art " does not match "artist\""""
+    normalized = normalize(text)
+    if normalized and SEPARATORS.fullmatch(str(text)[-1:] or 'x'):
+        normalized += ' '
+    return normalized
+
+
+def word_suffixes(text):
+    """The normalized text from every word start: "dell technologies" -> itself and "technologies\""""
+    normalized = normalize(text)
+    suffixes = [normalized] if normalized else []
+    for match in re.finditer(' ', normalized):
+        suffixes.append(normalized[match.end():])
+    return suffixes
+
+
+def collect_opportunities(data_dir):
+    """Every processed opportunity in data_dir, later files replacing earlier copies"""
+    paths = [path for pattern in DELTA_PATTERNS for path in glob.glob(os.path.join(data_dir, pattern))]
+    opportunities = {}
+    for path in sorted(paths, key=os.path.getmtime):
+        for document in iter_export(path):
+            opportunities[record_key(document)] = document
+    return list(opportunities.values())
+
+
+def pack_bytes(values):
+    """One blob plus offsets for a list of byte strings"""
+    total = sum(len(value) for value in values)
+    offsets = np.zeros(len(values) + 1, dtype=np.uint32 if total < 2 ** 32 else np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    return np.frombuffer(b''.join(values), dtype=np.uint8), offsets
+
+
+def pack_strings(strings):
+    """UTF-8 blob plus offsets for a list of strings"""
+    return pack_bytes([s.encode('utf-8') for s in strings])
+
+
+def build_arrays(opportunities, max_suggestions=MAX_SUGGESTIONS, scan_limit=SCAN_LIMIT):
+    """Arrays for the typeahead file: phrases in rank order, sorted keys and precomputed prefix tops"""
+    # Phrase weight: popularity (+1 so unpopular phrases still count) summed over opportunities
+    phrases = {}
+    for document in opportunities:
+        if document.get('isActive', True) is not True or document.get('isVerified', False) is not True:
+            continue
+        popularity = document.get('popularity') or 0
+        document_key = record_key(document)
+        for field in SUGGESTION_FIELDS:
+            values = document.get(field) or []
+            for value in values if isinstance(values, list) else [values]:
+                if not isinstance(value, str) or not normalize(value):
+                    continue
+                phrase = phrases.setdefault((field, value.strip()), {'weight': 0, 'best': -1, 'id': None})
+                phrase['weight'] += popularity + 1
+                if popularity > phrase['best']:
+                    phrase['best'], phrase['id'] = popularity, document_key
+
+    # Phrase ids are ranks, so the best suggestions for a prefix are its smallest ids
+    ranked = sorted(phrases.items(), key=lambda item: (-item[1]['weight'], item[0][1], item[0][0]))
+    field_codes = {field: code for code, field in enumerate(SUGGESTION_FIELDS)}
+
+    entries = []
+    for phrase_id, ((field, text), _) in enumerate(ranked):
+        for key in dict.fromkeys(suffix.encode('utf-8')[:MAX_KEY_BYTES] for suffix in word_suffixes(text)):
+            entries.append((key, phrase_id))
+    entries.sort()
+    keys = [key for key, _ in entries]
+    key_phrase = np.array([phrase_id for _, phrase_id in entries], dtype=np.int32)
+    tops = collect_tops(keys, key_phrase, max_suggestions, scan_limit)
+
+    key_blob, key_offsets = pack_bytes(keys)
+    phrase_blob, phrase_offsets = pack_strings([text for (_, text), _ in ranked])
+    id_blob, id_offsets = pack_strings([info['id'] or '' for _, info in ranked])
+    # Prefixes are byte prefixes and may end inside a multi-byte character
+    prefix_blob, prefix_offsets = pack_bytes([prefix for prefix, _ in tops])
+    top_offsets = np.zeros(len(tops) + 1, dtype=np.int64)
+    np.cumsum([len(ids) for _, ids in tops], out=top_offsets[1:])
+
+    return {
+        'key_blob': key_blob,
+        'key_offsets': key_offsets,
+        'key_phrase': key_phrase,
+        'phrase_blob': phrase_blob,
+        'phrase_offsets': phrase_offsets,
+        'phrase_field': np.array([field_codes[field] for (field, _), _ in ranked], dtype=np.uint8),
+        'phrase_weight': np.array([info['weight'] for _, info in ranked], dtype=np.int64),
+        'id_blob': id_blob,
+        'id_offsets': id_offsets,
+        'prefix_blob': prefix_blob,
+        'prefix_offsets': prefix_offsets,
+        'top_offsets': top_offsets,
+        'top_phrases': np.concatenate([ids for _, ids in tops] or [np.zeros(0)]).astype(np.int32),
+    }
+
+
+def smallest_distinct(ids, count=None):
+    """The distinct values of an id array in ascending order, optionally only the first `count`"""
+    ids = np.sort(ids)
+    distinct = ids[np.concatenate(([True], ids[1:] != ids[:-1]))] if len(ids) else ids
+    return distinct[:count]
+
+
+def collect_tops(keys, key_phrase, max_suggestions=MAX_SUGGESTIONS, scan_limit=SCAN_LIMIT):
+    """The best phrases of every prefix shared by more than scan_limit keys, as (prefix, ids)
+
+    Keys are laid out as a zero-padded byte matrix; a range of keys sharing
+    `depth` bytes is split wherever the next byte changes, and each part
+    visited the same way.
+    """
+    matrix = np.zeros((len(keys), MAX_KEY_BYTES), dtype=np.uint8)
+    for row, key in enumerate(keys):
+        matrix[row, :len(key)] = np.frombuffer(key, dtype=np.uint8)
+
+    tops = []
+    stack = [(0, len(keys), 0)]
+    while stack:
+        lo, hi, depth = stack.pop()
+        if hi - lo <= scan_limit:
+            continue
+        if depth:
+            tops.append((keys[lo][:depth], smallest_distinct(key_phrase[lo:hi], max_suggestions)))
+        if depth == MAX_KEY_BYTES:
+            continue
+        column = matrix[lo:hi, depth]
+        bounds = np.concatenate(([0], np.flatnonzero(column[1:] != column[:-1]) + 1, [hi - lo]))
+        for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            # Keys that end at this depth (padded with 0) belong to no longer prefix
+            if column[start]:
+                stack.append((lo + start, lo + end, depth + 1))
+    tops.sort(key=lambda top: top[0])
+    return tops
+
+
+def write_index(path, arrays):
+    """Header, then every array 8-byte aligned so it can be read straight from a memory map"""
+    header = {'version': INDEX_VERSION, 'fields': SUGGESTION_FIELDS, 'max_suggestions': MAX_SUGGESTIONS,
+              'max_key_bytes': MAX_KEY_BYTES, 'arrays': {}}
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = [offset, array.dtype.str, len(array)]
+        offset += (array.nbytes + 7) // 8 * 8
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * (-(len(MAGIC) + 8 + len(header_bytes)) % 8)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, 'little'))
+        f.write(header_bytes)
+        for array in arrays.values():
+            data = np.ascontiguousarray(array).tobytes()
+            f.write(data)
+            f.write(b'\0' * (-len(data) % 8))
+    os.replace(tmp_path, path)
+    return path
+
+
+def build_index(opportunities, path=DEFAULT_INDEX_PATH):
+    """Build and save the typeahead file for a set of opportunities"""
+    return write_index(path, build_arrays(opportunities))
+
+
+class TypeaheadIndex:
+    """Read-only view of a typeahead file through a memory map"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a typeahead index")
+        header_length = int.from_bytes(self.map[len(MAGIC):len(MAGIC) + 8], 'little')
+        data_start = len(MAGIC) + 8 + header_length
+        header = json.loads(self.map[len(MAGIC) + 8:data_start])
+        if header['version'] != INDEX_VERSION:
+            raise ValueError(f"{path} has index version {header['version']}, expected {INDEX_VERSION}")
+
+        self.fields = header['fields']
+        self.max_suggestions = header['max_suggestions']
+        self.max_key_bytes = header['max_key_bytes']
+        for name, (offset, dtype, count) in header['arrays'].items():
+            setattr(self, name, np.frombuffer(self.map, dtype=np.dtype(dtype), count=count,
+                                              offset=data_start + offset))
+    def _key(self, i):
+        return self.map_bytes(self.key_blob, self.key_offsets, i)
+
+    def _prefix(self, i):
+        return self.map_bytes(self.prefix_blob, self.prefix_offsets, i)
+
+    @staticmethod
+    def map_bytes(blob, offsets, i):
+        start, end = offsets[i:i + 2].tolist()
+        return blob[start:end].tobytes()
+
+    @staticmethod
+    def _bisect(get, count, target):
+        """First position whose value is >= target"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if get(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _text(self, phrase_id):
+        return self.map_bytes(self.phrase_blob, self.phrase_offsets, phrase_id).decode('utf-8')
+
+    def _phrase(self, phrase_id):
+        return {
+            'text': self._text(phrase_id),
+            'type': self.fields[self.phrase_field[phrase_id]],
+            'id': self.map_bytes(self.id_blob, self.id_offsets, phrase_id).decode('utf-8') or None,
+            'weight': int(self.phrase_weight[phrase_id]),
+        }
+
+    def suggest(self, query, limit=10):
+        """Suggestions whose text has a word starting with the query, most popular first"""
+        prefix = normalize_query(query)
+        if len(prefix) < MIN_QUERY_LENGTH:
+            return []
+        limit = min(limit, self.max_suggestions)
+        target = prefix.encode('utf-8')
+        truncated = len(target) > self.max_key_bytes
+        target = target[:self.max_key_bytes]
+
+        tops = len(self.prefix_offsets) - 1
+        position = self._bisect(self._prefix, tops, target)
+        if not truncated and position < tops and self._prefix(position) == target:
+            ids = self.top_phrases[self.top_offsets[position]:self.top_offsets[position + 1]][:limit]
+        else:
+            keys = len(self.key_offsets) - 1
+            lo = self._bisect(self._key, keys, target)
+            # 0xff never occurs in UTF-8, so this bounds every key starting with the prefix
+            hi = self._bisect(self._key, keys, target + b'\xff')
+            ids = smallest_distinct(self.key_phrase[lo:hi])
+            if truncated:
+                ids = [phrase_id for phrase_id in ids.tolist()
+                       if any(suffix.startswith(prefix) for suffix in word_suffixes(self._text(phrase_id)))]
+            ids = ids[:limit]
+        return [self._phrase(int(phrase_id)) for phrase_id in ids]
+
+    def close(self):
+        self.map.close()
+
+
+class SuggestionHandler(BaseHTTPRequestHandler):
+    """GET /suggestions?q=...&limit=... answered from the shared index"""
+    index = None
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path not in ('/suggestions', '/api/scholarships/search/suggestions'):
+            self.send_error(404)
+            return
+        params = parse_qs(url.query)
+        try:
+            limit = int(params.get('limit', ['10'])[0])
+        except ValueError:
+            limit = 10
+        with self.lock:
+            index = self.index
+        body = json.dumps(index.suggest(params.get('q', [''])[0], limit=limit), ensure_ascii=False)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(path, port, reload_seconds=30):
+    """Serve suggestions, re-mapping the file whenever the pipeline replaces it"""
+    SuggestionHandler.index = TypeaheadIndex(path)
+    mtime = os.path.getmtime(path)
+
+    def watch():
+        nonlocal mtime
+        while True:
+            time.sleep(reload_seconds)
+            try:
+                current = os.path.getmtime(path)
+                if current != mtime:
+                    index = TypeaheadIndex(path)
+                    with SuggestionHandler.lock:
+                        SuggestionHandler.index = index
+                    mtime = current
+                    print(f"🔄 Reloaded {path}")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not reload {path}: {e}")
+
+    threading.Thread(target=watch, daemon=True).start()
+    server = ThreadingHTTPServer(('127.0.0.1', port), SuggestionHandler)
+    print(f"🚀 Serving suggestions on http://127.0.0.1:{port}/suggestions?q=...")
+    server.serve_forever()
+
+
+def parse_args():
+    """Parse command line options for the typeahead index"""
+    parser = argparse.ArgumentParser(description="Build and serve the search suggestion index")
+    parser.add_argument('query', nargs='?', help="Show suggestions for this text")
+    parser.add_argument('--data-dir', default='data', help="Directory holding processed_*.json files")
+    parser.add_argument('--input', action='append', help="Build from this export or processed file instead")
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help="Typeahead file to build or read")
+    parser.add_argument('--no-build', action='store_true', help="Use the existing file")
+    parser.add_argument('--serve', type=int, metavar='PORT', help="Serve suggestions over HTTP")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to build, query or serve the typeahead index"""
+    args = parse_args()
+    if not args.no_build:
+        start = time.perf_counter()
+        if args.input:
+            opportunities = [document for path in args.input for document in iter_export(path)]
+        else:
+            opportunities = collect_opportunities(args.data_dir)
+        build_index(opportunities, args.index)
+        print(f"✅ Built {args.index} from {len(opportunities):,} opportunities "
+              f"({os.path.getsize(args.index) / 1e6:.1f} MB) in {time.perf_counter() - start:.2f}s")
+
+    if args.query:
+        index = TypeaheadIndex(args.index)
+        start = time.perf_counter()
+        suggestions = index.suggest(args.query)
+        print(f"🔍 {len(suggestions)} suggestions in {(time.perf_counter() - start) * 1e6:.0f}µs")
+        print(json.dumps(suggestions, indent=2, ensure_ascii=False))
+
+    if args.serve:
+        serve(args.index, args.serve)
+
+
+if __name__ == "__main__":
+    main()
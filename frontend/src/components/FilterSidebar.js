@@ -1,6 +1,6 @@
 import React from 'react';
 
-const FilterSidebar = ({ filters, onFilterChange, onClearFilters }) => {
+const FilterSidebar = ({ filters, onFilterChange, onClearFilters, facetCounts = {} }) => {
   const districts = [
     // Houston Area
     'Houston ISD', 'Katy ISD', 'Cypress-Fairbanks ISD', 'Spring ISD', 'Klein ISD', 'Aldine ISD',
@@ -23,6 +23,11 @@ const FilterSidebar = ({ filters, onFilterChange, onClearFilters }) => {
   const subjects = ['Mathematics', 'Science', 'English/Language Arts', 'Social Studies', 'History', 'Art', 'Music', 'Physical Education', 'Foreign Language', 'Computer Science', 'Special Education', 'ESL/ELL', 'Reading', 'Writing'];
   const fundingTypes = ['Classroom Supplies', 'Technology Equipment', 'Books and Materials', 'Professional Development', 'Field Trips', 'Special Programs', 'Student Support', 'Classroom Furniture', 'STEM Materials'];
 
+  const countLabel = (facet, value) => {
+    const count = facetCounts[facet]?.[value];
+    return count === undefined ? '' : ` (${count})`;
+  };
+
   const handleCheckboxChange = (category, value) => {
     const currentValues = filters[category] || [];
     const newValues = currentValues.includes(value)
@@ -105,7 +110,7 @@ const FilterSidebar = ({ filters, onFilterChange, onClearFilters }) => {
                 checked={filters.gradeLevels?.includes(grade) || false}
                 onChange={() => handleCheckboxChange('gradeLevels', grade)}
               />
-              <label htmlFor={`grade-${grade}`}>{grade}</label>
+              <label htmlFor={`grade-${grade}`}>{grade}{countLabel('gradeLevels', grade)}</label>
             </div>
           ))}
         </div>
@@ -123,7 +128,7 @@ const FilterSidebar = ({ filters, onFilterChange, onClearFilters }) => {
                 checked={filters.subjects?.includes(subject) || false}
                 onChange={() => handleCheckboxChange('subjects', subject)}
               />
-              <label htmlFor={`subject-${subject}`}>{subject}</label>
+              <label htmlFor={`subject-${subject}`}>{subject}{countLabel('subjects', subject)}</label>
             </div>
           ))}
         </div>
@@ -141,7 +146,7 @@ const FilterSidebar = ({ filters, onFilterChange, onClearFilters }) => {
                 checked={filters.fundingTypes?.includes(type) || false}
                 onChange={() => handleCheckboxChange('fundingTypes', type)}
               />
-              <label htmlFor={`funding-${type}`}>{type}</label>
+              <label htmlFor={`funding-${type}`}>{type}{countLabel('fundingTypes', type)}</label>
             </div>
           ))}
         </div>
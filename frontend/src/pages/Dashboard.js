@@ -21,6 +21,7 @@ const Dashboard = () => {
   const [totalItems, setTotalItems] = useState(0);
   const [bookmarkedIds, setBookmarkedIds] = useState(new Set());
   const [showSuccessMessage, setShowSuccessMessage] = useState('');
+  const [facetCounts, setFacetCounts] = useState({});
   
   const [filters, setFilters] = useState({
     minAmount: '',
@@ -156,6 +157,21 @@ const Dashboard = () => {
     setCurrentPage(1);
   };
 
+  // Fetch filter counts once; the backend serves them from a single precomputed document
+  useEffect(() => {
+    if (!isAuthenticated) return;
+
+    axios.get('/api/scholarships/facets')
+      .then(response => {
+        const counts = {};
+        Object.entries(response.data.facets || {}).forEach(([facet, values]) => {
+          counts[facet] = Object.fromEntries(values.map(({ value, count }) => [value, count]));
+        });
+        setFacetCounts(counts);
+      })
+      .catch(err => console.error('Error fetching filter counts:', err));
+  }, [isAuthenticated]);
+
   // Load data on component mount and when dependencies change
   useEffect(() => {
     if (isAuthenticated) {
@@ -184,6 +200,7 @@ const Dashboard = () => {
             filters={filters}
             onFilterChange={handleFilterChange}
             onClearFilters={handleClearFilters}
+            facetCounts={facetCounts}
           />
 
           {/* Main Content */}
@@ -1,19 +1,24 @@
 import React, { useState, useRef, useEffect, useCallback } from 'react';
+import { useSearchParams } from 'react-router-dom';
 import { useAuth0 } from '@auth0/auth0-react';
 import axios from 'axios';
 import './EssayAssist.css';
 
 const EssayAssist = () => {
   const { user, isAuthenticated } = useAuth0();
+  const [searchParams] = useSearchParams();
   const [messages, setMessages] = useState([]);
   const [inputMessage, setInputMessage] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [isStreaming, setIsStreaming] = useState(false);
   const [resumeStatus, setResumeStatus] = useState({ hasResume: false });
   const [isUploading, setIsUploading] = useState(false);
   const fileInputRef = useRef(null);
   const messagesEndRef = useRef(null);
 
   const userId = user?.sub || user?.email || 'anonymous';
+  // Set when opened from a scholarship page, so answers can use that grant's requirements
+  const scholarshipId = searchParams.get('scholarshipId') || undefined;
 
   const checkResumeStatus = useCallback(async () => {
     try {
@@ -90,6 +95,49 @@ const EssayAssist = () => {
     }
   };
 
+  // Reads the NDJSON stream from /chat/stream: {token} lines, then {done, response}, or {error}
+  const streamReply = async (message, onToken) => {
+    const response = await fetch('/api/essay-assist/chat/stream', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ message, userId, scholarshipId })
+    });
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let reply = null;
+
+    const handleLine = (line) => {
+      if (!line.trim()) return;
+      const event = JSON.parse(line);
+      if (event.error) {
+        throw new Error(event.error);
+      }
+      if (event.token) {
+        onToken(event.token);
+      }
+      if (event.done) {
+        reply = event.response;
+      }
+    };
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+
+    if (reply === null) {
+      throw new Error(response.ok ? 'The response was cut off.' : 'Please try again later.');
+    }
+    return reply;
+  };
+
   const handleSendMessage = async () => {
     if (!inputMessage.trim() || isLoading) return;
 
@@ -99,36 +147,56 @@ const EssayAssist = () => {
       content: inputMessage,
       timestamp: new Date()
     };
+    const assistantId = Date.now() + 1;
+    const setAssistantContent = (update) => {
+      setMessages(prev => prev.map(message => (
+        message.id === assistantId ? { ...message, content: update(message.content) } : message
+      )));
+    };
 
     setMessages(prev => [...prev, userMessage]);
     setInputMessage('');
     setIsLoading(true);
 
     try {
-      const response = await axios.post('/api/essay-assist/chat', {
-        message: inputMessage,
-        userId: userId
+      let started = false;
+      const reply = await streamReply(inputMessage, (token) => {
+        if (!started) {
+          // The first token replaces the typing indicator with the growing answer
+          started = true;
+          setIsStreaming(true);
+          setMessages(prev => [...prev, {
+            id: assistantId,
+            type: 'assistant',
+            content: '',
+            timestamp: new Date()
+          }]);
+        }
+        setAssistantContent(content => content + token);
       });
 
-      const assistantMessage = {
-        id: Date.now() + 1,
-        type: 'assistant',
-        content: response.data.response,
-        timestamp: new Date()
-      };
-
-      setMessages(prev => [...prev, assistantMessage]);
+      if (started) {
+        setAssistantContent(() => reply);
+      } else {
+        setMessages(prev => [...prev, {
+          id: assistantId,
+          type: 'assistant',
+          content: reply,
+          timestamp: new Date()
+        }]);
+      }
     } catch (error) {
       console.error('Chat error:', error);
       const errorMessage = {
-        id: Date.now() + 1,
+        id: Date.now() + 2,
         type: 'assistant',
-        content: `Sorry, I'm having trouble responding right now. ${error.response?.data?.error || 'Please try again later.'}`,
+        content: `Sorry, I'm having trouble responding right now. ${error.message || 'Please try again later.'}`,
         timestamp: new Date()
       };
       setMessages(prev => [...prev, errorMessage]);
     } finally {
       setIsLoading(false);
+      setIsStreaming(false);
     }
   };
 
@@ -219,7 +287,7 @@ const EssayAssist = () => {
               </div>
             </div>
           ))}
-          {isLoading && (
+          {isLoading && !isStreaming && (
             <div className="message assistant">
               <div className="message-content">
                 <div className="typing-indicator">
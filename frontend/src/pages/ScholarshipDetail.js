@@ -408,6 +408,21 @@ const ScholarshipDetail = () => {
               </div>
             )}
 
+            {/* Essay Help */}
+            <div className="card">
+              <div className="card-header">
+                <h3 className="text-lg font-semibold">Application Essay</h3>
+              </div>
+              <div className="card-body">
+                <button
+                  onClick={() => navigate(`/essay-assist?scholarshipId=${id}`)}
+                  className="btn btn-outline w-full"
+                >
+                  Get Essay Help
+                </button>
+              </div>
+            </div>
+
             {/* Organization Website */}
             {scholarship.website && (
               <div className="card">